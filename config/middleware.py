@@ -0,0 +1,94 @@
+# config/middleware.py - SO'ROV O'LCHOVLARI (SQL soni, SQL vaqti, umumiy vaqt)
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('performance')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """View e'lon qilingan SQL so'rovlar chegarasidan oshdi (faqat test/dev da)"""
+
+
+def query_budget(max_queries):
+    """
+    View uchun SQL so'rovlar chegarasi
+
+    @login_required
+    @query_budget(5)
+    def my_view(request): ...
+
+    QUERY_BUDGET_ENFORCE yoqilgan bo'lsa (DEBUG / test) chegaradan oshgan
+    so'rov QueryBudgetExceeded bilan yiqiladi, aks holda faqat logga yoziladi.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryMetrics:
+    """connection.execute_wrapper - har bir SQL so'rov soni va vaqti"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryTimingMiddleware:
+    """
+    Har bir so'rov uchun SQL soni, SQL vaqti va umumiy vaqt
+
+    Natija Server-Timing sarlavhasida (brauzer DevTools -> Timing) va
+    'performance' loggerida. StreamingHttpResponse tanasidagi so'rovlar
+    (eksportlar) javob qaytgandan keyin bajariladi - ular hisobga kirmaydi.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = QueryMetrics()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        sql_ms = metrics.duration * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else '-'
+        budget = getattr(request, '_query_budget', None)
+
+        response['Server-Timing'] = (
+            f'db;dur={sql_ms:.1f};desc="{metrics.count} queries", app;dur={total_ms:.1f}'
+        )
+        logger.info(
+            'view=%s method=%s path=%s status=%s queries=%s sql_ms=%.1f total_ms=%.1f budget=%s',
+            view_name, request.method, request.path, response.status_code,
+            metrics.count, sql_ms, total_ms, budget if budget is not None else '-',
+        )
+
+        if budget is not None and metrics.count > budget:
+            message = f"{view_name}: {metrics.count} ta SQL so'rov, chegara {budget}"
+            if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, 'query_budget', None)
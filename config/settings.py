@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from decouple import config  # ⚡ .env fayldan secretlarni olish uchun (pip install python-decouple)
 
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.QueryTimingMiddleware',  # SQL soni/vaqti -> Server-Timing + log
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -102,6 +104,8 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Hisobot vazifalari fayllari (ReportJob) - MEDIA_ROOT dan tashqarida, nginx bermaydi
+PRIVATE_MEDIA_ROOT = config('PRIVATE_MEDIA_ROOT', default=str(BASE_DIR / 'private_media'))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -119,6 +123,26 @@ CACHES = {
     }
 }
 
+# ⚡ So'rov o'lchovlari (config/middleware.py)
+TESTING = 'test' in sys.argv[1:2]
+# @query_budget(n) chegarasidan oshgan so'rov xato bilan yiqiladi (DEBUG va testlarda)
+QUERY_BUDGET_ENFORCE = config('QUERY_BUDGET_ENFORCE', default=DEBUG or TESTING, cast=bool)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'performance': {
+            'handlers': ['console'],
+            'level': config('PERFORMANCE_LOG_LEVEL', default='WARNING' if TESTING else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # 🔒 Security (production uchun muhim)
 SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=True, cast=bool)
 SECURE_HSTS_SECONDS = 31536000  # 1 yil
@@ -3,7 +3,7 @@ from django.core.exceptions import ValidationError
 from decimal import Decimal
 from .models import (
     Phone, Accessory, ExternalSeller, DailySeller,
-    AccessoryPurchaseHistory, Supplier, SupplierPayment
+    AccessoryPurchaseHistory, Supplier, SupplierPayment, get_current_date
 )
 from shops.models import Shop
 
@@ -704,8 +704,7 @@ class AccessoryForm(forms.ModelForm):
         elif not existing_code and shop:
             if code and Accessory.objects.filter(shop=shop, code=code).exists():
                 raise ValidationError({'code': f"Bu kod ({code}) allaqachon mavjud."})
-            if not code:
-                cleaned_data['code'] = Accessory.get_next_code(shop)
+            # Kod bo'sh bo'lsa Accessory.save() ketma-ketlikdan beradi
 
         if purchase_price and sale_price and sale_price < purchase_price:
             raise ValidationError({'sale_price': "Sotish narxi tannarxdan kam bo'lmasligi kerak"})
@@ -841,4 +840,43 @@ class AccessoryAddQuantityForm(forms.Form):
             history.save()
             accessory.save()
 
-        return accessory
\ No newline at end of file
+        return accessory
+
+
+class PhoneImportForm(forms.Form):
+    """Taminotchi partiyasi - CSV/XLSX fayldan telefonlar"""
+
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.xlsx,.csv'}),
+        label="Fayl (.xlsx yoki .csv)",
+        help_text="Ustunlar: imei, model, xotira, narx (ixtiyoriy: imei_xarajat, ta'mirlash, holati, "
+                  "sotish_narxi, to'langan, izoh)"
+    )
+    shop = forms.ModelChoiceField(
+        queryset=Shop.objects.all(),
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label="Do'kon"
+    )
+    supplier = forms.ModelChoiceField(
+        queryset=Supplier.objects.order_by('name'),
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label="Taminotchi"
+    )
+    created_at = forms.DateField(
+        initial=get_current_date,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label="Qabul sanasi"
+    )
+    is_debt = forms.BooleanField(
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label="Qarzga olish",
+        help_text="\"to'langan\" ustuni bo'lsa, qator bo'yicha summa ishlatiladi"
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(('.xlsx', '.csv')):
+            raise ValidationError("Faqat .xlsx yoki .csv fayl qabul qilinadi")
+        return file
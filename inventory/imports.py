@@ -0,0 +1,234 @@
+# inventory/imports.py - TELEFONLARNI FAYLDAN QABUL QILISH (CSV/XLSX)
+
+import codecs
+import csv
+import io
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import Phone, PhoneModel, MemorySize, Supplier, reverse_imei
+
+# Ustun nomi (kichik harfda) -> maydon. Birinchi qator - sarlavha
+COLUMN_ALIASES = {
+    'imei': 'imei',
+    'model': 'phone_model', 'modeli': 'phone_model', 'phone_model': 'phone_model',
+    'xotira': 'memory_size', 'memory': 'memory_size', 'memory_size': 'memory_size',
+    'narx': 'purchase_price', 'narxi': 'purchase_price', 'purchase_price': 'purchase_price',
+    'imei_xarajat': 'imei_cost', 'imei_cost': 'imei_cost',
+    "ta'mirlash": 'repair_cost', 'repair_cost': 'repair_cost',
+    'holati': 'condition_percentage', 'condition': 'condition_percentage',
+    'sotish_narxi': 'sale_price', 'sale_price': 'sale_price',
+    "to'langan": 'paid_amount', 'paid_amount': 'paid_amount',
+    'izoh': 'note', 'note': 'note',
+}
+REQUIRED_COLUMNS = ('imei', 'phone_model', 'memory_size', 'purchase_price')
+
+
+class PhoneImportError(Exception):
+    """Fayl umuman o'qib bo'lmaydi (qator xatolari bunga kirmaydi)"""
+
+
+# ============= FAYLNI O'QISH =============
+
+def _read_xlsx(file):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise PhoneImportError(f"XLSX faylni o'qib bo'lmadi: {e}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _csv_encoding(raw):
+    """UTF-8 (BOM bilan ham) yoki Excel ning kirill kodirovkasi - cp1251"""
+    try:
+        # final=False - namuna oxirida kesilgan ko'p baytli belgi xato emas
+        codecs.getincrementaldecoder('utf-8-sig')().decode(raw, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp1251'
+
+
+def _read_csv(file):
+    encoding = _csv_encoding(file.read(4096))
+    file.seek(0)
+    text = io.TextIOWrapper(file, encoding=encoding, newline='')
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+    except UnicodeDecodeError as e:
+        text.detach()
+        raise PhoneImportError(f"CSV faylni o'qib bo'lmadi: {e}")
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        yield from csv.reader(text, dialect)
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise PhoneImportError(f"CSV faylni o'qib bo'lmadi: {e}")
+    finally:
+        text.detach()
+
+
+def read_rows(file, filename):
+    """
+    (qator_raqami, {maydon: qiymat}) lar - fayl qatorma-qator o'qiladi (XLSX read-only)
+
+    file - binar fayl obyekti. Sarlavha darhol tekshiriladi (PhoneImportError)
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        rows = _read_xlsx(file)
+    elif extension == '.csv':
+        rows = _read_csv(file)
+    else:
+        raise PhoneImportError("Faqat .xlsx yoki .csv fayl qabul qilinadi")
+
+    header = next(rows, None)
+    if not header:
+        raise PhoneImportError("Fayl bo'sh")
+    fields = [COLUMN_ALIASES.get(str(cell or '').strip().lower()) for cell in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in fields]
+    if missing:
+        raise PhoneImportError(f"Ustunlar topilmadi: {', '.join(missing)}")
+
+    return _data_rows(rows, fields)
+
+
+def _data_rows(rows, fields):
+    for number, row in enumerate(rows, start=2):
+        values = {field: value for field, value in zip(fields, row) if field}
+        if any(value not in (None, '') for value in values.values()):
+            yield number, values
+
+
+# ============= QATORNI TEKSHIRISH =============
+
+def _text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() if value is not None else ''
+
+
+def _decimal(value, label, required=False):
+    text = _text(value).replace(' ', '').replace(',', '.')
+    if not text:
+        if required:
+            raise ValueError(f"{label} kiritilishi shart")
+        return Decimal('0')
+    try:
+        number = Decimal(text).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"{label} noto'g'ri: {text}")
+    if number < 0:
+        raise ValueError(f"{label} manfiy bo'lishi mumkin emas")
+    return number
+
+
+def _build_phone(values, models_by_name, sizes_by_name, defaults, is_debt):
+    """Qatordan Phone (saqlanmagan) - tannarx va qarz xotirada hisoblanadi"""
+    imei = ''.join(filter(str.isdigit, _text(values.get('imei'))))
+    if len(imei) != 15:
+        raise ValueError("IMEI 15 ta raqamdan iborat bo'lishi kerak")
+
+    model_name = _text(values.get('phone_model'))
+    phone_model = models_by_name.get(model_name.lower())
+    if phone_model is None:
+        raise ValueError(f"Model topilmadi: {model_name}")
+
+    size_name = _text(values.get('memory_size'))
+    memory_size = sizes_by_name.get(size_name.lower().replace(' ', ''))
+    if memory_size is None:
+        raise ValueError(f"Xotira hajmi topilmadi: {size_name}")
+
+    condition = _text(values.get('condition_percentage')).rstrip('%') or '100'
+    if not condition.isdigit() or not 1 <= int(condition) <= 100:
+        raise ValueError(f"Holati 1-100 oralig'ida bo'lishi kerak: {condition}")
+
+    purchase_price = _decimal(values.get('purchase_price'), "Narx", required=True)
+    if purchase_price <= 0:
+        raise ValueError("Narx 0 dan katta bo'lishi kerak")
+    sale_price = _decimal(values.get('sale_price'), "Sotish narxi")
+
+    phone = Phone(
+        imei=imei,
+        imei_reversed=reverse_imei(imei),
+        phone_model=phone_model,
+        memory_size=memory_size,
+        condition_percentage=int(condition),
+        purchase_price=purchase_price,
+        imei_cost=_decimal(values.get('imei_cost'), "IMEI xarajati"),
+        repair_cost=_decimal(values.get('repair_cost'), "Ta'mirlash xarajati"),
+        sale_price=sale_price or None,
+        note=_text(values.get('note')) or None,
+        status='shop',
+        source_type='supplier',
+        **defaults,
+    )
+    phone.cost_price = phone.purchase_price + phone.imei_cost + phone.repair_cost
+
+    # Qarz: fayl bo'yicha (is_debt) yoki qatordagi to'langan summa
+    if values.get('paid_amount') not in (None, ''):
+        phone.paid_amount = _decimal(values['paid_amount'], "To'langan summa")
+        if phone.paid_amount > phone.cost_price:
+            raise ValueError(f"To'langan summa tannarxdan ({phone.cost_price}) katta")
+    else:
+        phone.paid_amount = Decimal('0') if is_debt else phone.cost_price
+    phone.refresh_payment_state()
+    return phone
+
+
+# ============= IMPORT =============
+
+def import_phones(rows, shop, supplier, user, created_at, is_debt=True, batch_size=500, dry_run=False):
+    """
+    Taminotchi partiyasini qabul qilish
+
+    Mavjud IMEI lar bitta imei__in so'rovi bilan tekshiriladi, telefonlar bulk_create bilan
+    qo'shiladi (Phone.save va signallarsiz), taminotchi qarzi fayl uchun bitta UPDATE.
+    Xato qatorlar o'tkazib yuboriladi va hisobotda qaytadi.
+
+    Natija: {'created', 'errors': [(qator, xabar)], 'total_cost', 'total_debt'}
+    """
+    models_by_name = {model.model_name.lower(): model for model in PhoneModel.objects.all()}
+    sizes_by_name = {size.size.lower().replace(' ', ''): size for size in MemorySize.objects.all()}
+    defaults = dict(shop=shop, supplier=supplier, created_by=user, created_at=created_at)
+
+    errors = []
+    phones = {}  # imei -> (qator, Phone)
+    for number, values in rows:
+        try:
+            phone = _build_phone(values, models_by_name, sizes_by_name, defaults, is_debt)
+        except ValueError as e:
+            errors.append((number, str(e)))
+            continue
+        if phone.imei in phones:
+            errors.append((number, f"IMEI {phone.imei} faylda takrorlangan ({phones[phone.imei][0]}-qator)"))
+            continue
+        phones[phone.imei] = (number, phone)
+
+    existing = set(Phone.objects.filter(imei__in=list(phones)).values_list('imei', flat=True))
+    for imei in existing:
+        errors.append((phones.pop(imei)[0], f"IMEI {imei} allaqachon mavjud"))
+    errors.sort()
+
+    new_phones = [phone for _, phone in phones.values()]
+    total_debt = sum((phone.supplier_debt_contribution()[1] for phone in new_phones), Decimal('0'))
+    if new_phones and not dry_run:
+        with transaction.atomic():
+            Phone.objects.bulk_create(new_phones, batch_size=batch_size)
+            Supplier.add_deltas(supplier.id, total_debt=total_debt)
+
+    return {
+        'created': len(new_phones),
+        'errors': errors,
+        'total_cost': sum((phone.cost_price for phone in new_phones), Decimal('0')),
+        'total_debt': total_debt,
+    }
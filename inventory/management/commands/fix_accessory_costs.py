@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum, F, DecimalField, OuterRef, Subquery
+from inventory.models import Accessory, AccessoryPurchaseHistory
+
+MONEY_FIELD = DecimalField(max_digits=15, decimal_places=2)
+
+
+class Command(BaseCommand):
+    help = "Aksessuarlar o'rtacha tannarxini butun kirim tarixidan qayta hisoblash va farqni ko'rsatish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Faqat tekshirish: tannarx va jami kirim (soni, summasi) tarixga mosmi (hech narsa yozilmaydi)"
+        )
+        parser.add_argument('--shop', type=int, help="Faqat shu do'kon (ID)")
+
+    def handle(self, *args, **options):
+        history = AccessoryPurchaseHistory.objects.filter(accessory=OuterRef('pk')).order_by().values('accessory')
+        cost = Sum(F('purchase_price') * F('quantity'), output_field=MONEY_FIELD)
+        accessories = Accessory.objects.select_related('shop').annotate(
+            history_quantity=Subquery(history.annotate(total=Sum('quantity')).values('total')),
+            history_cost=Subquery(history.annotate(total=cost).values('total'), output_field=MONEY_FIELD),
+        ).order_by('shop_id', 'code')
+        if options['shop']:
+            accessories = accessories.filter(shop_id=options['shop'])
+
+        drifted = 0
+        total_drift = Decimal('0.00')
+        for accessory in accessories.iterator(chunk_size=500):
+            quantity = accessory.history_quantity or 0
+            cost = Decimal(accessory.history_cost or 0).quantize(Decimal('0.01'))
+            expected = Accessory.average_price(cost, quantity)
+            if (accessory.purchase_price, accessory.purchased_quantity, accessory.purchased_cost) == \
+                    (expected, quantity, cost):
+                continue
+
+            drifted += 1
+            drift = accessory.purchase_price - expected
+            total_drift += abs(drift) * accessory.quantity
+            self.stdout.write(self.style.WARNING(
+                f"{accessory.shop.name} / {accessory.code} {accessory.name}: "
+                f"tannarx={accessory.purchase_price} (tarix bo'yicha {expected}, farq {drift:+}), "
+                f"jami kirim={accessory.purchased_quantity} ta / {accessory.purchased_cost} so'm "
+                f"(tarix bo'yicha {quantity} ta / {cost} so'm)"
+            ))
+
+            if not options['check']:
+                accessory.purchase_price = expected
+                accessory.purchased_quantity = quantity
+                accessory.purchased_cost = cost
+                # save() - hisobot foydasi (ShopDailySummary) ham signal orqali suriladi
+                accessory.save(update_fields=['purchase_price', 'purchased_quantity', 'purchased_cost'])
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("✓ Barcha aksessuarlar tannarxi to'g'ri"))
+        elif options['check']:
+            self.stdout.write(self.style.ERROR(
+                f"✗ {drifted} ta aksessuarda farq bor (qoldiq bo'yicha {total_drift} so'm) - "
+                f"tuzatish uchun --check siz ishga tushiring"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ {drifted} ta aksessuar tuzatildi (qoldiq bo'yicha farq {total_drift} so'm)"
+            ))
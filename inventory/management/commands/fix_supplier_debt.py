@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Sum, DecimalField, Q
 from inventory.models import Phone, Supplier
 from decimal import Decimal
 
@@ -6,7 +7,16 @@ from decimal import Decimal
 class Command(BaseCommand):
     help = 'Taminotchilar qarzini tuzatish'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Faqat tekshirish: total_debt telefonlar qarzi yig'indisiga tengmi (hech narsa yozilmaydi)"
+        )
+
     def handle(self, *args, **options):
+        if options['check']:
+            return self.check_debts()
+
         # 1. Noto'g'ri telefonlarni tuzatish
         broken_phones = Phone.objects.filter(
             source_type='supplier',
@@ -32,4 +42,28 @@ class Command(BaseCommand):
                 f"To'langan=${result['total_paid']}"
             )
 
-        self.stdout.write(self.style.SUCCESS('✓ Barcha taminotchilar yangilandi!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('✓ Barcha taminotchilar yangilandi!'))
+
+    def check_debts(self):
+        """F() bilan yuritilgan total_debt ni bitta guruhlangan so'rov bilan solishtirish"""
+        suppliers = Supplier.objects.annotate(
+            phones_debt=Sum('phone__debt_balance', filter=Q(
+                phone__source_type='supplier', phone__payment_status__in=['debt', 'partial']
+            ), output_field=DecimalField(max_digits=15, decimal_places=2))
+        ).order_by('name')
+
+        mismatched = 0
+        for supplier in suppliers:
+            expected = supplier.phones_debt or Decimal('0.00')
+            if supplier.total_debt != expected:
+                mismatched += 1
+                self.stdout.write(self.style.WARNING(
+                    f"{supplier.name}: total_debt=${supplier.total_debt}, telefonlar bo'yicha=${expected}"
+                ))
+
+        if mismatched:
+            self.stdout.write(self.style.ERROR(
+                f"✗ {mismatched} ta taminotchida farq bor - tuzatish uchun --check siz ishga tushiring"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ Barcha taminotchilar qarzi to\'g\'ri'))
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from inventory.imports import PhoneImportError, import_phones, read_rows
+from inventory.models import Supplier, get_current_date
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = (
+        "Taminotchi partiyasini CSV/XLSX fayldan qabul qilish. Ustunlar: imei, model, xotira, narx "
+        "(ixtiyoriy: imei_xarajat, ta'mirlash, holati, sotish_narxi, to'langan, izoh)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help=".xlsx yoki .csv fayl")
+        parser.add_argument('--shop', type=int, required=True, help="Do'kon ID")
+        parser.add_argument('--supplier', type=int, required=True, help="Taminotchi ID")
+        parser.add_argument('--user', help="Qo'shgan foydalanuvchi (username)")
+        parser.add_argument(
+            '--date', type=date.fromisoformat, default=None, help="Qabul sanasi (YYYY-MM-DD), standart - bugun"
+        )
+        parser.add_argument('--paid', action='store_true', help="To'langan deb qabul qilish (standart - qarzga)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Faqat tekshirish - hech narsa yozilmaydi")
+
+    def handle(self, *args, **options):
+        try:
+            shop = Shop.objects.get(id=options['shop'])
+            supplier = Supplier.objects.get(id=options['supplier'])
+            user = User.objects.get(username=options['user']) if options['user'] else None
+        except (Shop.DoesNotExist, Supplier.DoesNotExist, User.DoesNotExist) as e:
+            raise CommandError(str(e))
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size musbat bo'lishi kerak")
+
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_phones(
+                    read_rows(file, options['path']), shop, supplier, user,
+                    created_at=options['date'] or get_current_date(), is_debt=not options['paid'],
+                    batch_size=options['batch_size'], dry_run=options['dry_run'],
+                )
+        except (OSError, PhoneImportError) as e:
+            raise CommandError(str(e))
+
+        for number, message in result['errors']:
+            self.stdout.write(self.style.WARNING(f"{number}-qator: {message}"))
+
+        action = "qabul qilinadi (dry-run)" if options['dry_run'] else "qabul qilindi"
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {result['created']} ta telefon {action}: tannarx ${result['total_cost']}, "
+            f"qarz ${result['total_debt']}; xato qatorlar: {len(result['errors'])}"
+        ))
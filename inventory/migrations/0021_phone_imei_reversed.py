@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:28
+
+from django.db import migrations, models
+
+
+def fill_imei_reversed(apps, schema_editor):
+    """Mavjud telefonlar uchun teskari IMEI"""
+    Phone = apps.get_model('inventory', 'Phone')
+    phones = []
+    for phone in Phone.objects.exclude(imei='').only('id', 'imei').iterator(chunk_size=2000):
+        phone.imei_reversed = phone.imei[::-1]
+        phones.append(phone)
+    Phone.objects.bulk_update(phones, ['imei_reversed'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0020_supplierpayment_shop_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phone',
+            name='imei_reversed',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='phone',
+            index=models.Index(fields=['imei_reversed'], name='phone_imei_reversed_idx'),
+        ),
+        migrations.RunPython(fill_imei_reversed, migrations.RunPython.noop),
+    ]
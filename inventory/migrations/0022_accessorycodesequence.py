@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_phone_imei_reversed'),
+        ('shops', '0007_alter_customer_phone_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessoryCodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.PositiveBigIntegerField(default=0, verbose_name='Oxirgi kod')),
+                ('shop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='accessory_code_sequence', to='shops.shop', verbose_name="Do'kon")),
+            ],
+            options={
+                'verbose_name': 'Aksessuar kodi ketma-ketligi',
+                'verbose_name_plural': 'Aksessuar kodlari ketma-ketligi',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:45
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_purchased_quantity(apps, schema_editor):
+    """Jami kirim soni - mavjud tarixdan bitta guruhlangan so'rov bilan"""
+    Accessory = apps.get_model('inventory', 'Accessory')
+    AccessoryPurchaseHistory = apps.get_model('inventory', 'AccessoryPurchaseHistory')
+    totals = dict(
+        AccessoryPurchaseHistory.objects.order_by().values('accessory').annotate(total=Sum('quantity'))
+        .values_list('accessory', 'total')
+    )
+    accessories = list(Accessory.objects.filter(pk__in=totals).only('id'))
+    for accessory in accessories:
+        accessory.purchased_quantity = totals[accessory.pk]
+    Accessory.objects.bulk_update(accessories, ['purchased_quantity'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_accessorycodesequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accessory',
+            name='purchased_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Jami kirim soni'),
+        ),
+        migrations.RunPython(fill_purchased_quantity, migrations.RunPython.noop),
+    ]
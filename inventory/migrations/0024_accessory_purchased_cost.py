@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 23:02
+
+from django.db import migrations, models
+from django.db.models import Sum, F
+
+
+def fill_purchased_cost(apps, schema_editor):
+    """Jami kirim summasi - mavjud tarixdan bitta guruhlangan so'rov bilan"""
+    Accessory = apps.get_model('inventory', 'Accessory')
+    AccessoryPurchaseHistory = apps.get_model('inventory', 'AccessoryPurchaseHistory')
+    cost = Sum(F('purchase_price') * F('quantity'), output_field=models.DecimalField(max_digits=15, decimal_places=2))
+    totals = dict(
+        AccessoryPurchaseHistory.objects.order_by().values('accessory').annotate(total=cost)
+        .values_list('accessory', 'total')
+    )
+    accessories = list(Accessory.objects.filter(pk__in=totals).only('id'))
+    for accessory in accessories:
+        accessory.purchased_cost = totals[accessory.pk]
+    Accessory.objects.bulk_update(accessories, ['purchased_cost'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0023_accessory_purchased_quantity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accessory',
+            name='purchased_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Jami kirim summasi'),
+        ),
+        migrations.RunPython(fill_purchased_cost, migrations.RunPython.noop),
+    ]
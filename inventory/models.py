@@ -1,8 +1,9 @@
 from decimal import Decimal
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, RegexValidator, MaxValueValidator
-from django.db.models import Sum, F, Q, DecimalField
+from django.db.models import Sum, Count, F, Q, Max, DecimalField, ExpressionWrapper, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
 from django.contrib.auth.models import User
 from shops.models import Shop
@@ -13,6 +14,62 @@ def get_current_date():
     return timezone.now().date()
 
 
+def _count_subquery(queryset):
+    """Korrelyatsiyalangan COUNT - JOIN qatorlarni ko'paytirmaydi"""
+    return Coalesce(Subquery(
+        queryset.order_by().values('supplier').annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def reverse_imei(imei):
+    """IMEI teskari yozuvi - oxirgi raqamlar bo'yicha qidiruv indeksdan foydalanadi"""
+    return imei[::-1] if imei else imei
+
+
+def imei_q(query, field='imei'):
+    """
+    IMEI qidiruv sharti (field: 'imei', 'phone__imei', 'old_phone_imei' ...)
+
+    15 raqam -> field= (indeks), kamroq raqam -> IMEI oxiri: {field}_reversed oralig'i
+    (startswith ning indeksli ko'rinishi - SQLite LIKE oddiy indeksni ishlatmaydi),
+    raqam bo'lmasa -> icontains
+    """
+    query = query.strip()
+    if query.isdigit() and len(query) >= 15:
+        return Q(**{field: query})
+    if query.isdigit():
+        suffix = reverse_imei(query)
+        # ':' - ASCII da '9' dan keyingi belgi: [suffix, suffix + ':') = suffix bilan boshlanadiganlar
+        return Q(**{f'{field}_reversed__gte': suffix, f'{field}_reversed__lt': suffix + ':'})
+    return Q(**{f'{field}__icontains': query})
+
+
+class SupplierQuerySet(models.QuerySet):
+    """Taminotchilar - ro'yxat statistikasi SQL da"""
+
+    MONEY_FIELD = DecimalField(max_digits=15, decimal_places=2)
+
+    def with_stats(self):
+        """
+        balance_value (= Supplier.balance), phone_count, debt_phone_count,
+        accessory_count, payments_count, payments_total - har biri alohida subquery
+        """
+        payments = SupplierPayment.objects.filter(supplier=OuterRef('pk')).order_by().values('supplier')
+        return self.annotate(
+            balance_value=ExpressionWrapper(F('initial_debt') + F('total_debt'), output_field=self.MONEY_FIELD),
+            phone_count=_count_subquery(Phone.objects.filter(supplier=OuterRef('pk'))),
+            debt_phone_count=_count_subquery(Phone.objects.filter(
+                supplier=OuterRef('pk'), source_type='supplier', payment_status__in=['debt', 'partial']
+            )),
+            accessory_count=_count_subquery(Accessory.objects.filter(supplier=OuterRef('pk'))),
+            payments_count=_count_subquery(SupplierPayment.objects.filter(supplier=OuterRef('pk'))),
+            payments_total=Coalesce(
+                Subquery(payments.annotate(total=Sum('amount')).values('total'), output_field=self.MONEY_FIELD),
+                Value(Decimal('0')), output_field=self.MONEY_FIELD
+            ),
+        )
+
+
 class Supplier(models.Model):
     """Taminotchi - telefon/aksessuar yetkazib beruvchi tashkilot"""
     name = models.CharField(max_length=100, verbose_name="Taminotchi nomi")
@@ -45,6 +102,8 @@ class Supplier(models.Model):
         help_text="Taminotchiga to'langan umumiy summa"
     )
 
+    objects = SupplierQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Taminotchi"
         verbose_name_plural = "Taminotchilar"
@@ -58,21 +117,30 @@ class Supplier(models.Model):
         """Qoldiq qarz = Boshlang'ich qarz + Telefonlar qarzi"""
         return self.initial_debt + self.total_debt
 
-    def update_total_debt(self):
-        """Taminotchining telefonlar qarzini hisoblash"""
-        total = self.phone_set.filter(
-            source_type='supplier',
-            payment_status__in=['debt', 'partial']
-        ).aggregate(
-            total=Sum('debt_balance', output_field=DecimalField(max_digits=15, decimal_places=2))
-        )['total'] or Decimal('0.00')
+    @classmethod
+    def add_deltas(cls, supplier_id, **deltas):
+        """
+        Qarz maydonlarini F() bilan atomar o'zgartirish - qayta yig'ish (aggregate) yo'q
+
+        Supplier.add_deltas(supplier_id, total_debt=Decimal('-50'), total_paid=Decimal('50'))
+        """
+        deltas = {field: value for field, value in deltas.items() if value}
+        if supplier_id and deltas:
+            cls.objects.filter(pk=supplier_id).update(**{
+                field: F(field) + value for field, value in deltas.items()
+            })
 
-        self.total_debt = total
-        self.save(update_fields=['total_debt'])
-        return total
+    def apply_deltas(self, **deltas):
+        """add_deltas + shu obyektni yangilash (xabarlarda qoldiq ko'rsatish uchun)"""
+        self.add_deltas(self.pk, **deltas)
+        self.refresh_from_db(fields=['initial_debt', 'total_debt', 'total_paid'])
 
     def recalculate_debt_and_payments(self):
-        """Taminotchining qarz va to'lovlarini qayta hisoblash"""
+        """
+        Taminotchining qarz va to'lovlarini qayta hisoblash - faqat tekshirish va tuzatish uchun
+
+        Odatda total_debt / total_paid Phone.save va to'lovlarda add_deltas bilan yuritiladi.
+        """
         # Telefonlar qarzi
         total_debt = self.phone_set.filter(
             source_type='supplier',
@@ -213,6 +281,12 @@ class Accessory(models.Model):
         verbose_name="Soni",
         editable=False
     )
+    # ✅ Jami kirim soni (tarix yig'indisi) - o'rtacha tannarx shu vazn bilan yangilanadi
+    purchased_quantity = models.PositiveIntegerField(default=0, verbose_name="Jami kirim soni", editable=False)
+    # ✅ Jami kirim summasi (soni*narx yig'indisi) - o'rtacha = summa / soni, to'liq hisob bilan aynan bir xil
+    purchased_cost = models.DecimalField(
+        max_digits=15, decimal_places=2, default=0, verbose_name="Jami kirim summasi", editable=False
+    )
     supplier = models.ForeignKey('Supplier', on_delete=models.SET_NULL, null=True, blank=True,
                                  verbose_name="Taminotchi")
     created_by = models.ForeignKey(
@@ -233,35 +307,64 @@ class Accessory(models.Model):
         ]
 
     def calculate_totals(self):
-        """Faqat o'rtacha narxni hisoblash"""
+        """To'liq qayta hisoblash (butun tarix bo'yicha) - fix_accessory_costs uchun"""
         if not self.pk:
             return 0, Decimal('0.00')
 
-        history = self.purchase_history.all()
-        total_quantity = history.aggregate(total=Sum('quantity'))['total'] or 0
+        totals = self.purchase_history.aggregate(
+            total_quantity=Sum('quantity'),
+            total_cost=Sum(
+                F('purchase_price') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2)
+            ),
+        )
+        total_quantity = totals['total_quantity'] or 0
+        return total_quantity, self.average_price(totals['total_cost'] or Decimal('0.00'), total_quantity)
+
+    @staticmethod
+    def average_price(total_cost, total_quantity):
+        """O'rtacha tannarx: jami kirim summasi / jami kirim soni"""
+        if total_quantity <= 0:
+            return Decimal('0.00')
+        return (Decimal(total_cost) / total_quantity).quantize(Decimal('0.01'))
 
-        if total_quantity > 0:
-            total_cost = history.aggregate(
-                total=Sum(F('purchase_price') * F('quantity'),
-                          output_field=DecimalField(max_digits=15, decimal_places=2))
-            )['total'] or Decimal('0.00')
-            average_price = (total_cost / total_quantity).quantize(Decimal('0.01'))
-        else:
-            average_price = Decimal('0.00')
-
-        return total_quantity, average_price
+    @classmethod
+    def add_purchase(cls, accessory_id, quantity, price):
+        """
+        Kirim: soni, jami kirim (soni va summa) va o'rtacha tannarx - tarixni qayta yig'ishsiz
+
+        Qator qulflanadi, yangi qiymatlar bitta UPDATE bilan yoziladi.
+        """
+        with transaction.atomic():
+            old_quantity, old_cost = cls.objects.select_for_update().filter(pk=accessory_id).values_list(
+                'purchased_quantity', 'purchased_cost'
+            ).get()
+            total_quantity = old_quantity + quantity
+            total_cost = old_cost + quantity * price
+            cls.objects.filter(pk=accessory_id).update(
+                quantity=F('quantity') + quantity,
+                purchased_quantity=total_quantity,
+                purchased_cost=total_cost,
+                purchase_price=cls.average_price(total_cost, total_quantity),
+            )
 
     def save(self, *args, **kwargs):
-        skip_quantity_update = kwargs.pop('skip_quantity_update', False)
+        is_new = not self.pk
+
+        # ✅ Kod kiritilmagan bo'lsa - do'kon ketma-ketligidan (poygasiz)
+        if is_new and not self.code and self.shop_id:
+            self.code = self.get_next_code(self.shop)
 
         if self.code and self.code.isdigit() and len(self.code) < 4:
             self.code = self.code.zfill(4)
 
-        if self.pk and not skip_quantity_update:
-            _, self.purchase_price = self.calculate_totals()
-
         super().save(*args, **kwargs)
 
+        # Qo'lda kiritilgan katta kod - ketma-ketlik undan keyin davom etadi
+        if is_new and self.code and self.code.isdigit():
+            AccessoryCodeSequence.objects.filter(
+                shop_id=self.shop_id, value__lt=int(self.code)
+            ).update(value=int(self.code))
+
     def __str__(self):
         return f"{self.name} ({self.code}) - {self.shop.name}"
 
@@ -274,13 +377,19 @@ class Accessory(models.Model):
             if existing.exists():
                 raise ValidationError(f"Bu kod ({self.code}) allaqachon '{self.shop.name}' do'konida mavjud.")
 
+    @staticmethod
+    def format_code(number):
+        return str(number).zfill(4)
+
     @classmethod
     def get_next_code(cls, shop):
-        last_accessory = cls.objects.filter(shop=shop).order_by('-code').first()
-        if last_accessory and last_accessory.code.isdigit():
-            next_code = int(last_accessory.code) + 1
-            return str(next_code).zfill(4)
-        return "0001"
+        """Keyingi bo'sh kod - AccessoryCodeSequence orqali (kodlar bo'yicha saralashsiz)"""
+        return cls.format_code(AccessoryCodeSequence.reserve(shop)[0])
+
+    @classmethod
+    def reserve_codes(cls, shop, count):
+        """Partiya qabul qilish uchun count ta ketma-ket kod"""
+        return [cls.format_code(number) for number in AccessoryCodeSequence.reserve(shop, count)]
 
     @classmethod
     def find_by_code(cls, shop, code):
@@ -291,6 +400,45 @@ class Accessory(models.Model):
             return None
 
 
+class AccessoryCodeSequence(models.Model):
+    """Do'kon bo'yicha aksessuar kodi hisoblagichi - oxirgi berilgan raqam"""
+    shop = models.OneToOneField(Shop, on_delete=models.CASCADE, related_name="accessory_code_sequence",
+                                verbose_name="Do'kon")
+    value = models.PositiveBigIntegerField(default=0, verbose_name="Oxirgi kod")
+
+    class Meta:
+        verbose_name = "Aksessuar kodi ketma-ketligi"
+        verbose_name_plural = "Aksessuar kodlari ketma-ketligi"
+
+    def __str__(self):
+        return f"{self.shop.name}: {self.value}"
+
+    @staticmethod
+    def _max_existing_code(shop):
+        """Ketma-ketlik birinchi marta yaratilganda - mavjud eng katta raqamli kod"""
+        return Accessory.objects.filter(shop=shop, code__regex=r'^\d+$').aggregate(
+            max_code=Max(Cast('code', models.BigIntegerField()))
+        )['max_code'] or 0
+
+    @classmethod
+    def reserve(cls, shop, count=1):
+        """
+        count ta ketma-ket raqam (range) - qator qulflanadi va F('value') + count bilan oshiriladi,
+        parallel so'rovlar bir xil kod olmaydi
+        """
+        if count < 1:
+            raise ValueError("count kamida 1 bo'lishi kerak")
+
+        with transaction.atomic():
+            sequence, _ = cls.objects.select_for_update().get_or_create(
+                shop=shop, defaults={'value': lambda: cls._max_existing_code(shop)}
+            )
+            cls.objects.filter(pk=sequence.pk).update(value=F('value') + count)
+            sequence.refresh_from_db(fields=['value'])
+
+        return range(sequence.value - count + 1, sequence.value + 1)
+
+
 class AccessoryPurchaseHistory(models.Model):
     """Aksessuar sotib olish tarixi"""
     accessory = models.ForeignKey(
@@ -328,14 +476,9 @@ class AccessoryPurchaseHistory(models.Model):
         super().save(*args, **kwargs)
 
         if is_new and self.accessory_id:
-            Accessory.objects.filter(pk=self.accessory_id).update(
-                quantity=F('quantity') + self.quantity
-            )
-            self.accessory.refresh_from_db()
-            _, avg_price = self.accessory.calculate_totals()
-            Accessory.objects.filter(pk=self.accessory_id).update(
-                purchase_price=avg_price
-            )
+            # ✅ O(1) - o'rtacha tannarx shu kirimdan yangilanadi (hisobot signallari reports/signals.py da)
+            Accessory.add_purchase(self.accessory_id, self.quantity, self.purchase_price)
+            self.accessory.refresh_from_db(fields=['quantity', 'purchased_quantity', 'purchased_cost', 'purchase_price'])
 
     def __str__(self):
         return f"{self.accessory.name} - {self.quantity} dona, {self.purchase_price} so'm ({self.created_at})"
@@ -371,6 +514,8 @@ class Phone(models.Model):
         db_index=True,
         validators=[RegexValidator(r'^\d{15}$', "IMEI 15 ta raqamdan iborat bo'lishi kerak")]
     )
+    # ✅ Teskari IMEI - oxirgi 4-6 raqam bo'yicha indeksli qidiruv (imei_q), save() yuritadi
+    imei_reversed = models.CharField(max_length=20, blank=True, default='', editable=False)
     condition_percentage = models.IntegerField(
         default=100,
         validators=[MinValueValidator(1), MaxValueValidator(100)],
@@ -520,6 +665,7 @@ class Phone(models.Model):
         verbose_name_plural = "Telefonlar"
         indexes = [
             models.Index(fields=['imei'], name='phone_imei_idx'),
+            models.Index(fields=['imei_reversed'], name='phone_imei_reversed_idx'),
             models.Index(fields=['status'], name='phone_status_idx'),
             models.Index(fields=['shop', 'status'], name='phone_shop_status_idx'),
             models.Index(fields=['payment_status'], name='phone_payment_status_idx'),
@@ -532,47 +678,96 @@ class Phone(models.Model):
     def save(self, *args, **kwargs):
         # Cost price hisoblash
         self.cost_price = self.purchase_price + self.imei_cost + self.repair_cost
+        self.imei_reversed = reverse_imei(self.imei) or ''
 
         # Qarz balansini hisoblash
         if self.source_type == 'supplier':
-            self.debt_balance = self.cost_price - self.paid_amount
-
-            # To'lov holatini yangilash
-            if self.paid_amount >= self.cost_price:
-                self.payment_status = 'paid'
-                self.debt_balance = Decimal('0')
-            elif self.paid_amount > 0:
-                self.payment_status = 'partial'
-            else:
-                self.payment_status = 'debt'
+            self.refresh_payment_state()
         else:
             # Boshqa manbalar uchun avtomatik to'langan
             self.payment_status = 'paid'
             self.paid_amount = self.cost_price
             self.debt_balance = Decimal('0')
 
-        is_new = self.pk is None
-        old_supplier = None
-        old_debt = Decimal('0')
-
-        # Agar tahrirlash bo'lsa, eski qiymatlarni saqlash
-        if not is_new:
-            try:
-                old_phone = Phone.objects.get(pk=self.pk)
-                old_supplier = old_phone.supplier
-                old_debt = old_phone.debt_balance
-            except Phone.DoesNotExist:
-                pass
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'imei' in update_fields:
+            update_fields = kwargs['update_fields'] = set(update_fields) | {'imei_reversed'}
+        if update_fields is not None:
+            if not self.DEBT_SOURCE_FIELDS.intersection(update_fields):
+                # Masalan faqat status - qarzga ta'sir qilmaydi
+                super().save(*args, **kwargs)
+                return
+            # Hisoblangan maydonlar ham yozilishi kerak - aks holda bazadagi qarz eskirib qoladi
+            kwargs['update_fields'] = set(update_fields) | self.DEBT_DERIVED_FIELDS
+
+        old_state = self._supplier_debt_state
+        if old_state is None and self.pk is not None:
+            old_state = self._load_supplier_debt_state(self.pk)
 
         super().save(*args, **kwargs)
 
-        # Taminotchining umumiy qarzini yangilash
-        if self.source_type == 'supplier' and self.supplier:
-            self.supplier.update_total_debt()
+        # ✅ Taminotchi qarzi - eski va yangi qiymat farqi (F() bilan, qayta yig'ishsiz)
+        new_state = self.supplier_debt_contribution()
+        if old_state != new_state:
+            old_supplier_id, old_debt = old_state or (None, Decimal('0'))
+            new_supplier_id, new_debt = new_state
+            if old_supplier_id == new_supplier_id:
+                Supplier.add_deltas(new_supplier_id, total_debt=new_debt - old_debt)
+            else:
+                Supplier.add_deltas(old_supplier_id, total_debt=-old_debt)
+                Supplier.add_deltas(new_supplier_id, total_debt=new_debt)
+        self._supplier_debt_state = new_state
+
+    def refresh_payment_state(self):
+        """Taminotchi telefoni: paid_amount dan qarz qoldig'i va to'lov holati"""
+        self.debt_balance = self.cost_price - self.paid_amount
+
+        # To'lov holatini yangilash
+        if self.paid_amount >= self.cost_price:
+            self.payment_status = 'paid'
+            self.debt_balance = Decimal('0')
+        elif self.paid_amount > 0:
+            self.payment_status = 'partial'
+        else:
+            self.payment_status = 'debt'
+
+    # Qarzga ta'sir qiluvchi va save() hisoblaydigan maydonlar
+    DEBT_SOURCE_FIELDS = {
+        'purchase_price', 'imei_cost', 'repair_cost', 'cost_price', 'paid_amount',
+        'debt_balance', 'payment_status', 'source_type', 'supplier', 'supplier_id',
+    }
+    DEBT_DERIVED_FIELDS = {'cost_price', 'paid_amount', 'debt_balance', 'payment_status'}
+    _DEBT_STATE_FIELDS = ('supplier_id', 'source_type', 'payment_status', 'debt_balance')
 
-        # Agar supplier o'zgargan bo'lsa, eski supplier qarzini ham yangilash
-        if old_supplier and old_supplier != self.supplier:
-            old_supplier.update_total_debt()
+    # Bazadan o'qilgan holat (from_db) - save() eski qatorni qayta o'qimaydi
+    _supplier_debt_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in instance.__dict__ for field in cls._DEBT_STATE_FIELDS):
+            instance._supplier_debt_state = instance.supplier_debt_contribution()
+        return instance
+
+    @classmethod
+    def _load_supplier_debt_state(cls, pk):
+        """Maydonlari to'liq yuklanmagan (only/defer) obyekt uchun"""
+        row = cls.objects.filter(pk=pk).values(*cls._DEBT_STATE_FIELDS).first()
+        if row is None:
+            return None
+        return cls._debt_contribution(**row)
+
+    @staticmethod
+    def _debt_contribution(supplier_id, source_type, payment_status, debt_balance):
+        """Supplier.total_debt ga qo'shiladigan qism: (supplier_id, summa)"""
+        if source_type == 'supplier' and supplier_id and payment_status in ('debt', 'partial'):
+            return supplier_id, debt_balance
+        return supplier_id, Decimal('0')
+
+    def supplier_debt_contribution(self):
+        return self._debt_contribution(
+            self.supplier_id, self.source_type, self.payment_status, self.debt_balance
+        )
 
     def clean(self):
         super().clean()
@@ -684,6 +879,124 @@ class SupplierPayment(models.Model):
         source_name = "Kassa" if self.payment_source == 'cash' else "Seyf"
         return f"{self.shop.name} - {self.supplier.name} - ${self.amount} ({source_icon} {source_name}) [{self.payment_date}]"
 
+    # ============= TAQSIMLASH (FIFO) =============
+
+    PHONE_PAYMENT_FIELDS = ['paid_amount', 'debt_balance', 'payment_status']
+
+    def allocate(self, phone_ids=None):
+        """
+        To'lovni telefonlarga FIFO taqsimlash - ✅ telefonlar sonidan qat'i nazar bir necha so'rov
+
+        Qarzdor telefonlar bir marta select_for_update bilan o'qiladi, taqsimot
+        xotirada hisoblanadi va bitta bulk_update (telefonlar), bitta bulk_create
+        (tafsilotlar) hamda bitta taminotchi UPDATE (F()) bilan yoziladi.
+        phone_ids berilsa - faqat tanlangan telefonlar (payment_type='specific').
+        Telefonlardan ortgan summa boshlang'ich qarzga o'tadi.
+        """
+        with transaction.atomic():
+            supplier = Supplier.objects.select_for_update().get(pk=self.supplier_id)
+            phones = Phone.objects.select_for_update().filter(
+                supplier_id=self.supplier_id,
+                source_type='supplier',
+                payment_status__in=['debt', 'partial']
+            ).order_by('created_at', 'id')
+            if phone_ids is not None:
+                phones = phones.filter(pk__in=phone_ids)
+
+            amount_remaining = self.amount
+            debt_delta = Decimal('0')
+            paid_phones = []
+            details = []
+            for phone in phones:
+                if amount_remaining <= 0:
+                    break
+
+                # Telefonning qolgan qarzini hisoblash
+                remaining_debt = phone.debt_balance
+                if remaining_debt <= 0:
+                    continue
+
+                # To'lanadigan summani aniqlash
+                payment_for_phone = min(amount_remaining, remaining_debt)
+                _, old_debt = phone.supplier_debt_contribution()
+                phone.paid_amount += payment_for_phone
+                phone.refresh_payment_state()
+                _, new_debt = phone.supplier_debt_contribution()
+                debt_delta += new_debt - old_debt
+
+                paid_phones.append(phone)
+                details.append(SupplierPaymentDetail(
+                    payment=self,
+                    phone=phone,
+                    amount=payment_for_phone,
+                    previous_balance=remaining_debt,
+                    new_balance=phone.debt_balance
+                ))
+                amount_remaining -= payment_for_phone
+
+            Phone.objects.bulk_update(paid_phones, self.PHONE_PAYMENT_FIELDS)
+            SupplierPaymentDetail.objects.bulk_create(details)
+
+            # Boshlang'ich qarzni to'lash
+            initial_paid = Decimal('0')
+            if amount_remaining > 0 and supplier.initial_debt > 0:
+                initial_paid = min(amount_remaining, supplier.initial_debt)
+                amount_remaining -= initial_paid
+
+            Supplier.add_deltas(
+                self.supplier_id,
+                total_debt=debt_delta,
+                total_paid=self.amount - amount_remaining,
+                initial_debt=-initial_paid,
+            )
+
+        return {
+            'phones_count': len(paid_phones),
+            'initial_paid': initial_paid,
+            'remaining': amount_remaining,
+        }
+
+    def reverse_allocation(self, amount=None):
+        """
+        allocate() ni bekor qilish - telefonlarga to'langan summa qaytariladi, tafsilotlar o'chiriladi
+
+        Telefonlarga taqsimlanmagan qism boshlang'ich qarzga qaytadi. amount - bazadagi
+        (tahrirlashdan oldingi) summa, forma obyektni o'zgartirgan bo'lsa beriladi.
+        Natija: qaytarilgan telefonlar soni.
+        """
+        amount = self.amount if amount is None else amount
+        with transaction.atomic():
+            details = list(self.details.all())
+            phones = {
+                phone.pk: phone for phone in Phone.objects.select_for_update().filter(
+                    pk__in=[detail.phone_id for detail in details]
+                )
+            }
+
+            debt_delta = Decimal('0')
+            phones_total = Decimal('0')
+            for detail in details:
+                phone = phones[detail.phone_id]
+                _, old_debt = phone.supplier_debt_contribution()
+                phone.paid_amount -= detail.amount
+                if phone.source_type == 'supplier':
+                    phone.refresh_payment_state()
+                _, new_debt = phone.supplier_debt_contribution()
+                debt_delta += new_debt - old_debt
+                phones_total += detail.amount
+
+            Phone.objects.bulk_update(phones.values(), self.PHONE_PAYMENT_FIELDS)
+            self.details.all().delete()
+
+            initial_paid = amount - phones_total
+            Supplier.add_deltas(
+                self.supplier_id,
+                total_debt=debt_delta,
+                total_paid=-amount,
+                initial_debt=max(initial_paid, Decimal('0')),
+            )
+        return len(phones)
+
 
 class SupplierPaymentDetail(models.Model):
     """To'lov tafsiloti - qaysi telefonga qancha to'landi"""
@@ -1,7 +1,7 @@
 # inventory/signals.py
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_delete
 from django.dispatch import receiver
-from .models import Phone
+from .models import Phone, Supplier, reverse_imei
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,10 +34,18 @@ def sync_phone_imei_to_exchange(sender, instance, **kwargs):
                 logger.info(f"🔄 PhoneExchange #{exchange.pk} da IMEI yangilanadi")
 
                 # ✅ Signal chaqirilmasligi uchun update ishlatamiz
-                PhoneExchange.objects.filter(pk=exchange.pk).update(old_phone_imei=new_imei)
+                PhoneExchange.objects.filter(pk=exchange.pk).update(
+                    old_phone_imei=new_imei, old_phone_imei_reversed=reverse_imei(new_imei)
+                )
                 logger.info(f"✅ PhoneExchange #{exchange.pk} da IMEI yangilandi!")
 
     except Phone.DoesNotExist:
         pass
     except Exception as e:
-        logger.error(f"❌ sync_phone_imei_to_exchange error: {e}", exc_info=True)
\ No newline at end of file
+        logger.error(f"❌ sync_phone_imei_to_exchange error: {e}", exc_info=True)
+
+@receiver(post_delete, sender=Phone)
+def subtract_phone_supplier_debt(sender, instance, **kwargs):
+    """✅ O'chirilgan telefon qarzi taminotchi total_debt dan ayiriladi (F() bilan)"""
+    supplier_id, debt = instance._supplier_debt_state or instance.supplier_debt_contribution()
+    Supplier.add_deltas(supplier_id, total_debt=-debt)
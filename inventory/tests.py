@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from decimal import Decimal
 from datetime import date, timedelta
+from django.db.models import Sum
 
 from inventory.models import (
     Phone, Accessory, PhoneModel, MemorySize,
@@ -347,4 +348,575 @@ class PhoneFormTestCase(TestCase):
         phone.save()
 
         self.assertEqual(phone.created_at, test_date)
-        print(f"\n✅ TEST 14: Form to'g'ri: {phone.created_at}")
\ No newline at end of file
+        print(f"\n✅ TEST 14: Form to'g'ri: {phone.created_at}")
+
+class InventoryDashboardTestCase(TestCase):
+    """Ombor dashboard - guruhlangan so'rovlar"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser5', password='testpass123')
+        self.user.userprofile.role = 'boss'
+        self.user.userprofile.save()
+        self.phone_model = PhoneModel.objects.create(model_name='iPhone 14')
+        self.memory_size = MemorySize.objects.create(size='128GB')
+        self.supplier = Supplier.objects.create(
+            name='Test Supplier 5', phone_number='+998901234571', initial_debt=Decimal('150.00')
+        )
+        self.imei = 500000000000000
+
+    def create_shop(self, name, statuses):
+        shop = Shop.objects.create(name=name, owner=self.user)
+        for index, status in enumerate(statuses):
+            self.imei += 1
+            Phone.objects.create(
+                shop=shop, phone_model=self.phone_model, memory_size=self.memory_size, imei=str(self.imei),
+                purchase_price=Decimal('500.00') + index * 10, created_at=date(2025, 1, 15), created_by=self.user,
+                supplier=self.supplier, source_type='supplier', status=status
+            )
+        accessory = Accessory.objects.create(
+            shop=shop, name=f'{name} kabel', code=f'{shop.id:04d}', sale_price=Decimal('50000'),
+            supplier=self.supplier, created_by=self.user
+        )
+        Accessory.objects.filter(id=accessory.id).update(quantity=len(statuses), purchase_price=Decimal('30000'))
+        return shop
+
+    def get_dashboard(self, **params):
+        self.client.force_login(self.user)
+        response = self.client.get('/inventory/', params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_15_dashboard_totals_match_per_shop_queries(self):
+        """TEST 15: Guruhlangan natija har bir do'kon uchun alohida hisob bilan bir xil"""
+        shops = [
+            self.create_shop('Dashboard 1', ['shop', 'shop', 'master', 'sold', 'returned']),
+            self.create_shop('Dashboard 2', ['shop', 'exchanged_in', 'sold']),
+            Shop.objects.create(name='Dashboard 3', owner=self.user),
+        ]
+
+        context = self.get_dashboard().context
+        stats = {stat['shop'].id: stat for stat in context['shop_stats']}
+        self.assertEqual(len(stats), 3)
+
+        for shop in shops:
+            phones = Phone.objects.filter(shop=shop, status__in=['shop', 'master', 'returned'])
+            debt = Phone.objects.filter(
+                shop=shop, source_type='supplier', payment_status__in=['debt', 'partial']
+            ).aggregate(total=Sum('debt_balance'))['total'] or Decimal('0.00')
+            accessory_value = sum(
+                (a.purchase_price * a.quantity for a in Accessory.objects.filter(shop=shop)), Decimal('0.00')
+            )
+            self.assertEqual(stats[shop.id]['phone_count'], phones.count())
+            self.assertEqual(
+                stats[shop.id]['phone_cost_value'],
+                phones.aggregate(total=Sum('cost_price'))['total'] or Decimal('0.00')
+            )
+            self.assertEqual(stats[shop.id]['supplier_debt'], debt)
+            self.assertEqual(stats[shop.id]['accessory_cost_value'], accessory_value)
+
+        self.assertEqual(context['phones_in_shop'], 3)
+        self.assertEqual(context['phones_sold'], 2)
+        self.assertEqual(context['phones_in_repair'], 1)
+        self.assertEqual(context['phones_returned'], 1)
+        self.assertEqual(context['phones_exchanged'], 1)
+        self.assertEqual(context['total_accessories'], 8)
+        self.assertEqual(
+            context['total_supplier_debt'],
+            sum(stat['supplier_debt'] for stat in stats.values()) + Decimal('150.00')
+        )
+
+        context = self.get_dashboard(status='master').context
+        self.assertEqual(context['total_phones'], 1)
+
+    def test_16_dashboard_query_count_is_constant(self):
+        """TEST 16: So'rovlar soni do'kon va telefonlar soniga bog'liq emas"""
+        self.create_shop('Dashboard 1', ['shop', 'sold'])
+        self.client.force_login(self.user)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as small:
+            self.get_dashboard()
+        for number in range(2, 6):
+            self.create_shop(f'Dashboard {number}', ['shop', 'master', 'returned', 'sold'])
+        with CaptureQueriesContext(connection) as large:
+            self.get_dashboard()
+        self.assertEqual(len(large), len(small))
+
+
+class SupplierDebtDeltaTestCase(TestCase):
+    """Taminotchi qarzi - F() farqlari bilan, qayta yig'ishsiz"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser6', password='testpass123')
+        self.user.userprofile.role = 'boss'
+        self.user.userprofile.save()
+        self.shop = Shop.objects.create(name='Test Shop 6', owner=self.user)
+        self.phone_model = PhoneModel.objects.create(model_name='iPhone 13')
+        self.memory_size = MemorySize.objects.create(size='64GB')
+        self.supplier = Supplier.objects.create(name='Supplier A', phone_number='+998901234572')
+        self.other = Supplier.objects.create(name='Supplier B', phone_number='+998901234573')
+        self.imei = 600000000000000
+
+    def create_phone(self, supplier, price, **extra):
+        self.imei += 1
+        values = dict(
+            shop=self.shop, phone_model=self.phone_model, memory_size=self.memory_size, imei=str(self.imei),
+            purchase_price=Decimal(price), created_at=date(2025, 2, 1), created_by=self.user,
+            supplier=supplier, source_type='supplier',
+        )
+        values.update(extra)
+        return Phone.objects.create(**values)
+
+    def assertDebtsConsistent(self):
+        for supplier in (self.supplier, self.other):
+            supplier.refresh_from_db()
+            expected = Phone.objects.filter(
+                supplier=supplier, source_type='supplier', payment_status__in=['debt', 'partial']
+            ).aggregate(total=Sum('debt_balance'))['total'] or Decimal('0')
+            self.assertEqual(supplier.total_debt, expected, supplier.name)
+
+    def test_17_phone_save_applies_deltas_without_aggregates(self):
+        """TEST 17: Telefon qo'shish / tahrirlash / o'chirish - faqat F() farqlari"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            phones = [self.create_phone(self.supplier, 500 + index) for index in range(5)]
+        self.assertFalse([q['sql'] for q in queries if 'SUM(' in q['sql'].upper()])
+        self.assertEqual(len(queries), 10)  # INSERT + UPDATE supplier
+        self.assertDebtsConsistent()
+        self.assertEqual(self.supplier.total_debt, Decimal('2510'))
+
+        # Bazadan o'qilgan telefon - eski qator qayta o'qilmaydi
+        phone = Phone.objects.get(pk=phones[0].pk)
+        phone.paid_amount = Decimal('200')
+        with CaptureQueriesContext(connection) as queries:
+            phone.save()
+        self.assertFalse([q['sql'] for q in queries if 'SUM(' in q['sql'].upper()])
+        self.assertDebtsConsistent()
+
+        # Taminotchi va manba o'zgarishi
+        phones[1].supplier = self.other
+        phones[1].save()
+        phones[2].source_type = 'external_seller'
+        phones[2].save()
+        self.assertDebtsConsistent()
+
+        # update_fields bilan saqlash - hisoblangan maydonlar ham yoziladi
+        phones[3].paid_amount = Decimal('503')
+        phones[3].save(update_fields=['paid_amount'])
+        phones[3].refresh_from_db()
+        self.assertEqual(phones[3].payment_status, 'paid')
+        self.assertDebtsConsistent()
+
+        phones[4].delete()
+        self.assertDebtsConsistent()
+        self.assertEqual(self.supplier.total_debt, Decimal('300'))
+
+    def test_18_supplier_payment_views_keep_debt_consistent(self):
+        """TEST 18: To'lov, tahrirlash va o'chirish - total_debt / total_paid / initial_debt"""
+        Supplier.objects.filter(pk=self.supplier.pk).update(initial_debt=Decimal('100'))
+        for price in (300, 400):
+            self.create_phone(self.supplier, price)
+        self.client.force_login(self.user)
+
+        response = self.client.post(f'/inventory/supplier/{self.supplier.pk}/payment/', {
+            'shop': self.shop.id, 'supplier': self.supplier.id, 'amount': '750', 'payment_type': 'general', 'payment_source': 'safe',
+            'payment_date': '2025-02-10',
+        }, secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertDebtsConsistent()
+        self.assertEqual(self.supplier.total_debt, Decimal('0'))
+        self.assertEqual(self.supplier.initial_debt, Decimal('50'))
+        self.assertEqual(self.supplier.total_paid, Decimal('750'))
+
+        payment = self.supplier.payments.get()
+        response = self.client.post(f'/inventory/payment/{payment.pk}/delete/', secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertDebtsConsistent()
+        self.assertEqual(self.supplier.total_debt, Decimal('700'))
+        self.assertEqual(self.supplier.initial_debt, Decimal('100'))
+        self.assertEqual(self.supplier.total_paid, Decimal('0'))
+
+        from django.core.management import call_command
+        from io import StringIO
+        out = StringIO()
+        call_command('fix_supplier_debt', check=True, stdout=out)
+        self.assertIn("to'g'ri", out.getvalue())
+
+    def test_19_bulk_fifo_allocation(self):
+        """TEST 19: FIFO taqsimlash - telefonlar sonidan qat'i nazar bir xil so'rovlar soni"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from inventory.models import SupplierPayment
+
+        Supplier.objects.filter(pk=self.supplier.pk).update(initial_debt=Decimal('20'))
+        phones = [self.create_phone(self.supplier, 100, created_at=date(2025, 1, 1) + timedelta(days=index))
+                  for index in range(30)]
+
+        payment = SupplierPayment.objects.create(
+            shop=self.shop, supplier=self.supplier, amount=Decimal('2550'), created_by=self.user
+        )
+        with CaptureQueriesContext(connection) as queries:
+            allocation = payment.allocate()
+        self.assertLessEqual(len(queries), 7)
+        self.assertEqual(allocation, {'phones_count': 26, 'initial_paid': Decimal('0'), 'remaining': Decimal('0')})
+
+        # Eng eskilari to'liq, keyingisi qisman, qolganlari tegilmagan
+        statuses = [Phone.objects.get(pk=phone.pk).payment_status for phone in phones]
+        self.assertEqual(statuses, ['paid'] * 25 + ['partial'] + ['debt'] * 4)
+        self.assertEqual(payment.details.count(), 26)
+        self.assertEqual(payment.details.get(phone=phones[25]).new_balance, Decimal('50'))
+        self.assertDebtsConsistent()
+        self.assertEqual(self.supplier.total_paid, Decimal('2550'))
+
+        # Tanlangan telefonlar + ortgan summa boshlang'ich qarzga
+        specific = SupplierPayment.objects.create(
+            shop=self.shop, supplier=self.supplier, amount=Decimal('130'), payment_type='specific',
+            created_by=self.user
+        )
+        allocation = specific.allocate([phones[29].pk])
+        self.assertEqual(allocation, {'phones_count': 1, 'initial_paid': Decimal('20'), 'remaining': Decimal('10')})
+        self.assertDebtsConsistent()
+        self.assertEqual(self.supplier.initial_debt, Decimal('0'))
+
+        # Tahrirlash: eski taqsimot qaytariladi, yangisi qo'llanadi
+        self.client.force_login(self.user)
+        response = self.client.post(f'/inventory/payment/{payment.pk}/edit/', {
+            'shop': self.shop.id, 'supplier': self.supplier.id, 'amount': '1000', 'payment_type': 'general',
+            'payment_source': 'safe', 'payment_date': '2025-02-10',
+        }, secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(payment.details.count(), 10)
+        self.assertEqual(Phone.objects.filter(supplier=self.supplier, payment_status='paid').count(), 11)
+        self.assertDebtsConsistent()
+
+    def test_20_supplier_list_annotated_stats(self):
+        """TEST 20: Taminotchilar ro'yxati - statistika, filtr va saralash SQL da"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        Supplier.objects.filter(pk=self.other.pk).update(initial_debt=Decimal('900'))
+        self.create_phone(self.supplier, 300)
+        self.create_phone(self.supplier, 200, paid_amount=Decimal('200'))
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get('/inventory/suppliers/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_suppliers'], 2)
+        self.assertEqual(response.context['suppliers_with_debt'], 2)
+        self.assertEqual(response.context['total_debt'], Decimal('1200'))
+
+        rows = {supplier.pk: supplier for supplier in response.context['page_obj']}
+        self.assertEqual(rows[self.supplier.pk].balance_value, Decimal('300'))
+        self.assertEqual(rows[self.supplier.pk].phone_count, 2)
+        self.assertEqual(rows[self.supplier.pk].debt_phone_count, 1)
+        self.assertEqual(rows[self.other.pk].phone_count, 0)
+
+        response = self.client.get('/inventory/suppliers/', {'sort': 'balance_desc'}, secure=True)
+        self.assertEqual([s.pk for s in response.context['page_obj']], [self.other.pk, self.supplier.pk])
+        self.assertEqual(response.context['filter_query'], 'sort=balance_desc')
+
+        Supplier.objects.filter(pk=self.other.pk).update(initial_debt=Decimal('0'))
+        response = self.client.get('/inventory/suppliers/', {'debt': 'no_debt'}, secure=True)
+        self.assertEqual([s.pk for s in response.context['page_obj']], [self.other.pk])
+
+        for number in range(15):
+            supplier = Supplier.objects.create(name=f'Supplier {number}', phone_number='+998900000000')
+            self.create_phone(supplier, 100)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/inventory/suppliers/', secure=True)
+        self.assertEqual(response.context['total_suppliers'], 17)
+        self.assertEqual(len(large), len(small))
+
+
+class PhoneImeiLookupTestCase(TestCase):
+    """IMEI qidiruvi - to'liq IMEI va oxirgi raqamlar indeks orqali"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser7', password='testpass123')
+        self.user.userprofile.role = 'boss'
+        self.user.userprofile.save()
+        self.shop = Shop.objects.create(name='Test Shop 7', owner=self.user)
+        self.phone_model = PhoneModel.objects.create(model_name='iPhone 12')
+        self.memory_size = MemorySize.objects.create(size='128GB')
+
+    def create_phone(self, imei):
+        return Phone.objects.create(
+            shop=self.shop, phone_model=self.phone_model, memory_size=self.memory_size, imei=imei,
+            purchase_price=Decimal('300'), created_at=date(2025, 3, 1), created_by=self.user,
+            source_type='daily_seller',
+        )
+
+    def test_21_imei_suffix_lookup_uses_reversed_index(self):
+        """TEST 21: imei_q - to'liq IMEI imei= , oxirgi raqamlar imei_reversed oralig'i"""
+        from inventory.models import imei_q
+        from sales.models import PhoneExchange
+
+        first = self.create_phone('356789012345678')
+        second = self.create_phone('356789012340000')
+        self.assertEqual(first.imei_reversed, '876543210987653')
+
+        self.assertEqual(list(Phone.objects.filter(imei_q('356789012345678'))), [first])
+        self.assertEqual(list(Phone.objects.filter(imei_q(' 5678 '))), [first])
+        self.assertEqual(set(Phone.objects.filter(imei_q('340000'))), {second})
+        self.assertFalse(Phone.objects.filter(imei_q('7890')).exists())  # o'rtadagi raqamlar - oxiri emas
+
+        plan = Phone.objects.filter(imei_q('5678')).explain()
+        self.assertIn('phone_imei_reversed_idx', plan)
+
+        # update_fields=['imei'] bilan ham teskari IMEI yangilanadi
+        first.imei = '356789012349999'
+        first.save(update_fields=['imei'])
+        first.refresh_from_db()
+        self.assertEqual(first.imei_reversed, '999943210987653')
+
+        exchange = PhoneExchange.objects.create(
+            new_phone=second, new_phone_price=Decimal('900'),
+            old_phone_model=self.phone_model, old_phone_memory=self.memory_size,
+            old_phone_imei='351111111112222', old_phone_accepted_price=Decimal('400'),
+            exchange_type='customer_pays', price_difference=Decimal('500'), cash_amount=Decimal('500'),
+            salesman=self.user, customer_name='Almashtiruvchi',
+            customer_phone_number='998900000000', exchange_date=date(2025, 3, 2)
+        )
+        self.assertEqual(list(PhoneExchange.objects.filter(imei_q('2222', 'old_phone_imei'))), [exchange])
+
+        # Phone IMEI o'zgarsa signal almashtirishdagi teskari IMEI ni ham yangilaydi
+        old_phone = exchange.created_old_phone
+        old_phone.imei = '351111111113333'
+        old_phone.save()
+        exchange.refresh_from_db()
+        self.assertEqual(exchange.old_phone_imei_reversed, '333311111111153')
+
+        self.client.force_login(self.user)
+        response = self.client.get('/inventory/search/', {'imei': '9999'}, secure=True)
+        self.assertEqual([phone['id'] for phone in response.json()['phones']], [first.pk])
+
+
+class AccessoryCodeSequenceTestCase(TestCase):
+    """Aksessuar kodi - do'kon ketma-ketligidan, saralashsiz"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser8', password='testpass123')
+        self.shop = Shop.objects.create(name='Test Shop 8', owner=self.user)
+        self.other_shop = Shop.objects.create(name='Test Shop 9', owner=self.user)
+
+    def create_accessory(self, shop, code=''):
+        return Accessory.objects.create(shop=shop, name='Chexol', code=code, sale_price=Decimal('50000'))
+
+    def test_22_accessory_code_sequence(self):
+        """TEST 22: Kod ketma-ketligi - mavjud kodlardan davom etadi, raqam bo'yicha, partiya bilan"""
+        from inventory.models import AccessoryCodeSequence
+
+        # '0900' < '10000' satr bo'yicha emas, raqam bo'yicha
+        self.create_accessory(self.shop, '0900')
+        self.create_accessory(self.shop, '10000')
+
+        self.assertEqual(self.create_accessory(self.shop).code, '10001')
+        self.assertEqual(self.create_accessory(self.other_shop).code, '0001')
+        self.assertEqual(Accessory.reserve_codes(self.shop, 3), ['10002', '10003', '10004'])
+
+        # Qo'lda kiritilgan kattaroq kod - ketma-ketlik undan keyin davom etadi
+        self.create_accessory(self.shop, '20000')
+        self.assertEqual(Accessory.get_next_code(self.shop), '20001')
+        self.assertEqual(AccessoryCodeSequence.objects.get(shop=self.shop).value, 20001)
+
+        with self.assertRaises(ValueError):
+            AccessoryCodeSequence.reserve(self.shop, 0)
+
+
+class AccessoryMovingAverageTestCase(TestCase):
+    """Aksessuar o'rtacha tannarxi - kirimdan O(1) yangilanadi"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser9', password='testpass123')
+        self.shop = Shop.objects.create(name='Test Shop 10', owner=self.user)
+        self.accessory = Accessory.objects.create(shop=self.shop, name='Kabel', sale_price=Decimal('60000'))
+
+    def purchase(self, quantity, price):
+        return AccessoryPurchaseHistory.objects.create(
+            accessory=self.accessory, quantity=quantity, purchase_price=Decimal(price), created_by=self.user
+        )
+
+    def test_23_moving_average_and_repair_command(self):
+        """TEST 23: Kirim - bitta UPDATE, tarix uzunligiga bog'liq emas; fix_accessory_costs farqni topadi"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.purchase(10, '30000')
+        self.purchase(30, '40000')
+        self.accessory.refresh_from_db()
+        self.assertEqual(self.accessory.quantity, 40)
+        self.assertEqual(self.accessory.purchased_quantity, 40)
+        self.assertEqual(self.accessory.purchase_price, Decimal('37500.00'))
+        self.assertEqual(self.accessory.calculate_totals(), (40, Decimal('37500.00')))
+
+        # Sotuv qoldiqni kamaytiradi, lekin o'rtacha narx vazni - jami kirim
+        Accessory.objects.filter(pk=self.accessory.pk).update(quantity=5)
+        with CaptureQueriesContext(connection) as short:
+            self.purchase(20, '45000')
+        for _ in range(20):
+            self.purchase(1, '45000')
+        with CaptureQueriesContext(connection) as long:
+            self.purchase(1, '45000')
+        self.assertEqual(len(short), len(long))
+        history_reads = [q['sql'] for q in long.captured_queries
+                         if 'accessorypurchasehistory' in q['sql'] and not q['sql'].startswith('INSERT')]
+        self.assertEqual(history_reads, [])
+
+        self.accessory.refresh_from_db()
+        self.assertEqual(self.accessory.quantity, 46)
+        self.assertEqual(self.accessory.purchased_quantity, 81)
+        self.assertEqual(self.accessory.purchased_cost, Decimal('3345000.00'))
+        # Jami summa saqlanadi - o'rtacha to'liq qayta hisob bilan aynan bir xil (yaxlitlash to'planmaydi)
+        _, full_average = self.accessory.calculate_totals()
+        self.assertEqual(self.accessory.purchase_price, full_average)
+        output = StringIO()
+        call_command('fix_accessory_costs', check=True, stdout=output)
+        self.assertIn("to'g'ri", output.getvalue())
+
+        # Qo'lda buzilgan tannarx: --check faqat ko'rsatadi, buyruq tuzatadi
+        Accessory.objects.filter(pk=self.accessory.pk).update(purchase_price=Decimal('1000'))
+        output = StringIO()
+        call_command('fix_accessory_costs', check=True, stdout=output)
+        self.assertIn('1 ta aksessuarda farq bor', output.getvalue())
+        self.accessory.refresh_from_db()
+        self.assertEqual(self.accessory.purchase_price, Decimal('1000.00'))
+
+        call_command('fix_accessory_costs', stdout=StringIO())
+        self.accessory.refresh_from_db()
+        self.assertEqual(self.accessory.purchase_price, full_average)
+        output = StringIO()
+        call_command('fix_accessory_costs', check=True, stdout=output)
+        self.assertIn("to'g'ri", output.getvalue())
+
+
+class PhoneImportTestCase(TestCase):
+    """Taminotchi partiyasi - CSV/XLSX fayldan ommaviy qabul"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser10', password='testpass123')
+        self.user.userprofile.role = 'boss'
+        self.user.userprofile.save()
+        self.shop = Shop.objects.create(name='Test Shop 11', owner=self.user)
+        self.supplier = Supplier.objects.create(name='Supplier Import', phone_number='+998901234574')
+        PhoneModel.objects.create(model_name='iPhone 14 Pro')
+        MemorySize.objects.create(size='256GB')
+        self.existing = Phone.objects.create(
+            shop=self.shop, phone_model=PhoneModel.objects.get(), memory_size=MemorySize.objects.get(),
+            imei='700000000000009', purchase_price=Decimal('500'), created_at=date(2025, 3, 1),
+            source_type='supplier', supplier=self.supplier, paid_amount=Decimal('500'),
+        )
+
+    def xlsx_file(self, rows):
+        from io import BytesIO
+        from openpyxl import Workbook
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        output = BytesIO()
+        workbook.save(output)
+        return SimpleUploadedFile('partiya.xlsx', output.getvalue())
+
+    def test_24_bulk_import_reports_row_errors(self):
+        """TEST 24: Import - xato qatorlar o'tkazib yuboriladi, qolganlari bulk_create, qarz bir marta"""
+        upload = self.xlsx_file([
+            ['IMEI', 'Model', 'Xotira', 'Narx', "Ta'mirlash", "To'langan"],
+            [700000000000001, 'iPhone 14 Pro', '256 GB', 800, 20, None],
+            ['700000000000002', 'iphone 14 pro', '256GB', '750.50', None, 300],
+            ['700000000000001', 'iPhone 14 Pro', '256GB', 800, None, None],    # faylda takror
+            ['700000000000009', 'iPhone 14 Pro', '256GB', 800, None, None],    # bazada bor
+            ['12345', 'iPhone 14 Pro', '256GB', 800, None, None],              # IMEI noto'g'ri
+            ['700000000000003', 'iPhone 99', '256GB', 800, None, None],        # model yo'q
+            [None, None, None, None, None, None],                              # bo'sh qator
+        ])
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/inventory/phones/import/', secure=True).status_code, 200)
+        response = self.client.post('/inventory/phones/import/', {
+            'file': upload, 'shop': self.shop.id, 'supplier': self.supplier.id,
+            'created_at': '2025-04-01', 'is_debt': 'on',
+        }, secure=True)
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([number for number, _ in result['errors']], [4, 5, 6, 7])
+
+        first = Phone.objects.get(imei='700000000000001')
+        self.assertEqual(first.cost_price, Decimal('820.00'))
+        self.assertEqual(first.payment_status, 'debt')
+        self.assertEqual(first.imei_reversed, '100000000000007')
+        self.assertEqual(first.created_at, date(2025, 4, 1))
+        second = Phone.objects.get(imei='700000000000002')
+        self.assertEqual((second.payment_status, second.debt_balance), ('partial', Decimal('450.50')))
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.total_debt, Decimal('1270.50'))
+        self.assertEqual(result['total_debt'], Decimal('1270.50'))
+
+    def test_25_import_command_query_count_is_constant(self):
+        """TEST 25: import_phones buyrug'i - CSV, dry-run, so'rovlar soni qatorlarga bog'liq emas"""
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def write_csv(count, start):
+            handle, path = tempfile.mkstemp(suffix='.csv')
+            with os.fdopen(handle, 'w', encoding='utf-8') as file:
+                file.write('imei;model;xotira;narx\n')
+                for number in range(start, start + count):
+                    file.write(f'{710000000000000 + number};iPhone 14 Pro;256GB;100\n')
+            self.addCleanup(os.remove, path)
+            return path
+
+        options = dict(shop=self.shop.id, supplier=self.supplier.id, stdout=StringIO())
+        call_command('import_phones', write_csv(3, 0), dry_run=True, **options)
+        self.assertEqual(Phone.objects.count(), 1)
+
+        with CaptureQueriesContext(connection) as small:
+            call_command('import_phones', write_csv(3, 0), batch_size=2000, **options)
+        with CaptureQueriesContext(connection) as large:
+            call_command('import_phones', write_csv(300, 100), batch_size=2000, **options)
+        # INSERT lar - partiyalar (SQLite parametr chegarasi), qolgan so'rovlar qatorlar soniga bog'liq emas
+        def other_queries(context):
+            return [query['sql'] for query in context.captured_queries if not query['sql'].startswith('INSERT')]
+        self.assertEqual(len(other_queries(small)), len(other_queries(large)))
+        self.assertEqual(Phone.objects.count(), 304)
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.total_debt, Decimal('30300.00'))
+        output = StringIO()
+        call_command('fix_supplier_debt', check=True, stdout=output)
+        self.assertIn("to'g'ri", output.getvalue())
+
+    def test_26_import_non_utf8_csv(self):
+        """TEST 26: Excel ning cp1251 CSV fayli o'qiladi, buzilgan fayl - 500 emas, xabar"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        content = 'imei;model;xotira;narx;izoh\n700000000000004;iPhone 14 Pro;256GB;100;Телефон б/у\n'
+        self.client.force_login(self.user)
+        response = self.client.post('/inventory/phones/import/', {
+            'file': SimpleUploadedFile('partiya.csv', content.encode('cp1251')),
+            'shop': self.shop.id, 'supplier': self.supplier.id, 'created_at': '2025-04-01',
+        }, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result']['created'], 1)
+        self.assertEqual(Phone.objects.get(imei='700000000000004').note, 'Телефон б/у')
+
+        # 0x98 - cp1251 da ham belgi emas
+        response = self.client.post('/inventory/phones/import/', {
+            'file': SimpleUploadedFile('partiya.csv', b'imei;model;xotira;narx\n\x98\xff\n'),
+            'shop': self.shop.id, 'supplier': self.supplier.id, 'created_at': '2025-04-01',
+        }, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['result'])
+        self.assertEqual(Phone.objects.count(), 2)
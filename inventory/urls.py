@@ -11,6 +11,7 @@ urlpatterns = [
     # Phone URLs
     path('phones/', views.phone_list, name='phone_list'),
     path('phones/create/', views.phone_create, name='phone_create'),
+    path('phones/import/', views.phone_import, name='phone_import'),
     path('phones/<int:pk>/edit/', views.phone_update, name='phone_update'),
     path('phones/<int:pk>/delete/', views.phone_delete, name='phone_delete'),
     path('phones/<int:pk>/', views.phone_detail, name='phone_detail'),
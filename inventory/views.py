@@ -6,14 +6,18 @@ from django.contrib import messages
 from django.views.decorators.http import require_GET
 from django.http import JsonResponse
 from django.core.paginator import Paginator
-from django.db.models import Sum, F, DecimalField, Q
+from django.utils.http import urlencode
+from django.db.models import Sum, Count, F, DecimalField, Q
 from decimal import Decimal
 from django_filters import rest_framework as filters
 
-from .forms import PhoneForm, AccessoryForm, AccessoryAddQuantityForm, SupplierForm, SupplierPaymentForm
+from .forms import PhoneForm, AccessoryForm, AccessoryAddQuantityForm, SupplierForm, SupplierPaymentForm, \
+    PhoneImportForm
+from .imports import PhoneImportError, import_phones, read_rows
 from .models import Phone, Accessory, AccessoryPurchaseHistory, ExternalSeller, DailySeller, PhoneModel, Supplier, \
-    SupplierPaymentDetail, SupplierPayment
+    SupplierPayment, imei_q
 from shops.models import Shop
+from config.middleware import query_budget
 
 
 def can_edit_inventory(user):
@@ -64,57 +68,82 @@ class AccessoryFilter(filters.FilterSet):
         model = Accessory
         fields = ['code', 'name']
 
+# Taminotchilar ro'yxati saralash: kalit -> (nomi, order_by)
+SUPPLIER_SORTS = {
+    'newest': ("Yangi qo'shilgan", ('-created_at', '-id')),
+    'balance_desc': ("Qarz (ko'pdan)", ('-balance_value', 'name')),
+    'balance_asc': ("Qarz (kamdan)", ('balance_value', 'name')),
+    'name': ("Nomi", ('name', 'id')),
+}
+
+
 @login_required
+@query_budget(10)
 def dashboard(request):
     """Dashboard - faqat do'kondagi, ustadagi va qaytarilgan telefonlar"""
-    shops = Shop.objects.prefetch_related('phones', 'accessories')
+    shops = list(Shop.objects.order_by('id'))
     status_filter = request.GET.get('status', '')
 
-    if not shops.exists():
+    if not shops:
         messages.error(request, "Hozircha tizimda do'kon mavjud emas.")
         return redirect('shop:dashboard')
 
+    money = DecimalField(max_digits=15, decimal_places=2)
+
+    # ✅ Faqat ko'rsatish uchun filtrlangan telefonlar
+    display_filter = Q(status__in=['shop', 'master', 'returned'])
+    if status_filter:
+        display_filter &= Q(status=status_filter)
+
+    # ✅ Telefonlar - barcha do'konlar uchun BITTA guruhlangan so'rov
+    phone_rows = {
+        row['shop']: row for row in Phone.objects.values('shop').annotate(
+            display_count=Count('id', filter=display_filter),
+            display_cost=Sum('cost_price', filter=display_filter, output_field=money),
+            # FAQAT shu shopdagi telefonlarning qarzi
+            debt=Sum('debt_balance', filter=Q(
+                source_type='supplier', payment_status__in=['debt', 'partial']
+            ), output_field=money),
+            in_shop=Count('id', filter=Q(status='shop')),
+            sold=Count('id', filter=Q(status='sold')),
+            in_repair=Count('id', filter=Q(status='master')),
+            returned=Count('id', filter=Q(status='returned')),
+            exchanged=Count('id', filter=Q(status='exchanged_in')),
+        ).order_by()
+    }
+
+    # ✅ Aksessuarlar - BITTA guruhlangan so'rov
+    accessory_rows = {
+        row['shop']: row for row in Accessory.objects.values('shop').annotate(
+            total_quantity=Sum('quantity'),
+            total_value=Sum(F('purchase_price') * F('quantity'), output_field=money),
+        ).order_by()
+    }
+
+    # ✅ Boshlang'ich qarzni FAQAT BIR MARTA hisoblash (barcha taminotchilardan)
+    all_suppliers_initial_debt = Supplier.objects.aggregate(
+        total=Sum('initial_debt', output_field=money)
+    )['total'] or Decimal('0.00')
+
     total_phone_value = Decimal('0.00')
     total_accessory_value = Decimal('0.00')
     total_phone_count = 0
     total_accessory_count = 0
     total_phone_debt = Decimal('0.00')  # Faqat telefonlar qarzi
-    total_our_money = Decimal('0.00')
+    status_counts = {'in_shop': 0, 'sold': 0, 'in_repair': 0, 'returned': 0, 'exchanged': 0}
     shop_stats = []
 
-    # ✅ Boshlang'ich qarzni FAQAT BIR MARTA hisoblash (barcha taminotchilardan)
-    all_suppliers_initial_debt = Supplier.objects.aggregate(
-        total=Sum('initial_debt', output_field=DecimalField(max_digits=15, decimal_places=2))
-    )['total'] or Decimal('0.00')
-
     for shop in shops:
-        # ✅ Faqat ko'rsatish uchun filtrlangan telefonlar
-        phones = shop.phones.filter(status__in=['shop', 'master', 'returned'])
-
-        if status_filter:
-            phones = phones.filter(status=status_filter)
-
-        phone_count = phones.count()
-        phone_cost_sum = phones.aggregate(
-            total=Sum('cost_price', output_field=DecimalField(max_digits=15, decimal_places=2))
-        )['total'] or Decimal('0.00')
-
-        accessories = shop.accessories.all()
-        accessory_count = accessories.aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0
-        accessory_cost_sum = accessories.aggregate(
-            total=Sum(F('purchase_price') * F('quantity'), output_field=DecimalField(max_digits=15, decimal_places=2))
-        )['total'] or Decimal('0.00')
-
-        # ✅ FAQAT shu shopdagi telefonlarning qarzi
-        phone_debt = shop.phones.filter(
-            source_type='supplier',
-            payment_status__in=['debt', 'partial']
-        ).aggregate(
-            total=Sum('debt_balance', output_field=DecimalField(max_digits=15, decimal_places=2))
-        )['total'] or Decimal('0.00')
+        phones = phone_rows.get(shop.id, {})
+        accessories = accessory_rows.get(shop.id, {})
+
+        phone_count = phones.get('display_count') or 0
+        phone_cost_sum = phones.get('display_cost') or Decimal('0.00')
+        accessory_count = accessories.get('total_quantity') or 0
+        accessory_cost_sum = accessories.get('total_value') or Decimal('0.00')
 
         # ✅ Har bir do'konda FAQAT telefon qarzi ko'rsatiladi
-        shop_supplier_debt = phone_debt
+        shop_supplier_debt = phones.get('debt') or Decimal('0.00')
 
         # Hisob pulimiz = Telefonlar qiymati - Telefon qarzi
         our_money = phone_cost_sum - shop_supplier_debt
@@ -123,8 +152,9 @@ def dashboard(request):
         total_accessory_count += accessory_count
         total_phone_value += phone_cost_sum
         total_accessory_value += accessory_cost_sum
-        total_phone_debt += phone_debt  # Faqat telefonlar qarzi
-        total_our_money += our_money  # Har do'kon uchun hisoblanadi
+        total_phone_debt += shop_supplier_debt
+        for key in status_counts:
+            status_counts[key] += phones.get(key) or 0
 
         shop_stats.append({
             'shop': shop,
@@ -143,13 +173,6 @@ def dashboard(request):
     # ✅ UMUMIY HISOB PULIMIZ = Jami telefon qiymati - Umumiy qarz
     total_our_money = total_phone_value - total_supplier_debt
 
-    all_phones = Phone.objects.filter(shop__in=shops)
-    phones_in_shop = all_phones.filter(status='shop').count()
-    phones_sold = all_phones.filter(status='sold').count()
-    phones_in_repair = all_phones.filter(status='master').count()
-    phones_returned = all_phones.filter(status='returned').count()
-    phones_exchanged = all_phones.filter(status='exchanged_in').count()
-
     context = {
         'shops': shops,
         'shop_stats': shop_stats,
@@ -157,16 +180,16 @@ def dashboard(request):
         'total_accessories': total_accessory_count,
         'total_phone_value': total_phone_value,
         'total_accessory_value': total_accessory_value,
-        'total_shops': shops.count(),
+        'total_shops': len(shops),
         'total_supplier_debt': total_supplier_debt,  # Umumiy: telefonlar + boshlang'ich
         'total_our_money': total_our_money,
         'status_filter': status_filter,
         'status_choices': Phone.STATUS_CHOICES,
-        'phones_in_shop': phones_in_shop,
-        'phones_sold': phones_sold,
-        'phones_in_repair': phones_in_repair,
-        'phones_returned': phones_returned,
-        'phones_exchanged': phones_exchanged,
+        'phones_in_shop': status_counts['in_shop'],
+        'phones_sold': status_counts['sold'],
+        'phones_in_repair': status_counts['in_repair'],
+        'phones_returned': status_counts['returned'],
+        'phones_exchanged': status_counts['exchanged'],
         'all_suppliers_initial_debt': all_suppliers_initial_debt,  # Debug uchun
     }
     return render(request, 'inventory/dashboard.html', context)
@@ -195,7 +218,7 @@ def phone_list(request):
 
     # ✅ Filtrlar
     if imei_query:
-        phones = phones.filter(imei__icontains=imei_query)
+        phones = phones.filter(imei_q(imei_query))
     if model_query:
         phones = phones.filter(phone_model__id=model_query)
     if status_filter:
@@ -305,6 +328,43 @@ def phone_create(request):
     })
 
 
+@login_required
+@boss_or_finance_required
+def phone_import(request):
+    """Taminotchi partiyasini CSV/XLSX fayldan qabul qilish"""
+    result = None
+    if request.method == 'POST':
+        form = PhoneImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            supplier = form.cleaned_data['supplier']
+            try:
+                result = import_phones(
+                    read_rows(upload.file, upload.name),
+                    form.cleaned_data['shop'], supplier, request.user,
+                    created_at=form.cleaned_data['created_at'],
+                    is_debt=form.cleaned_data['is_debt'],
+                )
+            except PhoneImportError as e:
+                messages.error(request, str(e))
+            else:
+                if result['created']:
+                    messages.success(
+                        request,
+                        f"{result['created']} ta telefon qabul qilindi! {supplier.name} qarzi: "
+                        f"+${result['total_debt']:,.2f}"
+                    )
+                if result['errors']:
+                    messages.warning(request, f"{len(result['errors'])} ta qator qabul qilinmadi")
+    else:
+        form = PhoneImportForm()
+
+    return render(request, 'inventory/phone_import.html', {
+        'form': form,
+        'result': result,
+    })
+
+
 @login_required
 @boss_or_finance_required
 def phone_update(request, pk):
@@ -708,7 +768,7 @@ def search(request):
     phones = Phone.objects.select_related('phone_model', 'memory_size', 'shop', 'created_by')
 
     if imei_query:
-        phones = phones.filter(imei__icontains=imei_query)
+        phones = phones.filter(imei_q(imei_query))
     if status_filter:
         phones = phones.filter(status=status_filter)
     if shop_id:
@@ -1034,43 +1094,54 @@ def check_daily_seller_phone_api(request):
         })
 
 @login_required
+@query_budget(8)
 def supplier_list(request):
-    """Taminotchilar ro'yxati"""
-    suppliers = Supplier.objects.all().order_by('-created_at')
-
+    """Taminotchilar ro'yxati - ✅ statistika, filtr va saralash SQL da (so'rovlar soni o'zgarmas)"""
     search_query = request.GET.get('search', '').strip()
+    debt_filter = request.GET.get('debt', '').strip()
+    sort = request.GET.get('sort', '').strip()
+    if sort not in SUPPLIER_SORTS:
+        sort = 'newest'
+
+    suppliers = Supplier.objects.with_stats()
+
     if search_query:
         suppliers = suppliers.filter(
             Q(name__icontains=search_query) |
             Q(phone_number__icontains=search_query) |
             Q(notes__icontains=search_query)
         )
+    if debt_filter == 'with_debt':
+        suppliers = suppliers.filter(balance_value__gt=0)
+    elif debt_filter == 'no_debt':
+        suppliers = suppliers.filter(balance_value__lte=0)
+    suppliers = suppliers.order_by(*SUPPLIER_SORTS[sort][1])
 
     paginator = Paginator(suppliers, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # ✅ TO'G'RI STATISTIKA - Barcha supplierlar bo'yicha
-    all_suppliers = Supplier.objects.all()
-
-    suppliers_with_debt = 0
-    total_debt = Decimal('0.00')
-    total_paid = Decimal('0.00')
-
-    for supplier in all_suppliers:
-        balance = supplier.balance
-        if balance > 0:
-            suppliers_with_debt += 1
-        total_debt += (supplier.initial_debt + supplier.total_debt)  # ✅ To'g'ri hisoblash
-        total_paid += supplier.total_paid
+    # ✅ TO'G'RI STATISTIKA - Barcha supplierlar bo'yicha, bitta so'rovda
+    stats = Supplier.objects.with_stats().aggregate(
+        total_suppliers=Count('id'),
+        suppliers_with_debt=Count('id', filter=Q(balance_value__gt=0)),
+        total_debt=Sum('balance_value'),
+        total_paid=Sum('total_paid'),
+    )
 
     context = {
         'page_obj': page_obj,
         'search_query': search_query,
-        'total_suppliers': all_suppliers.count(),
-        'suppliers_with_debt': suppliers_with_debt,
-        'total_debt': total_debt,
-        'total_paid': total_paid,
+        'debt_filter': debt_filter,
+        'sort': sort,
+        'sort_choices': [(key, label) for key, (label, _) in SUPPLIER_SORTS.items()],
+        'filter_query': urlencode({
+            key: value for key, value in (('search', search_query), ('debt', debt_filter), ('sort', sort)) if value
+        }),
+        'total_suppliers': stats['total_suppliers'],
+        'suppliers_with_debt': stats['suppliers_with_debt'],
+        'total_debt': stats['total_debt'] or Decimal('0.00'),
+        'total_paid': stats['total_paid'] or Decimal('0.00'),
     }
 
     return render(request, 'inventory/supplier_list.html', context)
@@ -1144,63 +1215,18 @@ def supplier_payment_create(request, supplier_id):
                     # ✅ shop form dan avtomatik olinadi
                     payment.save()
 
-                    amount_remaining = payment.amount
-                    initial_payment_made = Decimal('0.00')
-                    paid_phones_count = 0
-
-                    # 2. Telefonlarni tanlash
-                    if payment.payment_type == 'general':
-                        phones = supplier.get_debt_phones()
-                    else:
-                        phones = form.cleaned_data.get('selected_phones', [])
-                        phones = sorted(phones, key=lambda p: p.created_at) if phones else []
-
-                    # 3. Telefonlar qarzini to'lash
-                    for phone in phones:
-                        if amount_remaining <= 0:
-                            break
-
-                        # Telefonning qolgan qarzini hisoblash
-                        remaining_debt = phone.debt_balance
-                        if remaining_debt <= 0:
-                            continue
-
-                        # To'lanadigan summani aniqlash
-                        payment_for_phone = min(amount_remaining, remaining_debt)
-
-                        # Telefonning to'langan summasini yangilash
-                        phone.paid_amount += payment_for_phone
-                        phone.debt_balance = phone.cost_price - phone.paid_amount
-                        phone.payment_status = 'paid' if phone.debt_balance <= 0 else 'partial'
-                        phone.save(update_fields=['paid_amount', 'debt_balance', 'payment_status'])
-
-                        # To'lov tafsilotini saqlash
-                        SupplierPaymentDetail.objects.create(
-                            payment=payment,
-                            phone=phone,
-                            amount=payment_for_phone,
-                            previous_balance=remaining_debt,
-                            new_balance=phone.debt_balance
-                        )
-
-                        amount_remaining -= payment_for_phone
-                        paid_phones_count += 1
-
-                    # 4. Boshlang'ich qarzni to'lash
-                    if amount_remaining > 0 and supplier.initial_debt > 0:
-                        initial_payment_made = min(amount_remaining, supplier.initial_debt)
-                        supplier.initial_debt -= initial_payment_made
-                        amount_remaining -= initial_payment_made
-
-                    # 5. Taminotchining umumiy to'langan summasini yangilash
-                    supplier.total_paid += (payment.amount - amount_remaining)
-                    supplier.save(update_fields=['total_paid', 'initial_debt'])
-
-                    # 6. Taminotchining umumiy qarzini yangilash
-                    supplier.update_total_debt()
+                    # 2. ✅ FIFO taqsimlash - barcha telefonlar bir necha so'rovda
+                    phone_ids = None
+                    if payment.payment_type != 'general':
+                        phone_ids = [phone.pk for phone in form.cleaned_data.get('selected_phones') or []]
+                    allocation = payment.allocate(phone_ids)
                     supplier.refresh_from_db()
 
-                    # 7. ✅ Muvaffaqiyat xabari - DO'KON BILAN
+                    paid_phones_count = allocation['phones_count']
+                    initial_payment_made = allocation['initial_paid']
+                    amount_remaining = allocation['remaining']
+
+                    # 3. ✅ Muvaffaqiyat xabari - DO'KON BILAN
                     success_msg = f"✅ {payment.shop.name} do'konidan {supplier.name} ga ${payment.amount} to'lov qilindi!"
                     if paid_phones_count > 0:
                         success_msg += f" {paid_phones_count} ta telefon qarzi to'landi."
@@ -1391,80 +1417,22 @@ def supplier_payment_update(request, payment_id):
         if form.is_valid():
             try:
                 with transaction.atomic():
-                    # 1. ESKI TO'LOVNI BEKOR QILISH
-
-                    # Telefon to'lovlarini qaytarish
-                    for detail in payment.details.all():
-                        phone = detail.phone
-                        phone.paid_amount -= detail.amount
-                        phone.save(update_fields=['paid_amount'])
-
-                    # Boshlang'ich qarzga to'langan pulni qaytarish
-                    phone_payments_total = payment.details.aggregate(
-                        total=Sum('amount')
-                    )['total'] or Decimal('0.00')
-
-                    initial_paid = old_amount - phone_payments_total
-                    if initial_paid > 0:
-                        supplier.initial_debt += initial_paid
+                    # 1. ESKI TO'LOVNI BEKOR QILISH (bazadagi eski summa bilan)
+                    payment.reverse_allocation(amount=old_amount)
 
-                    # Supplier total_paid ni kamaytirish
-                    supplier.total_paid -= old_amount
-                    supplier.save(update_fields=['total_paid', 'initial_debt'])
-
-                    # 2. ESKI TAFSILOTLARNI O'CHIRISH
-                    payment.details.all().delete()
-
-                    # 3. YANGI TO'LOVNI QO'LLASH
+                    # 2. YANGI TO'LOVNI QO'LLASH
                     new_payment = form.save(commit=False)
                     # ✅ shop form dan avtomatik yangilanadi
                     new_payment.save()
 
-                    amount_remaining = new_payment.amount
-                    initial_payment_made = Decimal('0.00')
-                    paid_phones_count = 0
-
-                    # Yangi to'lovni telefonlarga tarqatish
-                    if new_payment.payment_type == 'general':
-                        phones = supplier.get_debt_phones()
-                    else:
-                        phones = form.cleaned_data.get('selected_phones', [])
-                        phones = sorted(phones, key=lambda p: p.created_at) if phones else []
-
-                    for phone in phones:
-                        if amount_remaining <= 0:
-                            break
-
-                        remaining_debt = phone.cost_price - phone.paid_amount
-                        if remaining_debt <= 0:
-                            continue
-
-                        payment_for_phone = min(amount_remaining, remaining_debt)
+                    phone_ids = None
+                    if new_payment.payment_type != 'general':
+                        phone_ids = [phone.pk for phone in form.cleaned_data.get('selected_phones') or []]
+                    allocation = new_payment.allocate(phone_ids)
 
-                        phone.paid_amount += payment_for_phone
-                        phone.save(update_fields=['paid_amount'])
-
-                        SupplierPaymentDetail.objects.create(
-                            payment=new_payment,
-                            phone=phone,
-                            amount=payment_for_phone,
-                            previous_balance=remaining_debt + payment_for_phone,
-                            new_balance=remaining_debt
-                        )
-
-                        amount_remaining -= payment_for_phone
-                        paid_phones_count += 1
-
-                    # Boshlang'ich qarzga to'lov
-                    if amount_remaining > 0 and supplier.initial_debt > 0:
-                        initial_payment_made = min(amount_remaining, supplier.initial_debt)
-                        supplier.initial_debt -= initial_payment_made
-                        amount_remaining -= initial_payment_made
-
-                    # Supplier yangilash
-                    supplier.total_paid += (new_payment.amount - amount_remaining)
-                    supplier.save(update_fields=['total_paid', 'initial_debt'])
-                    supplier.update_total_debt()
+                    paid_phones_count = allocation['phones_count']
+                    initial_payment_made = allocation['initial_paid']
+                    amount_remaining = allocation['remaining']
 
                     # ✅ Xabar - DO'KON VA MANBA O'ZGARISHLARINI KO'RSATISH
                     success_msg = f"✅ To'lov muvaffaqiyatli yangilandi!"
@@ -1528,29 +1496,12 @@ def supplier_payment_delete(request, payment_id):
     if request.method == 'POST':
         try:
             with transaction.atomic():
-                # 1. Telefon to'lovlarini qaytarish
-                total_phone_payment = Decimal('0.00')
-                for detail in payment.details.all():
-                    phone = detail.phone
-                    phone.paid_amount -= detail.amount
-                    phone.save(update_fields=['paid_amount'])
-                    total_phone_payment += detail.amount
-
-                # 2. Boshlang'ich qarzga to'langan pulni qaytarish
-                initial_paid = payment.amount - total_phone_payment
-                if initial_paid > 0:
-                    supplier.initial_debt += initial_paid
-
-                # 3. Supplier total_paid ni kamaytirish
-                supplier.total_paid -= payment.amount
-                supplier.save(update_fields=['total_paid', 'initial_debt'])
-
-                # 4. To'lovni o'chirish
+                # 1. Telefon to'lovlari va boshlang'ich qarzni qaytarish
+                payment.reverse_allocation()
+
+                # 2. To'lovni o'chirish
                 payment_amount = payment.amount
                 payment.delete()
-
-                # 5. Supplier qarzini yangilash
-                supplier.update_total_debt()
                 supplier.refresh_from_db()
 
                 messages.success(
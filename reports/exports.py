@@ -0,0 +1,180 @@
+# reports/exports.py - XLSX EKSPORT (write_only + StreamingHttpResponse)
+
+import tempfile
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# queryset.iterator() bo'lagi - xotira eksport hajmiga bog'liq emas
+EXPORT_CHUNK_SIZE = 2000
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def queryset_rows(queryset, build_row, chunk_size=EXPORT_CHUNK_SIZE, numbered=True):
+    """
+    QuerySet qatorlari generatori - iterator(chunk_size) bilan, keshlanmaydi
+
+    build_row(obj) -> list; numbered=True bo'lsa boshiga № qo'shiladi.
+    """
+    for index, obj in enumerate(queryset.iterator(chunk_size=chunk_size), 1):
+        row = build_row(obj)
+        yield [index, *row] if numbered else row
+
+
+class XlsxExport:
+    """
+    Ko'p varaqli XLSX eksport
+
+    Varaqlar qatorlari generator sifatida beriladi va faqat javob
+    yuborilayotganda o'qiladi. openpyxl write_only rejimi qatorlarni
+    vaqtinchalik faylga yozadi, tayyor fayl bo'laklab uzatiladi.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.sheets = []
+
+    def add_sheet(self, title, headers, rows):
+        """rows - qatorlar iterable (generator bo'lishi mumkin)"""
+        self.sheets.append((title[:31], headers, rows))
+        return self
+
+    def write(self, output):
+        workbook = Workbook(write_only=True)
+        bold = Font(bold=True)
+
+        for title, headers, rows in self.sheets:
+            sheet = workbook.create_sheet(title=title)
+            if headers:
+                header_cells = []
+                for header in headers:
+                    cell = WriteOnlyCell(sheet, value=header)
+                    cell.font = bold
+                    header_cells.append(cell)
+                sheet.append(header_cells)
+            for row in rows:
+                sheet.append(row)
+
+        if not self.sheets:
+            workbook.create_sheet()
+        workbook.save(output)
+
+    def iter_bytes(self, chunk_size=STREAM_CHUNK_SIZE):
+        with tempfile.TemporaryFile() as output:
+            self.write(output)
+            output.seek(0)
+            while True:
+                chunk = output.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def response(self):
+        """StreamingHttpResponse - so'rovlar generator ichida, view qaytgandan keyin bajariladi"""
+        response = StreamingHttpResponse(self.iter_bytes(), content_type=XLSX_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}"'
+        return response
+
+
+def export_filename(prefix):
+    return f'{prefix}_{timezone.localtime().strftime("%Y%m%d_%H%M%S")}.xlsx'
+
+
+# ============= VARAQLAR =============
+
+def add_summary_sheet(export, title, data):
+    """Ichma-ich lug'at (ExportHelper.prepare_*) -> 'Bo'lim | Ko'rsatkich | Qiymat' qatorlari"""
+    def flatten(value, section=''):
+        for key, item in value.items():
+            if isinstance(item, dict):
+                yield from flatten(item, key)
+            else:
+                yield [section, key, item]
+
+    return export.add_sheet(title, ["Bo'lim", "Ko'rsatkich", 'Qiymat'], flatten(data))
+
+
+def add_phone_sales_sheet(export, phone_sales):
+    phone_sales = phone_sales.select_related(
+        'phone__phone_model', 'phone__memory_size', 'customer', 'salesman'
+    ).with_profit().order_by('sale_date', 'id')
+
+    return export.add_sheet('Telefonlar', [
+        '№', 'Sana', 'Telefon', 'IMEI', 'Mijoz', 'Sotuvchi', 'Narx ($)', 'Naqd ($)', 'Karta ($)',
+        'Nasiya ($)', 'Qarz ($)', 'Tannarx ($)', 'Foyda ($)', 'Qaytarilgan'
+    ], queryset_rows(phone_sales, lambda sale: [
+        sale.sale_date,
+        f"{sale.phone.phone_model} {sale.phone.memory_size}",
+        sale.phone.imei,
+        sale.customer.name,
+        sale.salesman.get_full_name() or sale.salesman.username,
+        sale.sale_price, sale.cash_amount, sale.card_amount, sale.credit_amount, sale.debt_amount,
+        sale.phone.cost_price,
+        sale.calculated_profit,
+        'Ha' if sale.is_returned else "Yo'q",
+    ]))
+
+
+def add_accessory_sales_sheet(export, accessory_sales):
+    accessory_sales = accessory_sales.select_related(
+        'accessory', 'customer', 'salesman'
+    ).with_profit().order_by('sale_date', 'id')
+
+    return export.add_sheet('Aksessuarlar', [
+        '№', 'Sana', 'Aksessuar', 'Soni', 'Mijoz', 'Sotuvchi', "Birlik narxi (so'm)", "Jami (so'm)",
+        "Naqd (so'm)", "Karta (so'm)", "Nasiya (so'm)", "Qarz (so'm)", "Foyda (so'm)"
+    ], queryset_rows(accessory_sales, lambda sale: [
+        sale.sale_date,
+        sale.accessory.name,
+        sale.quantity,
+        sale.customer.name,
+        sale.salesman.get_full_name() or sale.salesman.username,
+        sale.unit_price, sale.total_price, sale.cash_amount, sale.card_amount, sale.credit_amount,
+        sale.debt_amount,
+        sale.calculated_profit,
+    ]))
+
+
+def add_exchanges_sheet(export, exchanges):
+    exchanges = exchanges.select_related(
+        'new_phone__phone_model', 'new_phone__memory_size', 'old_phone_model', 'old_phone_memory', 'salesman'
+    ).with_profit().order_by('exchange_date', 'id')
+
+    return export.add_sheet('Almashtirishlar', [
+        '№', 'Sana', 'Mijoz', 'Eski telefon', 'Eski IMEI', 'Yangi telefon', 'Yangi IMEI', 'Sotuvchi',
+        'Yangi narx ($)', 'Eski qiymat ($)', 'Naqd ($)', 'Karta ($)', 'Nasiya ($)', 'Qarz ($)', 'Foyda ($)'
+    ], queryset_rows(exchanges, lambda exchange: [
+        exchange.exchange_date,
+        exchange.customer_name,
+        f"{exchange.old_phone_model} {exchange.old_phone_memory}",
+        exchange.old_phone_imei or '-',
+        f"{exchange.new_phone.phone_model} {exchange.new_phone.memory_size}",
+        exchange.new_phone.imei,
+        exchange.salesman.get_full_name() or exchange.salesman.username,
+        exchange.new_phone_price, exchange.old_phone_accepted_price, exchange.cash_amount,
+        exchange.card_amount, exchange.credit_amount, exchange.debt_amount,
+        exchange.calculated_profit,
+    ]))
+
+
+def add_period_sales_sheets(export, shop, start_date, end_date, salesman=None):
+    """Oraliqdagi telefon, aksessuar va almashtirish varaqlari"""
+    from sales.models import PhoneSale, AccessorySale, PhoneExchange
+
+    phone_sales = PhoneSale.objects.filter(phone__shop=shop, sale_date__range=[start_date, end_date])
+    accessory_sales = AccessorySale.objects.filter(accessory__shop=shop, sale_date__range=[start_date, end_date])
+    exchanges = PhoneExchange.objects.filter(new_phone__shop=shop, exchange_date__range=[start_date, end_date])
+    if salesman is not None:
+        phone_sales = phone_sales.filter(salesman=salesman)
+        accessory_sales = accessory_sales.filter(salesman=salesman)
+        exchanges = exchanges.filter(salesman=salesman)
+
+    add_phone_sales_sheet(export, phone_sales)
+    add_accessory_sales_sheet(export, accessory_sales)
+    add_exchanges_sheet(export, exchanges)
+    return export
@@ -0,0 +1,197 @@
+# reports/jobs.py - FON VAZIFALARI (ReportJob + run_report_worker)
+
+import logging
+import os
+import tempfile
+import time
+import traceback
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.files import File
+
+from shops.models import Shop
+from .exports import XlsxExport, export_filename, add_summary_sheet, add_period_sales_sheets
+from .models import ReportCalculator
+from .utils import ExportHelper
+
+logger = logging.getLogger('performance')
+
+
+# ============= XLSX EKSPORTLAR (view va worker uchun umumiy) =============
+
+def build_daily_export(shop, selected_date):
+    """Kunlik hisobot XLSX - jamlanma + shu kungi sotuvlar"""
+    daily_data = ReportCalculator(shop).get_daily_report(selected_date)
+
+    export = XlsxExport(export_filename(f'kunlik_hisobot_{selected_date}'))
+    add_summary_sheet(export, 'Hisobot', ExportHelper.prepare_daily_report_for_export(daily_data))
+    return add_period_sales_sheets(export, shop, selected_date, selected_date)
+
+
+def build_monthly_export(shop, year, month):
+    """Oylik hisobot XLSX - jamlanma, kunlar va oy sotuvlari"""
+    monthly_data = ReportCalculator(shop).get_monthly_report(year, month)
+
+    export = XlsxExport(export_filename(f'oylik_hisobot_{year}_{month:02d}'))
+    add_summary_sheet(export, 'Hisobot', ExportHelper.prepare_monthly_report_for_export(monthly_data))
+    export.add_sheet('Kunlar', [
+        'Sana', 'Telefon ($)', 'Aksessuar (so\'m)', 'Telefonlar', 'Aksessuarlar', 'Almashtirishlar',
+        'Qaytarishlar', 'Foyda ($)', 'Aksessuar foydasi (so\'m)', 'Xarajatlar (so\'m)'
+    ], ([
+        day['date'], day['sales']['phone_total_usd'], day['sales']['accessory_total_uzs'],
+        day['counts']['phone'], day['counts']['accessory'], day['counts']['exchange'], day['counts']['returns'],
+        day['profits']['total_phone_exchange_profit'], day['profits']['accessory_profit'], day['expenses'],
+    ] for day in monthly_data['daily_stats']))
+    return add_period_sales_sheets(
+        export, shop, monthly_data['period']['start_date'], monthly_data['period']['end_date']
+    )
+
+
+def build_seller_salary_export(shop, seller, year, month):
+    """Sotuvchi oylik maoshi XLSX - jamlanma, kunlar va sotuvlar"""
+    salary_data = ReportCalculator(shop).get_seller_monthly_salary(seller, year, month)
+
+    export = XlsxExport(export_filename(f'maosh_{seller.username}_{year}_{month:02d}'))
+    add_summary_sheet(export, 'Maosh', ExportHelper.prepare_seller_salary_for_export(salary_data))
+    export.add_sheet('Kunlar', [
+        'Sana', 'Telefonlar', 'Aksessuarlar', 'Almashtirishlar', 'Qaytarishlar',
+        'Telefon ($)', 'Aksessuar (so\'m)', 'Telefon foydasi ($)', 'Aksessuar foydasi (so\'m)'
+    ], ([
+        day['date'], day['counts']['phone'], day['counts']['accessory'], day['counts']['exchange'],
+        day['counts']['returns'], day['sales']['phone_total_usd'], day['sales']['accessory_total_uzs'],
+        day['profits']['total_phone_exchange_profit'], day['profits']['accessory_profit'],
+    ] for day in salary_data['daily_data']))
+    return add_period_sales_sheets(
+        export, shop, salary_data['period']['start_date'], salary_data['period']['end_date'],
+        salesman=seller
+    )
+
+
+def build_sales_export(shop, start_date, end_date):
+    """Sana oralig'idagi barcha sotuvlar XLSX"""
+    export = XlsxExport(export_filename(f'sotuvlar_{start_date}_{end_date}'))
+    return add_period_sales_sheets(export, shop, start_date, end_date)
+
+
+# ============= JSON NATIJALAR =============
+
+def yearly_profit_payload(yearly_data):
+    """Yillik foyda tafsiloti (yearly_profit_detail API javobi)"""
+    profits = yearly_data.get('profits', {})
+    totals = yearly_data.get('totals', {})
+    counts = yearly_data.get('counts', {})
+    return {
+        'success': True,
+        'period': f"{yearly_data['year']}",
+        'profits': {
+            'phone_profit': float(profits.get('phone_profit', 0)),
+            'accessory_profit': float(profits.get('accessory_profit', 0)),
+            'exchange_profit': float(profits.get('exchange_profit', 0)),
+            'total_profit': float(profits.get('total_profit', 0))
+        },
+        'totals': {
+            'phone_sales': float(totals.get('phone_sales', 0)),
+            'accessory_sales': float(totals.get('accessory_sales', 0)),
+            'total_sales': float(totals.get('sales', 0))
+        },
+        'counts': {
+            'phone': counts.get('phone', 0),
+            'accessory': counts.get('accessory', 0),
+            'exchange': counts.get('exchange', 0),
+            'total': counts.get('total', 0)
+        },
+        'profit_margin': float(profits.get('profit_margin', 0))
+    }
+
+
+def yearly_report_payload(calculator, year):
+    """
+    Yillik hisobot: foyda tafsiloti + oylar + sotuvchilar jadvali
+
+    get_yearly_report QuickReport keshiga ham yoziladi - keyin sahifa tez ochiladi.
+    """
+    yearly_data = calculator.get_yearly_report(year)
+    payload = yearly_profit_payload(yearly_data)
+    payload['months'] = [{
+        'month': month['month'],
+        'phone_sales': month['totals']['phone_sales_usd'],
+        'accessory_sales': month['totals']['accessory_sales_uzs'],
+        'total_phone_exchange_profit': month['profits']['total_phone_exchange_profit'],
+        'accessory_profit': month['profits']['accessory_profit'],
+        'expenses': month['totals']['expenses'],
+    } for month in yearly_data['monthly_stats']]
+    payload['sellers'] = [{
+        **{key: value for key, value in row.items() if key != 'seller'},
+        'seller_id': row['seller'].id,
+        'seller_name': row['seller'].get_full_name() or row['seller'].username,
+    } for row in calculator.get_yearly_sellers_stats(year)]
+    return payload
+
+
+# ============= VAZIFA TURLARI =============
+
+def _run_yearly_report(shop, params):
+    return yearly_report_payload(ReportCalculator(shop), params['year'])
+
+
+def _run_yearly_profit_detail(shop, params):
+    return yearly_profit_payload(ReportCalculator(shop).get_yearly_report(params['year']))
+
+
+def _run_daily_export(shop, params):
+    return build_daily_export(shop, date.fromisoformat(params['date']))
+
+
+def _run_monthly_export(shop, params):
+    return build_monthly_export(shop, params['year'], params['month'])
+
+
+def _run_seller_salary_export(shop, params):
+    seller = User.objects.get(id=params['seller'])
+    return build_seller_salary_export(shop, seller, params['year'], params['month'])
+
+
+def _run_sales_export(shop, params):
+    return build_sales_export(shop, date.fromisoformat(params['start_date']), date.fromisoformat(params['end_date']))
+
+
+# Turi -> (kerakli parametrlar, bajaruvchi). Bajaruvchi lug'at (JSON natija) yoki XlsxExport qaytaradi
+JOB_TYPES = {
+    'yearly_report': (('shop', 'year'), _run_yearly_report),
+    'yearly_profit_detail': (('shop', 'year'), _run_yearly_profit_detail),
+    'daily_export': (('shop', 'date'), _run_daily_export),
+    'monthly_export': (('shop', 'year', 'month'), _run_monthly_export),
+    'seller_salary_export': (('shop', 'year', 'month', 'seller'), _run_seller_salary_export),
+    'sales_export': (('shop', 'start_date', 'end_date'), _run_sales_export),
+}
+
+
+def run_job(job):
+    """
+    Egallangan vazifani bajarish - natija JSON yoki fayl sifatida saqlanadi
+
+    Xatolik vazifani 'failed' qiladi (worker to'xtamaydi). Natija: True - muvaffaqiyatli.
+    """
+    started = time.perf_counter()
+    try:
+        _, handler = JOB_TYPES[job.kind]
+        shop = Shop.objects.get(id=job.params['shop'])
+        result = handler(shop, job.params)
+
+        if isinstance(result, XlsxExport):
+            with tempfile.TemporaryFile() as output:
+                result.write(output)
+                output.seek(0)
+                job.result_file.save(result.filename, File(output), save=False)
+            # Saqlangan nom tasodifiy - yuklab olishda foydalanuvchiga asl nom beriladi
+            result = {'filename': os.path.basename(result.filename)}
+        job.mark_done(result)
+    except Exception as e:
+        # To'liq traceback job.error da
+        logger.warning("Hisobot vazifasi #%s (%s) xatolik bilan tugadi: %r", job.pk, job.kind, e)
+        job.mark_failed(traceback.format_exc(limit=5))
+        return False
+
+    logger.info("Hisobot vazifasi #%s (%s): %.1f s", job.pk, job.kind, time.perf_counter() - started)
+    return True
@@ -0,0 +1,221 @@
+import json
+import logging
+import platform
+import statistics
+import time
+from datetime import datetime
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from reports.models import ReportCalculator, ShopDailySummary
+from sales.models import AccessorySale, PhoneSale
+from shops.models import Shop
+
+# Asosiy ro'yxat sahifalari (URL nomi, GET parametrlari - {shop}, {date}, {year}, {month})
+LIST_VIEWS = [
+    ('reports:daily', {'shop': '{shop}', 'date': '{date}'}),
+    ('reports:monthly', {'shop': '{shop}', 'year': '{year}', 'month': '{month}'}),
+    ('reports:yearly', {'shop': '{shop}', 'year': '{year}'}),
+    ('reports:shops', {'period': 'monthly', 'year': '{year}', 'month': '{month}'}),
+    ('sales:phone_sale_list', {}),
+    ('sales:accessory_sale_list', {}),
+    ('sales:phone_exchange_list', {}),
+    ('sales:debt_list', {}),
+    ('shop:customer_list', {}),
+    ('inventory:phone_list', {}),
+    ('inventory:accessory_list', {}),
+    ('inventory:supplier_list', {}),
+    ('inventory:dashboard', {}),
+    ('users:dashboard', {}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Hisobotlar va asosiy sahifalar vaqti hamda SQL so'rovlar sonini o'lchash, "
+        "natijani JSON ga yozish va oldingi natija (--baseline) bilan solishtirish"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, help="Do'kon (ID, standart - eng ko'p sotuvli)")
+        parser.add_argument('--date', help="Hisobot sanasi (YYYY-MM-DD, standart - oxirgi savdo kuni)")
+        parser.add_argument('--runs', type=int, default=5, help="Har bir o'lchov necha marta takrorlanadi")
+        parser.add_argument('--output', default='benchmark_reports.json', help="Natija fayli (JSON)")
+        parser.add_argument('--baseline', help="Solishtirish uchun oldingi natija fayli")
+        parser.add_argument('--user', help="Sahifalar shu foydalanuvchi nomidan ochiladi (standart - birinchi rahbar)")
+        parser.add_argument('--skip-views', action='store_true', help="Faqat hisobot funksiyalari")
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("--runs kamida 1 bo'lishi kerak")
+
+        shop = self.get_shop(options['shop'])
+        report_date = self.get_report_date(shop, options['date'])
+        self.runs = options['runs']
+
+        self.stdout.write(f"{shop.name}, {report_date}, {self.runs} marta")
+        results = {}
+        for name, func in self.report_cases(shop, report_date):
+            results[name] = self.measure(func)
+            self.print_result(name, results[name])
+
+        if not options['skip_views']:
+            # QueryTimingMiddleware har bir so'rovni logga yozadi - o'lchov natijasi yetarli
+            logging.getLogger('performance').setLevel(logging.WARNING)
+            client = self.get_client(options['user'])
+            for url_name, url in self.view_cases(shop, report_date):
+                results[url_name] = self.measure(lambda: client.get(url, secure=True, HTTP_HOST='localhost'))
+                self.print_result(url_name, results[url_name])
+
+        data = {
+            'created_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'shop': {'id': shop.id, 'name': shop.name},
+            'date': report_date.isoformat(),
+            'runs': self.runs,
+            'data_size': {
+                'phone_sales': PhoneSale.objects.filter(phone__shop=shop).count(),
+                'accessory_sales': AccessorySale.objects.filter(accessory__shop=shop).count(),
+                'summary_days': ShopDailySummary.objects.filter(shop=shop).count(),
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"✓ Natija yozildi: {options['output']}"))
+
+        if options['baseline']:
+            self.compare(options['baseline'], results)
+
+    # ============= TANLASH =============
+
+    def get_shop(self, shop_id):
+        if shop_id:
+            shop = Shop.objects.filter(id=shop_id).first()
+            if not shop:
+                raise CommandError(f"Do'kon topilmadi: {shop_id}")
+            return shop
+        shop = Shop.objects.annotate(days=Count('daily_summaries')).order_by('-days', 'id').first()
+        if not shop:
+            raise CommandError("Do'konlar yo'q - avval generate_demo_data ni ishga tushiring")
+        return shop
+
+    def get_report_date(self, shop, value):
+        if value:
+            try:
+                return datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Noto'g'ri sana: {value} (YYYY-MM-DD kerak)")
+        last = ShopDailySummary.objects.filter(shop=shop).aggregate(last=Max('date'))['last']
+        return last or timezone.localdate()
+
+    def get_client(self, username):
+        users = User.objects.filter(userprofile__role='boss')
+        if username:
+            users = User.objects.filter(username=username)
+        user = users.order_by('id').first()
+        if not user:
+            raise CommandError("Rahbar foydalanuvchi topilmadi (--user bering yoki --skip-views)")
+        # So'rov chegarasidan oshgan view 500 qaytaradi - o'lchov to'xtamaydi
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        return client
+
+    # ============= O'LCHOVLAR =============
+
+    def report_cases(self, shop, report_date):
+        """Kesh o'chirilgan - har safar to'liq hisoblanadi"""
+        calculator = ReportCalculator(shop, use_cache=False)
+        year, month = report_date.year, report_date.month
+        shops = list(Shop.objects.order_by('id'))
+        cases = [
+            ('get_daily_report', lambda: calculator.get_daily_report(report_date)),
+            ('get_monthly_report', lambda: calculator.get_monthly_report(year, month)),
+            ('get_yearly_report', lambda: calculator.get_yearly_report(year)),
+            ('get_shops_monthly_report', lambda: calculator.get_shops_monthly_report(shops, year, month)),
+        ]
+        seller = User.objects.filter(
+            phonesale__phone__shop=shop, phonesale__sale_date__year=year, phonesale__sale_date__month=month
+        ).order_by('id').first()
+        if seller:
+            cases.append(
+                ('get_seller_monthly_salary', lambda: calculator.get_seller_monthly_salary(seller, year, month))
+            )
+        return cases
+
+    def view_cases(self, shop, report_date):
+        values = {
+            'shop': shop.id, 'date': report_date.isoformat(),
+            'year': report_date.year, 'month': report_date.month,
+        }
+        for url_name, params in LIST_VIEWS:
+            query = '&'.join(f"{key}={value.format(**values)}" for key, value in params.items())
+            yield url_name, reverse(url_name) + (f'?{query}' if query else '')
+
+    def measure(self, func):
+        """Har bir takrorlash alohida o'lchanadi; so'rovlar soni oxirgi takrorlashdan"""
+        timings = []
+        status = None
+        for _ in range(self.runs):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                result = func()
+                timings.append((time.perf_counter() - started) * 1000)
+            status = getattr(result, 'status_code', status)
+
+        measured = {
+            'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(min(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': len(queries),
+        }
+        if status is not None:
+            measured['status'] = status
+        return measured
+
+    def print_result(self, name, result):
+        line = f"{name:<32} {result['median_ms']:>9.1f} ms  {result['queries']:>4} so'rov"
+        if result.get('status', 200) != 200:
+            self.stdout.write(self.style.WARNING(f"{line}  HTTP {result['status']}"))
+        else:
+            self.stdout.write(line)
+
+    # ============= SOLISHTIRISH =============
+
+    def compare(self, path, results):
+        try:
+            with open(path, encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Baseline o'qilmadi: {path} ({e})")
+
+        self.stdout.write(f"\nSolishtirish: {path}")
+        for name, result in results.items():
+            old = baseline.get(name)
+            if not old:
+                self.stdout.write(f"{name:<32} yangi")
+                continue
+            change = (result['median_ms'] - old['median_ms']) / old['median_ms'] * 100 if old['median_ms'] else 0
+            line = (
+                f"{name:<32} {old['median_ms']:>9.1f} -> {result['median_ms']:>9.1f} ms ({change:+.0f}%)  "
+                f"{old['queries']:>4} -> {result['queries']:>4} so'rov"
+            )
+            # So'rovlar soni ko'paysa - regressiya (vaqt shovqinli, so'rovlar soni aniq)
+            if result['queries'] > old['queries']:
+                self.stdout.write(self.style.ERROR(line))
+            elif result['queries'] < old['queries']:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
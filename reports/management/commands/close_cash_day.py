@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reports.models import CashBalanceCheckpoint
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Kunni yopish - kassa qoldig'i nazorat nuqtasini (CashBalanceCheckpoint) yozish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, help="Faqat shu do'kon (ID)")
+        parser.add_argument('--date', help="Yopiladigan kun (YYYY-MM-DD), standart - kecha")
+
+    def handle(self, *args, **options):
+        shops = Shop.objects.all()
+        if options['shop']:
+            shops = shops.filter(id=options['shop'])
+            if not shops.exists():
+                raise CommandError(f"Do'kon topilmadi: {options['shop']}")
+
+        if options['date']:
+            try:
+                target_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Noto'g'ri sana: {options['date']} (YYYY-MM-DD kerak)")
+        else:
+            target_date = timezone.localdate() - timedelta(days=1)
+
+        for shop in shops:
+            checkpoint = CashBalanceCheckpoint.close_day(shop, target_date)
+            self.stdout.write(
+                f"{shop.name}: {target_date} - ${checkpoint.closing_usd}, {checkpoint.closing_uzs} so'm"
+            )
+
+        self.stdout.write(self.style.SUCCESS("✓ Kun yopildi!"))
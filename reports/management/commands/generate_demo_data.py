@@ -0,0 +1,433 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import Accessory, AccessoryPurchaseHistory, MemorySize, Phone, PhoneModel, Supplier
+from sales.models import AccessorySale, Debt, Expense, PhoneExchange, PhoneReturn, PhoneSale
+from shops.models import Customer, Shop
+from users.models import CommissionHistory
+
+DEMO_SHOP_PREFIX = "Demo do'kon"
+DEMO_USER_PREFIX = 'demo_'
+DEMO_SUPPLIER_PREFIX = 'Demo taminotchi'
+DEMO_CUSTOMER_PREFIX = 'Demo mijoz'
+DEMO_PASSWORD = 'demo12345'
+
+# Model -> (tannarx $, xotiralar)
+PHONE_CATALOG = [
+    ('iPhone 11', 260, ['64GB', '128GB']),
+    ('iPhone 12', 340, ['64GB', '128GB', '256GB']),
+    ('iPhone 13', 430, ['128GB', '256GB']),
+    ('iPhone 14', 520, ['128GB', '256GB', '512GB']),
+    ('iPhone 14 Pro', 700, ['128GB', '256GB', '512GB']),
+    ('iPhone 15', 680, ['128GB', '256GB']),
+    ('iPhone 15 Pro Max', 980, ['256GB', '512GB', '1TB']),
+]
+MEMORY_EXTRA = {'64GB': 0, '128GB': 30, '256GB': 70, '512GB': 130, '1TB': 200}
+
+# Nomi, tannarx (so'm)
+ACCESSORY_CATALOG = [
+    ("G'ilof", 25000), ('Himoya oynasi', 15000), ('Zaryadlovchi 20W', 90000), ('Kabel Lightning', 35000),
+    ('Kabel USB-C', 30000), ('AirPods g\'ilofi', 40000), ('Quloqchin', 120000), ('Powerbank 10000', 180000),
+    ('Avto ushlagich', 60000), ('MagSafe', 150000),
+]
+EXPENSE_NAMES = ['Ijara', 'Elektr', 'Internet', 'Tushlik', 'Transport', 'Reklama', "Ta'mirlash"]
+RETURN_REASONS = ['Ekran nosoz', 'Mijoz fikridan qaytdi', 'Batareya tez tugaydi', 'Face ID ishlamaydi']
+
+
+class Command(BaseCommand):
+    help = (
+        "Sinov uchun deterministik ma'lumotlar: do'konlar, sotuvchilar, taminotchilar, telefonlar, "
+        "aksessuarlar va bir necha yillik sotuv/almashtirish/qaytarish/xarajat/qarzlar (--seed bo'yicha)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help="Tasodifiy sonlar urug'i (standart - 1)")
+        parser.add_argument('--shops', type=int, default=2, help="Do'konlar soni")
+        parser.add_argument('--sellers', type=int, default=3, help="Har bir do'kondagi sotuvchilar soni")
+        parser.add_argument('--suppliers', type=int, default=4, help="Taminotchilar soni")
+        parser.add_argument('--accessories', type=int, default=40, help="Har bir do'kondagi aksessuar turlari")
+        parser.add_argument('--days', type=int, default=730, help="Necha kunlik tarix (standart - 2 yil)")
+        parser.add_argument('--end', help="Oxirgi kun (YYYY-MM-DD, standart - bugun)")
+        parser.add_argument('--phones-per-day', type=int, default=4,
+                            help="Do'kon bo'yicha kunlik o'rtacha telefon sotuvi")
+        parser.add_argument('--flush', action='store_true', help="Avvalgi demo ma'lumotlarni o'chirib qayta yaratish")
+
+    def handle(self, *args, **options):
+        if options['end']:
+            try:
+                end_date = datetime.strptime(options['end'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Noto'g'ri sana: {options['end']} (YYYY-MM-DD kerak)")
+        else:
+            end_date = timezone.localdate()
+        if options['shops'] < 1 or options['sellers'] < 1 or options['days'] < 1:
+            raise CommandError("--shops, --sellers va --days kamida 1 bo'lishi kerak")
+
+        if self.demo_exists():
+            if not options['flush']:
+                raise CommandError("Demo ma'lumotlar allaqachon mavjud - qayta yaratish uchun --flush bering")
+            self.flush()
+
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.start_date = end_date - timedelta(days=options['days'] - 1)
+        self.end_date = end_date
+        self.counts = dict.fromkeys(
+            ['phones', 'phone_sales', 'accessory_sales', 'exchanges', 'returns', 'expenses', 'debts'], 0
+        )
+        self.next_imei = self.first_free_imei()
+        self.next_customer = 0
+
+        with transaction.atomic():
+            self.create_catalog()
+            self.create_people()
+            self.create_accessories()
+
+        self.generate_days()
+
+        self.stdout.write(
+            f"{len(self.shops)} do'kon, {sum(len(s) for s in self.sellers.values())} sotuvchi, "
+            f"{len(self.suppliers)} taminotchi, {self.next_customer} mijoz, {self.start_date} - {self.end_date}"
+        )
+        self.stdout.write(", ".join(f"{name}: {count}" for name, count in self.counts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Demo ma'lumotlar yaratildi (login: {DEMO_USER_PREFIX}boss / {DEMO_PASSWORD})"
+        ))
+
+    # ============= TOZALASH =============
+
+    @staticmethod
+    def demo_exists():
+        return (
+            Shop.objects.filter(name__startswith=DEMO_SHOP_PREFIX).exists()
+            or User.objects.filter(username__startswith=DEMO_USER_PREFIX).exists()
+        )
+
+    def flush(self):
+        """Demo do'konlar (kaskad - telefonlar, jamlanmalar), foydalanuvchilar, mijozlar"""
+        shops = Shop.objects.filter(name__startswith=DEMO_SHOP_PREFIX)
+        with transaction.atomic():
+            # Operatsiyalar do'kondan oldin - o'chirish signallari jamlanmaga yozadi,
+            # do'kon bilan birga o'chirilsa o'chgan do'konga qator qayta yaratiladi
+            PhoneReturn.objects.filter(phone_sale__phone__shop__in=shops).delete()
+            PhoneExchange.objects.filter(new_phone__shop__in=shops).delete()
+            PhoneSale.objects.filter(phone__shop__in=shops).delete()
+            AccessorySale.objects.filter(accessory__shop__in=shops).delete()
+            Expense.objects.filter(shop__in=shops).delete()
+            shops.delete()
+            User.objects.filter(username__startswith=DEMO_USER_PREFIX).delete()
+            Customer.objects.filter(name__startswith=DEMO_CUSTOMER_PREFIX).delete()
+            Supplier.objects.filter(name__startswith=DEMO_SUPPLIER_PREFIX).delete()
+        self.stdout.write("Avvalgi demo ma'lumotlar o'chirildi")
+
+    @staticmethod
+    def first_free_imei():
+        """Demo IMEI lar 35 bilan boshlanadi - mavjud telefonlar bilan to'qnashmasin"""
+        last = Phone.objects.filter(imei__regex=r'^35\d{13}$').order_by('-imei').values_list('imei', flat=True).first()
+        return int(last) + 1 if last else 350000000000000
+
+    def new_imei(self):
+        imei = str(self.next_imei)
+        self.next_imei += 1
+        return imei
+
+    # ============= ASOSIY MA'LUMOTLAR =============
+
+    def create_catalog(self):
+        self.models = []
+        for model_name, base_price, memories in PHONE_CATALOG:
+            phone_model, _ = PhoneModel.objects.get_or_create(model_name=model_name)
+            for size in memories:
+                memory, _ = MemorySize.objects.get_or_create(size=size)
+                self.models.append((phone_model, memory, base_price + MEMORY_EXTRA[size]))
+
+    def create_user(self, username, first_name, role):
+        user = User.objects.create_user(username=username, password=DEMO_PASSWORD, first_name=first_name)
+        # UserProfile signal orqali yaratiladi
+        profile = user.userprofile
+        profile.role = role
+        profile.save(update_fields=['role'])
+        return user
+
+    def create_people(self):
+        rng = self.rng
+        self.boss = self.create_user(f'{DEMO_USER_PREFIX}boss', 'Demo rahbar', 'boss')
+
+        self.suppliers = [
+            Supplier.objects.create(
+                name=f"{DEMO_SUPPLIER_PREFIX} {n}",
+                phone_number=f"+99871{n:07d}",
+                created_at=self.start_date,
+            )
+            for n in range(1, self.options['suppliers'] + 1)
+        ]
+
+        self.shops = []
+        self.sellers = {}
+        for shop_no in range(1, self.options['shops'] + 1):
+            shop = Shop.objects.create(name=f"{DEMO_SHOP_PREFIX} {shop_no}", owner=self.boss,
+                                       created_at=self.start_date)
+            self.shops.append(shop)
+            self.sellers[shop.id] = []
+            for seller_no in range(1, self.options['sellers'] + 1):
+                seller = self.create_user(
+                    f'{DEMO_USER_PREFIX}seller_{shop_no}_{seller_no}', f"Sotuvchi {shop_no}-{seller_no}", 'seller'
+                )
+                self.sellers[shop.id].append(seller)
+
+                # Komissiya tarixi: boshlang'ich shartlar va yarim yo'lda o'zgarish
+                midpoint = self.start_date + (self.end_date - self.start_date) / 2
+                for effective_date in (self.start_date, midpoint):
+                    CommissionHistory.objects.create(
+                        user=seller,
+                        phone_commission_percent=Decimal(rng.choice([3, 5, 7])),
+                        accessory_commission_percent=Decimal(rng.choice([8, 10, 12])),
+                        exchange_commission_percent=Decimal(rng.choice([3, 5])),
+                        base_salary_usd=Decimal(rng.choice([0, 100, 150])),
+                        base_salary_uzs=Decimal(rng.choice([0, 1500000, 2000000])),
+                        effective_date=effective_date,
+                        changed_by=self.boss,
+                        notes="Demo",
+                    )
+
+        self.customers = [self.new_customer() for _ in range(20 * len(self.shops))]
+
+    def new_customer(self):
+        self.next_customer += 1
+        n = self.next_customer
+        return Customer.objects.create(
+            name=f"{DEMO_CUSTOMER_PREFIX} {n}",
+            phone_number=f"+99890{n:07d}",
+            created_at=self.start_date,
+            created_by=self.boss,
+        )
+
+    def create_accessories(self):
+        rng = self.rng
+        self.accessories = {}
+        for shop in self.shops:
+            items = []
+            for code in range(1, self.options['accessories'] + 1):
+                name, cost = ACCESSORY_CATALOG[(code - 1) % len(ACCESSORY_CATALOG)]
+                accessory = Accessory.objects.create(
+                    shop=shop,
+                    name=f"{name} #{code}",
+                    code=str(code).zfill(4),
+                    sale_price=Decimal(round(cost * rng.uniform(1.3, 1.8), -3)),
+                    supplier=rng.choice(self.suppliers),
+                    created_by=self.boss,
+                    created_at=self.start_date,
+                )
+                self.restock(accessory, self.start_date, cost)
+                items.append(accessory)
+            self.accessories[shop.id] = items
+
+    def restock(self, accessory, day, cost=None):
+        if cost is None:
+            cost = accessory.sale_price / Decimal('1.5')
+        AccessoryPurchaseHistory.objects.create(
+            accessory=accessory,
+            quantity=self.rng.randint(10, 40),
+            purchase_price=Decimal(round(float(cost) * self.rng.uniform(0.9, 1.1), -2)),
+            created_at=day,
+            created_by=self.boss,
+        )
+        accessory.refresh_from_db()
+
+    # ============= KUNLIK OPERATSIYALAR =============
+
+    def generate_days(self):
+        """
+        Har bir kun alohida tranzaksiyada - signal'lar (CashFlow, ShopDailySummary, Customer)
+        oddiy formalar orqali kiritilgandagidek ishlaydi
+        """
+        self.stock = {shop.id: [] for shop in self.shops}
+        self.recent_sales = {shop.id: [] for shop in self.shops}
+
+        day = self.start_date
+        while day <= self.end_date:
+            with transaction.atomic():
+                for shop in self.shops:
+                    if day == self.start_date:
+                        self.intake_phones(shop, day, self.options['phones_per_day'] * 5)
+                    self.simulate_day(shop, day)
+            if day.day == 1 or day == self.end_date:
+                self.stdout.write(f"{day}: {self.counts['phone_sales']} telefon sotuvi")
+            day += timedelta(days=1)
+
+    def simulate_day(self, shop, day):
+        rng = self.rng
+        rate = self.options['phones_per_day']
+
+        self.intake_phones(shop, day, rng.randint(0, 2 * rate))
+
+        for _ in range(rng.randint(0, 2 * rate)):
+            if self.stock[shop.id]:
+                self.sell_phone(shop, day)
+
+        for _ in range(rng.randint(0, 3 * rate)):
+            self.sell_accessory(shop, day)
+
+        if self.stock[shop.id] and rng.random() < 0.3:
+            self.exchange_phone(shop, day)
+
+        if self.recent_sales[shop.id] and rng.random() < 0.08:
+            self.return_phone(shop, day)
+
+        if rng.random() < 0.5:
+            Expense.objects.create(
+                shop=shop,
+                name=rng.choice(EXPENSE_NAMES),
+                amount=Decimal(rng.randint(2, 60) * 10000),
+                expense_date=day,
+                created_by=self.boss,
+            )
+            self.counts['expenses'] += 1
+
+    def intake_phones(self, shop, day, count):
+        rng = self.rng
+        for _ in range(count):
+            phone_model, memory, base_price = rng.choice(self.models)
+            purchase_price = Decimal(round(base_price * rng.uniform(0.85, 1.05)))
+            phone = Phone.objects.create(
+                shop=shop,
+                phone_model=phone_model,
+                memory_size=memory,
+                imei=self.new_imei(),
+                condition_percentage=rng.choice([100, 100, 95, 90, 85]),
+                purchase_price=purchase_price,
+                imei_cost=Decimal(rng.choice([0, 0, 10, 20])),
+                sale_price=(purchase_price * Decimal(rng.uniform(1.08, 1.2))).quantize(Decimal('1')),
+                created_at=day,
+                created_by=self.boss,
+                source_type='supplier',
+                supplier=rng.choice(self.suppliers),
+                paid_amount=purchase_price if rng.random() < 0.7 else Decimal('0'),
+            )
+            self.stock[shop.id].append(phone)
+            self.counts['phones'] += 1
+
+    def pick_customer(self):
+        if self.rng.random() < 0.3:
+            customer = self.new_customer()
+            self.customers.append(customer)
+            return customer
+        return self.rng.choice(self.customers)
+
+    def split_payment(self, amount, allow_debt=True):
+        """(naqd, karta, nasiya, qarz) - yig'indisi amount ga teng"""
+        rng = self.rng
+        roll = rng.random()
+        cash = card = credit = debt = Decimal('0')
+        if roll < 0.6:
+            cash = amount
+        elif roll < 0.8:
+            card = (amount * Decimal(rng.choice(['0.3', '0.5', '1']))).quantize(Decimal('1'))
+            cash = amount - card
+        elif roll < 0.9 or not allow_debt:
+            credit = amount
+        else:
+            debt = min((amount * Decimal('0.3')).quantize(Decimal('1')), Decimal('500'))
+            cash = amount - debt
+        return cash, card, credit, debt
+
+    def create_debts(self, seller, shop, customer, currency, amount, day, description, identifier):
+        """sales.forms.manage_sale_debts bilan bir xil: mijoz -> sotuvchi va sotuvchi -> boshliq"""
+        Debt.objects.create(
+            debt_type='customer_to_seller', creditor=seller, customer=customer, currency=currency,
+            debt_amount=amount, paid_amount=Decimal('0'), due_date=day + timedelta(days=30), created_at=day,
+            notes=f"{description} ({identifier})",
+        )
+        Debt.objects.create(
+            debt_type='seller_to_boss', creditor=shop.owner, debtor=seller, currency=currency,
+            debt_amount=amount, paid_amount=Decimal('0'), due_date=day + timedelta(days=30), created_at=day,
+            notes=f"Qarz javobgarligi: {description} (Mijoz: {customer.name}, {identifier})",
+        )
+        self.counts['debts'] += 2
+
+    def sell_phone(self, shop, day):
+        rng = self.rng
+        phone = self.stock[shop.id].pop(rng.randrange(len(self.stock[shop.id])))
+        seller = rng.choice(self.sellers[shop.id])
+        customer = self.pick_customer()
+        price = phone.sale_price or (phone.cost_price * Decimal('1.15')).quantize(Decimal('1'))
+        cash, card, credit, debt = self.split_payment(price)
+
+        sale = PhoneSale.objects.create(
+            phone=phone, sale_price=price, cash_amount=cash, card_amount=card, credit_amount=credit,
+            debt_amount=debt, salesman=seller, customer=customer, sale_date=day,
+        )
+        if debt:
+            self.create_debts(
+                seller, shop, customer, 'USD', debt, day,
+                f"Telefon sotish: {phone.phone_model} {phone.memory_size}", f"IMEI: {phone.imei}",
+            )
+        self.recent_sales[shop.id] = (self.recent_sales[shop.id] + [sale])[-30:]
+        self.counts['phone_sales'] += 1
+
+    def sell_accessory(self, shop, day):
+        rng = self.rng
+        accessory = rng.choice(self.accessories[shop.id])
+        if accessory.quantity < 3:
+            self.restock(accessory, day)
+        quantity = rng.randint(1, 3)
+        cash, card, credit, debt = self.split_payment(accessory.sale_price * quantity, allow_debt=False)
+        AccessorySale.objects.create(
+            accessory=accessory, quantity=quantity, unit_price=accessory.sale_price,
+            cash_amount=cash, card_amount=card, credit_amount=credit, debt_amount=debt,
+            salesman=rng.choice(self.sellers[shop.id]), customer=self.pick_customer(), sale_date=day,
+        )
+        # AccessorySaleForm.save bilan bir xil
+        accessory.quantity -= quantity
+        accessory.save(update_fields=['quantity'])
+        self.counts['accessory_sales'] += 1
+
+    def exchange_phone(self, shop, day):
+        rng = self.rng
+        new_phone = self.stock[shop.id].pop(rng.randrange(len(self.stock[shop.id])))
+        old_model, old_memory, old_base = rng.choice(self.models)
+        new_price = new_phone.sale_price or (new_phone.cost_price * Decimal('1.15')).quantize(Decimal('1'))
+        accepted = min(Decimal(round(old_base * rng.uniform(0.5, 0.8))), new_price - 1)
+        cash, card, credit, debt = self.split_payment(new_price - accepted)
+        customer = self.pick_customer()
+
+        exchange = PhoneExchange(
+            new_phone=new_phone, new_phone_price=new_price,
+            old_phone_model=old_model, old_phone_memory=old_memory, old_phone_imei=self.new_imei(),
+            old_phone_condition_percentage=rng.choice([70, 80, 90]),
+            old_phone_accepted_price=accepted,
+            old_phone_future_sale_price=(accepted * Decimal('1.2')).quantize(Decimal('1')),
+            exchange_type='customer_pays',
+            cash_amount=cash, card_amount=card, credit_amount=credit, debt_amount=debt,
+            salesman=rng.choice(self.sellers[shop.id]), customer=customer,
+            customer_name=customer.name, customer_phone_number=customer.phone_number,
+            exchange_date=day, created_by=self.boss,
+        )
+        exchange.full_clean()
+        exchange.save()
+        if debt:
+            self.create_debts(
+                exchange.salesman, shop, customer, 'USD', debt, day,
+                f"Telefon almashtirish: {old_model} → {new_phone.phone_model}", f"IMEI: {new_phone.imei}",
+            )
+        # Qabul qilingan eski telefon do'konda sotuvga chiqadi
+        self.stock[shop.id].append(exchange.created_old_phone)
+        self.counts['exchanges'] += 1
+
+    def return_phone(self, shop, day):
+        rng = self.rng
+        sale = self.recent_sales[shop.id].pop(rng.randrange(len(self.recent_sales[shop.id])))
+        PhoneReturn.objects.create(
+            phone_sale=sale,
+            return_amount=(sale.sale_price * Decimal(rng.choice(['1', '0.95', '0.9']))).quantize(Decimal('1')),
+            return_date=max(day, sale.sale_date),
+            reason=rng.choice(RETURN_REASONS),
+            created_by=self.boss,
+        )
+        self.counts['returns'] += 1
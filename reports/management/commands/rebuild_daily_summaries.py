@@ -0,0 +1,83 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min, Max
+
+from reports.models import ShopDailySummary
+from sales.models import PhoneSale, AccessorySale, PhoneExchange, PhoneReturn, Expense
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Kunlik jamlanmani (ShopDailySummary) xom sotuvlardan qayta qurish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, help="Faqat shu do'kon (ID)")
+        parser.add_argument('--start', help="Boshlanish sanasi (YYYY-MM-DD)")
+        parser.add_argument('--end', help="Tugash sanasi (YYYY-MM-DD)")
+
+    def parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Noto'g'ri sana: {value} (YYYY-MM-DD kerak)")
+
+    def get_date_range(self, shop):
+        """Do'kondagi eng birinchi va oxirgi operatsiya sanalari"""
+        sources = [
+            PhoneSale.objects.filter(phone__shop=shop).aggregate(first=Min('sale_date'), last=Max('sale_date')),
+            AccessorySale.objects.filter(accessory__shop=shop).aggregate(
+                first=Min('sale_date'), last=Max('sale_date')),
+            PhoneExchange.objects.filter(new_phone__shop=shop).aggregate(
+                first=Min('exchange_date'), last=Max('exchange_date')),
+            PhoneReturn.objects.filter(phone_sale__phone__shop=shop).aggregate(
+                first=Min('return_date'), last=Max('return_date')),
+            Expense.objects.filter(shop=shop).aggregate(first=Min('expense_date'), last=Max('expense_date')),
+        ]
+        firsts = [source['first'] for source in sources if source['first']]
+        lasts = [source['last'] for source in sources if source['last']]
+        if not firsts:
+            return None, None
+        return min(firsts), max(lasts)
+
+    def handle(self, *args, **options):
+        shops = Shop.objects.all()
+        if options['shop']:
+            shops = shops.filter(id=options['shop'])
+            if not shops.exists():
+                raise CommandError(f"Do'kon topilmadi: {options['shop']}")
+
+        start = self.parse_date(options['start']) if options['start'] else None
+        end = self.parse_date(options['end']) if options['end'] else None
+
+        for shop in shops:
+            first, last = self.get_date_range(shop)
+            start_date = start or first
+            end_date = end or last
+            if not start_date or not end_date:
+                # Operatsiyalar yo'q - eski jamlanmalarni tozalash
+                ShopDailySummary.objects.filter(shop=shop).delete()
+                self.stdout.write(f"{shop.name}: operatsiyalar yo'q")
+                continue
+
+            if start_date > end_date:
+                raise CommandError(f"Boshlanish sanasi tugash sanasidan keyin: {start_date} > {end_date}")
+
+            if not start and not end:
+                # To'liq qayta qurish - operatsiyalar oralig'idan tashqaridagi qatorlar ham o'chadi
+                ShopDailySummary.objects.filter(shop=shop).exclude(
+                    date__range=[start_date, end_date]
+                ).delete()
+
+            # Yil bo'yicha bo'laklab - xotira oraliq uzunligiga bog'liq bo'lmasin
+            days = 0
+            for year in range(start_date.year, end_date.year + 1):
+                days += ShopDailySummary.rebuild(
+                    shop,
+                    max(start_date, date(year, 1, 1)),
+                    min(end_date, date(year, 12, 31)),
+                )
+
+            self.stdout.write(f"{shop.name}: {start_date} - {end_date}, {days} kun")
+
+        self.stdout.write(self.style.SUCCESS("✓ Kunlik jamlanmalar qayta qurildi!"))
@@ -0,0 +1,69 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from reports.jobs import run_job
+from reports.models import ReportJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Hisobot vazifalari navbatini (ReportJob) bajarish - og'ir hisobot va XLSX eksportlar "
+        "gunicorn so'rovidan tashqarida hisoblanadi. Tashqi broker kerak emas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Navbat bo'shaganda to'xtash")
+        parser.add_argument('--sleep', type=float, default=2.0, help="Navbat bo'sh bo'lsa kutish (soniya)")
+        parser.add_argument('--max-jobs', type=int, default=0, help="Shuncha vazifadan keyin to'xtash (0 - cheklovsiz)")
+        parser.add_argument(
+            '--stale-minutes', type=int, default=30,
+            help="Shundan uzoq 'running' holatidagi vazifa qayta navbatga qo'yiladi"
+        )
+        parser.add_argument('--keep-days', type=int, default=7, help="Tugagan vazifalar necha kun saqlanadi")
+
+    def handle(self, *args, **options):
+        if options['sleep'] <= 0 or options['stale_minutes'] <= 0 or options['keep_days'] <= 0:
+            raise CommandError("--sleep, --stale-minutes va --keep-days musbat bo'lishi kerak")
+
+        stale_timeout = timedelta(minutes=options['stale_minutes'])
+        keep = timedelta(days=options['keep_days'])
+        processed = 0
+        next_cleanup = timezone.now()
+
+        try:
+            while not options['max_jobs'] or processed < options['max_jobs']:
+                close_old_connections()
+
+                if timezone.now() >= next_cleanup:
+                    self.cleanup(stale_timeout, keep)
+                    next_cleanup = timezone.now() + timedelta(hours=1)
+
+                job = ReportJob.claim_next()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                self.stdout.write(f"#{job.pk} {job.kind} {job.params} ...")
+                if run_job(job):
+                    self.stdout.write(self.style.SUCCESS(f"✓ #{job.pk} tayyor ({job.duration:.1f} s)"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"✗ #{job.pk} xatolik: {job.error.strip().splitlines()[-1]}"))
+                processed += 1
+        except KeyboardInterrupt:
+            self.stdout.write("To'xtatildi")
+
+        self.stdout.write(f"Bajarilgan vazifalar: {processed}")
+
+    def cleanup(self, stale_timeout, keep):
+        requeued, failed = ReportJob.requeue_stale(stale_timeout)
+        purged = ReportJob.purge(keep)
+        if requeued or failed or purged:
+            self.stdout.write(
+                f"Qayta navbatga: {requeued}, vaqt tugagan: {failed}, o'chirilgan eski vazifalar: {purged}"
+            )
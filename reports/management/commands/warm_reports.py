@@ -0,0 +1,148 @@
+import multiprocessing
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+
+def warm_targets(base_date):
+    """Ertalab ochiladigan hisobotlar: kechagi kun, joriy va oldingi oy, joriy yil"""
+    this_month = base_date.replace(day=1)
+    previous_month = (this_month - timedelta(days=1)).replace(day=1)
+    return [
+        ('daily', base_date - timedelta(days=1)),
+        ('monthly', this_month),
+        ('monthly', previous_month),
+        ('yearly', date(base_date.year, 1, 1)),
+    ]
+
+
+def _init_worker():
+    """Har bir jarayon o'z DB ulanishini ochadi (spawn da Django ham sozlanadi)"""
+    import django
+    django.setup()
+
+
+def warm_shop(shop_id, base_date, force=False):
+    """
+    Bitta do'kon hisobotlarini hisoblash (faqat o'qiydi)
+
+    Yozuvlar keshni o'chiradi, demak barcha hisobotlar keshda bo'lsa
+    oxirgi isitishdan beri ma'lumot o'zgarmagan - do'kon o'tkazib yuboriladi.
+    Natija JSON ko'rinishida, hisoblashdan oldin olingan versiya tokeni bilan
+    qaytadi; keshga ota jarayon ketma-ket yozadi (SQLite bir vaqtda bitta
+    yozuvchiga ruxsat beradi).
+    """
+    from reports.models import QuickReport, ReportCalculator
+    from shops.models import Shop
+
+    started = time.monotonic()
+    result = {'shop_id': shop_id, 'name': str(shop_id), 'reports': [], 'error': None}
+    try:
+        shop = Shop.objects.get(pk=shop_id)
+        result['name'] = shop.name
+
+        targets = warm_targets(base_date)
+        if not force:
+            targets = QuickReport.missing(shop.id, targets)
+        calculator = ReportCalculator(shop, use_cache=False)
+
+        for report_type, report_date in targets:
+            token = QuickReport.current_token(shop.id, report_type, report_date)
+            if report_type == 'daily':
+                report = calculator.get_daily_report(report_date)
+            elif report_type == 'monthly':
+                report = calculator.get_monthly_report(report_date.year, report_date.month)
+            else:
+                report = calculator.get_yearly_report(report_date.year)
+            result['reports'].append((report_type, report_date, QuickReport._encode(report), token))
+    except Exception as e:
+        result['error'] = str(e)
+
+    result['seconds'] = time.monotonic() - started
+    return result
+
+
+def _warm_shop_task(args):
+    return warm_shop(*args)
+
+
+class Command(BaseCommand):
+    help = "Kunlik/oylik/yillik hisobotlarni oldindan hisoblab QuickReport keshiga yozish (cron uchun)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, action='append', help="Faqat shu do'kon(lar) (ID)")
+        parser.add_argument('--date', help="Bugungi sana o'rniga (YYYY-MM-DD)")
+        parser.add_argument('--workers', type=int, help="Jarayonlar soni (standart - CPU soni, 1 - jarayonsiz)")
+        parser.add_argument('--force', action='store_true', help="Keshdagi hisobotlarni ham qayta hisoblash")
+
+    def handle(self, *args, **options):
+        from reports.models import QuickReport
+        from shops.models import Shop
+
+        if options['date']:
+            try:
+                base_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Noto'g'ri sana: {options['date']} (YYYY-MM-DD kerak)")
+        else:
+            base_date = timezone.localdate()
+
+        shops = Shop.objects.order_by('id')
+        if options['shop']:
+            shops = shops.filter(id__in=options['shop'])
+        shop_ids = list(shops.values_list('id', flat=True))
+        if not shop_ids:
+            self.stdout.write("Do'konlar yo'q")
+            return
+
+        workers = max(1, min(options['workers'] or multiprocessing.cpu_count(), len(shop_ids)))
+        tasks = [(shop_id, base_date, options['force']) for shop_id in shop_ids]
+
+        started = time.monotonic()
+        if workers == 1:
+            results = map(_warm_shop_task, tasks)
+        else:
+            # Ota jarayon ulanishlari fork orqali bolalarga o'tmasin
+            connections.close_all()
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+            pool = context.Pool(processes=workers, initializer=_init_worker)
+            results = pool.imap_unordered(_warm_shop_task, tasks)
+
+        failed = []
+        try:
+            for result in results:
+                if result['error']:
+                    failed.append(result)
+                    self.stderr.write(f"❌ {result['name']}: {result['error']} ({result['seconds']:.2f}s)")
+                elif result['reports']:
+                    stored, outdated = [], []
+                    for report_type, report_date, encoded, token in result['reports']:
+                        # Hisoblash paytida yozuv bo'lgan - eski natija yozilmaydi (o'qishda qayta hisoblanadi)
+                        if QuickReport.current_token(result['shop_id'], report_type, report_date) != token:
+                            outdated.append(f"{report_type} {report_date}")
+                            continue
+                        QuickReport.store_encoded(result['shop_id'], report_type, report_date, encoded, token)
+                        stored.append(f"{report_type} {report_date}")
+                    self.stdout.write(
+                        f"{result['name']}: {len(stored)} ta hisobot ({result['seconds']:.2f}s) - " + ", ".join(stored)
+                    )
+                    if outdated:
+                        self.stdout.write(self.style.WARNING(
+                            f"{result['name']}: hisoblash paytida ma'lumot o'zgardi, yozilmadi - " + ", ".join(outdated)
+                        ))
+                else:
+                    self.stdout.write(f"{result['name']}: o'zgarmagan, o'tkazildi ({result['seconds']:.2f}s)")
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+
+        if failed:
+            raise CommandError(f"{len(failed)} ta do'konda xato")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {len(shop_ids)} ta do'kon, {workers} ta jarayon, {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-17 21:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_cashflowtransaction_related_supplier_payment_and_more'),
+        ('shops', '0007_alter_customer_phone_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Sana')),
+                ('phone_count', models.IntegerField(default=0, verbose_name='Telefonlar soni')),
+                ('phone_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Telefon savdosi ($)')),
+                ('phone_cash', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Telefon naqd ($)')),
+                ('phone_card', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Telefon karta ($)')),
+                ('phone_debt', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Telefon qarz ($)')),
+                ('phone_credit', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Telefon nasiya ($)')),
+                ('phone_profit', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Telefon foydasi ($)')),
+                ('phone_returned', models.IntegerField(default=0, verbose_name='Shu kun sotilib qaytarilganlar')),
+                ('accessory_count', models.IntegerField(default=0, verbose_name='Aksessuarlar soni')),
+                ('accessory_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Aksessuar savdosi (so'm)")),
+                ('accessory_cash', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Aksessuar naqd (so'm)")),
+                ('accessory_card', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Aksessuar karta (so'm)")),
+                ('accessory_debt', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Aksessuar qarz (so'm)")),
+                ('accessory_credit', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Aksessuar nasiya (so'm)")),
+                ('accessory_profit', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Aksessuar foydasi (so'm)")),
+                ('exchange_count', models.IntegerField(default=0, verbose_name='Almashtirishlar soni')),
+                ('exchange_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Almashtirish savdosi ($)')),
+                ('exchange_old_phone_value', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Qabul qilingan eski telefonlar ($)')),
+                ('exchange_cash', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Almashtirish naqd ($)')),
+                ('exchange_card', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Almashtirish karta ($)')),
+                ('exchange_debt', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Almashtirish qarz ($)')),
+                ('exchange_credit', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Almashtirish nasiya ($)')),
+                ('exchange_profit', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Almashtirish foydasi ($)')),
+                ('returns_count', models.IntegerField(default=0, verbose_name='Qaytarishlar soni')),
+                ('returns_loss', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Boshqa kun sotilganlar foydasi ($)')),
+                ('returns_count_other_month', models.IntegerField(default=0, verbose_name='Boshqa oyda sotilganlar soni')),
+                ('returns_loss_other_month', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Boshqa oyda sotilganlar foydasi ($)')),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Xarajatlar (so'm)")),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to='shops.shop')),
+            ],
+            options={
+                'verbose_name': 'Kunlik jamlanma',
+                'verbose_name_plural': 'Kunlik jamlanmalar',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('shop', 'date'), name='unique_shop_daily_summary')],
+            },
+        ),
+    ]
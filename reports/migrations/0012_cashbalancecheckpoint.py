@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 21:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0011_shopdailysummary'),
+        ('shops', '0007_alter_customer_phone_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashBalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Sana')),
+                ('closing_usd', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Kun oxiridagi qoldiq ($)')),
+                ('closing_uzs', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Kun oxiridagi qoldiq (so'm)")),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cash_checkpoints', to='shops.shop')),
+            ],
+            options={
+                'verbose_name': "Kassa qoldig'i",
+                'verbose_name_plural': 'Kassa qoldiqlari',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('shop', 'date'), name='unique_shop_cash_checkpoint')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0012_cashbalancecheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shopdailysummary',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, verbose_name="O'zgarishlar soni"),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:07
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0013_shopdailysummary_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('yearly_report', 'Yillik hisobot'), ('yearly_profit_detail', 'Yillik foyda tafsiloti'), ('daily_export', 'Kunlik hisobot XLSX'), ('monthly_export', 'Oylik hisobot XLSX'), ('seller_salary_export', 'Sotuvchi maoshi XLSX'), ('sales_export', 'Sotuvlar XLSX')], max_length=30, verbose_name='Turi')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parametrlar')),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Tayyor'), ('failed', 'Xatolik')], default='pending', max_length=10, verbose_name='Holati')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Natija')),
+                ('result_file', models.FileField(blank=True, upload_to='report_jobs/%Y/%m/', verbose_name='Natija fayli')),
+                ('error', models.TextField(blank=True, verbose_name='Xatolik')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Urinishlar')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Yaratgan')),
+            ],
+            options={
+                'verbose_name': 'Hisobot vazifasi',
+                'verbose_name_plural': 'Hisobot vazifalari',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='report_job_queue_idx')],
+            },
+        ),
+    ]
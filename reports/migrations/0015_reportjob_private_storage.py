@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:57
+
+import reports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0014_reportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='result_file',
+            field=models.FileField(blank=True, storage=reports.models.PrivateFileStorage(), upload_to=reports.models.report_job_upload_to, verbose_name='Natija fayli'),
+        ),
+    ]
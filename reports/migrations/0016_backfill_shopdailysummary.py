@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:12
+
+import io
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def rebuild_daily_summaries(apps, schema_editor):
+    """
+    Mavjud do'konlar kunlik jamlanmasi - hisobotlar shu jadvaldan o'qiydi
+
+    ShopDailySummary.rebuild ReportCalculator orqali hisoblaydi (tarixiy model
+    emas), shuning uchun barcha jadvallar oxirgi holatda bo'lgach ishga tushadi.
+    """
+    call_command('rebuild_daily_summaries', stdout=io.StringIO())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0015_reportjob_private_storage'),
+        ('inventory', '0024_accessory_purchased_cost'),
+        ('sales', '0020_phoneexchange_old_phone_imei_reversed'),
+        ('shops', '0007_alter_customer_phone_number'),
+        ('users', '0008_alter_userprofile_role'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_daily_summaries, migrations.RunPython.noop),
+    ]
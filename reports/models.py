@@ -1,8 +1,17 @@
 # reports/models.py - QISM 1
 
-from django.db import models
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+from django.db import models, transaction
 from django.utils import timezone
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Max, Q, F, DecimalField
+from django.db.models.functions import ExtractYear, ExtractMonth, TruncMonth
 from decimal import Decimal
 from datetime import date, timedelta
 from calendar import monthrange
@@ -10,6 +19,7 @@ from calendar import monthrange
 from sales.models import PhoneExchange, AccessorySale, PhoneSale
 from shops.models import Shop
 from django.contrib.auth.models import User
+from users.models import CommissionTimeline
 
 
 # ============= CASH FLOW MODEL =============
@@ -217,142 +227,202 @@ class SalesQueryHelper:
 class ReportCalculator:
     """Hisobot hisoblashlari"""
 
-    def __init__(self, shop):
+    def __init__(self, shop, use_cache=True):
         self.shop = shop
+        self.use_cache = use_cache
         self.query_helper = SalesQueryHelper()
         self.profit_calc = ProfitCalculator()
 
-    def _calculate_sales_totals(self, phone_sales, accessory_sales, exchanges):
-        """Savdo summalari - QuerySet uchun"""
-        phone_totals = phone_sales.aggregate(
-            count=Count('id'),
-            total=Sum('sale_price'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            credit=Sum('credit_amount'),
-            debt=Sum('debt_amount')
-        )
+    # ============= KESH (QuickReport) =============
 
-        accessory_totals = accessory_sales.aggregate(
-            count=Count('id'),
-            total=Sum('total_price'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            credit=Sum('credit_amount'),
-            debt=Sum('debt_amount')
-        )
+    def _get_cached_report(self, report_type, report_date, compute):
+        """
+        Hisobot QuickReport keshidan; yo'q bo'lsa hisoblab yoziladi
 
-        exchange_totals = exchanges.aggregate(
-            count=Count('id'),
-            total=Sum('new_phone_price'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            credit=Sum('credit_amount'),
-            debt=Sum('debt_amount')
+        Yozuvlar (sotuv, qaytarish, almashtirish, xarajat, cash flow) tegishli
+        kun, oy va yil keshini o'chiradi - shuning uchun muddati yo'q. Versiya
+        tokeni hisoblashdan OLDIN olinadi va hisobot bilan saqlanadi: hisoblash
+        paytida yozuv commit bo'lsa, eski natija keyingi o'qishda rad etiladi.
+        """
+        if self.use_cache:
+            cached, token = QuickReport.load(self.shop, report_type, report_date)
+            if cached is not None:
+                return self._attach_lazy_parts(report_type, cached)
+
+        report = compute()
+        if self.use_cache:
+            QuickReport.store(self.shop, report_type, report_date, report, token)
+        return report
+
+    def _attach_lazy_parts(self, report_type, report):
+        """Keshga yozilmagan qismlar: do'kon va lazy QuerySet'lar"""
+        report['shop'] = self.shop
+        if report_type == 'daily':
+            report['cashflow']['transactions'] = self._get_cashflow_transactions(report['date'])
+            report['sales_data'] = self._get_daily_sales_data(report['date'])
+        elif report_type == 'monthly':
+            for daily in report.get('daily_stats', []):
+                self._attach_lazy_parts('daily', daily)
+        elif report_type == 'yearly':
+            for monthly in report['monthly_stats']:
+                self._attach_lazy_parts('monthly', monthly)
+        return report
+
+    def get_daily_report(self, target_date=None):
+        """Kunlik hisobot - BARCHA SOTUVCHILAR UCHUN - ✅ KUNLIK JAMLANMADAN (keshlanadi)"""
+        if not target_date:
+            target_date = timezone.now().date()
+
+        return self._get_cached_report(
+            'daily', target_date,
+            lambda: self.get_daily_stats_range(target_date, target_date)[0]
         )
 
-        return {
-            'phone': {k: Decimal(str(v)) if v else Decimal('0') for k, v in phone_totals.items()},
-            'accessory': {k: Decimal(str(v)) if v else Decimal('0') for k, v in accessory_totals.items()},
-            'exchange': {k: Decimal(str(v)) if v else Decimal('0') for k, v in exchange_totals.items()}
-        }
+    # ============= GURUHLANGAN (GROUP BY) HISOB =============
 
-    def _calculate_sales_totals_from_list(self, phone_sales, accessory_sales, exchanges):
-        """Savdo summalari - List uchun"""
-        phone_totals = {
-            'count': len(phone_sales),
-            'total': sum(Decimal(str(s.sale_price)) for s in phone_sales),
-            'cash': sum(Decimal(str(s.cash_amount)) for s in phone_sales),
-            'card': sum(Decimal(str(s.card_amount)) for s in phone_sales),
-            'credit': sum(Decimal(str(s.credit_amount)) for s in phone_sales),
-            'debt': sum(Decimal(str(s.debt_amount)) for s in phone_sales),
-        }
+    PHONE_KEYS = ('count', 'total', 'cash', 'card', 'debt', 'credit', 'profit', 'returned')
+    ACCESSORY_KEYS = ('count', 'total', 'cash', 'card', 'debt', 'credit', 'profit')
+    EXCHANGE_KEYS = ('count', 'total', 'old_phone_value', 'cash', 'card', 'debt', 'credit', 'profit')
+    RETURN_KEYS = ('count', 'loss', 'count_other_month', 'loss_other_month')
+    CASHFLOW_KEYS = (
+        'daily_seller_payments', 'exchange_old_phone_value', 'exchange_expenses',
+        'phone_returns', 'supplier_payments_cash', 'uzs_income', 'uzs_expense',
+        'accessory_sales', 'exchange_equal', 'daily_expenses',
+    )
 
-        accessory_totals = {
-            'count': len(accessory_sales),
-            'total': sum(Decimal(str(s.total_price)) for s in accessory_sales),
-            'cash': sum(Decimal(str(s.cash_amount)) for s in accessory_sales),
-            'card': sum(Decimal(str(s.card_amount)) for s in accessory_sales),
-            'credit': sum(Decimal(str(s.credit_amount)) for s in accessory_sales),
-            'debt': sum(Decimal(str(s.debt_amount)) for s in accessory_sales),
-        }
+    @staticmethod
+    def _normalize_row(row, keys):
+        """GROUP BY qatoridagi None qiymatlarni 0 ga almashtirish"""
+        result = {}
+        for key in keys:
+            value = row.get(key) if row else None
+            if key.startswith('count') or key in ('returned', 'exchange_equal'):
+                result[key] = value or 0
+            else:
+                result[key] = value if value is not None else Decimal('0')
+        return result
 
-        exchange_totals = {
-            'count': len(exchanges),
-            'total': sum(Decimal(str(e.new_phone_price)) for e in exchanges),
-            'cash': sum(Decimal(str(e.cash_amount)) for e in exchanges),
-            'card': sum(Decimal(str(e.card_amount)) for e in exchanges),
-            'credit': sum(Decimal(str(e.credit_amount)) for e in exchanges),
-            'debt': sum(Decimal(str(e.debt_amount)) for e in exchanges),
-        }
+    def _get_grouped_daily_totals(self, start_date, end_date):
+        """
+        Sana oralig'idagi kunlik summalar - XOM jadvallardan, har biriga BITTA GROUP BY
 
-        return {
-            'phone': {k: Decimal(str(v)) if v else Decimal('0') for k, v in phone_totals.items()},
-            'accessory': {k: Decimal(str(v)) if v else Decimal('0') for k, v in accessory_totals.items()},
-            'exchange': {k: Decimal(str(v)) if v else Decimal('0') for k, v in exchange_totals.items()}
-        }
+        Natija: {'phone': {sana: qator}, 'accessory': ..., 'exchange': ...,
+                 'returns': ..., 'expenses': {sana: summa}}
+        Hisobotlar ShopDailySummary ni o'qiydi; bu usul jamlanmani
+        qayta qurish (rebuild_daily_summaries) uchun manba.
+        """
+        from sales.models import PhoneSale, AccessorySale, PhoneExchange, PhoneReturn, Expense
 
-    def _calculate_profits(self, phone_sales, accessory_sales, exchanges):
-        """Foyda hisoblash - QuerySet uchun - ✅ YANGI USUL"""
-        # ✅ is_returned flag ishlatish
-        valid_phone_sales = phone_sales.filter(is_returned=False)
+        money = DecimalField(max_digits=15, decimal_places=2)
+        net = Q(is_returned=False)
 
-        phone_profit = sum(
-            self.profit_calc.calculate_phone_profit(sale)
-            for sale in valid_phone_sales
-        )
+        # 1. Telefon sotuvlari (sof + qaytarilganlar soni)
+        phone_rows = PhoneSale.objects.filter(
+            phone__shop=self.shop,
+            sale_date__range=[start_date, end_date]
+        ).values('sale_date').annotate(
+            **PhoneSale.objects.totals_annotations(filter=net),
+            returned=Count('id', filter=Q(is_returned=True)),
+        ).order_by()
 
-        accessory_profit = sum(
-            self.profit_calc.calculate_accessory_profit(sale)
-            for sale in accessory_sales
-        )
+        # 2. Aksessuar sotuvlari
+        accessory_rows = AccessorySale.objects.filter(
+            accessory__shop=self.shop,
+            sale_date__range=[start_date, end_date]
+        ).values('sale_date').annotate(**AccessorySale.objects.totals_annotations()).order_by()
 
-        exchange_profit = sum(
-            self.profit_calc.calculate_exchange_profit(exchange)
-            for exchange in exchanges
+        # 3. Almashtirishlar
+        exchange_rows = PhoneExchange.objects.filter(
+            new_phone__shop=self.shop,
+            exchange_date__range=[start_date, end_date]
+        ).values('exchange_date').annotate(**PhoneExchange.objects.totals_annotations()).order_by()
+
+        # 4. Qaytarishlar - boshqa kunda / boshqa oyda sotilganlar foydasi yo'qotiladi
+        returned = Q(phone_sale__is_returned=True)
+        other_day = returned & ~Q(phone_sale__sale_date=F('return_date'))
+        other_month = returned & ~(
+            Q(phone_sale__sale_date__year=ExtractYear('return_date')) &
+            Q(phone_sale__sale_date__month=ExtractMonth('return_date'))
         )
+        lost_profit = PhoneReturn.objects.lost_profit_expression()
+
+        return_rows = PhoneReturn.objects.filter(
+            phone_sale__phone__shop=self.shop,
+            return_date__range=[start_date, end_date]
+        ).values('return_date').annotate(
+            count=Count('id'),
+            loss=Sum(lost_profit, filter=other_day, output_field=money),
+            count_other_month=Count('id', filter=other_month),
+            loss_other_month=Sum(lost_profit, filter=other_month, output_field=money),
+        ).order_by()
+
+        # 5. Xarajatlar
+        expense_rows = Expense.objects.filter(
+            shop=self.shop,
+            expense_date__range=[start_date, end_date]
+        ).values('expense_date').annotate(total=Sum('amount')).order_by()
 
         return {
-            'phone_profit': phone_profit,
-            'accessory_profit': accessory_profit,
-            'exchange_profit': exchange_profit,
-            'total_profit': phone_profit + accessory_profit + exchange_profit,
-            'valid_phone_count': valid_phone_sales.count(),
-            'returned_count': phone_sales.filter(is_returned=True).count()
+            'phone': {row['sale_date']: row for row in phone_rows},
+            'accessory': {row['sale_date']: row for row in accessory_rows},
+            'exchange': {row['exchange_date']: row for row in exchange_rows},
+            'returns': {row['return_date']: row for row in return_rows},
+            'expenses': {row['expense_date']: row['total'] or Decimal('0') for row in expense_rows},
         }
 
-    def _calculate_profits_from_list(self, phone_sales, accessory_sales, exchanges):
-        """Foyda hisoblash - List uchun - ✅ YANGI USUL"""
-        # ✅ is_returned attribute ishlatish
-        valid_phone_sales = [s for s in phone_sales if not s.is_returned]
+    def _get_summary_daily_totals(self, start_date, end_date):
+        """
+        _get_grouped_daily_totals bilan bir xil natija - ShopDailySummary dan (BITTA so'rov)
 
-        phone_profit = sum(
-            self.profit_calc.calculate_phone_profit(sale)
-            for sale in valid_phone_sales
-        )
+        Narx oraliqdagi kunlar soniga bog'liq, sotuvlar soniga emas.
+        """
+        grouped = {group: {} for group in ShopDailySummary.GROUPS}
+        grouped['expenses'] = {}
 
-        accessory_profit = sum(
-            self.profit_calc.calculate_accessory_profit(sale)
-            for sale in accessory_sales
-        )
+        summaries = ShopDailySummary.objects.filter(
+            shop=self.shop,
+            date__range=[start_date, end_date]
+        ).values('date', *ShopDailySummary.value_fields())
 
-        exchange_profit = sum(
-            self.profit_calc.calculate_exchange_profit(exchange)
-            for exchange in exchanges
-        )
+        for summary in summaries:
+            day = summary['date']
+            for group, keys in ShopDailySummary.GROUPS.items():
+                grouped[group][day] = {key: summary[f'{group}_{key}'] for key in keys}
+            grouped['expenses'][day] = summary['expenses']
+
+        return grouped
+
+    @staticmethod
+    def _cashflow_annotations():
+        """CASHFLOW_KEYS uchun turi bo'yicha shartli yig'indilar"""
+        def by_type(transaction_type, field='amount_usd'):
+            return Sum(field, filter=Q(transaction_type=transaction_type))
 
         return {
-            'phone_profit': phone_profit,
-            'accessory_profit': accessory_profit,
-            'exchange_profit': exchange_profit,
-            'total_profit': phone_profit + accessory_profit + exchange_profit,
-            'valid_phone_count': len(valid_phone_sales),
-            'returned_count': len([s for s in phone_sales if s.is_returned])
+            'daily_seller_payments': by_type('daily_seller_payment'),
+            'exchange_old_phone_value': by_type('exchange_old_phone_value'),
+            'exchange_expenses': by_type('exchange_expense'),
+            'phone_returns': by_type('phone_return'),
+            'supplier_payments_cash': by_type('supplier_payment_cash'),
+            'uzs_income': Sum('amount_uzs', filter=Q(amount_uzs__gt=0)),
+            'uzs_expense': Sum('amount_uzs', filter=Q(amount_uzs__lt=0)),
+            'accessory_sales': by_type('accessory_sale', 'amount_uzs'),
+            'exchange_equal': Count('id', filter=Q(transaction_type='exchange_equal')),
+            'daily_expenses': by_type('daily_expense', 'amount_uzs'),
         }
 
-    def _get_daily_cashflow(self, target_date):
+    def _get_grouped_cashflow(self, start_date, end_date):
+        """Cash flow tranzaksiyalari - kun va turi bo'yicha shartli yig'indilar (BITTA so'rov)"""
+        cashflow_rows = CashFlowTransaction.objects.filter(
+            shop=self.shop,
+            transaction_date__range=[start_date, end_date]
+        ).values('transaction_date').annotate(**self._cashflow_annotations()).order_by()
+
+        return {row['transaction_date']: row for row in cashflow_rows}
+
+    def _build_cashflow(self, target_date, phone, exchange, cash):
         """
-        Kunlik cash flow - TO'G'RI FORMULA
+        Kunlik cash flow - TO'G'RI FORMULA (tayyor summalardan)
 
         KIRIM (USD) = Jami Savdo - (Karta + Qarz + Nasiya)
 
@@ -361,287 +431,132 @@ class ReportCalculator:
             2. Olingan telefon qiymati (almashtirish)
             3. Almashtirish chiqimlari
             4. Telefon qaytarish
-            5. Taminotchiga kassa to'lovlari ← YANGI
+            5. Taminotchiga kassa to'lovlari
 
         SOF BALANS = KIRIM - CHIQIM
         """
-        from sales.models import PhoneSale, PhoneExchange
-
-        transactions = CashFlowTransaction.objects.filter(
-            shop=self.shop,
-            transaction_date=target_date
-        )
-
-        # ====== TO'G'RI FORMULA: KIRIM = Jami savdo - (Karta + Qarz + Nasiya) ======
-
-        # 1. JAMI SAVDO USD - Telefon va almashtirish savdolari
-        phone_sales = PhoneSale.objects.filter(
-            phone__shop=self.shop,
-            sale_date=target_date,
-            is_returned=False
-        )
-
-        exchanges = PhoneExchange.objects.filter(
-            new_phone__shop=self.shop,
-            exchange_date=target_date
-        )
-
-        # Telefon sotuvlari summalari
-        total_phone_usd = phone_sales.aggregate(total=Sum('sale_price'))['total'] or Decimal('0')
-        phone_card = phone_sales.aggregate(total=Sum('card_amount'))['total'] or Decimal('0')
-        phone_credit = phone_sales.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0')
-        phone_debt = phone_sales.aggregate(total=Sum('debt_amount'))['total'] or Decimal('0')
-        phone_cash = phone_sales.aggregate(total=Sum('cash_amount'))['total'] or Decimal('0')
-
-        # Almashtirish savdolari summalari
-        total_exchange_usd = exchanges.aggregate(total=Sum('new_phone_price'))['total'] or Decimal('0')
-        exchange_card = exchanges.aggregate(total=Sum('card_amount'))['total'] or Decimal('0')
-        exchange_credit = exchanges.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0')
-        exchange_debt = exchanges.aggregate(total=Sum('debt_amount'))['total'] or Decimal('0')
-        exchange_cash = exchanges.aggregate(total=Sum('cash_amount'))['total'] or Decimal('0')
-
-        # JAMI SAVDO USD
-        jami_savdo_usd = total_phone_usd + total_exchange_usd
-
-        # JAMI NAQD EMAS (Karta + Qarz + Nasiya)
-        jami_karta = phone_card + exchange_card
-        jami_qarz = phone_debt + exchange_debt
-        jami_nasiya = phone_credit + exchange_credit
+        jami_savdo_usd = phone['total'] + exchange['total']
+        jami_karta = phone['card'] + exchange['card']
+        jami_qarz = phone['debt'] + exchange['debt']
+        jami_nasiya = phone['credit'] + exchange['credit']
         jami_naqd_emas = jami_karta + jami_qarz + jami_nasiya
+        jami_naqd = phone['cash'] + exchange['cash']
 
-        # JAMI NAQD (savdodan kelib tushgan)
-        jami_naqd = phone_cash + exchange_cash
-
-        # TO'G'RI KIRIM USD (Naqd pul) - BU ASOSIY FORMULA
         kirim_usd = jami_savdo_usd - jami_naqd_emas
 
-        # ====== CHIQIM USD - TO'LIQ YANGILANGAN ======
-
-        # 1️⃣ Kunlik sotuvchi to'lovlari
-        daily_seller_payments = abs(
-            transactions.filter(
-                transaction_type='daily_seller_payment'
-            ).aggregate(total=Sum('amount_usd'))['total'] or Decimal('0')
-        )
-
-        # 2️⃣ Olingan telefon qiymati (exchange_old_phone_value)
-        old_phone_value = abs(
-            transactions.filter(
-                transaction_type='exchange_old_phone_value'
-            ).aggregate(total=Sum('amount_usd'))['total'] or Decimal('0')
-        )
-
-        # 3️⃣ Almashtirish chiqimlari (mijozga pul berish)
-        exchange_expenses = abs(
-            transactions.filter(
-                transaction_type='exchange_expense'
-            ).aggregate(total=Sum('amount_usd'))['total'] or Decimal('0')
-        )
-
-        # 4️⃣ Telefon qaytarish (mijozga pul qaytarish)
-        phone_returns = abs(
-            transactions.filter(
-                transaction_type='phone_return'
-            ).aggregate(total=Sum('amount_usd'))['total'] or Decimal('0')
-        )
+        daily_seller_payments = abs(cash['daily_seller_payments'])
+        old_phone_value = abs(cash['exchange_old_phone_value'])
+        exchange_expenses = abs(cash['exchange_expenses'])
+        phone_returns = abs(cash['phone_returns'])
+        supplier_payments_cash = abs(cash['supplier_payments_cash'])
 
-        # 5️⃣ ✅ YANGI - Taminotchiga KASSA to'lovlari
-        supplier_payments_cash = abs(
-            transactions.filter(
-                transaction_type='supplier_payment_cash'
-            ).aggregate(total=Sum('amount_usd'))['total'] or Decimal('0')
-        )
-
-        # 📊 JAMI CHIQIM USD - Barcha chiqimlarni qo'shamiz
         chiqim_usd = (
-                daily_seller_payments +  # Kunlik sotuvchi
-                old_phone_value +  # Olingan telefon
-                exchange_expenses +  # Almashtirish chiqim
-                phone_returns +  # Qaytarish
-                supplier_payments_cash  # ✅ Taminotchiga kassa to'lov
+                daily_seller_payments +
+                old_phone_value +
+                exchange_expenses +
+                phone_returns +
+                supplier_payments_cash
         )
 
-        # ====== SOF BALANS ======
-        sof_balans_usd = kirim_usd - chiqim_usd
-
-        # ====== UZS (SO'M) ======
-        uzs_income = transactions.filter(
-            amount_uzs__gt=0
-        ).aggregate(total=Sum('amount_uzs'))['total'] or Decimal('0')
-
-        uzs_expense = abs(
-            transactions.filter(
-                amount_uzs__lt=0
-            ).aggregate(total=Sum('amount_uzs'))['total'] or Decimal('0')
-        )
-
-        # ====== DETAILS (TAFSILOTLAR - TO'LIQ) ======
-        details = {
-            # KIRIM TAFSILOTLARI
-            'total_sales': jami_savdo_usd,  # Jami savdo
-            'card_total': jami_karta,  # Karta
-            'debt_total': jami_qarz,  # Qarz
-            'credit_total': jami_nasiya,  # Nasiya
-            'cash_total': jami_naqd,  # Naqd (savdodan)
-            'karta_nasiya_qarz': jami_naqd_emas,  # Naqd bo'lmagan
-
-            # CHIQIM TAFSILOTLARI (USD)
-            'daily_seller_payments': daily_seller_payments,  # 1. Kunlik sotuvchi
-            'exchange_old_phone_value': old_phone_value,  # 2. Olingan telefon
-            'exchange_expenses': exchange_expenses,  # 3. Almashtirish chiqim
-            'phone_returns': phone_returns,  # 4. Qaytarish
-            'supplier_payments_cash': supplier_payments_cash,  # 5. ✅ Taminotchiga kassa
-            'total_expense': chiqim_usd,  # JAMI CHIQIM
-
-            # Boshqa ma'lumotlar
-            'phone_sales': total_phone_usd,
-            'exchange_income': total_exchange_usd,
-            'accessory_sales': transactions.filter(
-                transaction_type='accessory_sale'
-            ).aggregate(total=Sum('amount_uzs'))['total'] or Decimal('0'),
-            'exchange_equal': transactions.filter(
-                transaction_type='exchange_equal'
-            ).count(),
-            'daily_expenses': abs(
-                transactions.filter(
-                    transaction_type='daily_expense'
-                ).aggregate(total=Sum('amount_uzs'))['total'] or Decimal('0')
-            ),
-        }
+        uzs_income = cash['uzs_income']
+        uzs_expense = abs(cash['uzs_expense'])
 
         return {
             'usd': {
-                'income': kirim_usd,  # Kirim
-                'expense': chiqim_usd,  # Chiqim
-                'net': sof_balans_usd,  # Sof balans
+                'income': kirim_usd,
+                'expense': chiqim_usd,
+                'net': kirim_usd - chiqim_usd,
             },
             'uzs': {
                 'income': uzs_income,
                 'expense': uzs_expense,
                 'net': uzs_income - uzs_expense
             },
-            'details': details,
-            'transactions': transactions
+            'details': {
+                'total_sales': jami_savdo_usd,
+                'card_total': jami_karta,
+                'debt_total': jami_qarz,
+                'credit_total': jami_nasiya,
+                'cash_total': jami_naqd,
+                'karta_nasiya_qarz': jami_naqd_emas,
+                'daily_seller_payments': daily_seller_payments,
+                'exchange_old_phone_value': old_phone_value,
+                'exchange_expenses': exchange_expenses,
+                'phone_returns': phone_returns,
+                'supplier_payments_cash': supplier_payments_cash,
+                'total_expense': chiqim_usd,
+                'phone_sales': phone['total'],
+                'exchange_income': exchange['total'],
+                'accessory_sales': cash['accessory_sales'],
+                'exchange_equal': cash['exchange_equal'],
+                'daily_expenses': abs(cash['daily_expenses']),
+            },
+            # Lazy QuerySet - faqat kerak bo'lganda bajariladi
+            'transactions': self._get_cashflow_transactions(target_date),
         }
 
-    def get_daily_report(self, target_date=None):
-        """Kunlik hisobot - BARCHA SOTUVCHILAR UCHUN - ✅ YANGI USUL"""
-        if not target_date:
-            target_date = timezone.now().date()
-
-        from sales.models import PhoneSale, AccessorySale, PhoneExchange, PhoneReturn, Expense
-
-        # BU KUNDA SOTILGAN TELEFONLAR
-        phone_sales = PhoneSale.objects.filter(
-            phone__shop=self.shop,
-            sale_date=target_date
-        ).select_related('phone', 'customer', 'salesman')
-
-        accessory_sales = AccessorySale.objects.filter(
-            accessory__shop=self.shop,
-            sale_date=target_date
-        ).select_related('accessory', 'customer', 'salesman')
-
-        exchanges = PhoneExchange.objects.filter(
-            new_phone__shop=self.shop,
-            exchange_date=target_date
-        ).select_related('new_phone', 'salesman')
-
-        phone_returns = PhoneReturn.objects.filter(
-            phone_sale__phone__shop=self.shop,
-            return_date=target_date
-        ).select_related('phone_sale__phone', 'phone_sale')
-
-        # ✅ YANGI USUL - is_returned flag
-        net_phone_sales = phone_sales.filter(is_returned=False)
-
-        # BU KUNDA QAYTARILGAN LEKIN OLDINGI KUNLARDA SOTILGAN
-        previous_day_returns = phone_returns.filter(
-            phone_sale__is_returned=True
-        ).exclude(
-            phone_sale__sale_date=target_date
-        )
-
-        expenses = Expense.objects.filter(
+    def _get_cashflow_transactions(self, target_date):
+        return CashFlowTransaction.objects.filter(
             shop=self.shop,
-            expense_date=target_date
-        )
-        total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-
-        phone_totals = net_phone_sales.aggregate(
-            total=Sum('sale_price'),
-            count=Count('id'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            debt=Sum('debt_amount'),
-            credit=Sum('credit_amount')
-        )
-
-        accessory_totals = accessory_sales.aggregate(
-            total=Sum('total_price'),
-            count=Count('id'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            debt=Sum('debt_amount'),
-            credit=Sum('credit_amount')
+            transaction_date=target_date
         )
 
-        exchange_totals = exchanges.aggregate(
-            total=Sum('new_phone_price'),
-            old_phone_value=Sum('old_phone_accepted_price'),
-            count=Count('id'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            debt=Sum('debt_amount'),
-            credit=Sum('credit_amount')
-        )
+    def get_cashflow_range(self, start_date, end_date):
+        """
+        Oraliqdagi har bir kun uchun cash flow - {sana: cashflow}
 
-        phone_profit_from_sales = sum(
-            self.profit_calc.calculate_phone_profit(sale)
-            for sale in net_phone_sales
-        )
+        2 ta so'rov: sotuv summalari kunlik jamlanmadan va cash flow
+        tranzaksiyalari turi bo'yicha shartli yig'indilar.
+        """
+        grouped = self._get_summary_daily_totals(start_date, end_date)
+        cashflow = self._get_grouped_cashflow(start_date, end_date)
 
-        phone_profit_loss_from_returns = sum(
-            self.profit_calc.calculate_phone_profit(ret.phone_sale)
-            for ret in previous_day_returns
-        )
+        result = {}
+        current_date = start_date
+        while current_date <= end_date:
+            result[current_date] = self._build_cashflow(
+                current_date,
+                self._normalize_row(grouped['phone'].get(current_date), self.PHONE_KEYS),
+                self._normalize_row(grouped['exchange'].get(current_date), self.EXCHANGE_KEYS),
+                self._normalize_row(cashflow.get(current_date), self.CASHFLOW_KEYS),
+            )
+            current_date += timedelta(days=1)
+        return result
 
-        net_phone_profit = phone_profit_from_sales - phone_profit_loss_from_returns
+    def get_daily_cashflow(self, target_date=None):
+        """Bitta kunlik cash flow - get_daily_report['cashflow'] bilan bir xil"""
+        if not target_date:
+            target_date = timezone.now().date()
+        return self.get_cashflow_range(target_date, target_date)[target_date]
 
-        accessory_profit = sum(
-            self.profit_calc.calculate_accessory_profit(sale)
-            for sale in accessory_sales
-        )
+    def _get_daily_sales_data(self, target_date):
+        """Kunlik sotuvlar ro'yxati - lazy QuerySet'lar (keshga yozilmaydi)"""
+        from sales.models import PhoneSale, AccessorySale, PhoneExchange, PhoneReturn
 
-        exchange_profit = sum(
-            self.profit_calc.calculate_exchange_profit(exchange)
-            for exchange in exchanges
-        )
+        return {
+            'phone_sales': PhoneSale.objects.filter(
+                phone__shop=self.shop, sale_date=target_date, is_returned=False
+            ).select_related('phone', 'customer', 'salesman').with_profit(),
+            'accessory_sales': AccessorySale.objects.filter(
+                accessory__shop=self.shop, sale_date=target_date
+            ).select_related('accessory', 'customer', 'salesman').with_profit(),
+            'exchanges': PhoneExchange.objects.filter(
+                new_phone__shop=self.shop, exchange_date=target_date
+            ).select_related('new_phone', 'salesman').with_profit(),
+            'phone_returns': PhoneReturn.objects.filter(
+                phone_sale__phone__shop=self.shop, return_date=target_date
+            ).select_related('phone_sale__phone', 'phone_sale').with_lost_profit(),
+        }
 
+    def _build_daily_stats(self, target_date, phone, accessory, exchange, returns, total_expenses, cash):
+        """Bitta kun uchun get_daily_report bilan bir xil lug'at (tayyor summalardan)"""
+        net_phone_profit = phone['profit'] - returns['loss']
+        accessory_profit = accessory['profit']
+        exchange_profit = exchange['profit']
         total_phone_exchange_profit = net_phone_profit + exchange_profit
 
-        total_phone_sales_usd = (phone_totals.get('total') or Decimal('0')) + (
-                exchange_totals.get('total') or Decimal('0'))
-
-        total_phone_cash_usd = (
-                (phone_totals.get('cash') or Decimal('0')) +
-                (exchange_totals.get('cash') or Decimal('0'))
-        )
-
-        total_phone_card_usd = (phone_totals.get('card') or Decimal('0')) + (
-                exchange_totals.get('card') or Decimal('0'))
-        total_phone_debt_usd = (phone_totals.get('debt') or Decimal('0')) + (
-                exchange_totals.get('debt') or Decimal('0'))
-        total_phone_credit_usd = (phone_totals.get('credit') or Decimal('0')) + (
-                exchange_totals.get('credit') or Decimal('0'))
-
-        total_accessory_sales_uzs = accessory_totals.get('total') or Decimal('0')
-        total_accessory_cash_uzs = accessory_totals.get('cash') or Decimal('0')
-        total_accessory_card_uzs = accessory_totals.get('card') or Decimal('0')
-        total_accessory_debt_uzs = accessory_totals.get('debt') or Decimal('0')
-        total_accessory_credit_uzs = accessory_totals.get('credit') or Decimal('0')
-
-        cashflow = self._get_daily_cashflow(target_date)
+        total_phone_sales_usd = phone['total'] + exchange['total']
+        total_accessory_sales_uzs = accessory['total']
 
         total_sales = total_phone_sales_usd + total_accessory_sales_uzs
         profit_margin = Decimal('0.00')
@@ -652,25 +567,24 @@ class ReportCalculator:
             'shop': self.shop,
             'date': target_date,
             'counts': {
-                'phone': phone_totals.get('count') or 0,
-                'accessory': accessory_totals.get('count') or 0,
-                'exchange': exchange_totals.get('count') or 0,
-                'returns': phone_returns.count(),
-                'total': (phone_totals.get('count') or 0) + (accessory_totals.get('count') or 0) + (
-                        exchange_totals.get('count') or 0)
+                'phone': phone['count'],
+                'accessory': accessory['count'],
+                'exchange': exchange['count'],
+                'returns': returns['count'],
+                'total': phone['count'] + accessory['count'] + exchange['count']
             },
             'sales': {
-                'total': total_phone_sales_usd + total_accessory_sales_uzs,
+                'total': total_sales,
                 'phone_total_usd': total_phone_sales_usd,
-                'phone_cash_usd': total_phone_cash_usd,
-                'phone_card_usd': total_phone_card_usd,
-                'phone_debt_usd': total_phone_debt_usd,
-                'phone_credit_usd': total_phone_credit_usd,
+                'phone_cash_usd': phone['cash'] + exchange['cash'],
+                'phone_card_usd': phone['card'] + exchange['card'],
+                'phone_debt_usd': phone['debt'] + exchange['debt'],
+                'phone_credit_usd': phone['credit'] + exchange['credit'],
                 'accessory_total_uzs': total_accessory_sales_uzs,
-                'accessory_cash_uzs': total_accessory_cash_uzs,
-                'accessory_card_uzs': total_accessory_card_uzs,
-                'accessory_debt_uzs': total_accessory_debt_uzs,
-                'accessory_credit_uzs': total_accessory_credit_uzs,
+                'accessory_cash_uzs': accessory['cash'],
+                'accessory_card_uzs': accessory['card'],
+                'accessory_debt_uzs': accessory['debt'],
+                'accessory_credit_uzs': accessory['credit'],
             },
             'profits': {
                 'phone_profit': net_phone_profit,
@@ -681,117 +595,90 @@ class ReportCalculator:
             },
             'profit_margin': profit_margin,
             'expenses': total_expenses,
-            'net_cash_uzs': total_accessory_cash_uzs - total_expenses,
-            'cashflow': cashflow,
-            'sales_data': {
-                'phone_sales': net_phone_sales,
-                'accessory_sales': accessory_sales,
-                'exchanges': exchanges,
-                'phone_returns': phone_returns,
-            }
+            'net_cash_uzs': accessory['cash'] - total_expenses,
+            'cashflow': self._build_cashflow(target_date, phone, exchange, cash),
+            # Lazy QuerySet'lar - shablon ularni ochmasa so'rov bajarilmaydi
+            'sales_data': self._get_daily_sales_data(target_date),
         }
 
-    def get_monthly_report(self, year, month):
-        """Oylik hisobot - ✅ YANGI USUL"""
-        from sales.models import PhoneReturn
+    def get_daily_stats_range(self, start_date, end_date, grouped=None):
+        """
+        Oraliqdagi har bir kun uchun kunlik hisobotlar ro'yxati
 
-        start_date = date(year, month, 1)
-        _, last_day = monthrange(year, month)
-        end_date = date(year, month, last_day)
+        grouped berilmasa kunlik jamlanma (ShopDailySummary) o'qiladi;
+        cash flow har doim alohida BITTA guruhlangan so'rov.
+        """
+        if grouped is None:
+            grouped = self._get_summary_daily_totals(start_date, end_date)
+        cashflow = self._get_grouped_cashflow(start_date, end_date)
 
         daily_stats = []
-        working_days = 0
         current_date = start_date
-
         while current_date <= end_date:
-            daily_report = self.get_daily_report(current_date)
-            daily_stats.append(daily_report)
-            if daily_report['sales']['total'] > 0:
-                working_days += 1
+            daily_stats.append(self._build_daily_stats(
+                current_date,
+                self._normalize_row(grouped['phone'].get(current_date), self.PHONE_KEYS),
+                self._normalize_row(grouped['accessory'].get(current_date), self.ACCESSORY_KEYS),
+                self._normalize_row(grouped['exchange'].get(current_date), self.EXCHANGE_KEYS),
+                self._normalize_row(grouped['returns'].get(current_date), self.RETURN_KEYS),
+                grouped['expenses'].get(current_date, Decimal('0')),
+                self._normalize_row(cashflow.get(current_date), self.CASHFLOW_KEYS),
+            ))
             current_date += timedelta(days=1)
 
-        # ✅ YANGI USUL
-        all_phone_sales = PhoneSale.objects.filter(
-            phone__shop=self.shop,
-            sale_date__range=[start_date, end_date]
-        ).select_related('phone', 'customer', 'salesman')
-
-        phone_returns = PhoneReturn.objects.filter(
-            phone_sale__phone__shop=self.shop,
-            return_date__range=[start_date, end_date]
-        ).select_related('phone_sale__phone', 'phone_sale')
-
-        # ✅ SOF TELEFON SOTUVLARI
-        net_phone_sales = all_phone_sales.filter(is_returned=False)
-
-        # ✅ BU OYDA QAYTARILGAN LEKIN OLDINGI OYDA SOTILGAN
-        previous_month_returns = phone_returns.filter(
-            phone_sale__is_returned=True
-        ).exclude(
-            phone_sale__sale_date__range=[start_date, end_date]
-        )
-
-        accessory_sales = AccessorySale.objects.filter(
-            accessory__shop=self.shop,
-            sale_date__range=[start_date, end_date]
-        ).select_related('accessory', 'customer', 'salesman')
-
-        exchanges = PhoneExchange.objects.filter(
-            new_phone__shop=self.shop,
-            exchange_date__range=[start_date, end_date]
-        ).select_related('new_phone', 'salesman')
+        return daily_stats
 
-        phone_totals = net_phone_sales.aggregate(
-            total=Sum('sale_price'),
-            count=Count('id'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            debt=Sum('debt_amount'),
-            credit=Sum('credit_amount')
+    def get_monthly_report(self, year, month):
+        """Oylik hisobot - ✅ KUNLIK JAMLANMADAN (sotuvlar soniga bog'liq emas, keshlanadi)"""
+        return self._get_cached_report(
+            'monthly', date(year, month, 1),
+            lambda: self._compute_monthly_report(year, month)
         )
 
-        accessory_totals = accessory_sales.aggregate(
-            total=Sum('total_price'),
-            count=Count('id'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            debt=Sum('debt_amount'),
-            credit=Sum('credit_amount')
-        )
+    def _compute_monthly_report(self, year, month):
+        start_date = date(year, month, 1)
+        _, last_day = monthrange(year, month)
+        end_date = date(year, month, last_day)
 
-        exchange_totals = exchanges.aggregate(
-            total=Sum('new_phone_price'),
-            old_phone_value=Sum('old_phone_accepted_price'),
-            count=Count('id'),
-            cash=Sum('cash_amount'),
-            card=Sum('card_amount'),
-            debt=Sum('debt_amount'),
-            credit=Sum('credit_amount')
+        grouped = self._get_summary_daily_totals(start_date, end_date)
+        daily_stats = self.get_daily_stats_range(start_date, end_date, grouped)
+        working_days = sum(1 for d in daily_stats if d['sales']['total'] > 0)
+
+        def month_totals(rows, keys):
+            totals = self._normalize_row(None, keys)
+            for row in rows.values():
+                for key, value in self._normalize_row(row, keys).items():
+                    totals[key] += value
+            return totals
+
+        return self._build_monthly_report(
+            year, month, working_days,
+            month_totals(grouped['phone'], self.PHONE_KEYS),
+            month_totals(grouped['accessory'], self.ACCESSORY_KEYS),
+            month_totals(grouped['exchange'], self.EXCHANGE_KEYS),
+            month_totals(grouped['returns'], self.RETURN_KEYS),
+            sum(grouped['expenses'].values(), Decimal('0')),
+            daily_stats=daily_stats,
         )
 
-        total_expenses = sum([d['expenses'] for d in daily_stats])
+    def _build_monthly_report(self, year, month, working_days, phone_totals, accessory_totals,
+                              exchange_totals, return_totals, total_expenses, daily_stats=None):
+        """
+        Oylik hisobot lug'ati - tayyor oylik summalardan
 
-        phone_profit_from_sales = sum(
-            self.profit_calc.calculate_phone_profit(sale)
-            for sale in net_phone_sales
-        )
+        daily_stats berilmasa (yillik hisobotdagi oylar) kalit qo'shilmaydi.
+        """
+        start_date = date(year, month, 1)
+        _, last_day = monthrange(year, month)
+        end_date = date(year, month, last_day)
 
-        phone_profit_loss_from_returns = sum(
-            self.profit_calc.calculate_phone_profit(ret.phone_sale)
-            for ret in previous_month_returns
-        )
+        # ✅ BU OYDA QAYTARILGAN LEKIN OLDINGI OYDA SOTILGAN
+        phone_profit_from_sales = phone_totals['profit']
+        phone_profit_loss_from_returns = return_totals['loss_other_month']
 
         net_phone_profit = phone_profit_from_sales - phone_profit_loss_from_returns
-
-        accessory_profit = sum(
-            self.profit_calc.calculate_accessory_profit(sale)
-            for sale in accessory_sales
-        )
-
-        exchange_profit = sum(
-            self.profit_calc.calculate_exchange_profit(exchange)
-            for exchange in exchanges
-        )
+        accessory_profit = accessory_totals['profit']
+        exchange_profit = exchange_totals['profit']
 
         total_phone_exchange_profit = net_phone_profit + exchange_profit
 
@@ -823,7 +710,7 @@ class ReportCalculator:
         if total_sales > 0:
             profit_margin = (total_phone_exchange_profit / total_sales * 100).quantize(Decimal('0.01'))
 
-        return {
+        report = {
             'shop': self.shop,
             'year': year,
             'month': month,
@@ -832,7 +719,6 @@ class ReportCalculator:
                 'end_date': end_date,
                 'working_days': working_days
             },
-            'daily_stats': daily_stats,
             'totals': {
                 'phone_sales_usd': total_phone_sales_usd,
                 'phone_cash_usd': total_phone_cash_usd,
@@ -859,6 +745,7 @@ class ReportCalculator:
                 'accessory_profit': accessory_profit,
                 'exchange_profit': exchange_profit,
                 'total_phone_exchange_profit': total_phone_exchange_profit,
+                'total_profit': total_phone_exchange_profit + accessory_profit,
             },
             'profit_margin': profit_margin,
             'averages': {
@@ -870,117 +757,207 @@ class ReportCalculator:
                 'phone': phone_totals.get('count') or 0,
                 'accessory': accessory_totals.get('count') or 0,
                 'exchange': exchange_totals.get('count') or 0,
-                'returns': phone_returns.count(),
-                'returns_this_month': all_phone_sales.filter(is_returned=True).count(),
-                'returns_previous_months': previous_month_returns.count(),
+                'returns': return_totals['count'],
+                'returns_this_month': phone_totals['returned'],
+                'returns_previous_months': return_totals['count_other_month'],
                 'net_phone': net_phone_count,
                 'total': net_phone_count + (accessory_totals.get('count') or 0)
             }
         }
+        if daily_stats is not None:
+            report['daily_stats'] = daily_stats
+        return report
 
-    def get_seller_daily_report(self, seller, target_date=None):
-        """Sotuvchi kunlik hisobot - ✅ YANGI USUL"""
-        if not target_date:
-            target_date = timezone.now().date()
+    # ============= BIR NECHTA DO'KON (JAMLANGAN HISOBOT) =============
 
-        from sales.models import PhoneSale, AccessorySale, PhoneExchange, PhoneReturn
+    GROUP_KEYS = {
+        'phone': PHONE_KEYS,
+        'accessory': ACCESSORY_KEYS,
+        'exchange': EXCHANGE_KEYS,
+        'returns': RETURN_KEYS,
+    }
 
-        phone_sales_qs = PhoneSale.objects.filter(
-            phone__shop=self.shop,
-            salesman=seller,
-            sale_date=target_date
-        ).select_related('phone', 'customer', 'salesman')
+    @classmethod
+    def _get_summary_totals_by_shop(cls, shops, start_date, end_date):
+        """
+        Oraliq summalari do'kon bo'yicha - ShopDailySummary GROUP BY shop (BITTA so'rov)
 
-        accessory_sales_qs = AccessorySale.objects.filter(
-            accessory__shop=self.shop,
-            salesman=seller,
-            sale_date=target_date
-        ).select_related('accessory', 'customer', 'salesman')
+        Natija: {shop_id: {'phone': qator, ..., 'expenses': summa, 'working_days': kunlar}}
+        """
+        fields = ShopDailySummary.value_fields()
+        rows = ShopDailySummary.objects.filter(
+            shop__in=shops,
+            date__range=[start_date, end_date]
+        ).values('shop_id').annotate(
+            working_days=Count('id', filter=ShopDailySummary.ACTIVE_DAY),
+            **{field: Sum(field) for field in fields}
+        ).order_by()
+
+        totals = {}
+        for row in rows:
+            totals[row['shop_id']] = {
+                group: cls._normalize_row({key: row[f'{group}_{key}'] for key in keys}, cls.GROUP_KEYS[group])
+                for group, keys in ShopDailySummary.GROUPS.items()
+            }
+            totals[row['shop_id']]['expenses'] = row['expenses'] or Decimal('0')
+            totals[row['shop_id']]['working_days'] = row['working_days']
+        return totals
+
+    @classmethod
+    def _get_cashflow_totals_by_shop(cls, shops, start_date, end_date):
+        """Cash flow summalari do'kon bo'yicha (BITTA so'rov)"""
+        rows = CashFlowTransaction.objects.filter(
+            shop__in=shops,
+            transaction_date__range=[start_date, end_date]
+        ).values('shop_id').annotate(**cls._cashflow_annotations()).order_by()
+
+        return {row['shop_id']: cls._normalize_row(row, cls.CASHFLOW_KEYS) for row in rows}
+
+    @classmethod
+    def _sum_rows(cls, rows, keys):
+        totals = cls._normalize_row(None, keys)
+        for row in rows:
+            for key in keys:
+                totals[key] += row[key]
+        return totals
+
+    @classmethod
+    def _sum_shop_totals(cls, shop_totals):
+        totals = {
+            group: cls._sum_rows([row[group] for row in shop_totals], keys)
+            for group, keys in cls.GROUP_KEYS.items()
+        }
+        totals['expenses'] = sum((row['expenses'] for row in shop_totals), Decimal('0'))
+        totals['working_days'] = sum(row['working_days'] for row in shop_totals)
+        return totals
+
+    @classmethod
+    def _empty_shop_totals(cls):
+        totals = {group: cls._normalize_row(None, keys) for group, keys in cls.GROUP_KEYS.items()}
+        totals.update(expenses=Decimal('0'), working_days=0)
+        return totals
+
+    @classmethod
+    def get_shops_daily_report(cls, shops, target_date):
+        """
+        Barcha do'konlar kunlik hisoboti - do'konlar soniga bog'liq emas (jamlanma + cash flow)
 
-        exchanges_qs = PhoneExchange.objects.filter(
-            new_phone__shop=self.shop,
-            salesman=seller,
-            exchange_date=target_date
-        ).select_related('new_phone', 'old_phone_model', 'old_phone_memory', 'customer', 'salesman')
+        Natija: {'date', 'shops': [do'kon hisoboti (get_daily_report kabi)], 'total': jami}
+        """
+        shops = list(shops)
+        summary = cls._get_summary_totals_by_shop(shops, target_date, target_date)
+        cashflow = cls._get_cashflow_totals_by_shop(shops, target_date, target_date)
+
+        def build(shop, totals, cash):
+            return cls(shop)._build_daily_stats(
+                target_date, totals['phone'], totals['accessory'], totals['exchange'],
+                totals['returns'], totals['expenses'], cash
+            )
 
-        phone_returns = PhoneReturn.objects.filter(
-            phone_sale__phone__shop=self.shop,
-            phone_sale__salesman=seller,
-            return_date=target_date
-        ).select_related('phone_sale__phone', 'phone_sale__customer')
+        rows = [(shop, summary.get(shop.id) or cls._empty_shop_totals(),
+                 cashflow.get(shop.id) or cls._normalize_row(None, cls.CASHFLOW_KEYS)) for shop in shops]
 
-        # ✅ YANGI USUL
-        net_phone_sales_qs = phone_sales_qs.filter(is_returned=False)
+        total = build(None, cls._sum_shop_totals([totals for _, totals, _ in rows]),
+                      cls._sum_rows([cash for _, _, cash in rows], cls.CASHFLOW_KEYS))
+        # Jami qator uchun bitta do'kon sotuvlari ro'yxati yo'q
+        total.pop('sales_data')
+        total['cashflow'].pop('transactions')
 
-        phone_sales_list = list(net_phone_sales_qs)
-        accessory_sales_list = list(accessory_sales_qs)
-        exchanges_list = list(exchanges_qs)
+        return {
+            'date': target_date,
+            'shops': [build(shop, totals, cash) for shop, totals, cash in rows],
+            'total': total,
+        }
 
-        totals = self._calculate_sales_totals_from_list(phone_sales_list, accessory_sales_list, exchanges_list)
-        profits = self._calculate_profits_from_list(phone_sales_list, accessory_sales_list, exchanges_list)
+    @classmethod
+    def get_shops_monthly_report(cls, shops, year, month):
+        """
+        Barcha do'konlar oylik hisoboti - do'konlar soniga bog'liq emas (jamlanma + ish kunlari)
 
-        phone_with_exchange = {
-            'total_usd': totals['phone']['total'] + totals['exchange']['total'],
-            'cash_usd': totals['phone']['cash'] + totals['exchange']['cash'],
-            'card_usd': totals['phone']['card'] + totals['exchange']['card'],
-            'debt_usd': totals['phone']['debt'] + totals['exchange']['debt'],
-        }
+        Natija: {'year', 'month', 'shops': [do'kon oylik hisoboti (daily_stats'siz)], 'total': jami}
+        """
+        shops = list(shops)
+        start_date = date(year, month, 1)
+        end_date = date(year, month, monthrange(year, month)[1])
+        summary = cls._get_summary_totals_by_shop(shops, start_date, end_date)
 
-        total_phone_exchange_profit = profits['phone_profit'] + profits['exchange_profit']
-        net_total_profit = total_phone_exchange_profit + profits['accessory_profit']
+        def build(shop, totals):
+            return cls(shop)._build_monthly_report(
+                year, month, totals['working_days'], totals['phone'], totals['accessory'],
+                totals['exchange'], totals['returns'], totals['expenses']
+            )
 
-        total_sales = phone_with_exchange['total_usd'] + totals['accessory']['total']
-        profit_margin = Decimal('0.00')
-        if total_sales > 0:
-            profit_margin = (net_total_profit / total_sales * 100).quantize(Decimal('0.01'))
+        rows = [(shop, summary.get(shop.id) or cls._empty_shop_totals()) for shop in shops]
+
+        total_rows = cls._sum_shop_totals([totals for _, totals in rows])
+        # Jami ish kuni - kamida bitta do'konda savdo bo'lgan kunlar
+        total_rows['working_days'] = ShopDailySummary.objects.filter(
+            ShopDailySummary.ACTIVE_DAY,
+            shop__in=shops,
+            date__range=[start_date, end_date]
+        ).values('date').distinct().count()
 
         return {
-            'seller': seller,
-            'date': target_date,
-            'counts': {
-                'phone': len(phone_sales_list),
-                'accessory': len(accessory_sales_list),
-                'exchange': len(exchanges_list),
-                'returns': phone_returns.count(),
-                'total': len(phone_sales_list) + len(accessory_sales_list) + len(exchanges_list)
-            },
-            'sales': {
-                'total': phone_with_exchange['total_usd'] + totals['accessory']['total'],
-                'cash': phone_with_exchange['cash_usd'] + totals['accessory']['cash'],
-                'card': phone_with_exchange['card_usd'] + totals['accessory']['card'],
-                'debt': phone_with_exchange['debt_usd'] + totals['accessory']['debt'],
-                # YANGI: Alohida telefon va almashtirish summalari
-                'phone_only_total_usd': totals['phone']['total'],
-                'phone_only_cash_usd': totals['phone']['cash'],
-                'exchange_total_usd': totals['exchange']['total'],
-                'exchange_cash_usd': totals['exchange']['cash'],
-                'phone_total_usd': phone_with_exchange['total_usd'],  # Eski birlashtirilgan saqlanadi
-                'phone_cash_usd': phone_with_exchange['cash_usd'],
-                'accessory_total_uzs': totals['accessory']['total'],
-                'accessory_cash_uzs': totals['accessory']['cash'],
-            },
-            'profits': {
-                'phone_profit': profits['phone_profit'],
-                'accessory_profit': profits['accessory_profit'],
-                'exchange_profit': profits['exchange_profit'],
-                'total_phone_exchange_profit': total_phone_exchange_profit,
-                'total_profit': net_total_profit,
-            },
-            'profit_margin': profit_margin,
-            'sales_data': {
-                'phone_sales': net_phone_sales_qs,
-                'accessory_sales': accessory_sales_qs,
-                'exchanges': exchanges_qs,
-                'phone_returns': phone_returns,
-            }
+            'year': year,
+            'month': month,
+            'shops': [build(shop, totals) for shop, totals in rows],
+            'total': build(None, total_rows),
         }
 
+    def get_seller_daily_report(self, seller, target_date=None):
+        """Sotuvchi kunlik hisobot - ✅ SQL AGGREGATE (foyda summalar bilan bir so'rovda)"""
+        if not target_date:
+            target_date = timezone.now().date()
+
+        grouped = self._get_seller_daily_totals(target_date, target_date, [seller])
+        key = (seller.id, target_date)
+        returns = self._normalize_row(grouped['returns'].get(key), ('count',))
+
+        return self._build_seller_daily_report(
+            seller, target_date,
+            self._normalize_row(grouped['phone'].get(key), self.SELLER_KEYS),
+            self._normalize_row(grouped['accessory'].get(key), self.SELLER_KEYS),
+            self._normalize_row(grouped['exchange'].get(key), self.SELLER_KEYS),
+            returns['count'],
+        )
+
+    def _get_grouped_monthly_totals(self, year):
+        """
+        Yil bo'yicha oylik summalar - ShopDailySummary dan BITTA so'rov (oy bo'yicha GROUP BY)
+
+        Natija: {'phone': {oy: qator}, ..., 'expenses': {oy: summa}, 'working_days': {oy: kunlar}}
+        """
+        fields = ShopDailySummary.value_fields()
+
+        rows = ShopDailySummary.objects.filter(
+            shop=self.shop,
+            date__year=year
+        ).annotate(period=ExtractMonth('date')).values('period').annotate(
+            working_days=Count('id', filter=ShopDailySummary.ACTIVE_DAY),
+            **{field: Sum(field) for field in fields}
+        ).order_by()
+
+        grouped = {group: {} for group in ShopDailySummary.GROUPS}
+        grouped['expenses'] = {}
+        grouped['working_days'] = {}
+        for row in rows:
+            month = row['period']
+            for group, keys in ShopDailySummary.GROUPS.items():
+                grouped[group][month] = {key: row[f'{group}_{key}'] for key in keys}
+            grouped['expenses'][month] = row['expenses'] or Decimal('0')
+            grouped['working_days'][month] = row['working_days']
+
+        return grouped
+
     def get_yearly_report(self, year):
-        """Yillik hisobot - OYLIK HISOBOTLARNI JAMLASH"""
-        from sales.models import PhoneReturn
+        """Yillik hisobot - ✅ KUNLIK JAMLANMA OYLAR BO'YICHA GURUHLANGAN (keshlanadi)"""
+        return self._get_cached_report(
+            'yearly', date(year, 1, 1),
+            lambda: self._compute_yearly_report(year)
+        )
 
-        start_date = date(year, 1, 1)
-        end_date = date(year, 12, 31)
+    def _compute_yearly_report(self, year):
+        grouped = self._get_grouped_monthly_totals(year)
 
         monthly_stats = []
         total_phone_sales = Decimal('0')
@@ -999,7 +976,14 @@ class ReportCalculator:
         total_returns_count = 0
 
         for month in range(1, 13):
-            monthly_report = self.get_monthly_report(year, month)
+            monthly_report = self._build_monthly_report(
+                year, month, grouped['working_days'].get(month, 0),
+                self._normalize_row(grouped['phone'].get(month), self.PHONE_KEYS),
+                self._normalize_row(grouped['accessory'].get(month), self.ACCESSORY_KEYS),
+                self._normalize_row(grouped['exchange'].get(month), self.EXCHANGE_KEYS),
+                self._normalize_row(grouped['returns'].get(month), self.RETURN_KEYS),
+                grouped['expenses'].get(month, Decimal('0')),
+            )
             monthly_stats.append(monthly_report)
 
             total_phone_sales += monthly_report['totals']['phone_sales_usd']
@@ -1047,6 +1031,7 @@ class ReportCalculator:
                 'accessory_profit': total_accessory_profit,
                 'exchange_profit': total_exchange_profit,
                 'total_phone_exchange_profit': total_phone_exchange_profit,
+                'total_profit': total_phone_exchange_profit + total_accessory_profit,
                 'profit_margin': profit_margin
             },
             'averages': {
@@ -1066,181 +1051,454 @@ class ReportCalculator:
         }
 
     def get_seller_monthly_salary(self, seller, year, month):
-        """Sotuvchi oylik maoshi - ✅ YANGI USUL"""
-        from sales.models import PhoneReturn
+        """Sotuvchi oylik maoshi - ✅ get_all_sellers_monthly_salary orqali (guruhlangan so'rovlar)"""
+        return self.get_all_sellers_monthly_salary(year, month, [seller])[seller.id]
 
-        start_date = date(year, month, 1)
-        _, last_day = monthrange(year, month)
-        end_date = date(year, month, last_day)
+    # ============= BARCHA SOTUVCHILAR MAOSHI (BITTA O'TISH) =============
 
-        daily_data = []
-        current_date = start_date
+    SELLER_KEYS = ('count', 'total', 'cash', 'card', 'debt', 'profit')
 
-        while current_date <= end_date:
-            day_report = self.get_seller_daily_report(seller, current_date)
+    def _seller_querysets(self, start_date, end_date, sellers=None):
+        """Do'kon va oraliq bo'yicha sotuv, aksessuar, almashtirish va qaytarish querysetlari"""
+        from sales.models import PhoneSale, AccessorySale, PhoneExchange, PhoneReturn
 
-            if day_report['counts']['total'] > 0 or day_report['counts']['returns'] > 0:
-                for sale in day_report['sales_data']['phone_sales']:
-                    sale.calculated_profit = self.profit_calc.calculate_phone_profit(sale)
+        phone_sales = PhoneSale.objects.filter(phone__shop=self.shop, sale_date__range=[start_date, end_date])
+        accessory_sales = AccessorySale.objects.filter(
+            accessory__shop=self.shop, sale_date__range=[start_date, end_date]
+        )
+        exchanges = PhoneExchange.objects.filter(
+            new_phone__shop=self.shop, exchange_date__range=[start_date, end_date]
+        )
+        phone_returns = PhoneReturn.objects.filter(
+            phone_sale__phone__shop=self.shop, return_date__range=[start_date, end_date]
+        )
+        if sellers is not None:
+            phone_sales = phone_sales.filter(salesman__in=sellers)
+            accessory_sales = accessory_sales.filter(salesman__in=sellers)
+            exchanges = exchanges.filter(salesman__in=sellers)
+            phone_returns = phone_returns.filter(phone_sale__salesman__in=sellers)
+        return phone_sales, accessory_sales, exchanges, phone_returns
 
-                for exchange in day_report['sales_data']['exchanges']:
-                    exchange.calculated_profit = self.profit_calc.calculate_exchange_profit(exchange)
+    @staticmethod
+    def _group_seller_sales(phone_sales, accessory_sales, exchanges):
+        """(sotuvchi, kun) bo'yicha sotuvlar - har bir jadval uchun BITTA GROUP BY"""
+        phone_rows = phone_sales.values('salesman_id', 'sale_date').annotate(
+            **phone_sales.totals_annotations(filter=Q(is_returned=False))
+        ).order_by()
+        accessory_rows = accessory_sales.values('salesman_id', 'sale_date').annotate(
+            **accessory_sales.totals_annotations()
+        ).order_by()
+        exchange_rows = exchanges.values('salesman_id', 'exchange_date').annotate(
+            **exchanges.totals_annotations()
+        ).order_by()
 
-                for sale in day_report['sales_data']['accessory_sales']:
-                    sale.calculated_profit = self.profit_calc.calculate_accessory_profit(sale)
+        return {
+            'phone': {(row['salesman_id'], row['sale_date']): row for row in phone_rows},
+            'accessory': {(row['salesman_id'], row['sale_date']): row for row in accessory_rows},
+            'exchange': {(row['salesman_id'], row['exchange_date']): row for row in exchange_rows},
+        }
 
-                daily_data.append(day_report)
+    def _get_seller_daily_totals(self, start_date, end_date, sellers=None):
+        """
+        (sotuvchi, kun) bo'yicha summalar - har bir jadval uchun BITTA GROUP BY
 
-            current_date += timedelta(days=1)
+        Natija: {'phone': {(sotuvchi_id, sana): qator}, 'accessory': ..., 'exchange': ..., 'returns': ...}
+        """
+        phone_sales, accessory_sales, exchanges, phone_returns = self._seller_querysets(
+            start_date, end_date, sellers
+        )
+        grouped = self._group_seller_sales(phone_sales, accessory_sales, exchanges)
 
-        phone_sales = self.query_helper.get_phone_sales(self.shop, start_date, end_date, seller)
-        accessory_sales = self.query_helper.get_accessory_sales(self.shop, start_date, end_date, seller)
-        exchanges = self.query_helper.get_exchanges(self.shop, start_date, end_date, seller)
+        # Oydan tashqarida sotilib, shu oyda qaytarilganlar foydasi yo'qotiladi
+        money = DecimalField(max_digits=15, decimal_places=2)
+        outside = Q(phone_sale__is_returned=True) & ~Q(phone_sale__sale_date__range=[start_date, end_date])
+        return_rows = phone_returns.values('phone_sale__salesman_id', 'return_date').annotate(
+            count=Count('id'),
+            loss=Sum(phone_returns.lost_profit_expression(), filter=outside, output_field=money),
+        ).order_by()
 
-        phone_returns = PhoneReturn.objects.filter(
-            phone_sale__phone__shop=self.shop,
-            phone_sale__salesman=seller,
-            return_date__range=[start_date, end_date]
-        ).select_related('phone_sale__phone', 'phone_sale')
+        grouped['returns'] = {(row['phone_sale__salesman_id'], row['return_date']): row for row in return_rows}
+        return grouped
 
-        # ✅ YANGI USUL
-        net_phone_sales = phone_sales.filter(is_returned=False)
+    def _build_seller_daily_report(self, seller, target_date, phone, accessory, exchange, returns_count):
+        """get_seller_daily_report bilan bir xil lug'at - tayyor summalardan"""
+        from sales.models import PhoneSale, AccessorySale, PhoneExchange, PhoneReturn
 
-        phone_profit_from_sales = sum(
-            self.profit_calc.calculate_phone_profit(sale)
-            for sale in net_phone_sales
-        )
+        total_phone_exchange_profit = phone['profit'] + exchange['profit']
+        net_total_profit = total_phone_exchange_profit + accessory['profit']
+        phone_total_usd = phone['total'] + exchange['total']
+        phone_cash_usd = phone['cash'] + exchange['cash']
 
-        # ✅ YANGI USUL
-        previous_month_returns = phone_returns.filter(
-            phone_sale__is_returned=True
-        ).exclude(
-            phone_sale__sale_date__range=[start_date, end_date]
-        )
+        total_sales = phone_total_usd + accessory['total']
+        profit_margin = Decimal('0.00')
+        if total_sales > 0:
+            profit_margin = (net_total_profit / total_sales * 100).quantize(Decimal('0.01'))
 
-        phone_profit_loss_from_returns = sum(
-            self.profit_calc.calculate_phone_profit(ret.phone_sale)
-            for ret in previous_month_returns
-        )
+        return {
+            'seller': seller,
+            'date': target_date,
+            'counts': {
+                'phone': phone['count'],
+                'accessory': accessory['count'],
+                'exchange': exchange['count'],
+                'returns': returns_count,
+                'total': phone['count'] + accessory['count'] + exchange['count']
+            },
+            'sales': {
+                'total': total_sales,
+                'cash': phone_cash_usd + accessory['cash'],
+                'card': phone['card'] + exchange['card'] + accessory['card'],
+                'debt': phone['debt'] + exchange['debt'] + accessory['debt'],
+                'phone_only_total_usd': phone['total'],
+                'phone_only_cash_usd': phone['cash'],
+                'exchange_total_usd': exchange['total'],
+                'exchange_cash_usd': exchange['cash'],
+                'phone_total_usd': phone_total_usd,
+                'phone_cash_usd': phone_cash_usd,
+                'accessory_total_uzs': accessory['total'],
+                'accessory_cash_uzs': accessory['cash'],
+            },
+            'profits': {
+                'phone_profit': phone['profit'],
+                'accessory_profit': accessory['profit'],
+                'exchange_profit': exchange['profit'],
+                'total_phone_exchange_profit': total_phone_exchange_profit,
+                'total_profit': net_total_profit,
+            },
+            'profit_margin': profit_margin,
+            # Lazy QuerySet'lar - calculated_profit / lost_profit SQL da qo'shiladi
+            'sales_data': {
+                'phone_sales': PhoneSale.objects.filter(
+                    phone__shop=self.shop, salesman=seller, sale_date=target_date, is_returned=False
+                ).select_related('phone', 'customer', 'salesman').with_profit(),
+                'accessory_sales': AccessorySale.objects.filter(
+                    accessory__shop=self.shop, salesman=seller, sale_date=target_date
+                ).select_related('accessory', 'customer', 'salesman').with_profit(),
+                'exchanges': PhoneExchange.objects.filter(
+                    new_phone__shop=self.shop, salesman=seller, exchange_date=target_date
+                ).select_related(
+                    'new_phone', 'old_phone_model', 'old_phone_memory', 'customer', 'salesman'
+                ).with_profit(),
+                'phone_returns': PhoneReturn.objects.filter(
+                    phone_sale__phone__shop=self.shop, phone_sale__salesman=seller, return_date=target_date
+                ).select_related('phone_sale__phone', 'phone_sale__customer').with_lost_profit(),
+            }
+        }
 
-        net_phone_profit = phone_profit_from_sales - phone_profit_loss_from_returns
+    def get_all_sellers_monthly_salary(self, year, month, sellers=None):
+        """
+        Barcha sotuvchilar oylik maoshi - ✅ GURUHLANGAN SO'ROVLAR (sotuvchi va kunlar soniga bog'liq emas)
 
-        accessory_profit = sum(
-            self.profit_calc.calculate_accessory_profit(sale)
-            for sale in accessory_sales
-        )
+        Har bir sotuvchi uchun get_seller_monthly_salary bilan bir xil lug'at.
+        sellers berilmasa - oyda sotuv yoki qaytarishi bor sotuvchilar.
+        Natija: {sotuvchi_id: maosh lug'ati}
+        """
+        start_date = date(year, month, 1)
+        _, last_day = monthrange(year, month)
+        end_date = date(year, month, last_day)
 
-        exchange_profit = sum(
-            self.profit_calc.calculate_exchange_profit(exchange)
-            for exchange in exchanges
-        )
+        grouped = self._get_seller_daily_totals(start_date, end_date, sellers)
 
-        total_phone_exchange_profit = net_phone_profit + exchange_profit
-        total_profit = total_phone_exchange_profit + accessory_profit
+        if sellers is None:
+            seller_ids = {seller_id for rows in grouped.values() for seller_id, _ in rows}
+            sellers = User.objects.filter(id__in=seller_ids).select_related('userprofile').order_by('id')
+        timelines = CommissionTimeline.for_users(sellers, until=end_date)
 
-        totals = self._calculate_sales_totals(net_phone_sales, accessory_sales, exchanges)
+        days_by_seller = {}
+        for rows in grouped.values():
+            for seller_id, day in rows:
+                days_by_seller.setdefault(seller_id, set()).add(day)
 
-        phone_commission_usd = Decimal('0')
-        accessory_commission_uzs = Decimal('0')
-        exchange_commission_usd = Decimal('0')
+        results = {}
+        for seller in sellers:
+            daily_data = []
+            month_totals = {
+                group: self._normalize_row(None, self.SELLER_KEYS) for group in ('phone', 'accessory', 'exchange')
+            }
+            returns_count = 0
+            phone_profit_loss = Decimal('0')
+            phone_commission_usd = Decimal('0')
+            accessory_commission_uzs = Decimal('0')
+            exchange_commission_usd = Decimal('0')
+
+            for day in sorted(days_by_seller.get(seller.id, ())):
+                key = (seller.id, day)
+                phone = self._normalize_row(grouped['phone'].get(key), self.SELLER_KEYS)
+                accessory = self._normalize_row(grouped['accessory'].get(key), self.SELLER_KEYS)
+                exchange = self._normalize_row(grouped['exchange'].get(key), self.SELLER_KEYS)
+                returns = self._normalize_row(grouped['returns'].get(key), ('count', 'loss'))
+
+                for group, row in (('phone', phone), ('accessory', accessory), ('exchange', exchange)):
+                    for field in self.SELLER_KEYS:
+                        month_totals[group][field] += row[field]
+                returns_count += returns['count']
+                phone_profit_loss += returns['loss']
+
+                # Kunlik komissiya - o'sha kundagi foizlar bilan (get_seller_monthly_salary kabi yaxlitlash)
+                rates = timelines[seller.id].rates_for_date(day)
+                phone_commission_usd += (phone['profit'] * rates['phone_rate'] / 100).quantize(Decimal('0.01'))
+                phone_commission_usd -= (returns['loss'] * rates['phone_rate'] / 100).quantize(Decimal('0.01'))
+                accessory_commission_uzs += (
+                        accessory['profit'] * rates['accessory_rate'] / 100).quantize(Decimal('0.01'))
+                exchange_commission_usd += (
+                        exchange['profit'] * rates['exchange_rate'] / 100).quantize(Decimal('0.01'))
+
+                day_report = self._build_seller_daily_report(
+                    seller, day, phone, accessory, exchange, returns['count']
+                )
+                if day_report['counts']['total'] > 0 or returns['count'] > 0:
+                    daily_data.append(day_report)
+
+            phone_totals = month_totals['phone']
+            accessory_totals = month_totals['accessory']
+            exchange_totals = month_totals['exchange']
+
+            net_phone_profit = phone_totals['profit'] - phone_profit_loss
+            total_phone_exchange_profit = net_phone_profit + exchange_totals['profit']
+
+            final_rates = timelines[seller.id].rates_for_date(end_date)
+            total_commission_usd = phone_commission_usd + exchange_commission_usd
+
+            results[seller.id] = {
+                'seller': seller,
+                'year': year,
+                'month': month,
+                'period': {'start_date': start_date, 'end_date': end_date},
+                'daily_data': daily_data,
+
+                'sales': {
+                    'phone_count': phone_totals['count'],
+                    'accessory_count': accessory_totals['count'],
+                    'exchange_count': exchange_totals['count'],
+                    'returns_count': returns_count,
+                    'phone_total': phone_totals['total'] + exchange_totals['total'],
+                    'accessory_total': accessory_totals['total'],
+                },
+
+                'profits': {
+                    'phone_profit': net_phone_profit,
+                    'phone_profit_from_sales': phone_totals['profit'],
+                    'phone_profit_loss': phone_profit_loss,
+                    'accessory_profit': accessory_totals['profit'],
+                    'exchange_profit': exchange_totals['profit'],
+                    'total_phone_exchange_profit': total_phone_exchange_profit,
+                    'total_profit': total_phone_exchange_profit + accessory_totals['profit'],
+                },
+
+                'commission': {
+                    'phone_commission': phone_commission_usd,
+                    'exchange_commission': exchange_commission_usd,
+                    'accessory_commission': accessory_commission_uzs,
+                    'total_commission': total_commission_usd,
+                    'base_salary_usd': final_rates['base_salary_usd'],
+                    'base_salary_uzs': final_rates['base_salary_uzs'],
+                    'total_salary_usd': final_rates['base_salary_usd'] + total_commission_usd,
+                    'total_salary_uzs': final_rates['base_salary_uzs'] + accessory_commission_uzs,
+                },
+
+                'commission_rates': final_rates,
+            }
 
-        current_date = start_date
-        while current_date <= end_date:
-            if hasattr(seller, 'userprofile') and hasattr(seller.userprofile, 'get_commission_rates_for_date'):
-                rates = seller.userprofile.get_commission_rates_for_date(current_date)
-            else:
-                rates = {
-                    'phone_rate': Decimal('0'),
-                    'accessory_rate': Decimal('0'),
-                    'exchange_rate': Decimal('0'),
-                    'base_salary_usd': Decimal('0'),
-                    'base_salary_uzs': Decimal('0')
-                }
+        return results
 
-            day_phone_sales = net_phone_sales.filter(sale_date=current_date)
-            day_phone_profit = sum(
-                self.profit_calc.calculate_phone_profit(sale)
-                for sale in day_phone_sales
-            )
-            phone_commission_usd += (day_phone_profit * rates['phone_rate'] / 100).quantize(Decimal('0.01'))
+    def get_yearly_sellers_stats(self, year):
+        """
+        Yillik hisobot sotuvchilar jadvali - har oy get_all_sellers_monthly_salary dan jamlanadi
 
-            day_returns = previous_month_returns.filter(return_date=current_date)
-            day_return_loss = sum(
-                self.profit_calc.calculate_phone_profit(ret.phone_sale)
-                for ret in day_returns
-            )
-            phone_commission_usd -= (day_return_loss * rates['phone_rate'] / 100).quantize(Decimal('0.01'))
+        Faqat yil davomida sotuvi bor sotuvchilar, telefon savdosi bo'yicha kamayish tartibida.
+        """
+        start_date = date(year, 1, 1)
+        end_date = date(year, 12, 31)
 
-            day_accessory_sales = accessory_sales.filter(sale_date=current_date)
-            day_accessory_profit = sum(
-                self.profit_calc.calculate_accessory_profit(sale)
-                for sale in day_accessory_sales
-            )
-            accessory_commission_uzs += (day_accessory_profit * rates['accessory_rate'] / 100).quantize(Decimal('0.01'))
+        phone_sellers = PhoneSale.objects.filter(
+            phone__shop=self.shop, sale_date__range=[start_date, end_date]
+        ).values_list('salesman_id', flat=True).distinct()
+        accessory_sellers = AccessorySale.objects.filter(
+            accessory__shop=self.shop, sale_date__range=[start_date, end_date]
+        ).values_list('salesman_id', flat=True).distinct()
+        exchange_sellers = PhoneExchange.objects.filter(
+            new_phone__shop=self.shop, exchange_date__range=[start_date, end_date]
+        ).values_list('salesman_id', flat=True).distinct()
+
+        seller_ids = set(phone_sellers) | set(accessory_sellers) | set(exchange_sellers)
+        sellers = list(User.objects.filter(id__in=seller_ids).select_related('userprofile'))
+
+        # ✅ Har oy uchun barcha sotuvchilar maoshi bitta o'tishda
+        monthly_salaries = {
+            month: self.get_all_sellers_monthly_salary(year, month, sellers)
+            for month in range(1, 13)
+        }
 
-            day_exchanges = exchanges.filter(exchange_date=current_date)
-            day_exchange_profit = sum(
-                self.profit_calc.calculate_exchange_profit(exchange)
-                for exchange in day_exchanges
-            )
-            exchange_commission_usd += (day_exchange_profit * rates['exchange_rate'] / 100).quantize(Decimal('0.01'))
+        yearly_sellers_stats = []
+        for seller in sellers:
+            totals = {
+                'phone_sales': Decimal('0'), 'accessory_sales': Decimal('0'),
+                'phone_profit': Decimal('0'), 'accessory_profit': Decimal('0'), 'exchange_profit': Decimal('0'),
+                'phone_count': 0, 'accessory_count': 0, 'exchange_count': 0, 'returns_count': 0,
+            }
+            monthly_phone_data = []
+            monthly_accessory_data = []
+            working_days_count = 0
+
+            for month in range(1, 13):
+                monthly_salary = monthly_salaries[month][seller.id]
+                sales = monthly_salary['sales']
+                profits = monthly_salary['profits']
+
+                totals['phone_sales'] += sales['phone_total']
+                totals['accessory_sales'] += sales['accessory_total']
+                totals['phone_profit'] += profits['phone_profit']
+                totals['accessory_profit'] += profits['accessory_profit']
+                totals['exchange_profit'] += profits['exchange_profit']
+                for key in ('phone_count', 'accessory_count', 'exchange_count', 'returns_count'):
+                    totals[key] += sales[key]
+
+                # OYLIK DIAGRAMMA UCHUN MA'LUMOTLAR
+                monthly_phone_data.append(sales['phone_count'] + sales['exchange_count'])
+                monthly_accessory_data.append(sales['accessory_count'])
+                working_days_count += len(monthly_salary['daily_data'])
+
+            total_transactions = totals['phone_count'] + totals['accessory_count'] + totals['exchange_count']
+            if total_transactions == 0:
+                continue
+
+            yearly_sellers_stats.append({
+                'seller': seller,
+                'phone_sales_usd': totals['phone_sales'],
+                'accessory_sales_uzs': totals['accessory_sales'],
+                'phone_count': totals['phone_count'],
+                'accessory_count': totals['accessory_count'],
+                'exchange_count': totals['exchange_count'],
+                'returns_count': totals['returns_count'],
+                'net_phone_count': totals['phone_count'] + totals['exchange_count'],
+                'phone_profit': totals['phone_profit'],
+                'accessory_profit': totals['accessory_profit'],
+                'exchange_profit': totals['exchange_profit'],
+                'total_phone_exchange_profit': totals['phone_profit'] + totals['exchange_profit'],
+                'total_sales': totals['phone_sales'] + totals['accessory_sales'],
+                'total_transactions': total_transactions,
+                'monthly_phone_data': monthly_phone_data,
+                'monthly_accessory_data': monthly_accessory_data,
+                'working_days': working_days_count,
+            })
+
+        yearly_sellers_stats.sort(
+            key=lambda x: (x['phone_sales_usd'], x['total_transactions']),
+            reverse=True
+        )
+        return yearly_sellers_stats
 
-            current_date += timedelta(days=1)
+    # ============= SOTUVCHILAR GRAFIKLARI (KUNLIK + OYLIK QATORLAR) =============
 
-        if hasattr(seller, 'userprofile') and hasattr(seller.userprofile, 'get_commission_rates_for_date'):
-            final_rates = seller.userprofile.get_commission_rates_for_date(end_date)
-        else:
-            final_rates = {
-                'phone_rate': Decimal('0'),
-                'accessory_rate': Decimal('0'),
-                'exchange_rate': Decimal('0'),
-                'base_salary_usd': Decimal('0'),
-                'base_salary_uzs': Decimal('0')
-            }
+    SERIES_KEYS = (
+        'phone_count', 'accessory_count', 'exchange_count', 'returns_count',
+        'phone_sales', 'exchange_sales', 'accessory_sales',
+        'phone_profit', 'exchange_profit', 'returns_loss', 'accessory_profit',
+        'commission_usd', 'commission_uzs',
+    )
 
-        total_commission_usd = phone_commission_usd + exchange_commission_usd
-        total_salary_usd = final_rates['base_salary_usd'] + total_commission_usd
-        total_salary_uzs = final_rates['base_salary_uzs'] + accessory_commission_uzs
+    @classmethod
+    def _empty_series_point(cls):
+        return {key: 0 if key.endswith('_count') else Decimal('0') for key in cls.SERIES_KEYS}
 
-        return {
-            'seller': seller,
-            'year': year,
-            'month': month,
-            'period': {'start_date': start_date, 'end_date': end_date},
-            'daily_data': daily_data,
+    def get_sellers_series(self, year, month, sellers=None):
+        """
+        Sotuvchilar grafiklari - ✅ butun yil BITTA o'tishda (12 oy va 31 kun uchun alohida hisobot emas)
 
-            'sales': {
-                'phone_count': net_phone_sales.count(),
-                'accessory_count': int(totals['accessory']['count']),
-                'exchange_count': int(totals['exchange']['count']),
-                'returns_count': phone_returns.count(),
-                'phone_total': totals['phone']['total'] + totals['exchange']['total'],
-                'accessory_total': totals['accessory']['total'],
-            },
+        Natija: {sotuvchi_id: {'seller', 'daily': [tanlangan oy kunlari], 'monthly': [12 oy], 'yearly': {...}}}
+        Oylik qiymatlar get_seller_monthly_salary bilan bir xil: komissiya har kun o'sha kundagi
+        foizlar bilan, boshqa oyda sotilib shu oyda qaytarilganlar foydasi yo'qotiladi.
+        sellers berilmasa - yilda sotuv yoki qaytarishi bor sotuvchilar.
+        """
+        year_start, year_end = date(year, 1, 1), date(year, 12, 31)
+        _, last_day = monthrange(year, month)
 
-            'profits': {
-                'phone_profit': net_phone_profit,
-                'phone_profit_from_sales': phone_profit_from_sales,
-                'phone_profit_loss': phone_profit_loss_from_returns,
-                'accessory_profit': accessory_profit,
-                'exchange_profit': exchange_profit,
-                'total_phone_exchange_profit': total_phone_exchange_profit,
-                'total_profit': total_profit,
-            },
+        phone_sales, accessory_sales, exchanges, phone_returns = self._seller_querysets(
+            year_start, year_end, sellers
+        )
+        grouped = self._group_seller_sales(phone_sales, accessory_sales, exchanges)
 
-            'commission': {
-                'phone_commission': phone_commission_usd,
-                'exchange_commission': exchange_commission_usd,
-                'accessory_commission': accessory_commission_uzs,
-                'total_commission': total_commission_usd,
-                'base_salary_usd': final_rates['base_salary_usd'],
-                'base_salary_uzs': final_rates['base_salary_uzs'],
-                'total_salary_usd': total_salary_usd,
-                'total_salary_uzs': total_salary_uzs,
-            },
+        # Qaytarishlar sotilgan oy bilan - yo'qotish faqat oy almashganda (oylik maosh kabi)
+        money = DecimalField(max_digits=15, decimal_places=2)
+        return_rows = phone_returns.values(
+            'phone_sale__salesman_id', 'return_date', sale_month=TruncMonth('phone_sale__sale_date')
+        ).annotate(
+            count=Count('id'),
+            loss=Sum(phone_returns.lost_profit_expression(), filter=Q(phone_sale__is_returned=True),
+                     output_field=money),
+        ).order_by()
+        returns = {}
+        for row in return_rows:
+            key = (row['phone_sale__salesman_id'], row['return_date'])
+            entry = returns.setdefault(key, {'count': 0, 'loss': Decimal('0')})
+            entry['count'] += row['count']
+            if row['sale_month'] != row['return_date'].replace(day=1):
+                entry['loss'] += row['loss'] or Decimal('0')
+        grouped['returns'] = returns
+
+        if sellers is None:
+            seller_ids = {seller_id for rows in grouped.values() for seller_id, _ in rows}
+            sellers = User.objects.filter(id__in=seller_ids).select_related('userprofile').order_by('id')
+        timelines = CommissionTimeline.for_users(sellers, until=year_end)
+
+        days_by_seller = {}
+        for rows in grouped.values():
+            for seller_id, day in rows:
+                days_by_seller.setdefault(seller_id, set()).add(day)
+
+        results = {}
+        for seller in sellers:
+            timeline = timelines[seller.id]
+            daily = [dict(self._empty_series_point(), day=day) for day in range(1, last_day + 1)]
+            monthly = [dict(self._empty_series_point(), month=m) for m in range(1, 13)]
+
+            for day in days_by_seller.get(seller.id, ()):
+                key = (seller.id, day)
+                phone = self._normalize_row(grouped['phone'].get(key), self.SELLER_KEYS)
+                accessory = self._normalize_row(grouped['accessory'].get(key), self.SELLER_KEYS)
+                exchange = self._normalize_row(grouped['exchange'].get(key), self.SELLER_KEYS)
+                day_returns = grouped['returns'].get(key, {'count': 0, 'loss': Decimal('0')})
+
+                rates = timeline.rates_for_date(day)
+                point = {
+                    'phone_count': phone['count'],
+                    'accessory_count': accessory['count'],
+                    'exchange_count': exchange['count'],
+                    'returns_count': day_returns['count'],
+                    'phone_sales': phone['total'],
+                    'exchange_sales': exchange['total'],
+                    'accessory_sales': accessory['total'],
+                    'phone_profit': phone['profit'],
+                    'exchange_profit': exchange['profit'],
+                    'returns_loss': day_returns['loss'],
+                    'accessory_profit': accessory['profit'],
+                    # get_all_sellers_monthly_salary bilan bir xil yaxlitlash
+                    'commission_usd': (
+                        (phone['profit'] * rates['phone_rate'] / 100).quantize(Decimal('0.01'))
+                        - (day_returns['loss'] * rates['phone_rate'] / 100).quantize(Decimal('0.01'))
+                        + (exchange['profit'] * rates['exchange_rate'] / 100).quantize(Decimal('0.01'))
+                    ),
+                    'commission_uzs': (accessory['profit'] * rates['accessory_rate'] / 100).quantize(Decimal('0.01')),
+                }
 
-            'commission_rates': final_rates,
-        }
+                for key_name, value in point.items():
+                    monthly[day.month - 1][key_name] += value
+                if day.month == month:
+                    daily[day.day - 1].update(point)
+
+            yearly = self._empty_series_point()
+            yearly.update(salary_usd=Decimal('0'), salary_uzs=Decimal('0'))
+            for entry in monthly:
+                _, month_days = monthrange(year, entry['month'])
+                final_rates = timeline.rates_for_date(date(year, entry['month'], month_days))
+                entry['salary_usd'] = final_rates['base_salary_usd'] + entry['commission_usd']
+                entry['salary_uzs'] = final_rates['base_salary_uzs'] + entry['commission_uzs']
+                for key_name in yearly:
+                    yearly[key_name] += entry[key_name]
+
+            results[seller.id] = {'seller': seller, 'daily': daily, 'monthly': monthly, 'yearly': yearly}
+
+        return results
 
 
 class QuickReport(models.Model):
@@ -1264,4 +1522,607 @@ class QuickReport(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.shop.name} - {self.get_report_type_display()} - {self.report_date}"
\ No newline at end of file
+        return f"{self.shop.name} - {self.get_report_type_display()} - {self.report_date}"
+
+    # Hisobot tuzilishi o'zgarsa oshiriladi - eski keshlar qayta hisoblanadi
+    VERSION = 1
+
+    @staticmethod
+    def period(report_type, report_date):
+        """Hisobot qamragan sanalar oralig'i - versiya tokeni shu oraliq bo'yicha"""
+        if report_type == 'daily':
+            return report_date, report_date
+        if report_type == 'monthly':
+            _, last_day = monthrange(report_date.year, report_date.month)
+            return report_date.replace(day=1), report_date.replace(day=last_day)
+        return date(report_date.year, 1, 1), date(report_date.year, 12, 31)
+
+    @classmethod
+    def current_token(cls, shop_id, report_type, report_date):
+        """Oraliqning joriy versiya tokeni (ShopDailySummary.version)"""
+        return ShopDailySummary.version(shop_id, *cls.period(report_type, report_date))[0]
+
+    @classmethod
+    def load(cls, shop, report_type, report_date):
+        """
+        (hisobot, token) - keshdagi hisobot (Decimal/sana tiklangan) va oraliqning joriy tokeni
+
+        Kesh bor bo'lsa token shu so'rovning o'zida (Subquery) olinadi. Hisobot None -
+        keshda yo'q, eski VERSION yoki saqlangan token joriysidan farq qiladi.
+        """
+        start_date, end_date = cls.period(report_type, report_date)
+        row = cls.objects.filter(
+            shop=shop, report_type=report_type, report_date=report_date
+        ).annotate(**ShopDailySummary.version_subqueries(start_date, end_date)).values(
+            'data', 'summary_days', 'summary_revision', 'summary_last_modified'
+        ).first()
+        if row is None:
+            return None, cls.current_token(shop.pk, report_type, report_date)
+
+        token = ShopDailySummary.version_token(
+            shop.pk, start_date, end_date,
+            row['summary_days'], row['summary_revision'], row['summary_last_modified']
+        )
+        data = row['data']
+        if not data or data.get('version') != cls.VERSION or data.get('token') != token:
+            return None, token
+        return cls._decode(data['report']), token
+
+    @classmethod
+    def store(cls, shop, report_type, report_date, report, token):
+        cls.store_encoded(shop.pk, report_type, report_date, cls._encode(report), token)
+
+    @classmethod
+    def store_encoded(cls, shop_id, report_type, report_date, encoded, token):
+        """
+        _encode qilingan hisobotni yozish (warm_reports - boshqa jarayonda hisoblangan)
+
+        token - hisoblashdan oldin olingan versiya; load shunga qarab eskirganini aniqlaydi
+        """
+        cls.objects.update_or_create(
+            shop_id=shop_id, report_type=report_type, report_date=report_date,
+            defaults={'data': {'version': cls.VERSION, 'token': token, 'report': encoded}}
+        )
+
+    @classmethod
+    def missing(cls, shop_id, targets):
+        """targets [(report_type, report_date), ...] dan keshda (joriy VERSION bilan) yo'qlari"""
+        if not targets:
+            return []
+        condition = Q()
+        for report_type, report_date in targets:
+            condition |= Q(report_type=report_type, report_date=report_date)
+        stored = set(cls.objects.filter(condition, shop_id=shop_id, data__version=cls.VERSION).values_list(
+            'report_type', 'report_date'
+        ).order_by())
+        return [target for target in targets if target not in stored]
+
+    @classmethod
+    def invalidate(cls, shop_id, dates):
+        """Sanalar kunlik keshi va ular joylashgan oy/yil keshlarini o'chirish"""
+        dates = set(dates)
+        if not dates:
+            return
+        cls.objects.filter(shop_id=shop_id).filter(
+            Q(report_type='daily', report_date__in=dates) |
+            Q(report_type='monthly', report_date__in={day.replace(day=1) for day in dates}) |
+            Q(report_type='yearly', report_date__in={day.replace(month=1, day=1) for day in dates})
+        ).delete()
+
+    @classmethod
+    def _encode(cls, value):
+        """JSON ga: Decimal va sana belgilanadi, model/QuerySet tashlab ketiladi"""
+        if isinstance(value, dict):
+            return {
+                key: cls._encode(item) for key, item in value.items()
+                if not isinstance(item, (models.Model, models.QuerySet))
+            }
+        if isinstance(value, (list, tuple)):
+            return [cls._encode(item) for item in value]
+        if isinstance(value, Decimal):
+            return {'__decimal__': str(value)}
+        if isinstance(value, date):
+            return {'__date__': value.isoformat()}
+        return value
+
+    @classmethod
+    def _decode(cls, value):
+        if isinstance(value, dict):
+            if '__decimal__' in value:
+                return Decimal(value['__decimal__'])
+            if '__date__' in value:
+                return date.fromisoformat(value['__date__'])
+            return {key: cls._decode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls._decode(item) for item in value]
+        return value
+
+
+# ============= KUNLIK JAMLANMA (ROLLUP) =============
+
+def _money_field(verbose_name):
+    return models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name=verbose_name)
+
+
+class ShopDailySummary(models.Model):
+    """
+    Do'kon bo'yicha kunlik jamlanma - hisobotlar xom sotuvlarni emas, shu jadvalni o'qiydi
+
+    Sotuv/qaytarish/almashtirish/xarajat saqlanganda yoki o'chirilganda
+    reports/signals.py farq (delta) bilan yangilaydi. Tiklash uchun:
+    python manage.py rebuild_daily_summaries
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='daily_summaries')
+    date = models.DateField(verbose_name="Sana")
+
+    # Telefon sotuvlari (qaytarilmaganlar)
+    phone_count = models.IntegerField(default=0, verbose_name="Telefonlar soni")
+    phone_total = _money_field("Telefon savdosi ($)")
+    phone_cash = _money_field("Telefon naqd ($)")
+    phone_card = _money_field("Telefon karta ($)")
+    phone_debt = _money_field("Telefon qarz ($)")
+    phone_credit = _money_field("Telefon nasiya ($)")
+    phone_profit = _money_field("Telefon foydasi ($)")
+    phone_returned = models.IntegerField(default=0, verbose_name="Shu kun sotilib qaytarilganlar")
+
+    # Aksessuar sotuvlari
+    accessory_count = models.IntegerField(default=0, verbose_name="Aksessuarlar soni")
+    accessory_total = _money_field("Aksessuar savdosi (so'm)")
+    accessory_cash = _money_field("Aksessuar naqd (so'm)")
+    accessory_card = _money_field("Aksessuar karta (so'm)")
+    accessory_debt = _money_field("Aksessuar qarz (so'm)")
+    accessory_credit = _money_field("Aksessuar nasiya (so'm)")
+    accessory_profit = _money_field("Aksessuar foydasi (so'm)")
+
+    # Almashtirishlar
+    exchange_count = models.IntegerField(default=0, verbose_name="Almashtirishlar soni")
+    exchange_total = _money_field("Almashtirish savdosi ($)")
+    exchange_old_phone_value = _money_field("Qabul qilingan eski telefonlar ($)")
+    exchange_cash = _money_field("Almashtirish naqd ($)")
+    exchange_card = _money_field("Almashtirish karta ($)")
+    exchange_debt = _money_field("Almashtirish qarz ($)")
+    exchange_credit = _money_field("Almashtirish nasiya ($)")
+    exchange_profit = _money_field("Almashtirish foydasi ($)")
+
+    # Shu kuni qilingan qaytarishlar
+    returns_count = models.IntegerField(default=0, verbose_name="Qaytarishlar soni")
+    returns_loss = _money_field("Boshqa kun sotilganlar foydasi ($)")
+    returns_count_other_month = models.IntegerField(default=0, verbose_name="Boshqa oyda sotilganlar soni")
+    returns_loss_other_month = _money_field("Boshqa oyda sotilganlar foydasi ($)")
+
+    expenses = _money_field("Xarajatlar (so'm)")
+    # Kunga tegishli har bir yozuv (sotuv, cash flow...) o'zgarganda oshadi - API ETag uchun
+    revision = models.PositiveIntegerField(default=0, verbose_name="O'zgarishlar soni")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Ish kuni - sof telefon, aksessuar yoki almashtirish savdosi bo'lgan kun
+    ACTIVE_DAY = Q(phone_count__gt=0) | Q(accessory_count__gt=0) | Q(exchange_count__gt=0)
+
+    # Guruh -> ReportCalculator kalitlari; ustun nomi '<guruh>_<kalit>'
+    GROUPS = {
+        'phone': ('count', 'total', 'cash', 'card', 'debt', 'credit', 'profit', 'returned'),
+        'accessory': ('count', 'total', 'cash', 'card', 'debt', 'credit', 'profit'),
+        'exchange': ('count', 'total', 'old_phone_value', 'cash', 'card', 'debt', 'credit', 'profit'),
+        'returns': ('count', 'loss', 'count_other_month', 'loss_other_month'),
+    }
+
+    class Meta:
+        verbose_name = "Kunlik jamlanma"
+        verbose_name_plural = "Kunlik jamlanmalar"
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_shop_daily_summary'),
+        ]
+
+    def __str__(self):
+        return f"{self.shop.name} - {self.date}"
+
+    @classmethod
+    def value_fields(cls):
+        """Yig'iladigan barcha ustunlar"""
+        fields = [
+            f'{group}_{key}' for group, keys in cls.GROUPS.items() for key in keys
+        ]
+        fields.append('expenses')
+        return fields
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Farqlarni qo'shish: {(shop_id, sana): {ustun: farq}}
+
+        F() bilan yangilanadi - parallel yozuvlar bir-birini o'chirmaydi.
+        O'zgargan kunlarning hisobot keshi (QuickReport) ham o'chiriladi.
+        Summalar o'zgarmasa ham (mijoz, izoh...) kun revision'i oshiriladi.
+        """
+        now = timezone.now()
+        changed_days = {}
+        for (shop_id, day), changes in deltas.items():
+            changes = {field: value for field, value in changes.items() if value}
+            updates = {field: F(field) + value for field, value in changes.items()}
+            updates.update(revision=F('revision') + 1, updated_at=now)
+            if not cls.objects.filter(shop_id=shop_id, date=day).update(**updates):
+                summary, _ = cls.objects.get_or_create(shop_id=shop_id, date=day)
+                cls.objects.filter(pk=summary.pk).update(**updates)
+            if changes:
+                changed_days.setdefault(shop_id, set()).add(day)
+
+        for shop_id, days in changed_days.items():
+            QuickReport.invalidate(shop_id, days)
+
+    @classmethod
+    def touch(cls, shop_id, days):
+        """Summalarsiz o'zgarish (masalan, cash flow) - faqat revision oshiriladi"""
+        cls.apply_deltas({(shop_id, day): {} for day in days})
+
+    @classmethod
+    def version(cls, shop_id, start_date, end_date):
+        """
+        Oraliq ma'lumotlari versiyasi - (ETag, Last-Modified), bitta so'rov
+
+        Har qanday yozuv signal orqali kun revision'ini oshiradi, rebuild esa
+        qatorlarni qayta yaratadi (updated_at) - ikkalasi ham tokenni o'zgartiradi.
+        """
+        stats = cls.objects.filter(
+            shop_id=shop_id, date__range=[start_date, end_date]
+        ).order_by().aggregate(days=Count('id'), revision=Sum('revision'), last_modified=Max('updated_at'))
+        token = cls.version_token(
+            shop_id, start_date, end_date, stats['days'], stats['revision'], stats['last_modified']
+        )
+        return token, stats['last_modified']
+
+    @staticmethod
+    def version_token(shop_id, start_date, end_date, days, revision, last_modified):
+        return '{}:{}:{}:{}:{}:{}'.format(
+            shop_id, start_date, end_date, days or 0, revision or 0,
+            last_modified.timestamp() if last_modified else 0
+        )
+
+    @classmethod
+    def version_subqueries(cls, start_date, end_date):
+        """version() agregatlari - shop_id maydonli so'rovga annotate uchun (QuickReport.load)"""
+        from django.db.models import OuterRef, Subquery
+
+        days = cls.objects.filter(
+            shop_id=OuterRef('shop_id'), date__range=[start_date, end_date]
+        ).order_by().values('shop_id')
+        return {
+            'summary_days': Subquery(days.annotate(value=Count('id')).values('value')),
+            'summary_revision': Subquery(days.annotate(value=Sum('revision')).values('value')),
+            'summary_last_modified': Subquery(days.annotate(value=Max('updated_at')).values('value')),
+        }
+
+    @classmethod
+    def shift_accessory_profit(cls, accessory_id, shop_id, price_delta):
+        """
+        Aksessuar o'rtacha tannarxi o'zgarganda foydani qayta hisoblash
+
+        Foyda joriy tannarx bo'yicha hisoblanadi, shuning uchun shu aksessuar
+        sotilgan har bir kunda: foyda -= farq * sotilgan soni (bitta UPDATE).
+        """
+        from django.db.models import OuterRef, Subquery, ExpressionWrapper
+
+        if not price_delta:
+            return
+
+        sales = AccessorySale.objects.filter(accessory_id=accessory_id)
+        sold_quantity = sales.filter(sale_date=OuterRef('date')).values('accessory_id').annotate(
+            quantity=Sum('quantity')
+        ).values('quantity')
+
+        QuickReport.invalidate(shop_id, sales.values_list('sale_date', flat=True).distinct())
+        cls.objects.filter(
+            shop_id=shop_id,
+            date__in=sales.values('sale_date')
+        ).update(
+            accessory_profit=F('accessory_profit') - ExpressionWrapper(
+                Subquery(sold_quantity) * price_delta,
+                output_field=DecimalField(max_digits=15, decimal_places=2)
+            ),
+            revision=F('revision') + 1,
+            updated_at=timezone.now()
+        )
+
+    @classmethod
+    def rebuild(cls, shop, start_date, end_date):
+        """Oraliqni xom jadvallardan qayta hisoblash (backfill / tuzatish)"""
+        grouped = ReportCalculator(shop)._get_grouped_daily_totals(start_date, end_date)
+
+        days = set(grouped['expenses'])
+        for group in cls.GROUPS:
+            days.update(grouped[group])
+
+        summaries = []
+        for day in sorted(days):
+            values = {'expenses': grouped['expenses'].get(day, Decimal('0'))}
+            for group, keys in cls.GROUPS.items():
+                row = ReportCalculator._normalize_row(grouped[group].get(day), keys)
+                values.update({f'{group}_{key}': value for key, value in row.items()})
+            summaries.append(cls(shop=shop, date=day, **values))
+
+        with transaction.atomic():
+            cls.objects.filter(shop=shop, date__range=[start_date, end_date]).delete()
+            cls.objects.bulk_create(summaries)
+            QuickReport.invalidate(shop.id, [
+                start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)
+            ])
+        return len(summaries)
+
+
+class CashBalanceCheckpoint(models.Model):
+    """
+    Kassa qoldig'i nazorat nuqtasi - kun yopilganda yoziladi (close_cash_day)
+
+    Qoldiq - CashFlowTransaction summalari yig'indisi (kirim +, chiqim -).
+    Istalgan kun boshidagi qoldiq: eng yaqin oldingi nuqta + oradagi
+    tranzaksiyalar, ya'ni butun tarixni yig'ish shart emas. Orqa sana bilan
+    tranzaksiya o'zgarsa, signal shu sanadan keyingi nuqtalarni qayta hisoblaydi.
+    """
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='cash_checkpoints')
+    date = models.DateField(verbose_name="Sana")
+    closing_usd = _money_field("Kun oxiridagi qoldiq ($)")
+    closing_uzs = _money_field("Kun oxiridagi qoldiq (so'm)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Kassa qoldig'i"
+        verbose_name_plural = "Kassa qoldiqlari"
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_shop_cash_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.shop.name} - {self.date}: ${self.closing_usd} / {self.closing_uzs} so'm"
+
+    @staticmethod
+    def _transactions_total(shop_id, start_date, end_date):
+        """[start_date, end_date] oralig'idagi tranzaksiyalar yig'indisi (start_date=None - boshidan)"""
+        transactions = CashFlowTransaction.objects.filter(shop_id=shop_id, transaction_date__lte=end_date)
+        if start_date is not None:
+            transactions = transactions.filter(transaction_date__gte=start_date)
+        totals = transactions.aggregate(usd=Sum('amount_usd'), uzs=Sum('amount_uzs'))
+        return {'usd': totals['usd'] or Decimal('0'), 'uzs': totals['uzs'] or Decimal('0')}
+
+    @classmethod
+    def opening_balance(cls, shop, target_date):
+        """Kun boshidagi qoldiq: {'usd': ..., 'uzs': ...}"""
+        shop_id = getattr(shop, 'pk', shop)
+        day_before = target_date - timedelta(days=1)
+        checkpoint = cls.objects.filter(
+            shop_id=shop_id, date__lt=target_date
+        ).order_by('-date').values('date', 'closing_usd', 'closing_uzs').first()
+
+        if checkpoint is None:
+            return cls._transactions_total(shop_id, None, day_before)
+
+        balance = {'usd': checkpoint['closing_usd'], 'uzs': checkpoint['closing_uzs']}
+        if checkpoint['date'] < day_before:
+            delta = cls._transactions_total(shop_id, checkpoint['date'] + timedelta(days=1), day_before)
+            balance = {key: balance[key] + delta[key] for key in balance}
+        return balance
+
+    @classmethod
+    def closing_balance(cls, shop, target_date):
+        """Kun oxiridagi qoldiq"""
+        return cls.opening_balance(shop, target_date + timedelta(days=1))
+
+    @classmethod
+    def close_day(cls, shop, target_date):
+        """Kunni yopish - kun oxiridagi qoldiqni nazorat nuqtasi sifatida yozish"""
+        balance = cls.closing_balance(shop, target_date)
+        checkpoint, _ = cls.objects.update_or_create(
+            shop_id=getattr(shop, 'pk', shop),
+            date=target_date,
+            defaults={'closing_usd': balance['usd'], 'closing_uzs': balance['uzs']}
+        )
+        return checkpoint
+
+    @classmethod
+    def recompute_from(cls, shop_id, from_date):
+        """
+        from_date va undan keyingi nuqtalarni qayta hisoblash - faqat oldinga
+
+        Oldingi nuqtalarga tegilmaydi; tranzaksiyalar kun bo'yicha BITTA
+        guruhlangan so'rovda o'qiladi. Natija: yangilangan nuqtalar soni.
+        """
+        checkpoints = list(cls.objects.filter(shop_id=shop_id, date__gte=from_date).order_by('date'))
+        if not checkpoints:
+            return 0
+
+        balance = cls.opening_balance(shop_id, checkpoints[0].date)
+        daily_rows = CashFlowTransaction.objects.filter(
+            shop_id=shop_id,
+            transaction_date__range=[checkpoints[0].date, checkpoints[-1].date]
+        ).values('transaction_date').annotate(
+            usd=Sum('amount_usd'), uzs=Sum('amount_uzs')
+        ).order_by('transaction_date')
+
+        rows = iter(daily_rows)
+        row = next(rows, None)
+        now = timezone.now()
+        for checkpoint in checkpoints:
+            while row is not None and row['transaction_date'] <= checkpoint.date:
+                balance['usd'] += row['usd'] or Decimal('0')
+                balance['uzs'] += row['uzs'] or Decimal('0')
+                row = next(rows, None)
+            checkpoint.closing_usd = balance['usd']
+            checkpoint.closing_uzs = balance['uzs']
+            checkpoint.updated_at = now
+
+        cls.objects.bulk_update(checkpoints, ['closing_usd', 'closing_uzs', 'updated_at'])
+        return len(checkpoints)
+
+
+@deconstructible
+class PrivateFileStorage(FileSystemStorage):
+    """
+    PRIVATE_MEDIA_ROOT dagi fayllar - ommaviy URL yo'q (url() xato beradi),
+    faqat ruxsat tekshiriladigan view orqali beriladi
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    @cached_property
+    def base_location(self):
+        return settings.PRIVATE_MEDIA_ROOT
+
+    @cached_property
+    def base_url(self):
+        return None
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        if setting == 'PRIVATE_MEDIA_ROOT':
+            self.__dict__.pop('base_location', None)
+            self.__dict__.pop('location', None)
+        super()._clear_cached_properties(setting, **kwargs)
+
+
+def report_job_upload_to(instance, filename):
+    """Tasodifiy nom - eksport nomi (sana + vaqt) bo'yicha faylni topib bo'lmaydi"""
+    return f"report_jobs/{timezone.now():%Y/%m}/{uuid.uuid4().hex}{os.path.splitext(filename)[1]}"
+
+
+class ReportJob(models.Model):
+    """
+    Fon vazifasi - og'ir hisobot yoki katta XLSX eksport (run_report_worker bajaradi)
+
+    Tashqi broker kerak emas: navbat shu jadvalning o'zi. Worker vazifani
+    status='pending' shartli UPDATE bilan egallaydi - bir nechta worker
+    bitta vazifani ikki marta olmaydi (SQLite'da ham).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Navbatda'),
+        (STATUS_RUNNING, 'Bajarilmoqda'),
+        (STATUS_DONE, 'Tayyor'),
+        (STATUS_FAILED, 'Xatolik'),
+    ]
+    FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED)
+
+    KIND_CHOICES = [
+        ('yearly_report', 'Yillik hisobot'),
+        ('yearly_profit_detail', 'Yillik foyda tafsiloti'),
+        ('daily_export', 'Kunlik hisobot XLSX'),
+        ('monthly_export', 'Oylik hisobot XLSX'),
+        ('seller_salary_export', 'Sotuvchi maoshi XLSX'),
+        ('sales_export', 'Sotuvlar XLSX'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, verbose_name="Turi")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Parametrlar")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Holati")
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Natija")
+    result_file = models.FileField(
+        upload_to=report_job_upload_to, storage=PrivateFileStorage(), blank=True, verbose_name="Natija fayli"
+    )
+    error = models.TextField(blank=True, verbose_name="Xatolik")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Urinishlar")
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs', verbose_name="Yaratgan"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Hisobot vazifasi"
+        verbose_name_plural = "Hisobot vazifalari"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='report_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_kind_display()} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    @property
+    def duration(self):
+        """Bajarilish vaqti (soniya) - tugamagan bo'lsa None"""
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+    # ============= NAVBAT =============
+
+    @classmethod
+    def enqueue(cls, kind, params, user=None):
+        """Bir xil parametrli tugamagan vazifa bo'lsa - o'sha qaytariladi (ikki marta bosish)"""
+        existing = cls.objects.filter(
+            kind=kind, params=params, created_by=user, status__in=[cls.STATUS_PENDING, cls.STATUS_RUNNING]
+        ).order_by('id').first()
+        if existing:
+            return existing
+        return cls.objects.create(kind=kind, params=params, created_by=user)
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Eng eski navbatdagi vazifani egallash
+
+        UPDATE ... WHERE status='pending' atomar: boshqa worker oldinroq
+        olgan bo'lsa 0 qator yangilanadi va keyingi vazifa olinadi.
+        """
+        while True:
+            job_id = cls.objects.filter(status=cls.STATUS_PENDING).order_by(
+                'created_at', 'id'
+            ).values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+
+            claimed = cls.objects.filter(pk=job_id, status=cls.STATUS_PENDING).update(
+                status=cls.STATUS_RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1
+            )
+            if claimed:
+                return cls.objects.get(pk=job_id)
+
+    @classmethod
+    def requeue_stale(cls, timeout, max_attempts=3):
+        """
+        Worker to'xtab qolgan (timeout dan uzoq 'running') vazifalarni qaytarish
+
+        Urinishlar tugagan bo'lsa - xatolik bilan yopiladi.
+        """
+        now = timezone.now()
+        stale = cls.objects.filter(status=cls.STATUS_RUNNING, started_at__lt=now - timeout)
+        failed = stale.filter(attempts__gte=max_attempts).update(
+            status=cls.STATUS_FAILED, finished_at=now, error="Worker javob bermadi (vaqt tugadi)"
+        )
+        requeued = stale.filter(attempts__lt=max_attempts).update(status=cls.STATUS_PENDING, started_at=None)
+        return requeued, failed
+
+    @classmethod
+    def purge(cls, older_than):
+        """Tugagan eski vazifalar va ularning fayllarini o'chirish"""
+        jobs = list(cls.objects.filter(
+            status__in=cls.FINISHED_STATUSES, finished_at__lt=timezone.now() - older_than
+        ))
+        for job in jobs:
+            if job.result_file:
+                job.result_file.delete(save=False)
+        cls.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+        return len(jobs)
+
+    # ============= NATIJA =============
+
+    def mark_done(self, result=None):
+        self.status = self.STATUS_DONE
+        self.result = result
+        self.error = ''
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'result', 'result_file', 'error', 'finished_at'])
+
+    def mark_failed(self, error):
+        self.status = self.STATUS_FAILED
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at'])
@@ -1,10 +1,11 @@
 # reports/signals.py - TO'LIQ UPDATE QOBILIYATI
 
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete
 from django.dispatch import receiver
 from decimal import Decimal
 from .models import CashFlowTransaction
-from datetime import date
+from datetime import date, datetime
+from django.utils import timezone
 
 
 # ==================== TELEFON SOTISH ====================
@@ -545,3 +546,373 @@ def delete_supplier_payment_cashflow(sender, instance, **kwargs):
             print(f"✅ Supplier payment cashflow o'chirildi: {deleted_count} ta")
     except Exception as e:
         print(f"❌ Supplier Payment delete error: {e}")
+
+
+# ==================== KUNLIK JAMLANMA (ShopDailySummary) ====================
+#
+# Har bir yozuvning jamlanmadagi ulushi bazadan o'qiladi: saqlashdan oldin (pre_*)
+# va keyin (post_*). Farq ShopDailySummary.apply_deltas orqali F() bilan qo'shiladi.
+# Ulush: [(shop_id, sana, {ustun: qiymat})]
+
+def _merge_deltas(before, after):
+    """Eski va yangi ulushlardan {(shop_id, sana): {ustun: farq}}"""
+    deltas = {}
+    for sign, rows in ((-1, before), (1, after)):
+        for shop_id, day, values in rows:
+            changes = deltas.setdefault((shop_id, day), {})
+            for field, value in values.items():
+                changes[field] = changes.get(field, 0) + sign * value
+    return deltas
+
+
+def _apply_summary_change(before, after):
+    from .models import ShopDailySummary
+    ShopDailySummary.apply_deltas(_merge_deltas(before, after))
+
+
+def _phone_sale_rows(sale_ids, include_sale=True, include_return=True, returned_ids=()):
+    """
+    Telefon sotuvi ulushi: sotuv kuni (sof yoki qaytarilgan) + qaytarish kuni (yo'qotilgan foyda)
+
+    returned_ids - is_returned hali bazaga yozilmagan, lekin qaytarilgan deb
+    hisoblanadigan sotuvlar (PhoneReturn.save post_save dan keyin yangilaydi).
+    """
+    from sales.models import PhoneSale
+
+    sales = PhoneSale.objects.filter(id__in=[sale_id for sale_id in sale_ids if sale_id]).values(
+        'id', 'phone__shop_id', 'sale_date', 'is_returned', 'sale_price', 'phone__cost_price',
+        'cash_amount', 'card_amount', 'debt_amount', 'credit_amount', 'phone_return__return_date',
+    )
+
+    rows = []
+    for sale in sales:
+        shop_id = sale['phone__shop_id']
+        is_returned = sale['is_returned'] or sale['id'] in returned_ids
+        profit = sale['sale_price'] - sale['phone__cost_price']
+
+        if include_sale:
+            if is_returned:
+                rows.append((shop_id, sale['sale_date'], {'phone_returned': 1}))
+            else:
+                rows.append((shop_id, sale['sale_date'], {
+                    'phone_count': 1,
+                    'phone_total': sale['sale_price'],
+                    'phone_cash': sale['cash_amount'],
+                    'phone_card': sale['card_amount'],
+                    'phone_debt': sale['debt_amount'],
+                    'phone_credit': sale['credit_amount'],
+                    'phone_profit': profit,
+                }))
+
+        return_date = sale['phone_return__return_date']
+        if include_return and return_date:
+            values = {'returns_count': 1}
+            if is_returned and return_date != sale['sale_date']:
+                values['returns_loss'] = profit
+            if is_returned and (return_date.year, return_date.month) != (
+                    sale['sale_date'].year, sale['sale_date'].month):
+                values['returns_count_other_month'] = 1
+                values['returns_loss_other_month'] = profit
+            rows.append((shop_id, return_date, values))
+
+    return rows
+
+
+def _accessory_sale_rows(sale_ids):
+    from sales.models import AccessorySale
+
+    sales = AccessorySale.objects.filter(id__in=sale_ids).values(
+        'accessory__shop_id', 'sale_date', 'quantity', 'total_price', 'accessory__purchase_price',
+        'cash_amount', 'card_amount', 'debt_amount', 'credit_amount',
+    )
+    return [
+        (sale['accessory__shop_id'], sale['sale_date'], {
+            'accessory_count': 1,
+            'accessory_total': sale['total_price'],
+            'accessory_cash': sale['cash_amount'],
+            'accessory_card': sale['card_amount'],
+            'accessory_debt': sale['debt_amount'],
+            'accessory_credit': sale['credit_amount'],
+            'accessory_profit': sale['total_price'] - sale['accessory__purchase_price'] * sale['quantity'],
+        })
+        for sale in sales
+    ]
+
+
+def _exchange_rows(exchange_ids):
+    from sales.models import PhoneExchange
+
+    exchanges = PhoneExchange.objects.filter(id__in=exchange_ids).values(
+        'new_phone__shop_id', 'exchange_date', 'new_phone_price', 'new_phone__cost_price',
+        'old_phone_accepted_price', 'cash_amount', 'card_amount', 'debt_amount', 'credit_amount',
+    )
+    return [
+        (exchange['new_phone__shop_id'], exchange['exchange_date'], {
+            'exchange_count': 1,
+            'exchange_total': exchange['new_phone_price'],
+            'exchange_old_phone_value': exchange['old_phone_accepted_price'],
+            'exchange_cash': exchange['cash_amount'],
+            'exchange_card': exchange['card_amount'],
+            'exchange_debt': exchange['debt_amount'],
+            'exchange_credit': exchange['credit_amount'],
+            'exchange_profit': exchange['new_phone_price'] - exchange['new_phone__cost_price'],
+        })
+        for exchange in exchanges
+    ]
+
+
+def _expense_rows(expense_ids):
+    from sales.models import Expense
+
+    expenses = Expense.objects.filter(id__in=expense_ids).values('shop_id', 'expense_date', 'amount')
+    return [
+        (expense['shop_id'], expense['expense_date'], {'expenses': expense['amount']})
+        for expense in expenses
+    ]
+
+
+SUMMARY_ROW_LOADERS = {
+    'sales.PhoneSale': lambda pk: _phone_sale_rows([pk]),
+    'sales.AccessorySale': lambda pk: _accessory_sale_rows([pk]),
+    'sales.PhoneExchange': lambda pk: _exchange_rows([pk]),
+    'sales.Expense': lambda pk: _expense_rows([pk]),
+}
+
+
+def _summary_sender(sender):
+    return f"{sender._meta.app_label}.{sender.__name__}"
+
+
+@receiver(pre_save, sender='sales.PhoneSale')
+@receiver(pre_save, sender='sales.AccessorySale')
+@receiver(pre_save, sender='sales.PhoneExchange')
+@receiver(pre_save, sender='sales.Expense')
+def remember_summary_before_save(sender, instance, raw=False, **kwargs):
+    """Saqlashdan oldingi ulush (yangi yozuvda - bo'sh)"""
+    if raw:
+        return
+    try:
+        loader = SUMMARY_ROW_LOADERS[_summary_sender(sender)]
+        instance._summary_before = loader(instance.pk) if instance.pk else []
+    except Exception as e:
+        print(f"❌ {sender.__name__} summary pre_save error: {e}")
+
+
+@receiver(post_save, sender='sales.PhoneSale')
+@receiver(post_save, sender='sales.AccessorySale')
+@receiver(post_save, sender='sales.PhoneExchange')
+@receiver(post_save, sender='sales.Expense')
+def update_summary_after_save(sender, instance, raw=False, **kwargs):
+    """Kunlik jamlanmaga farqni qo'shish - CREATE va UPDATE"""
+    if raw:
+        return
+    try:
+        loader = SUMMARY_ROW_LOADERS[_summary_sender(sender)]
+        before = instance.__dict__.pop('_summary_before', [])
+        _apply_summary_change(before, loader(instance.pk))
+    except Exception as e:
+        print(f"❌ {sender.__name__} summary update error: {e}")
+
+
+@receiver(pre_delete, sender='sales.PhoneSale')
+@receiver(pre_delete, sender='sales.AccessorySale')
+@receiver(pre_delete, sender='sales.PhoneExchange')
+@receiver(pre_delete, sender='sales.Expense')
+def remember_summary_before_delete(sender, instance, **kwargs):
+    """O'chirishdan oldingi ulush (kaskadda bog'liq yozuvlar hali mavjud)"""
+    try:
+        if _summary_sender(sender) == 'sales.PhoneSale':
+            # Qaytarish kuni ulushini PhoneReturn o'zi ayiradi (kaskad)
+            instance._summary_before = _phone_sale_rows([instance.pk], include_return=False)
+        else:
+            instance._summary_before = SUMMARY_ROW_LOADERS[_summary_sender(sender)](instance.pk)
+    except Exception as e:
+        print(f"❌ {sender.__name__} summary pre_delete error: {e}")
+
+
+@receiver(post_delete, sender='sales.PhoneSale')
+@receiver(post_delete, sender='sales.AccessorySale')
+@receiver(post_delete, sender='sales.PhoneExchange')
+@receiver(post_delete, sender='sales.Expense')
+@receiver(post_delete, sender='sales.PhoneReturn')
+def update_summary_after_delete(sender, instance, **kwargs):
+    """Kunlik jamlanmadan o'chirilgan yozuv ulushini ayirish"""
+    try:
+        _apply_summary_change(instance.__dict__.pop('_summary_before', []), [])
+    except Exception as e:
+        print(f"❌ {sender.__name__} summary delete error: {e}")
+
+
+# Qaytarish: sotuv kuni sof -> qaytarilgan, qaytarish kunida yo'qotilgan foyda
+
+@receiver(pre_save, sender='sales.PhoneReturn')
+def remember_return_summary_before_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        sale_ids = {instance.phone_sale_id}
+        if instance.pk:
+            from sales.models import PhoneReturn
+            sale_ids.update(PhoneReturn.objects.filter(pk=instance.pk).values_list('phone_sale_id', flat=True))
+        instance._summary_sale_ids = sale_ids
+        instance._summary_before = _phone_sale_rows(sale_ids)
+    except Exception as e:
+        print(f"❌ PhoneReturn summary pre_save error: {e}")
+
+
+@receiver(post_save, sender='sales.PhoneReturn')
+def update_return_summary_after_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        sale_ids = instance.__dict__.pop('_summary_sale_ids', {instance.phone_sale_id})
+        after = _phone_sale_rows(sale_ids, returned_ids={instance.phone_sale_id})
+        _apply_summary_change(instance.__dict__.pop('_summary_before', []), after)
+    except Exception as e:
+        print(f"❌ PhoneReturn summary update error: {e}")
+
+
+@receiver(pre_delete, sender='sales.PhoneReturn')
+def remember_return_summary_before_delete(sender, instance, **kwargs):
+    """Qaytarish bekor qilinganda sotuv is_returned holatida qoladi - faqat qaytarish kuni ayriladi"""
+    try:
+        instance._summary_before = _phone_sale_rows([instance.phone_sale_id], include_sale=False)
+    except Exception as e:
+        print(f"❌ PhoneReturn summary pre_delete error: {e}")
+
+
+# Tannarx o'zgarishi - foyda joriy tannarx bo'yicha hisoblanadi
+
+@receiver(pre_save, sender='inventory.Phone')
+def remember_phone_cost_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Tannarx o'zgarsa - shu telefon sotuvlari va almashtirishlarining eski ulushi"""
+    if raw or not instance.pk or (update_fields is not None and 'cost_price' not in update_fields):
+        return
+    try:
+        old_cost = sender.objects.filter(pk=instance.pk).values_list('cost_price', flat=True).first()
+        if old_cost is None or old_cost == instance.cost_price:
+            return
+
+        from sales.models import PhoneSale, PhoneExchange
+        instance._summary_sale_ids = list(PhoneSale.objects.filter(phone_id=instance.pk).values_list('id', flat=True))
+        instance._summary_exchange_ids = list(
+            PhoneExchange.objects.filter(new_phone_id=instance.pk).values_list('id', flat=True)
+        )
+        instance._summary_before = (
+                _phone_sale_rows(instance._summary_sale_ids) + _exchange_rows(instance._summary_exchange_ids)
+        )
+    except Exception as e:
+        print(f"❌ Phone summary pre_save error: {e}")
+
+
+@receiver(post_save, sender='inventory.Phone')
+def update_summary_after_phone_cost_change(sender, instance, raw=False, **kwargs):
+    if raw or '_summary_before' not in instance.__dict__:
+        return
+    try:
+        after = (
+                _phone_sale_rows(instance.__dict__.pop('_summary_sale_ids')) +
+                _exchange_rows(instance.__dict__.pop('_summary_exchange_ids'))
+        )
+        _apply_summary_change(instance.__dict__.pop('_summary_before'), after)
+    except Exception as e:
+        print(f"❌ Phone summary update error: {e}")
+
+
+@receiver(pre_save, sender='inventory.Accessory')
+def remember_accessory_price_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """O'rtacha tannarx qo'lda o'zgarganda (masalan fix_accessory_costs) - kirim pastdagi signallarda"""
+    if raw or not instance.pk or (update_fields is not None and 'purchase_price' not in update_fields):
+        return
+    instance._summary_old_price = sender.objects.filter(pk=instance.pk).values_list(
+        'purchase_price', flat=True
+    ).first()
+
+
+@receiver(post_save, sender='inventory.Accessory')
+def update_summary_after_accessory_price_change(sender, instance, raw=False, **kwargs):
+    old_price = instance.__dict__.pop('_summary_old_price', None)
+    if raw or old_price is None:
+        return
+    try:
+        from .models import ShopDailySummary
+        # Bazadagi (yaxlitlangan) qiymat - hisobotlar aynan shuni ishlatadi
+        new_price = sender.objects.filter(pk=instance.pk).values_list('purchase_price', flat=True).first()
+        if new_price is not None and new_price != old_price:
+            ShopDailySummary.shift_accessory_profit(instance.pk, instance.shop_id, new_price - old_price)
+    except Exception as e:
+        print(f"❌ Accessory summary update error: {e}")
+
+
+@receiver(pre_save, sender='inventory.AccessoryPurchaseHistory')
+def remember_accessory_cost_before_purchase(sender, instance, raw=False, **kwargs):
+    """Kirim o'rtacha tannarxni Accessory.save() siz - Accessory.add_purchase (bitta UPDATE) bilan o'zgartiradi"""
+    if raw or instance.pk or not instance.accessory_id:
+        return
+    from inventory.models import Accessory
+    instance._summary_old_cost = Accessory.objects.filter(pk=instance.accessory_id).values_list(
+        'shop_id', 'purchased_quantity', 'purchased_cost', 'purchase_price'
+    ).first()
+
+
+@receiver(post_save, sender='inventory.AccessoryPurchaseHistory')
+def update_summary_after_accessory_purchase(sender, instance, raw=False, created=False, **kwargs):
+    old_cost = instance.__dict__.pop('_summary_old_cost', None)
+    if raw or not created or old_cost is None:
+        return
+    try:
+        from inventory.models import Accessory
+        from .models import ShopDailySummary
+        shop_id, old_quantity, old_total, old_price = old_cost
+        # add_purchase shu saqlashdan keyin aynan shu narxni yozadi
+        new_price = Accessory.average_price(
+            old_total + instance.quantity * instance.purchase_price, old_quantity + instance.quantity
+        )
+        if new_price != old_price:
+            ShopDailySummary.shift_accessory_profit(instance.accessory_id, shop_id, new_price - old_price)
+    except Exception as e:
+        print(f"❌ Accessory purchase summary update error: {e}")
+
+
+# ==================== HISOBOT KESHI VA KASSA QOLDIG'I ====================
+
+@receiver(pre_save, sender=CashFlowTransaction)
+def remember_cashflow_date_before_save(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._cache_old_date = sender.objects.filter(pk=instance.pk).values_list(
+        'shop_id', 'transaction_date'
+    ).first()
+
+
+@receiver(post_save, sender=CashFlowTransaction)
+@receiver(post_delete, sender=CashFlowTransaction)
+def invalidate_report_cache_on_cashflow(sender, instance, raw=False, **kwargs):
+    """
+    Cash flow o'zgarsa - shu kun, oy va yil hisobot keshi eskiradi, kun
+    revision'i oshadi, shu sanadan keyingi kassa qoldig'i nuqtalari qayta hisoblanadi
+    """
+    if raw:
+        return
+    try:
+        from .models import QuickReport, CashBalanceCheckpoint, ShopDailySummary
+        old = instance.__dict__.pop('_cache_old_date', None)
+        if old:
+            QuickReport.invalidate(old[0], [old[1]])
+            ShopDailySummary.touch(old[0], [old[1]])
+        transaction_date = instance.transaction_date
+        if isinstance(transaction_date, datetime):
+            # default=timezone.now - saqlanmaguncha datetime bo'lishi mumkin
+            transaction_date = timezone.localdate(transaction_date)
+        QuickReport.invalidate(instance.shop_id, [transaction_date])
+        ShopDailySummary.touch(instance.shop_id, [transaction_date])
+
+        if old and old[0] != instance.shop_id:
+            CashBalanceCheckpoint.recompute_from(old[0], old[1])
+            CashBalanceCheckpoint.recompute_from(instance.shop_id, transaction_date)
+        else:
+            CashBalanceCheckpoint.recompute_from(
+                instance.shop_id, min(old[1], transaction_date) if old else transaction_date
+            )
+    except Exception as e:
+        print(f"❌ CashFlow cache invalidate error: {e}")
@@ -5,6 +5,7 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import date, timedelta
 from decimal import Decimal
+from django.db.models import F, Count, Sum
 from calendar import monthrange
 
 from shops.models import Shop, Customer
@@ -15,8 +16,9 @@ from sales.models import (
 )
 from reports.models import (
     CashFlowTransaction, ReportCalculator,
-    ProfitCalculator, SalesQueryHelper
+    ProfitCalculator, SalesQueryHelper, ShopDailySummary, QuickReport, CashBalanceCheckpoint
 )
+from users.models import CommissionTimeline
 
 
 class CashFlowTransactionTestCase(TestCase):
@@ -652,6 +654,1090 @@ class IntegrationTestCase(TestCase):
         self.assertEqual(yearly['profits']['phone_profit'], expected_profit)
 
 
+class GroupedReportTestCase(TestCase):
+    """Guruhlangan (GROUP BY) hisobotlar - eski kunlik hisobot bilan solishtirish"""
+
+    COMPARED_KEYS = ('counts', 'sales', 'profits', 'profit_margin', 'expenses', 'net_cash_uzs')
+
+    def setUp(self):
+        import random
+        from inventory.models import AccessoryPurchaseHistory
+
+        rng = random.Random(2024)
+        self.user = User.objects.create_user(username='seller', password='test123')
+        self.shop = Shop.objects.create(name='Test Shop', owner=self.user)
+        self.phone_model = PhoneModel.objects.create(model_name='iPhone 14')
+        self.memory = MemorySize.objects.create(size='128GB')
+        self.customer = Customer.objects.create(
+            name='Test Customer',
+            phone_number='998901234567',
+            created_by=self.user
+        )
+
+        self.accessory = Accessory.objects.create(
+            name='Chexol', shop=self.shop, code='0001', sale_price=Decimal('50000')
+        )
+        AccessoryPurchaseHistory.objects.create(
+            accessory=self.accessory, quantity=500,
+            purchase_price=Decimal('30000'), created_by=self.user
+        )
+
+        imei_counter = 100000000000000
+        day = date(2024, 2, 20)
+        sales = []
+        while day <= date(2024, 4, 10):
+            for _ in range(rng.randint(0, 3)):
+                imei_counter += 1
+                phone = Phone.objects.create(
+                    phone_model=self.phone_model, memory_size=self.memory, shop=self.shop,
+                    purchase_price=Decimal(rng.randint(500, 900)), imei_cost=Decimal('10.50'),
+                    repair_cost=Decimal('0'), status='shop', source_type='supplier',
+                    imei=str(imei_counter), created_at=day
+                )
+                price = phone.cost_price + Decimal(rng.randint(-50, 300))
+                cash = (price / 2).quantize(Decimal('0.01'))
+                sales.append(PhoneSale.objects.create(
+                    phone=phone, customer=self.customer, salesman=self.user,
+                    sale_price=price, cash_amount=cash, card_amount=price - cash,
+                    sale_date=day
+                ))
+
+            if rng.random() < 0.6:
+                quantity = rng.randint(1, 3)
+                AccessorySale.objects.create(
+                    accessory=self.accessory, customer=self.customer, salesman=self.user,
+                    quantity=quantity, unit_price=Decimal('50000'),
+                    cash_amount=Decimal('50000') * quantity, sale_date=day
+                )
+
+            if rng.random() < 0.3:
+                imei_counter += 1
+                new_phone = Phone.objects.create(
+                    phone_model=self.phone_model, memory_size=self.memory, shop=self.shop,
+                    purchase_price=Decimal('700'), status='shop', source_type='supplier',
+                    imei=str(imei_counter), created_at=day
+                )
+                imei_counter += 1
+                PhoneExchange.objects.create(
+                    new_phone=new_phone, new_phone_price=Decimal('900'),
+                    old_phone_model=self.phone_model, old_phone_memory=self.memory,
+                    old_phone_imei=str(imei_counter), old_phone_accepted_price=Decimal('400'),
+                    exchange_type='customer_pays', price_difference=Decimal('500'), cash_amount=Decimal('500'),
+                    salesman=self.user, customer_name='Almashtiruvchi',
+                    customer_phone_number='998900000000', exchange_date=day
+                )
+
+            if rng.random() < 0.4:
+                Expense.objects.create(
+                    shop=self.shop, name='Ijara', amount=Decimal(rng.randint(1, 9) * 10000),
+                    expense_date=day, created_by=self.user
+                )
+
+            # Qaytarishlar - ba'zilari shu kuni, ba'zilari keyingi oyda
+            if sales and rng.random() < 0.25:
+                sale = sales.pop(rng.randrange(len(sales)))
+                return_date = min(sale.sale_date + timedelta(days=rng.choice([0, 0, 3, 20])), date(2024, 4, 10))
+                PhoneReturn.objects.create(
+                    phone_sale=sale, return_amount=sale.sale_price,
+                    return_date=return_date, reason='Test', created_by=self.user
+                )
+
+            day += timedelta(days=1)
+
+    def assertSameDailyReport(self, grouped, legacy):
+        for key in self.COMPARED_KEYS:
+            self.assertEqual(grouped[key], legacy[key], f"{legacy['date']} - {key}")
+        for key in ('usd', 'uzs', 'details'):
+            self.assertEqual(grouped['cashflow'][key], legacy['cashflow'][key], f"{legacy['date']} - cashflow.{key}")
+
+    def test_monthly_daily_stats_match_daily_report(self):
+        """Oylik daily_stats har bir kun uchun get_daily_report bilan bir xil"""
+        calculator = ReportCalculator(self.shop)
+        monthly = calculator.get_monthly_report(2024, 3)
+
+        self.assertEqual(len(monthly['daily_stats']), 31)
+        for grouped_day in monthly['daily_stats']:
+            legacy_day = calculator.get_daily_report(grouped_day['date'])
+            self.assertSameDailyReport(grouped_day, legacy_day)
+            self.assertEqual(
+                list(grouped_day['sales_data']['phone_sales']),
+                list(legacy_day['sales_data']['phone_sales'])
+            )
+
+    def test_monthly_report_constant_query_count(self):
+        """Oylik hisobot so'rovlar soni oy uzunligiga bog'liq emas"""
+        calculator = ReportCalculator(self.shop, use_cache=False)
+        # Kunlik jamlanma + cash flow
+        with self.assertNumQueries(2):
+            calculator.get_monthly_report(2024, 2)
+        with self.assertNumQueries(2):
+            calculator.get_monthly_report(2024, 3)
+
+    def test_monthly_totals_previous_month_returns(self):
+        """Oylik jami - oldingi oyda sotilib shu oyda qaytarilganlar"""
+        calculator = ReportCalculator(self.shop)
+        monthly = calculator.get_monthly_report(2024, 3)
+        start, end = date(2024, 3, 1), date(2024, 3, 31)
+
+        previous_returns = PhoneReturn.objects.filter(
+            return_date__range=[start, end]
+        ).exclude(phone_sale__sale_date__range=[start, end])
+        expected_loss = sum(
+            (ProfitCalculator.calculate_phone_profit(r.phone_sale) for r in previous_returns),
+            Decimal('0')
+        )
+        net_sales = PhoneSale.objects.filter(sale_date__range=[start, end], is_returned=False)
+        expected_profit = sum(
+            (ProfitCalculator.calculate_phone_profit(s) for s in net_sales),
+            Decimal('0')
+        )
+
+        self.assertEqual(monthly['counts']['returns_previous_months'], previous_returns.count())
+        self.assertEqual(monthly['profits']['phone_profit_loss'], expected_loss)
+        self.assertEqual(monthly['profits']['phone_profit'], expected_profit - expected_loss)
+        self.assertEqual(monthly['counts']['phone'], net_sales.count())
+
+
+    def nested_yearly_report(self, calculator, year):
+        """Eski usul - 12 ta oylik hisobotni jamlash (solishtirish uchun)"""
+        monthly_stats = [calculator.get_monthly_report(year, month) for month in range(1, 13)]
+        totals = {
+            'phone_sales': sum(m['totals']['phone_sales_usd'] for m in monthly_stats),
+            'accessory_sales': sum(m['totals']['accessory_sales_uzs'] for m in monthly_stats),
+            'phone_cash': sum(m['totals']['phone_cash_usd'] for m in monthly_stats),
+            'accessory_cash': sum(m['totals']['accessory_cash_uzs'] for m in monthly_stats),
+            'expenses': sum(m['totals']['expenses'] for m in monthly_stats),
+        }
+        profits = {
+            key: sum(m['profits'][key] for m in monthly_stats)
+            for key in ('phone_profit', 'accessory_profit', 'exchange_profit')
+        }
+        counts = {
+            key: sum(m['counts'][key] for m in monthly_stats)
+            for key in ('phone', 'accessory', 'exchange', 'returns')
+        }
+        working_days = sum(m['period']['working_days'] for m in monthly_stats)
+        return monthly_stats, totals, profits, counts, working_days
+
+    def test_yearly_report_matches_nested_monthly_reports(self):
+        """Yillik hisobot - 12 ta oylik hisobotni jamlash bilan bir xil natija"""
+        calculator = ReportCalculator(self.shop)
+        yearly = calculator.get_yearly_report(2024)
+        monthly_stats, totals, profits, counts, working_days = self.nested_yearly_report(calculator, 2024)
+
+        self.assertEqual(len(yearly['monthly_stats']), 12)
+        for grouped_month, nested_month in zip(yearly['monthly_stats'], monthly_stats):
+            nested_month = dict(nested_month)
+            nested_month.pop('daily_stats')
+            self.assertEqual(grouped_month, nested_month)
+
+        for key, value in totals.items():
+            self.assertEqual(yearly['totals'][key], value, key)
+        for key, value in profits.items():
+            self.assertEqual(yearly['profits'][key], value, key)
+        for key, value in counts.items():
+            self.assertEqual(yearly['counts'][key], value, key)
+        self.assertEqual(
+            yearly['averages']['daily_phone_sales'],
+            totals['phone_sales'] / working_days
+        )
+        self.assertGreater(counts['returns'], 0)
+
+    def test_yearly_report_constant_query_count(self):
+        """Yillik hisobot - kunlik jamlanmadan bitta so'rov"""
+        calculator = ReportCalculator(self.shop, use_cache=False)
+        with self.assertNumQueries(1):
+            calculator.get_yearly_report(2024)
+
+    def test_report_cache_served_from_quick_report(self):
+        """Ikkinchi marta hisobot bitta QuickReport so'rovidan qaytadi"""
+        calculator = ReportCalculator(self.shop)
+        monthly = calculator.get_monthly_report(2024, 3)
+        yearly = calculator.get_yearly_report(2024)
+        daily = calculator.get_daily_report(date(2024, 3, 5))
+
+        with self.assertNumQueries(1):
+            cached_monthly = calculator.get_monthly_report(2024, 3)
+        with self.assertNumQueries(1):
+            cached_yearly = calculator.get_yearly_report(2024)
+        with self.assertNumQueries(1):
+            cached_daily = calculator.get_daily_report(date(2024, 3, 5))
+
+        for key in ('period', 'totals', 'profits', 'profit_margin', 'averages', 'counts'):
+            self.assertEqual(cached_monthly[key], monthly[key], key)
+        for cached_day, day in zip(cached_monthly['daily_stats'], monthly['daily_stats']):
+            self.assertSameDailyReport(cached_day, day)
+        self.assertEqual(cached_yearly['monthly_stats'][2]['totals'], yearly['monthly_stats'][2]['totals'])
+        self.assertEqual(cached_yearly['profits'], yearly['profits'])
+        self.assertSameDailyReport(cached_daily, daily)
+
+        # Lazy qismlar qayta ulanadi
+        self.assertEqual(cached_daily['shop'], self.shop)
+        self.assertEqual(
+            list(cached_daily['sales_data']['phone_sales']),
+            list(daily['sales_data']['phone_sales'])
+        )
+
+    def test_report_cache_invalidated_by_writes(self):
+        """Yozuv shu kun, oy va yil keshini o'chiradi; boshqa oylar saqlanadi"""
+        calculator = ReportCalculator(self.shop)
+        march = calculator.get_monthly_report(2024, 3)
+        calculator.get_monthly_report(2024, 2)
+        calculator.get_yearly_report(2024)
+        calculator.get_daily_report(date(2024, 3, 5))
+
+        Expense.objects.create(
+            shop=self.shop, name='Svet', amount=Decimal('70000'),
+            expense_date=date(2024, 3, 5), created_by=self.user
+        )
+
+        cached = set(QuickReport.objects.filter(shop=self.shop).values_list('report_type', 'report_date'))
+        self.assertEqual(cached, {('monthly', date(2024, 2, 1))})
+        self.assertEqual(
+            calculator.get_monthly_report(2024, 3)['totals']['expenses'],
+            march['totals']['expenses'] + Decimal('70000')
+        )
+
+        # Faqat cash flow yozuvi ham keshni eskirtiradi
+        calculator.get_daily_report(date(2024, 2, 10))
+        CashFlowTransaction.objects.create(
+            shop=self.shop, transaction_date=date(2024, 2, 10),
+            transaction_type='daily_expense', amount_uzs=Decimal('-1000')
+        )
+        self.assertFalse(QuickReport.objects.filter(shop=self.shop, report_date__month=2).exists())
+
+    def test_report_cache_rejects_report_computed_before_write(self):
+        """Hisoblash paytida yozuv commit bo'lsa - saqlangan eski hisobot keyingi o'qishda rad etiladi"""
+        calculator = ReportCalculator(self.shop)
+        compute_monthly = calculator._compute_monthly_report
+
+        def compute_then_write(year, month):
+            report = compute_monthly(year, month)
+            # Boshqa yozuvchi: invalidate hali saqlanmagan keshni o'chiradi, keyin eski natija yoziladi
+            Expense.objects.create(
+                shop=self.shop, name='Svet', amount=Decimal('70000'),
+                expense_date=date(2024, 3, 5), created_by=self.user
+            )
+            return report
+
+        calculator._compute_monthly_report = compute_then_write
+        stale = calculator.get_monthly_report(2024, 3)
+        del calculator._compute_monthly_report
+        self.assertTrue(QuickReport.objects.filter(shop=self.shop, report_type='monthly').exists())
+
+        fresh = calculator.get_monthly_report(2024, 3)
+        self.assertEqual(fresh['totals']['expenses'], stale['totals']['expenses'] + Decimal('70000'))
+        with self.assertNumQueries(1):
+            self.assertEqual(calculator.get_monthly_report(2024, 3)['totals'], fresh['totals'])
+
+    def legacy_seller_salary(self, seller, year, month):
+        """Eski usul - ProfitCalculator bilan har bir sotuv va kun bo'yicha (solishtirish uchun)"""
+        start = date(year, month, 1)
+        end = date(year, month, monthrange(year, month)[1])
+        profile = seller.userprofile if hasattr(seller, 'userprofile') else None
+
+        net_sales = PhoneSale.objects.filter(salesman=seller, sale_date__range=[start, end], is_returned=False)
+        accessory_sales = AccessorySale.objects.filter(salesman=seller, sale_date__range=[start, end])
+        exchanges = PhoneExchange.objects.filter(salesman=seller, exchange_date__range=[start, end])
+        returns = PhoneReturn.objects.filter(phone_sale__salesman=seller, return_date__range=[start, end])
+        previous_returns = returns.filter(phone_sale__is_returned=True).exclude(
+            phone_sale__sale_date__range=[start, end]
+        )
+
+        def total(items, profit):
+            return sum((profit(item) for item in items), Decimal('0'))
+
+        phone_commission = accessory_commission = exchange_commission = Decimal('0')
+        day = start
+        while day <= end:
+            rates = profile.get_commission_rates_for_date(day) if profile else CommissionTimeline.ZERO_RATES
+            cent = Decimal('0.01')
+            phone_commission += (total(net_sales.filter(sale_date=day), ProfitCalculator.calculate_phone_profit)
+                                 * rates['phone_rate'] / 100).quantize(cent)
+            phone_commission -= (total((r.phone_sale for r in previous_returns.filter(return_date=day)),
+                                       ProfitCalculator.calculate_phone_profit)
+                                 * rates['phone_rate'] / 100).quantize(cent)
+            accessory_commission += (total(accessory_sales.filter(sale_date=day),
+                                           ProfitCalculator.calculate_accessory_profit)
+                                     * rates['accessory_rate'] / 100).quantize(cent)
+            exchange_commission += (total(exchanges.filter(exchange_date=day),
+                                          ProfitCalculator.calculate_exchange_profit)
+                                    * rates['exchange_rate'] / 100).quantize(cent)
+            day += timedelta(days=1)
+
+        phone_profit = total(net_sales, ProfitCalculator.calculate_phone_profit)
+        loss = total((r.phone_sale for r in previous_returns), ProfitCalculator.calculate_phone_profit)
+        return {
+            'sales': {
+                'phone_count': net_sales.count(),
+                'accessory_count': accessory_sales.count(),
+                'exchange_count': exchanges.count(),
+                'returns_count': returns.count(),
+            },
+            'profits': {
+                'phone_profit_from_sales': phone_profit,
+                'phone_profit_loss': loss,
+                'phone_profit': phone_profit - loss,
+                'accessory_profit': total(accessory_sales, ProfitCalculator.calculate_accessory_profit),
+                'exchange_profit': total(exchanges, ProfitCalculator.calculate_exchange_profit),
+            },
+            'commission': {
+                'phone_commission': phone_commission,
+                'accessory_commission': accessory_commission,
+                'exchange_commission': exchange_commission,
+            },
+        }
+
+    def test_all_sellers_monthly_salary_matches_per_seller(self):
+        """Bitta o'tishdagi maosh - get_seller_monthly_salary va eski ProfitCalculator usuli bilan bir xil"""
+        from users.models import CommissionHistory
+
+        second = User.objects.create_user(username='seller2', password='test123')
+        no_profile = User.objects.create_user(username='seller3', password='test123')
+        no_profile.userprofile.delete()
+        no_profile = User.objects.get(pk=no_profile.pk)
+
+        PhoneSale.objects.filter(sale_date__day__in=[3, 8, 14, 22]).update(salesman=second)
+        AccessorySale.objects.filter(sale_date__day__in=[5, 8, 27]).update(salesman=second)
+        PhoneExchange.objects.filter(exchange_date__day__gt=20).update(salesman=no_profile)
+
+        CommissionHistory.objects.create(
+            user=self.user, phone_commission_percent=Decimal('7.50'),
+            accessory_commission_percent=Decimal('12'), exchange_commission_percent=Decimal('3'),
+            base_salary_usd=Decimal('300'), effective_date=date(2024, 1, 1)
+        )
+        CommissionHistory.objects.create(
+            user=self.user, phone_commission_percent=Decimal('9'),
+            accessory_commission_percent=Decimal('15'), exchange_commission_percent=Decimal('4.25'),
+            base_salary_uzs=Decimal('2000000'), effective_date=date(2024, 3, 12)
+        )
+        CommissionHistory.objects.create(
+            user=second, phone_commission_percent=Decimal('6'),
+            accessory_commission_percent=Decimal('11'), exchange_commission_percent=Decimal('6'),
+            effective_date=date(2024, 3, 20)
+        )
+
+        calculator = ReportCalculator(self.shop)
+        for month in (2, 3, 4):
+            batch = calculator.get_all_sellers_monthly_salary(2024, month)
+            self.assertTrue(batch)
+            for seller_id, salary in batch.items():
+                seller = User.objects.get(pk=seller_id)
+                single = calculator.get_seller_monthly_salary(seller, 2024, month)
+                for key in ('period', 'sales', 'profits', 'commission', 'commission_rates'):
+                    self.assertEqual(salary[key], single[key], f"{month} - {seller_id} - {key}")
+
+                legacy = self.legacy_seller_salary(seller, 2024, month)
+                for section, values in legacy.items():
+                    for key, value in values.items():
+                        self.assertEqual(salary[section][key], value, f"{month} - {seller_id} - {section}.{key}")
+
+                for day in salary['daily_data']:
+                    legacy_day = calculator.get_seller_daily_report(seller, day['date'])
+                    for key in ('counts', 'sales', 'profits', 'profit_margin'):
+                        self.assertEqual(day[key], legacy_day[key], f"{day['date']} - {key}")
+
+    def test_all_sellers_monthly_salary_constant_query_count(self):
+        """Sotuvchilar va kunlar soniga bog'liq bo'lmagan so'rovlar soni"""
+        second = User.objects.create_user(username='seller2', password='test123')
+        PhoneSale.objects.filter(sale_date__day__lt=15).update(salesman=second)
+
+        calculator = ReportCalculator(self.shop)
+        # 4 ta guruhlangan so'rov + sotuvchilar + komissiya tarixi
+        with self.assertNumQueries(6):
+            calculator.get_all_sellers_monthly_salary(2024, 3)
+
+    def test_sellers_series_matches_monthly_salary(self):
+        """get_sellers_series - har bir oy get_seller_monthly_salary, har bir kun get_seller_daily_report bilan bir xil"""
+        from users.models import CommissionHistory
+
+        second = User.objects.create_user(username='seller2', password='test123')
+        PhoneSale.objects.filter(sale_date__day__in=[3, 8, 14, 22]).update(salesman=second)
+        AccessorySale.objects.filter(sale_date__day__in=[5, 8, 27]).update(salesman=second)
+        CommissionHistory.objects.create(
+            user=self.user, phone_commission_percent=Decimal('7.50'),
+            accessory_commission_percent=Decimal('12'), exchange_commission_percent=Decimal('3'),
+            base_salary_usd=Decimal('300'), effective_date=date(2024, 1, 1)
+        )
+        CommissionHistory.objects.create(
+            user=self.user, phone_commission_percent=Decimal('9'),
+            accessory_commission_percent=Decimal('15'), exchange_commission_percent=Decimal('4.25'),
+            base_salary_uzs=Decimal('2000000'), effective_date=date(2024, 3, 12)
+        )
+
+        calculator = ReportCalculator(self.shop)
+        # 3 ta guruhlangan sotuv + qaytarishlar + sotuvchilar + komissiya tarixi
+        with self.assertNumQueries(6):
+            series = calculator.get_sellers_series(2024, 3)
+        self.assertEqual(set(series), {self.user.id, second.id})
+
+        for seller_id, data in series.items():
+            seller = User.objects.get(pk=seller_id)
+            self.assertEqual(len(data['monthly']), 12)
+            for point in data['monthly']:
+                salary = calculator.get_seller_monthly_salary(seller, 2024, point['month'])
+                label = f"{seller.username} - {point['month']}"
+                self.assertEqual(point['phone_count'], salary['sales']['phone_count'], label)
+                self.assertEqual(point['accessory_count'], salary['sales']['accessory_count'], label)
+                self.assertEqual(point['exchange_count'], salary['sales']['exchange_count'], label)
+                self.assertEqual(point['returns_count'], salary['sales']['returns_count'], label)
+                self.assertEqual(point['phone_sales'] + point['exchange_sales'], salary['sales']['phone_total'], label)
+                self.assertEqual(point['accessory_sales'], salary['sales']['accessory_total'], label)
+                self.assertEqual(point['phone_profit'] - point['returns_loss'], salary['profits']['phone_profit'], label)
+                self.assertEqual(point['exchange_profit'], salary['profits']['exchange_profit'], label)
+                self.assertEqual(point['accessory_profit'], salary['profits']['accessory_profit'], label)
+                self.assertEqual(point['commission_usd'], salary['commission']['total_commission'], label)
+                self.assertEqual(point['commission_uzs'], salary['commission']['accessory_commission'], label)
+                self.assertEqual(point['salary_usd'], salary['commission']['total_salary_usd'], label)
+                self.assertEqual(point['salary_uzs'], salary['commission']['total_salary_uzs'], label)
+
+            self.assertEqual(len(data['daily']), 31)
+            for point in data['daily']:
+                day_report = calculator.get_seller_daily_report(seller, date(2024, 3, point['day']))
+                self.assertEqual(point['phone_count'], day_report['counts']['phone'])
+                self.assertEqual(point['exchange_count'], day_report['counts']['exchange'])
+                self.assertEqual(point['accessory_count'], day_report['counts']['accessory'])
+                self.assertEqual(point['returns_count'], day_report['counts']['returns'])
+                self.assertEqual(point['phone_sales'] + point['exchange_sales'], day_report['sales']['phone_total_usd'])
+                self.assertEqual(point['phone_profit'], day_report['profits']['phone_profit'])
+                self.assertEqual(point['accessory_profit'], day_report['profits']['accessory_profit'])
+
+            self.assertEqual(
+                data['yearly']['salary_usd'], sum(point['salary_usd'] for point in data['monthly'])
+            )
+
+    def test_seller_series_api(self):
+        """/users/api/seller-series/ - rahbar barcha sotuvchilarni, sotuvchi faqat o'zini ko'radi"""
+        second = User.objects.create_user(username='seller2', password='test123')
+        PhoneSale.objects.filter(sale_date__day__lt=15).update(salesman=second)
+        boss = User.objects.create_user(username='boss', password='test123')
+        boss.userprofile.role = 'boss'
+        boss.userprofile.save()
+
+        params = {'shop': self.shop.id, 'year': 2024, 'month': 3}
+        self.client.force_login(boss)
+        response = self.client.get('/users/api/seller-series/', params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual({seller['id'] for seller in data['sellers']}, {self.user.id, second.id})
+        response = self.client.get('/users/api/seller-series/', dict(params, seller='abc'), secure=True)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/users/api/seller-series/', dict(params, seller=second.id), secure=True)
+        self.assertEqual([seller['id'] for seller in response.json()['sellers']], [second.id])
+
+        series = ReportCalculator(self.shop).get_sellers_series(2024, 3)
+        for seller in data['sellers']:
+            self.assertEqual(len(seller['daily']), 31)
+            self.assertEqual(seller['yearly']['phone_count'], series[seller['id']]['yearly']['phone_count'])
+            self.assertAlmostEqual(
+                seller['yearly']['salary_usd'], float(series[seller['id']]['yearly']['salary_usd']), places=2
+            )
+
+        self.client.force_login(second)
+        response = self.client.get('/users/api/seller-series/', params, secure=True)
+        self.assertEqual([seller['id'] for seller in response.json()['sellers']], [second.id])
+        response = self.client.get('/users/api/seller-series/', dict(params, seller=second.id), secure=True)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/users/api/seller-series/', dict(params, seller=self.user.id), secure=True)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get('/users/api/seller-series/', {'shop': 'x'}, secure=True)
+        self.assertEqual(response.status_code, 400)
+
+        # Sotuvchi sahifasi - oylik kartochkalar bitta hisobotdan, grafiklar API dan
+        response = self.client.get('/users/', {'shop': self.shop.id, 'year': 2024, 'month': 3}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/users/api/seller-series/')
+        self.assertEqual(len(response.context['daily_sales_data']), 31)
+
+    def test_cashflow_range_matches_daily_report(self):
+        """get_cashflow_range - har bir kun get_daily_report['cashflow'] bilan bir xil, 2 ta so'rovda"""
+        calculator = ReportCalculator(self.shop, use_cache=False)
+        start, end = date(2024, 3, 1), date(2024, 3, 31)
+
+        with self.assertNumQueries(2):
+            cashflow_by_day = calculator.get_cashflow_range(start, end)
+
+        self.assertEqual(len(cashflow_by_day), 31)
+        for day, cashflow in cashflow_by_day.items():
+            expected = calculator.get_daily_report(day)['cashflow']
+            for key in ('usd', 'uzs', 'details'):
+                self.assertEqual(cashflow[key], expected[key], f"{day} - {key}")
+
+        self.client.force_login(self.user)
+        response = self.client.get('/reports/api/cashflow/', {
+            'shop': self.shop.id, 'start_date': '2024-03-01', 'end_date': '2024-03-31'
+        }, secure=True)
+        self.assertEqual(response.status_code, 200)
+        days = response.json()['days']
+        self.assertEqual(len(days), 31)
+        self.assertEqual(
+            days[9]['cashflow']['usd']['net'], float(cashflow_by_day[date(2024, 3, 10)]['usd']['net'])
+        )
+
+    def test_report_api_conditional_get(self):
+        """If-None-Match mos kelsa 304 - hisobot hisoblanmaydi; o'sha kundagi yozuv ETag'ni o'zgartiradi"""
+        self.client.force_login(self.user)
+        sale = PhoneSale.objects.filter(sale_date__month=3).select_related('phone').first()
+        params = {'shop': self.shop.id, 'date': str(sale.sale_date)}
+        other_day = {'shop': self.shop.id, 'date': str(sale.sale_date + timedelta(days=1))}
+
+        response = self.client.get('/reports/api/phone-sales/', params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        other_etag = self.client.get('/reports/api/cashflow/', other_day, secure=True)['ETag']
+
+        # Sessiya + foydalanuvchi + versiya - sotuvlar o'qilmaydi
+        with self.assertNumQueries(3):
+            response = self.client.get('/reports/api/phone-sales/', params, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Summalarsiz o'zgarish ham (mijoz) versiyani oshiradi
+        other_customer = Customer.objects.create(name='Boshqa', phone_number='998907654321', created_by=self.user)
+        sale.customer = other_customer
+        sale.save()
+        response = self.client.get('/reports/api/phone-sales/', params, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Boshqa', [row['customer_name'] for row in response.json()['results']])
+        etag = response['ETag']
+
+        # Cash flow yozuvi - shu kun o'zgaradi, boshqa kun o'zgarmaydi
+        CashFlowTransaction.objects.create(
+            shop=self.shop, transaction_date=sale.sale_date, transaction_type='daily_expense',
+            amount_uzs=Decimal('-10000'), description='Test', created_by=self.user
+        )
+        response = self.client.get('/reports/api/cashflow/details/', params, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/reports/api/cashflow/', other_day, secure=True, HTTP_IF_NONE_MATCH=other_etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Oraliq - ichidagi kun o'zgarsa yangi ETag
+        range_params = {'shop': self.shop.id, 'start_date': '2024-03-01', 'end_date': '2024-03-31'}
+        range_etag = self.client.get('/reports/api/cashflow/', range_params, secure=True)['ETag']
+        Expense.objects.create(
+            shop=self.shop, name='Svet', amount=Decimal('20000'), expense_date=date(2024, 3, 15), created_by=self.user
+        )
+        response = self.client.get('/reports/api/cashflow/', range_params, secure=True, HTTP_IF_NONE_MATCH=range_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_shops_report_matches_single_shop_reports(self):
+        """Barcha do'konlar - har bir do'kon qatori yakka hisobot bilan bir xil, so'rovlar soni o'zgarmas"""
+        other_shop = Shop.objects.create(name='Second Shop', owner=self.user)
+        phone = Phone.objects.create(
+            phone_model=self.phone_model, memory_size=self.memory, shop=other_shop,
+            purchase_price=Decimal('600'), status='shop', source_type='supplier',
+            imei='999999999999999', created_at=date(2024, 3, 10)
+        )
+        PhoneSale.objects.create(
+            phone=phone, customer=self.customer, salesman=self.user, sale_price=Decimal('750'),
+            cash_amount=Decimal('750'), sale_date=date(2024, 3, 10)
+        )
+        Expense.objects.create(
+            shop=other_shop, name='Ijara', amount=Decimal('30000'), expense_date=date(2024, 3, 10),
+            created_by=self.user
+        )
+        shops = list(Shop.objects.order_by('id'))
+
+        # Jamlanma GROUP BY shop + cash flow / ish kunlari
+        with self.assertNumQueries(2):
+            daily = ReportCalculator.get_shops_daily_report(shops, date(2024, 3, 10))
+        with self.assertNumQueries(2):
+            monthly = ReportCalculator.get_shops_monthly_report(shops, 2024, 3)
+
+        for shop, shop_daily, shop_monthly in zip(shops, daily['shops'], monthly['shops']):
+            calculator = ReportCalculator(shop, use_cache=False)
+            self.assertSameDailyReport(shop_daily, calculator.get_daily_report(date(2024, 3, 10)))
+            expected = calculator.get_monthly_report(2024, 3)
+            for key in ('counts', 'totals', 'profits', 'profit_margin', 'period'):
+                self.assertEqual(shop_monthly[key], expected[key], f"{shop.name} - {key}")
+
+        self.assertEqual(
+            daily['total']['sales']['total'], sum(row['sales']['total'] for row in daily['shops'])
+        )
+        self.assertEqual(
+            monthly['total']['profits']['total_profit'],
+            sum(row['profits']['total_profit'] for row in monthly['shops'])
+        )
+        self.assertEqual(
+            daily['total']['cashflow']['usd']['net'],
+            sum(row['cashflow']['usd']['net'] for row in daily['shops'])
+        )
+
+        # Do'kon qo'shilsa ham so'rovlar soni o'sha (+ do'konlar ro'yxati)
+        Shop.objects.create(name='Empty Shop', owner=self.user)
+        with self.assertNumQueries(3):
+            ReportCalculator.get_shops_monthly_report(Shop.objects.all(), 2024, 3)
+
+        self.user.userprofile.role = 'boss'
+        self.user.userprofile.save()
+        self.client.force_login(self.user)
+        response = self.client.get('/reports/shops/', {'period': 'monthly', 'year': 2024, 'month': 3}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['shop_rows']), 3)
+        self.assertContains(response, 'Second Shop')
+
+    def test_query_timing_middleware(self):
+        """Server-Timing sarlavhasi, query_budget chegarasi va undan oshganda xato"""
+        from django.test import override_settings
+        from config.middleware import QueryBudgetExceeded
+        from reports import views
+
+        self.client.force_login(self.user)
+        params = {'shop': self.shop.id, 'date': '2024-03-10'}
+
+        with self.assertLogs('performance', level='INFO') as logs:
+            response = self.client.get('/reports/api/phone-sales/', params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+        self.assertIn('view=reports:phone_sales_api', logs.output[0])
+
+        queries = int(response['Server-Timing'].split('desc="')[1].split(' ')[0])
+        self.assertLessEqual(queries, views.phone_sales_api.query_budget)
+
+        # Chegaralar e'lon qilingan boshqa API'lar ham (testlarda QUERY_BUDGET_ENFORCE yoqiq)
+        for url in ('accessory-sales', 'exchange-sales', 'cashflow', 'cashflow/details'):
+            self.assertEqual(self.client.get(f'/reports/api/{url}/', params, secure=True).status_code, 200)
+
+        self.addCleanup(setattr, views.phone_sales_api, 'query_budget', views.phone_sales_api.query_budget)
+        views.phone_sales_api.query_budget = queries - 1
+        with override_settings(QUERY_BUDGET_ENFORCE=True), self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/reports/api/phone-sales/', params, secure=True)
+        with override_settings(QUERY_BUDGET_ENFORCE=False), self.assertLogs('performance', level='WARNING'):
+            self.assertEqual(self.client.get('/reports/api/phone-sales/', params, secure=True).status_code, 200)
+
+    def test_sql_profit_matches_profit_calculator(self):
+        """with_profit / sales_totals - ProfitCalculator bilan bir xil, foyda summalar bilan BITTA so'rovda"""
+        for sale in PhoneSale.objects.select_related('phone').with_profit():
+            self.assertEqual(sale.calculated_profit, ProfitCalculator.calculate_phone_profit(sale))
+        for sale in AccessorySale.objects.select_related('accessory').with_profit():
+            self.assertEqual(sale.calculated_profit, ProfitCalculator.calculate_accessory_profit(sale))
+        for exchange in PhoneExchange.objects.select_related('new_phone').with_profit():
+            self.assertEqual(exchange.calculated_profit, ProfitCalculator.calculate_exchange_profit(exchange))
+        for phone_return in PhoneReturn.objects.select_related('phone_sale__phone').with_lost_profit():
+            self.assertEqual(phone_return.lost_profit, ProfitCalculator.calculate_phone_profit(phone_return.phone_sale))
+
+        net_sales = PhoneSale.objects.filter(sale_date__month=3, is_returned=False)
+        with self.assertNumQueries(1):
+            totals = net_sales.sales_totals()
+        self.assertEqual(totals['count'], net_sales.count())
+        self.assertEqual(totals['total'], sum(s.sale_price for s in net_sales))
+        self.assertEqual(
+            totals['profit'],
+            sum((ProfitCalculator.calculate_phone_profit(s) for s in net_sales), Decimal('0'))
+        )
+        self.assertEqual(
+            AccessorySale.objects.none().sales_totals(),
+            {'count': 0, 'total': Decimal('0'), 'cash': Decimal('0'), 'card': Decimal('0'),
+             'debt': Decimal('0'), 'credit': Decimal('0'), 'profit': Decimal('0')}
+        )
+
+    def test_seller_daily_report_constant_query_count(self):
+        """Sotuvchi kunlik hisoboti - sotuvlar soniga bog'liq bo'lmagan 4 ta guruhlangan so'rov"""
+        busiest = PhoneSale.objects.values('sale_date').annotate(n=Count('id')).order_by('-n').first()['sale_date']
+        calculator = ReportCalculator(self.shop)
+        with self.assertNumQueries(4):
+            report = calculator.get_seller_daily_report(self.user, busiest)
+
+        phone_sales = list(report['sales_data']['phone_sales'])
+        self.assertEqual(report['counts']['phone'], len(phone_sales))
+        self.assertEqual(
+            report['profits']['phone_profit'],
+            sum((sale.calculated_profit for sale in phone_sales), Decimal('0'))
+        )
+
+    def assertSummaryMatchesRawTables(self):
+        """Signallar yuritgan jamlanma xom jadvallardan hisoblangan bilan bir xil"""
+        calculator = ReportCalculator(self.shop)
+        start, end = date(2024, 1, 1), date(2024, 12, 31)
+        raw = calculator._get_grouped_daily_totals(start, end)
+        summary = calculator._get_summary_daily_totals(start, end)
+
+        for group, keys in ShopDailySummary.GROUPS.items():
+            for day in set(raw[group]) | set(summary[group]):
+                self.assertEqual(
+                    calculator._normalize_row(summary[group].get(day), keys),
+                    calculator._normalize_row(raw[group].get(day), keys),
+                    f"{day} - {group}"
+                )
+        for day in set(raw['expenses']) | set(summary['expenses']):
+            self.assertEqual(
+                summary['expenses'].get(day, Decimal('0')), raw['expenses'].get(day, Decimal('0')), day
+            )
+
+    def test_summary_matches_raw_tables(self):
+        """Yaratishdan keyin jamlanma to'g'ri"""
+        self.assertSummaryMatchesRawTables()
+        self.assertTrue(ShopDailySummary.objects.filter(shop=self.shop, returns_loss_other_month__gt=0).exists())
+
+    def test_summary_follows_updates_and_deletes(self):
+        """Tahrirlash, o'chirish, qaytarishni bekor qilish va tannarx o'zgarishlari"""
+        from inventory.models import AccessoryPurchaseHistory
+
+        # Sotuv narxi va sanasi o'zgardi
+        sale = PhoneSale.objects.filter(is_returned=False).first()
+        sale.sale_price += Decimal('100')
+        sale.cash_amount += Decimal('100')
+        sale.sale_date = date(2024, 3, 15)
+        sale.save()
+
+        # Qaytarilgan sotuv narxi o'zgardi (qaytarish kunidagi yo'qotish ham o'zgaradi)
+        returned_sale = PhoneSale.objects.filter(is_returned=True).exclude(
+            sale_date=F('phone_return__return_date')
+        ).first()
+        returned_sale.sale_price += Decimal('40')
+        returned_sale.card_amount += Decimal('40')
+        returned_sale.save()
+
+        # Telefon tannarxi o'zgardi
+        phone = PhoneSale.objects.filter(is_returned=False).last().phone
+        phone.repair_cost = Decimal('55')
+        phone.save()
+
+        # Yangi kirim - aksessuar o'rtacha tannarxi o'zgaradi
+        AccessoryPurchaseHistory.objects.create(
+            accessory=self.accessory, quantity=100,
+            purchase_price=Decimal('42000'), created_by=self.user
+        )
+
+        accessory_sale = AccessorySale.objects.first()
+        accessory_sale.quantity += 1
+        accessory_sale.cash_amount += Decimal('50000')
+        accessory_sale.sale_date = date(2024, 2, 21)
+        accessory_sale.save()
+
+        expense = Expense.objects.first()
+        expense.amount += Decimal('5000')
+        expense.expense_date = date(2024, 4, 1)
+        expense.save()
+        Expense.objects.last().delete()
+
+        # Qaytarishni bekor qilish - sotuv qaytarilgan holatda qoladi
+        PhoneReturn.objects.first().delete()
+        # Qaytarilgan sotuvni o'chirish (qaytarish kaskad bilan)
+        PhoneReturn.objects.last().phone_sale.delete()
+        # Telefonni o'chirish (sotuv kaskad bilan)
+        PhoneSale.objects.filter(is_returned=False).first().phone.delete()
+        PhoneExchange.objects.first().delete()
+
+        self.assertSummaryMatchesRawTables()
+
+    def full_scan_balance(self, target_date):
+        """Boshidan yig'ish - kun oxiridagi qoldiq (solishtirish uchun)"""
+        totals = CashFlowTransaction.objects.filter(
+            shop=self.shop, transaction_date__lte=target_date
+        ).aggregate(usd=Sum('amount_usd'), uzs=Sum('amount_uzs'))
+        return {'usd': totals['usd'] or Decimal('0'), 'uzs': totals['uzs'] or Decimal('0')}
+
+    def test_cash_balance_from_nearest_checkpoint(self):
+        """Kun boshidagi qoldiq - eng yaqin nuqta + oradagi tranzaksiyalar, boshidan yig'ish bilan bir xil"""
+        for day in (date(2024, 2, 10), date(2024, 3, 1), date(2024, 3, 20)):
+            CashBalanceCheckpoint.close_day(self.shop, day)
+
+        for day in (date(2024, 1, 15), date(2024, 2, 11), date(2024, 3, 2), date(2024, 3, 20), date(2024, 4, 5)):
+            self.assertEqual(
+                CashBalanceCheckpoint.opening_balance(self.shop, day),
+                self.full_scan_balance(day - timedelta(days=1)), day
+            )
+            self.assertEqual(CashBalanceCheckpoint.closing_balance(self.shop, day), self.full_scan_balance(day), day)
+
+        # Nuqta + cheklangan oraliq
+        with self.assertNumQueries(2):
+            CashBalanceCheckpoint.opening_balance(self.shop, date(2024, 3, 25))
+        # Kecha yopilgan - faqat nuqta o'qiladi
+        with self.assertNumQueries(1):
+            CashBalanceCheckpoint.opening_balance(self.shop, date(2024, 3, 21))
+
+    def test_backdated_write_recomputes_only_forward(self):
+        """Orqa sana bilan yozuv - faqat shu sanadan keyingi nuqtalar qayta hisoblanadi"""
+        from django.core.management import call_command
+        from io import StringIO
+
+        for day in ('2024-02-10', '2024-03-10', '2024-03-20', '2024-03-31'):
+            call_command('close_cash_day', shop=self.shop.id, date=day, stdout=StringIO())
+        self.assertEqual(CashBalanceCheckpoint.objects.filter(shop=self.shop).count(), 4)
+
+        # 3-10 dagi nuqtaga qo'lda +1 - undan oldinga qayta hisoblanmasa, keyingilar uni meros oladi
+        CashBalanceCheckpoint.objects.filter(shop=self.shop, date=date(2024, 3, 10)).update(
+            closing_usd=F('closing_usd') + 1
+        )
+
+        def assertCheckpointsCorrect(offset):
+            for checkpoint in CashBalanceCheckpoint.objects.filter(shop=self.shop):
+                expected = self.full_scan_balance(checkpoint.date)
+                extra = offset if checkpoint.date >= date(2024, 3, 10) else 0
+                self.assertEqual(checkpoint.closing_usd, expected['usd'] + extra, checkpoint.date)
+                self.assertEqual(checkpoint.closing_uzs, expected['uzs'], checkpoint.date)
+
+        transaction = CashFlowTransaction.objects.create(
+            shop=self.shop, transaction_date=date(2024, 3, 15),
+            transaction_type='daily_seller_payment', amount_usd=Decimal('-500'), amount_uzs=Decimal('-2000')
+        )
+        # 3-20 va 3-31 qayta hisoblandi, 3-10 va undan oldingilarga tegilmadi
+        assertCheckpointsCorrect(offset=1)
+
+        # 3-5 ga ko'chirildi - 3-10 ham qayta hisoblanadi (+1 yo'qoladi)
+        transaction.transaction_date = date(2024, 3, 5)
+        transaction.save()
+        assertCheckpointsCorrect(offset=0)
+
+        transaction.delete()
+        assertCheckpointsCorrect(offset=0)
+
+    def test_warm_reports_command(self):
+        """warm_reports - keshni to'ldiradi, o'zgarmagan do'konni o'tkazadi, yozuvdan keyin qayta isitadi"""
+        from django.core.management import call_command
+        from io import StringIO
+        from reports.management.commands.warm_reports import warm_targets
+
+        targets = warm_targets(date(2024, 3, 15))
+        self.assertEqual(QuickReport.missing(self.shop.id, targets), targets)
+
+        out = StringIO()
+        call_command('warm_reports', date='2024-03-15', workers=1, stdout=out)
+        self.assertIn('4 ta hisobot', out.getvalue())
+        self.assertEqual(QuickReport.missing(self.shop.id, targets), [])
+
+        calculator = ReportCalculator(self.shop)
+        with self.assertNumQueries(1):
+            calculator.get_yearly_report(2024)
+
+        out = StringIO()
+        # Do'konlar ro'yxati + do'kon + kesh tekshiruvi
+        with self.assertNumQueries(3):
+            call_command('warm_reports', date='2024-03-15', workers=1, stdout=out)
+        self.assertIn("o'zgarmagan", out.getvalue())
+
+        Expense.objects.create(
+            shop=self.shop, name='Ijara', amount=Decimal('5000'), expense_date=date(2024, 2, 5), created_by=self.user
+        )
+        self.assertEqual(
+            QuickReport.missing(self.shop.id, targets),
+            [('monthly', date(2024, 2, 1)), ('yearly', date(2024, 1, 1))]
+        )
+        out = StringIO()
+        call_command('warm_reports', date='2024-03-15', workers=1, stdout=out)
+        self.assertIn('2 ta hisobot', out.getvalue())
+
+        # Bola hisoblagandan keyin, ota yozishidan oldin yozuv - eskirgan hisobotlar yozilmaydi
+        from reports.management.commands import warm_reports
+        warm_shop = warm_reports.warm_shop
+
+        def warm_shop_then_write(*args):
+            result = warm_shop(*args)
+            Expense.objects.create(
+                shop=self.shop, name='Ijara', amount=Decimal('5000'), expense_date=date(2024, 3, 1),
+                created_by=self.user
+            )
+            return result
+
+        self.addCleanup(setattr, warm_reports, 'warm_shop', warm_shop)
+        warm_reports.warm_shop = warm_shop_then_write
+        out = StringIO()
+        call_command('warm_reports', date='2024-03-15', workers=1, force=True, stdout=out)
+        self.assertIn('2 ta hisobot', out.getvalue())
+        self.assertIn("yozilmadi - monthly 2024-03-01, yearly 2024-01-01", out.getvalue())
+        self.assertEqual(
+            QuickReport.missing(self.shop.id, targets),
+            [('monthly', date(2024, 3, 1)), ('yearly', date(2024, 1, 1))]
+        )
+
+    def test_sales_export_streams_xlsx(self):
+        """Sotuvlar XLSX - StreamingHttpResponse, har bir sotuv qatori va SQL foydasi bilan"""
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        self.user.userprofile.role = 'boss'
+        self.user.userprofile.save()
+        self.client.force_login(self.user)
+
+        response = self.client.get('/reports/sales/export/', {
+            'shop': self.shop.id, 'start_date': '2024-01-01', 'end_date': '2024-12-31'
+        }, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('spreadsheetml', response['Content-Type'])
+
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['Telefonlar', 'Aksessuarlar', 'Almashtirishlar'])
+
+        phone_rows = list(workbook['Telefonlar'].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(len(phone_rows), PhoneSale.objects.count())
+        self.assertEqual(
+            sum(Decimal(str(row[12])) for row in phone_rows if row[13] == "Yo'q"),
+            PhoneSale.objects.filter(is_returned=False).sales_totals()['profit']
+        )
+        self.assertEqual(len(list(workbook['Aksessuarlar'].iter_rows(min_row=2))), AccessorySale.objects.count())
+        self.assertEqual(len(list(workbook['Almashtirishlar'].iter_rows(min_row=2))), PhoneExchange.objects.count())
+
+        response = self.client.get('/sales/phone-exchange/export/', secure=True)
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(len(list(workbook['Almashtirishlar'].iter_rows(min_row=2))), PhoneExchange.objects.count())
+        self.assertEqual(next(workbook['Statistika'].values)[1], PhoneExchange.objects.count())
+
+    def test_rebuild_daily_summaries_command(self):
+        """rebuild_daily_summaries - buzilgan jamlanmani tiklaydi"""
+        from django.core.management import call_command
+        from io import StringIO
+
+        ShopDailySummary.objects.filter(shop=self.shop, date__month=3).delete()
+        ShopDailySummary.objects.filter(shop=self.shop).update(phone_profit=Decimal('1'))
+        ShopDailySummary.objects.create(shop=self.shop, date=date(2023, 5, 5), expenses=Decimal('10'))
+
+        call_command('rebuild_daily_summaries', shop=self.shop.id, stdout=StringIO())
+
+        self.assertSummaryMatchesRawTables()
+        # Operatsiyasi yo'q kun qatorlari ham tozalanadi
+        self.assertFalse(ShopDailySummary.objects.filter(shop=self.shop, date__year=2023).exists())
+
+    def test_generate_demo_data_and_benchmark_commands(self):
+        """generate_demo_data - seed bo'yicha bir xil natija; benchmark_reports - JSON natija va solishtirish"""
+        import json
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from io import StringIO
+
+        options = dict(seed=7, shops=1, sellers=2, suppliers=2, accessories=5, days=20, end='2024-03-20',
+                       phones_per_day=2, stdout=StringIO())
+        call_command('generate_demo_data', **options)
+        demo_shop = Shop.objects.get(name="Demo do'kon 1")
+        first = ShopDailySummary.objects.filter(shop=demo_shop).aggregate(
+            phones=Sum('phone_count'), total=Sum('phone_total'), accessories=Sum('accessory_total')
+        )
+        self.assertGreater(first['phones'], 0)
+        self.assertEqual(User.objects.get(username='demo_seller_1_1').commission_history.count(), 3)
+
+        with self.assertRaises(CommandError):
+            call_command('generate_demo_data', **options)
+        call_command('generate_demo_data', flush=True, **options)
+        demo_shop = Shop.objects.get(name="Demo do'kon 1")
+        self.assertEqual(
+            ShopDailySummary.objects.filter(shop=demo_shop).aggregate(
+                phones=Sum('phone_count'), total=Sum('phone_total'), accessories=Sum('accessory_total')
+            ),
+            first
+        )
+
+        # Ma'lumotlar signallar orqali yaratilgan - jamlanma xom jadvallar bilan mos
+        self.shop = demo_shop
+        self.assertSummaryMatchesRawTables()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = os.path.join(tmp, 'baseline.json')
+            call_command('benchmark_reports', shop=demo_shop.id, runs=1, output=baseline, stdout=StringIO())
+            with open(baseline, encoding='utf-8') as f:
+                data = json.load(f)
+            self.assertEqual(data['date'], '2024-03-20')
+            self.assertEqual(data['results']['get_daily_report']['queries'], 2)
+            self.assertEqual(data['results']['reports:monthly']['status'], 200)
+            self.assertIn('get_seller_monthly_salary', data['results'])
+
+            out = StringIO()
+            call_command('benchmark_reports', shop=demo_shop.id, runs=1, skip_views=True,
+                         output=os.path.join(tmp, 'current.json'), baseline=baseline, stdout=out)
+            self.assertIn('get_yearly_report', out.getvalue())
+
+    def test_report_jobs_queue_and_worker(self):
+        """ReportJob - navbatga qo'yish, worker atomar egallaydi, natija JSON / XLSX fayl"""
+        import os
+        import tempfile
+        from io import BytesIO, StringIO
+        from django.core.management import call_command
+        from django.test import override_settings
+        from openpyxl import load_workbook
+        from reports.models import ReportJob
+
+        self.user.userprofile.role = 'boss'
+        self.user.userprofile.save()
+        self.client.force_login(self.user)
+
+        with tempfile.TemporaryDirectory() as media_root, tempfile.TemporaryDirectory() as private_root, \
+                override_settings(MEDIA_ROOT=media_root, PRIVATE_MEDIA_ROOT=private_root):
+            response = self.client.post('/reports/jobs/', {
+                'kind': 'yearly_report', 'shop': self.shop.id, 'year': 2024
+            }, secure=True)
+            self.assertEqual(response.status_code, 202)
+            yearly_job = response.json()
+            self.assertEqual(yearly_job['status'], 'pending')
+            self.assertEqual(yearly_job['params'], {'shop': self.shop.id, 'year': 2024})
+
+            # Qayta bosish - yangi vazifa yaratilmaydi
+            response = self.client.post('/reports/jobs/', {
+                'kind': 'yearly_report', 'shop': self.shop.id, 'year': 2024
+            }, secure=True)
+            self.assertEqual(response.json()['id'], yearly_job['id'])
+
+            response = self.client.post('/reports/jobs/', {
+                'kind': 'sales_export', 'shop': self.shop.id, 'start_date': '2024-01-01', 'end_date': '2024-12-31'
+            }, secure=True)
+            export_job = response.json()
+
+            self.assertEqual(self.client.post('/reports/jobs/', {'kind': 'x'}, secure=True).status_code, 400)
+            self.assertEqual(self.client.post('/reports/jobs/', {
+                'kind': 'sales_export', 'shop': self.shop.id, 'start_date': '2024-12-31', 'end_date': '2024-01-01'
+            }, secure=True).status_code, 400)
+            self.assertEqual(self.client.get('/reports/jobs/', secure=True).status_code, 405)
+
+            # Egallash atomar: ikkinchi worker xuddi shu vazifani ololmaydi
+            claimed = ReportJob.claim_next()
+            self.assertEqual(claimed.id, yearly_job['id'])
+            self.assertEqual(claimed.status, ReportJob.STATUS_RUNNING)
+            self.assertEqual(ReportJob.objects.filter(pk=claimed.pk, status='pending').update(status='running'), 0)
+            self.assertEqual(ReportJob.claim_next().id, export_job['id'])
+            self.assertIsNone(ReportJob.claim_next())
+
+            # To'xtab qolgan vazifalar qayta navbatga qaytadi
+            self.assertEqual(ReportJob.requeue_stale(timedelta(0)), (2, 0))
+
+            out = StringIO()
+            call_command('run_report_worker', once=True, stdout=out)
+            self.assertIn('Bajarilgan vazifalar: 2', out.getvalue())
+
+            response = self.client.get(yearly_job['status_url'], secure=True)
+            data = response.json()
+            self.assertEqual(data['status'], 'done')
+            yearly_data = ReportCalculator(self.shop).get_yearly_report(2024)
+            self.assertEqual(data['result']['counts']['phone'], yearly_data['counts']['phone'])
+            self.assertEqual(len(data['result']['months']), 12)
+            sellers = ReportCalculator(self.shop).get_yearly_sellers_stats(2024)
+            self.assertEqual([row['seller_id'] for row in data['result']['sellers']], [row['seller'].id for row in sellers])
+            self.assertNotIn('download_url', data)
+
+            data = self.client.get(export_job['status_url'], secure=True).json()
+            self.assertEqual(data['status'], 'done')
+            # Fayl MEDIA_ROOT dan tashqarida (nginx bermaydi), nomi tasodifiy
+            job = ReportJob.objects.get(id=export_job['id'])
+            self.assertTrue(os.path.exists(os.path.join(private_root, job.result_file.name)))
+            self.assertEqual(os.listdir(media_root), [])
+            self.assertNotIn('sotuvlar', job.result_file.name)
+            response = self.client.get(data['download_url'], secure=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('sotuvlar_2024-01-01_2024-12-31', response['Content-Disposition'])
+            workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+            self.assertEqual(len(list(workbook['Telefonlar'].iter_rows(min_row=2))), PhoneSale.objects.count())
+            response.close()
+
+            # Xatolik vazifani 'failed' qiladi, worker to'xtamaydi
+            failed = ReportJob.objects.create(kind='seller_salary_export', params={
+                'shop': self.shop.id, 'year': 2024, 'month': 3, 'seller': 0
+            }, created_by=self.user)
+            call_command('run_report_worker', once=True, stdout=StringIO())
+            failed.refresh_from_db()
+            self.assertEqual(failed.status, ReportJob.STATUS_FAILED)
+            self.assertIn('DoesNotExist', failed.error)
+
+            # Boshqa foydalanuvchi vazifasi ko'rinmaydi
+            other = User.objects.create_user(username='boss2', password='test123')
+            other.userprofile.role = 'boss'
+            other.userprofile.save()
+            self.client.force_login(other)
+            self.assertEqual(self.client.get(yearly_job['status_url'], secure=True).status_code, 404)
+
+            self.assertEqual(ReportJob.purge(timedelta(0)), 3)
+            self.assertFalse(ReportJob.objects.exists())
+
+
 # Test ishga tushirish
 if __name__ == '__main__':
     import unittest
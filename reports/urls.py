@@ -14,6 +14,7 @@ urlpatterns = [
 
     # Taqqoslash
     path('comparison/', views.comparison_report, name='comparison'),
+    path('shops/', views.shops_report, name='shops'),
     path('no-access/', views.no_access, name='no_access'),
 
     # Sotuvchi hisobotlari
@@ -21,6 +22,17 @@ urlpatterns = [
     path('seller/<int:seller_id>/modal/', views.seller_detail_modal, name='seller_detail_modal'),
     path('seller/<int:seller_id>/salary/', views.seller_salary_report, name='seller_salary'),
 
+    # XLSX eksport
+    path('daily/export/', views.daily_report_export, name='daily_export'),
+    path('monthly/export/', views.monthly_report_export, name='monthly_export'),
+    path('seller/<int:seller_id>/salary/export/', views.seller_salary_export, name='seller_salary_export'),
+    path('sales/export/', views.sales_export, name='sales_export'),
+
+    # Fon vazifalari (run_report_worker)
+    path('jobs/', views.report_job_create, name='report_job_create'),
+    path('jobs/<int:job_id>/', views.report_job_status, name='report_job_status'),
+    path('jobs/<int:job_id>/download/', views.report_job_download, name='report_job_download'),
+
     # API endpoints
     path('api/phone-sales/', views.phone_sales_api, name='phone_sales_api'),
     path('api/accessory-sales/', views.accessory_sales_api, name='accessory_sales_api'),
@@ -331,14 +331,17 @@ class ExportHelper:
                 'phone_total_usd': float(report_data.get('sales', {}).get('phone_total_usd', 0)),
                 'accessory_total_uzs': float(report_data.get('sales', {}).get('accessory_total_uzs', 0)),
                 'total_sales': float(report_data.get('sales', {}).get('total', 0)),
-                'total_cash': float(report_data.get('sales', {}).get('cash', 0)),
-                'total_card': float(report_data.get('sales', {}).get('card', 0)),
-                'total_debt': float(report_data.get('sales', {}).get('debt', 0)),
+                'phone_cash_usd': float(report_data.get('sales', {}).get('phone_cash_usd', 0)),
+                'phone_card_usd': float(report_data.get('sales', {}).get('phone_card_usd', 0)),
+                'phone_debt_usd': float(report_data.get('sales', {}).get('phone_debt_usd', 0)),
+                'accessory_cash_uzs': float(report_data.get('sales', {}).get('accessory_cash_uzs', 0)),
+                'accessory_card_uzs': float(report_data.get('sales', {}).get('accessory_card_uzs', 0)),
+                'accessory_debt_uzs': float(report_data.get('sales', {}).get('accessory_debt_uzs', 0)),
             },
             'profits': {
-                'phone_profit': float(report_data.get('profits', {}).get('phone_profit_usd', 0)),
-                'accessory_profit': float(report_data.get('profits', {}).get('accessory_profit_uzs', 0)),
-                'exchange_profit': float(report_data.get('profits', {}).get('exchange_profit_usd', 0)),
+                'phone_profit': float(report_data.get('profits', {}).get('phone_profit', 0)),
+                'accessory_profit': float(report_data.get('profits', {}).get('accessory_profit', 0)),
+                'exchange_profit': float(report_data.get('profits', {}).get('exchange_profit', 0)),
                 'total_profit': float(report_data.get('profits', {}).get('total_profit', 0)),
             },
             'counts': {
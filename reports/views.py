@@ -2,18 +2,28 @@
 
 from django.db.models import Sum, Count, Q
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, FileResponse, Http404
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.views.decorators.http import condition, require_POST
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
+from django.urls import reverse
 from datetime import datetime, timedelta, date
 from decimal import Decimal
+import hashlib
+import os
 from calendar import monthrange
 
 from sales.models import PhoneSale, PhoneExchange, PhoneReturn, AccessorySale
 from shops.models import Shop
-from .models import ReportCalculator, ProfitCalculator
+from config.middleware import query_budget
+from .models import ReportCalculator, ReportJob, ShopDailySummary
+from .jobs import (
+    JOB_TYPES, build_daily_export, build_monthly_export, build_seller_salary_export, build_sales_export,
+    yearly_profit_payload,
+)
+from .utils import ValidationHelper
 
 
 def is_boss_or_finance(user):
@@ -85,21 +95,13 @@ def daily_report(request):
 
     calculator = ReportCalculator(selected_shop)
     daily_data = calculator.get_daily_report(selected_date)
-    profit_calc = ProfitCalculator()
 
     # ✅ USER ROLI TEKSHIRISH
     user_role = getattr(request.user.userprofile, 'role', 'seller') if hasattr(request.user,
                                                                                'userprofile') else 'seller'
     is_boss = user_role == 'boss'
 
-    # Foyda hisoblash - faqat boss uchun
-    if is_boss:
-        for sale in daily_data['sales_data']['phone_sales']:
-            sale.calculated_profit = profit_calc.calculate_phone_profit(sale)
-        for sale in daily_data['sales_data']['accessory_sales']:
-            sale.calculated_profit = profit_calc.calculate_accessory_profit(sale)
-        for exchange in daily_data['sales_data']['exchanges']:
-            exchange.calculated_profit = profit_calc.calculate_exchange_profit(exchange)
+    # Foyda (calculated_profit) sales_data QuerySet'larida SQL da hisoblangan - shablon faqat boss ga ko'rsatadi
 
     # ✅ KUNLIK OLINGAN TELEFONLAR
     daily_received_phones = Phone.objects.filter(
@@ -138,15 +140,6 @@ def daily_report(request):
         seller_calculator = ReportCalculator(selected_shop)
         seller_data = seller_calculator.get_seller_daily_report(seller, selected_date)
 
-        # Foyda hisoblash - faqat boss uchun
-        if is_boss:
-            for sale in seller_data['sales_data']['phone_sales']:
-                sale.calculated_profit = profit_calc.calculate_phone_profit(sale)
-            for sale in seller_data['sales_data']['accessory_sales']:
-                sale.calculated_profit = profit_calc.calculate_accessory_profit(sale)
-            for exchange in seller_data['sales_data']['exchanges']:
-                exchange.calculated_profit = profit_calc.calculate_exchange_profit(exchange)
-
         if seller_data['counts']['total'] > 0:
             seller_stats.append(seller_data)
 
@@ -237,12 +230,14 @@ def monthly_report(request):
     ).values_list('salesman_id', flat=True).distinct()
 
     seller_ids = set(phone_sellers) | set(accessory_sellers) | set(exchange_sellers)
-    sellers = User.objects.filter(id__in=seller_ids)
+    sellers = User.objects.filter(id__in=seller_ids).select_related('userprofile')
+
+    # HAR BIR SOTUVCHI UCHUN OYLIK MA'LUMOT - ✅ BITTA O'TISHDA
+    salaries = calculator.get_all_sellers_monthly_salary(year, month, sellers)
 
-    # HAR BIR SOTUVCHI UCHUN OYLIK MA'LUMOT
     seller_monthly_stats = []
     for seller in sellers:
-        salary_data = calculator.get_seller_monthly_salary(seller, year, month)
+        salary_data = salaries[seller.id]
 
         if salary_data['sales']['phone_count'] > 0 or salary_data['sales']['accessory_count'] > 0:
             total_phone_exchange_profit = salary_data['profits']['phone_profit'] + salary_data['profits'][
@@ -318,97 +313,7 @@ def yearly_report(request):
     calculator = ReportCalculator(selected_shop)
     yearly_data = calculator.get_yearly_report(year)
 
-    start_date = date(year, 1, 1)
-    end_date = date(year, 12, 31)
-
-    # SOTUVCHILAR RO'YXATI
-    phone_sellers = PhoneSale.objects.filter(
-        phone__shop=selected_shop,
-        sale_date__range=[start_date, end_date]
-    ).values_list('salesman_id', flat=True).distinct()
-
-    accessory_sellers = AccessorySale.objects.filter(
-        accessory__shop=selected_shop,
-        sale_date__range=[start_date, end_date]
-    ).values_list('salesman_id', flat=True).distinct()
-
-    exchange_sellers = PhoneExchange.objects.filter(
-        new_phone__shop=selected_shop,
-        exchange_date__range=[start_date, end_date]
-    ).values_list('salesman_id', flat=True).distinct()
-
-    seller_ids = set(phone_sellers) | set(accessory_sellers) | set(exchange_sellers)
-    sellers = User.objects.filter(id__in=seller_ids)
-
-    # HAR BIR SOTUVCHI UCHUN YILLIK MA'LUMOT (OYLIK HISOBOTLARDAN)
-    yearly_sellers_stats = []
-
-    for seller in sellers:
-        # OYLIK HISOBOTLARNI JAM QILISH
-        total_phone_sales = Decimal('0')
-        total_accessory_sales = Decimal('0')
-        total_phone_profit = Decimal('0')
-        total_accessory_profit = Decimal('0')
-        total_exchange_profit = Decimal('0')
-        total_phone_count = 0
-        total_accessory_count = 0
-        total_exchange_count = 0
-        total_returns_count = 0
-
-        # OYLIK MA'LUMOTLAR UCHUN MASSIVLAR
-        monthly_phone_data = []
-        monthly_accessory_data = []
-        working_days_count = 0
-
-        for month in range(1, 13):
-            monthly_salary = calculator.get_seller_monthly_salary(seller, year, month)
-
-            total_phone_sales += monthly_salary['sales']['phone_total']
-            total_accessory_sales += monthly_salary['sales']['accessory_total']
-            total_phone_profit += monthly_salary['profits']['phone_profit']
-            total_accessory_profit += monthly_salary['profits']['accessory_profit']
-            total_exchange_profit += monthly_salary['profits']['exchange_profit']
-            total_phone_count += monthly_salary['sales']['phone_count']
-            total_accessory_count += monthly_salary['sales']['accessory_count']
-            total_exchange_count += monthly_salary['sales']['exchange_count']
-            total_returns_count += monthly_salary['sales']['returns_count']
-
-            # OYLIK DIAGRAMMA UCHUN MA'LUMOTLAR
-            net_phones = monthly_salary['sales']['phone_count'] + monthly_salary['sales']['exchange_count']
-            monthly_phone_data.append(net_phones)
-            monthly_accessory_data.append(monthly_salary['sales']['accessory_count'])
-
-            if len(monthly_salary.get('daily_data', [])) > 0:
-                working_days_count += len(monthly_salary['daily_data'])
-
-        total_phone_exchange_profit = total_phone_profit + total_exchange_profit
-        net_phone_count = total_phone_count + total_exchange_count
-
-        if total_phone_count > 0 or total_accessory_count > 0 or total_exchange_count > 0:
-            yearly_sellers_stats.append({
-                'seller': seller,
-                'phone_sales_usd': total_phone_sales,
-                'accessory_sales_uzs': total_accessory_sales,
-                'phone_count': total_phone_count,
-                'accessory_count': total_accessory_count,
-                'exchange_count': total_exchange_count,
-                'returns_count': total_returns_count,
-                'net_phone_count': net_phone_count,
-                'phone_profit': total_phone_profit,
-                'accessory_profit': total_accessory_profit,
-                'exchange_profit': total_exchange_profit,
-                'total_phone_exchange_profit': total_phone_exchange_profit,
-                'total_sales': total_phone_sales + total_accessory_sales,
-                'total_transactions': total_phone_count + total_accessory_count + total_exchange_count,
-                'monthly_phone_data': monthly_phone_data,
-                'monthly_accessory_data': monthly_accessory_data,
-                'working_days': working_days_count
-            })
-
-    yearly_sellers_stats.sort(
-        key=lambda x: (x['phone_sales_usd'], x['total_transactions']),
-        reverse=True
-    )
+    yearly_sellers_stats = calculator.get_yearly_sellers_stats(year)
 
     # UMUMIY STATISTIKA
     total_stats = {
@@ -456,20 +361,8 @@ def seller_detail_page(request, seller_id):
     selected_date = ReportMixin.parse_date(request.GET.get('date'))
 
     calculator = ReportCalculator(selected_shop)
+    # calculated_profit / lost_profit QuerySet'larda SQL da hisoblangan
     seller_stats = calculator.get_seller_daily_report(seller, selected_date)
-    profit_calc = ProfitCalculator()
-
-    # Foyda hisoblash
-    for sale in seller_stats['sales_data']['phone_sales']:
-        sale.calculated_profit = profit_calc.calculate_phone_profit(sale)
-    for exchange in seller_stats['sales_data']['exchanges']:
-        exchange.calculated_profit = profit_calc.calculate_exchange_profit(exchange)
-    for sale in seller_stats['sales_data']['accessory_sales']:
-        sale.calculated_profit = profit_calc.calculate_accessory_profit(sale)
-    for return_obj in seller_stats['sales_data']['phone_returns']:
-        return_obj.lost_profit = (
-            return_obj.phone_sale.sale_price - return_obj.phone_sale.phone.cost_price
-        )
 
     # Pagination
     phone_page = request.GET.get('phone_page', 1)
@@ -523,14 +416,6 @@ def seller_detail_modal(request, seller_id):
 
     calculator = ReportCalculator(shop)
     seller_stats = calculator.get_seller_daily_report(seller, selected_date)
-    profit_calc = ProfitCalculator()
-
-    for sale in seller_stats['sales_data']['phone_sales']:
-        sale.calculated_profit = profit_calc.calculate_phone_profit(sale)
-    for sale in seller_stats['sales_data']['accessory_sales']:
-        sale.calculated_profit = profit_calc.calculate_accessory_profit(sale)
-    for exchange in seller_stats['sales_data']['exchanges']:
-        exchange.calculated_profit = profit_calc.calculate_exchange_profit(exchange)
 
     return render(request, 'reports/seller_detail_modal.html', {
         'seller': seller,
@@ -554,17 +439,8 @@ def seller_salary_report(request, seller_id):
     month = int(request.GET.get('month', timezone.now().month))
 
     calculator = ReportCalculator(selected_shop)
+    # Kunlik sales_data QuerySet'larida calculated_profit SQL da hisoblangan
     salary_data = calculator.get_seller_monthly_salary(seller, year, month)
-    profit_calc = ProfitCalculator()
-
-    # Har bir kunlik ma'lumotga foyda qo'shish
-    for day_data in salary_data.get('daily_data', []):
-        for sale in day_data['sales_data']['phone_sales']:
-            sale.calculated_profit = profit_calc.calculate_phone_profit(sale)
-        for exchange in day_data['sales_data']['exchanges']:
-            exchange.calculated_profit = profit_calc.calculate_exchange_profit(exchange)
-        for sale in day_data['sales_data']['accessory_sales']:
-            sale.calculated_profit = profit_calc.calculate_accessory_profit(sale)
 
     return render(request, 'reports/seller_salary.html', {
         'seller': seller,
@@ -584,7 +460,51 @@ def seller_salary_report(request, seller_id):
     })
 
 
+# ============= API: ETag / Last-Modified =============
+
+# JSON tuzilishi o'zgarsa oshiriladi - eski ETag'lar mos kelmaydi
+API_ETAG_VERSION = 1
+
+
+def _report_version(request):
+    """
+    API so'rovi uchun (ETag, Last-Modified) - hisobotdan oldin, bitta so'rovda
+
+    shop + date yoki start_date/end_date bo'yicha ShopDailySummary.version.
+    Parametrlar noto'g'ri bo'lsa (None, None) - view o'zi 400 qaytaradi.
+    """
+    if not hasattr(request, '_report_version'):
+        version = (None, None)
+        date_str = request.GET.get('date')
+        try:
+            shop_id = int(request.GET.get('shop'))
+            start_date = datetime.strptime(request.GET.get('start_date', date_str), '%Y-%m-%d').date()
+            end_date = datetime.strptime(request.GET.get('end_date', date_str), '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            pass
+        else:
+            token, last_modified = ShopDailySummary.version(shop_id, start_date, end_date)
+            etag = hashlib.md5(f"{API_ETAG_VERSION}:{token}".encode()).hexdigest()
+            version = (etag, last_modified)
+        request._report_version = version
+    return request._report_version
+
+
+def _report_etag(request, *args, **kwargs):
+    return _report_version(request)[0]
+
+
+def _report_last_modified(request, *args, **kwargs):
+    return _report_version(request)[1]
+
+
+# If-None-Match mos kelsa - 304, view (hisoblash) umuman chaqirilmaydi
+report_api_condition = condition(etag_func=_report_etag, last_modified_func=_report_last_modified)
+
+
 @login_required
+@query_budget(6)
+@report_api_condition
 def phone_sales_api(request):
     """Telefon sotuvlari API"""
     shop_id = request.GET.get('shop')
@@ -603,12 +523,13 @@ def phone_sales_api(request):
     phone_sales = PhoneSale.objects.filter(
         phone__shop=shop,
         sale_date=selected_date
-    ).select_related('phone', 'customer', 'salesman').order_by('-id')
+    ).select_related(
+        'phone__phone_model', 'phone__memory_size', 'customer', 'salesman'
+    ).with_profit().order_by('-id')
 
     paginator = Paginator(phone_sales, 20)
     page_obj = paginator.get_page(page)
 
-    profit_calc = ProfitCalculator()
     results = []
     for sale in page_obj:
         results.append({
@@ -620,7 +541,7 @@ def phone_sales_api(request):
             'card_amount_usd': float(sale.card_amount),
             'debt_amount_usd': float(sale.debt_amount),
             'credit_amount_usd': float(sale.credit_amount),
-            'profit_usd': float(profit_calc.calculate_phone_profit(sale)),
+            'profit_usd': float(sale.calculated_profit),
             'sale_time': sale.created_at.strftime('%H:%M') if hasattr(sale, 'created_at') else sale.sale_date.strftime('%H:%M'),
             'currency': 'USD'
         })
@@ -634,6 +555,8 @@ def phone_sales_api(request):
 
 
 @login_required
+@query_budget(6)
+@report_api_condition
 def accessory_sales_api(request):
     """Aksessuar sotuvlari API"""
     shop_id = request.GET.get('shop')
@@ -652,12 +575,11 @@ def accessory_sales_api(request):
     accessory_sales = AccessorySale.objects.filter(
         accessory__shop=shop,
         sale_date=selected_date
-    ).select_related('accessory', 'customer', 'salesman').order_by('-id')
+    ).select_related('accessory', 'customer', 'salesman').with_profit().order_by('-id')
 
     paginator = Paginator(accessory_sales, 20)
     page_obj = paginator.get_page(page)
 
-    profit_calc = ProfitCalculator()
     results = []
     for sale in page_obj:
         results.append({
@@ -670,7 +592,7 @@ def accessory_sales_api(request):
             'cash_amount_uzs': int(sale.cash_amount),
             'card_amount_uzs': int(sale.card_amount),
             'debt_amount_uzs': int(sale.debt_amount),
-            'profit_uzs': int(profit_calc.calculate_accessory_profit(sale)),
+            'profit_uzs': int(sale.calculated_profit),
             'sale_time': sale.created_at.strftime('%H:%M') if hasattr(sale, 'created_at') else sale.sale_date.strftime('%H:%M'),
             'currency': 'UZS'
         })
@@ -684,6 +606,8 @@ def accessory_sales_api(request):
 
 
 @login_required
+@query_budget(6)
+@report_api_condition
 def exchange_sales_api(request):
     """Almashtirish sotuvlari API"""
     shop_id = request.GET.get('shop')
@@ -702,12 +626,13 @@ def exchange_sales_api(request):
     exchanges = PhoneExchange.objects.filter(
         new_phone__shop=shop,
         exchange_date=selected_date
-    ).select_related('new_phone', 'salesman').order_by('-id')
+    ).select_related(
+        'new_phone__phone_model', 'new_phone__memory_size', 'old_phone_model', 'salesman'
+    ).with_profit().order_by('-id')
 
     paginator = Paginator(exchanges, 20)
     page_obj = paginator.get_page(page)
 
-    profit_calc = ProfitCalculator()
     results = []
     for exchange in page_obj:
         results.append({
@@ -718,7 +643,7 @@ def exchange_sales_api(request):
             'new_phone_price_usd': float(exchange.new_phone_price),
             'old_phone_value_usd': float(exchange.old_phone_accepted_price),
             'additional_payment_usd': float(exchange.cash_amount),
-            'profit_usd': float(profit_calc.calculate_exchange_profit(exchange)),
+            'profit_usd': float(exchange.calculated_profit),
             'exchange_time': exchange.created_at.strftime('%H:%M') if hasattr(exchange, 'created_at') else exchange.exchange_date.strftime('%H:%M'),
             'currency': 'USD'
         })
@@ -731,6 +656,76 @@ def exchange_sales_api(request):
     })
 
 
+MONTH_NAMES = {
+    1: 'Yanvar', 2: 'Fevral', 3: 'Mart', 4: 'Aprel',
+    5: 'May', 6: 'Iyun', 7: 'Iyul', 8: 'Avgust',
+    9: 'Sentabr', 10: 'Oktabr', 11: 'Noyabr', 12: 'Dekabr'
+}
+
+
+def _shops_report_row(report, period):
+    """Kunlik yoki oylik hisobotdan jadval qatori (shablon uchun bir xil kalitlar)"""
+    if period == 'monthly':
+        totals = report['totals']
+        sales_usd, sales_uzs = totals['phone_sales_usd'], totals['accessory_sales_uzs']
+        cash_usd, cash_uzs = totals['phone_cash_usd'], totals['accessory_cash_uzs']
+        expenses = totals['expenses']
+    else:
+        sales = report['sales']
+        sales_usd, sales_uzs = sales['phone_total_usd'], sales['accessory_total_uzs']
+        cash_usd, cash_uzs = sales['phone_cash_usd'], sales['accessory_cash_uzs']
+        expenses = report['expenses']
+
+    return {
+        'shop': report['shop'],
+        'counts': report['counts'],
+        'sales_usd': sales_usd,
+        'sales_uzs': sales_uzs,
+        'cash_usd': cash_usd,
+        'cash_uzs': cash_uzs,
+        'expenses': expenses,
+        'phone_exchange_profit': report['profits']['total_phone_exchange_profit'],
+        'accessory_profit': report['profits']['accessory_profit'],
+        'profit_margin': report['profit_margin'],
+    }
+
+
+@login_required
+@query_budget(8)
+@check_report_access
+def shops_report(request):
+    """BARCHA DO'KONLAR - kunlik yoki oylik, do'kon bo'yicha qatorlar va jami (GROUP BY shop)"""
+    shops = ReportMixin.get_user_shops(request.user)
+    if not shops.exists():
+        return render(request, 'reports/no_shop.html')
+
+    period = 'monthly' if request.GET.get('period') == 'monthly' else 'daily'
+    selected_date = ReportMixin.parse_date(request.GET.get('date'))
+    year = int(request.GET.get('year', timezone.now().year))
+    month = int(request.GET.get('month', timezone.now().month))
+
+    if period == 'monthly':
+        report = ReportCalculator.get_shops_monthly_report(shops, year, month)
+    else:
+        report = ReportCalculator.get_shops_daily_report(shops, selected_date)
+
+    is_boss = hasattr(request.user, 'userprofile') and request.user.userprofile.role == 'boss'
+
+    return render(request, 'reports/shops_report.html', {
+        'period': period,
+        'selected_date': selected_date,
+        'year': year,
+        'month': month,
+        'shop_rows': [_shops_report_row(shop_report, period) for shop_report in report['shops']],
+        'total_row': _shops_report_row(report['total'], period),
+        'is_boss': is_boss,
+        'today': timezone.now().date(),
+        'years': range(2020, timezone.now().year + 2),
+        'months': list(MONTH_NAMES.items()),
+        'month_name': MONTH_NAMES.get(month, ''),
+    })
+
+
 @login_required
 def comparison_report(request):
     """Taqqoslash hisoboti"""
@@ -825,82 +820,94 @@ def yearly_profit_detail(request):
     except Shop.DoesNotExist:
         return JsonResponse({'error': "Do'kon topilmadi"}, status=404)
 
-    calculator = ReportCalculator(shop)
-    yearly_data = calculator.get_yearly_report(year)
+    return JsonResponse(yearly_profit_payload(ReportCalculator(shop).get_yearly_report(year)))
 
-    return JsonResponse({
-        'success': True,
-        'period': f"{year}",
-        'profits': {
-            'phone_profit': float(yearly_data.get('profits', {}).get('phone_profit', 0)),
-            'accessory_profit': float(yearly_data.get('profits', {}).get('accessory_profit', 0)),
-            'exchange_profit': float(yearly_data.get('profits', {}).get('exchange_profit', 0)),
-            'total_profit': float(yearly_data.get('profits', {}).get('total_profit', 0))
-        },
-        'totals': {
-            'phone_sales': float(yearly_data.get('totals', {}).get('phone_sales', 0)),
-            'accessory_sales': float(yearly_data.get('totals', {}).get('accessory_sales', 0)),
-            'total_sales': float(yearly_data.get('totals', {}).get('sales', 0))
+
+def _serialize_cashflow(cashflow):
+    """Cash flow lug'atini JSON uchun"""
+    usd = cashflow.get('usd', {})
+    uzs = cashflow.get('uzs', {})
+    details = cashflow.get('details', {})
+    return {
+        'usd': {
+            'income': float(usd.get('income', 0)),
+            'expense': float(usd.get('expense', 0)),
+            'net': float(usd.get('net', 0))
         },
-        'counts': {
-            'phone': yearly_data.get('counts', {}).get('phone', 0),
-            'accessory': yearly_data.get('counts', {}).get('accessory', 0),
-            'exchange': yearly_data.get('counts', {}).get('exchange', 0),
-            'total': yearly_data.get('counts', {}).get('total', 0)
+        'uzs': {
+            'income': float(uzs.get('income', 0)),
+            'expense': float(uzs.get('expense', 0)),
+            'net': float(uzs.get('net', 0))
         },
-        'profit_margin': float(yearly_data.get('profits', {}).get('profit_margin', 0))
-    })
+        'details': {
+            'phone_sales': float(details.get('phone_sales', 0)),
+            'accessory_sales': float(details.get('accessory_sales', 0)),
+            'exchange_income': float(details.get('exchange_income', 0)),
+            'exchange_equal': int(details.get('exchange_equal', 0)),
+            'daily_seller_payments': float(details.get('daily_seller_payments', 0)),
+            'exchange_expenses': float(details.get('exchange_expenses', 0)),
+            'phone_returns': float(details.get('phone_returns', 0)),
+            'daily_expenses': float(details.get('daily_expenses', 0)),
+            'supplier_payments_cash': float(details.get('supplier_payments_cash', 0)),
+        }
+    }
 
 
 @login_required
+@query_budget(6)
+@report_api_condition
 def cashflow_api(request):
-    """Cash Flow API - kunlik"""
+    """
+    Cash Flow API - kunlik yoki sana oralig'i
+
+    ?date=YYYY-MM-DD - bitta kun
+    ?start_date=...&end_date=... - har bir kun uchun (2 ta so'rovda)
+    """
     shop_id = request.GET.get('shop')
     date_str = request.GET.get('date')
+    start_str = request.GET.get('start_date')
+    end_str = request.GET.get('end_date')
 
-    if not shop_id or not date_str:
+    if not shop_id or not (date_str or (start_str and end_str)):
         return JsonResponse({'error': "Parametrlar kerak"}, status=400)
 
     try:
-        selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         shop = Shop.objects.get(id=shop_id)
+        if date_str:
+            start_date = end_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        else:
+            start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
     except (ValueError, Shop.DoesNotExist):
         return JsonResponse({'error': "Noto'g'ri parametrlar"}, status=400)
 
+    if start_date > end_date or (end_date - start_date).days > 366:
+        return JsonResponse({'error': "Noto'g'ri sana oralig'i"}, status=400)
+
     calculator = ReportCalculator(shop)
-    daily_data = calculator.get_daily_report(selected_date)
-    cashflow = daily_data.get('cashflow', {})
+    cashflow_by_day = calculator.get_cashflow_range(start_date, end_date)
+
+    if date_str:
+        return JsonResponse({
+            'success': True,
+            'date': str(start_date),
+            'cashflow': _serialize_cashflow(cashflow_by_day[start_date]),
+        })
 
     return JsonResponse({
         'success': True,
-        'date': str(selected_date),
-        'cashflow': {
-            'usd': {
-                'income': float(cashflow.get('usd', {}).get('income', 0)),
-                'expense': float(cashflow.get('usd', {}).get('expense', 0)),
-                'net': float(cashflow.get('usd', {}).get('net', 0))
-            },
-            'uzs': {
-                'income': float(cashflow.get('uzs', {}).get('income', 0)),
-                'expense': float(cashflow.get('uzs', {}).get('expense', 0)),
-                'net': float(cashflow.get('uzs', {}).get('net', 0))
-            },
-            'details': {
-                'phone_sales': float(cashflow.get('details', {}).get('phone_sales', 0)),
-                'accessory_sales': float(cashflow.get('details', {}).get('accessory_sales', 0)),
-                'exchange_income': float(cashflow.get('details', {}).get('exchange_income', 0)),
-                'exchange_equal': int(cashflow.get('details', {}).get('exchange_equal', 0)),
-                'daily_seller_payments': float(cashflow.get('details', {}).get('daily_seller_payments', 0)),
-                'exchange_expenses': float(cashflow.get('details', {}).get('exchange_expenses', 0)),
-                'phone_returns': float(cashflow.get('details', {}).get('phone_returns', 0)),
-                'daily_expenses': float(cashflow.get('details', {}).get('daily_expenses', 0)),
-                'supplier_payments_cash': float(cashflow.get('details', {}).get('supplier_payments_cash', 0)),
-            }
-        }
+        'start_date': str(start_date),
+        'end_date': str(end_date),
+        'days': [
+            {'date': str(day), 'cashflow': _serialize_cashflow(cashflow)}
+            for day, cashflow in cashflow_by_day.items()
+        ],
     })
 
 
 @login_required
+@query_budget(6)
+@report_api_condition
 def cashflow_details_api(request):
     """Cash Flow tafsilotlari"""
     from .models import CashFlowTransaction
@@ -939,3 +946,171 @@ def cashflow_details_api(request):
         'count': len(results),
         'transactions': results
     })
+
+
+# ============= XLSX EKSPORT (oqimli) =============
+
+@login_required
+@check_report_access
+def daily_report_export(request):
+    """Kunlik hisobot XLSX - jamlanma + shu kungi sotuvlar"""
+    shops = ReportMixin.get_user_shops(request.user)
+    if not shops.exists():
+        return render(request, 'reports/no_shop.html')
+
+    selected_shop = ReportMixin.get_selected_shop(shops, request.GET.get('shop'))
+    selected_date = ReportMixin.parse_date(request.GET.get('date'))
+
+    return build_daily_export(selected_shop, selected_date).response()
+
+
+@login_required
+@check_report_access
+def monthly_report_export(request):
+    """Oylik hisobot XLSX - jamlanma, kunlar va oy sotuvlari"""
+    shops = ReportMixin.get_user_shops(request.user)
+    if not shops.exists():
+        return render(request, 'reports/no_shop.html')
+
+    selected_shop = ReportMixin.get_selected_shop(shops, request.GET.get('shop'))
+    year = int(request.GET.get('year', timezone.now().year))
+    month = int(request.GET.get('month', timezone.now().month))
+
+    return build_monthly_export(selected_shop, year, month).response()
+
+
+@login_required
+@check_report_access
+def seller_salary_export(request, seller_id):
+    """Sotuvchi oylik maoshi XLSX - jamlanma, kunlar va sotuvlar"""
+    seller = get_object_or_404(User, id=seller_id)
+    shops = ReportMixin.get_user_shops(request.user)
+    if not shops.exists():
+        return render(request, 'reports/no_shop.html')
+
+    selected_shop = ReportMixin.get_selected_shop(shops, request.GET.get('shop'))
+    year = int(request.GET.get('year', timezone.now().year))
+    month = int(request.GET.get('month', timezone.now().month))
+
+    return build_seller_salary_export(selected_shop, seller, year, month).response()
+
+
+@login_required
+@check_report_access
+def sales_export(request):
+    """Sana oralig'idagi barcha sotuvlar XLSX (masalan bir yil) - xotira hajmga bog'liq emas"""
+    shops = ReportMixin.get_user_shops(request.user)
+    if not shops.exists():
+        return render(request, 'reports/no_shop.html')
+
+    selected_shop = ReportMixin.get_selected_shop(shops, request.GET.get('shop'))
+    end_date = ReportMixin.parse_date(request.GET.get('end_date'))
+    start_date = ReportMixin.parse_date(request.GET.get('start_date'), default=end_date.replace(day=1))
+
+    is_valid, message = ValidationHelper.validate_date_range(start_date, end_date)
+    if not is_valid:
+        return JsonResponse({'error': message}, status=400)
+
+    return build_sales_export(selected_shop, start_date, end_date).response()
+
+
+# ============= FON VAZIFALARI (ReportJob) =============
+
+def _report_job_params(request, kind, shop):
+    """POST ma'lumotlaridan vazifa turi uchun kerakli parametrlar (JSON ga mos)"""
+    data = request.POST
+    today = timezone.localdate()
+    required, _ = JOB_TYPES[kind]
+    params = {'shop': shop.id}
+
+    if 'year' in required:
+        params['year'] = int(data.get('year') or today.year)
+    if 'month' in required:
+        params['month'] = int(data.get('month') or today.month)
+        if not 1 <= params['month'] <= 12:
+            raise ValueError("Oy 1-12 oralig'ida bo'lishi kerak")
+    if 'date' in required:
+        params['date'] = ReportMixin.parse_date(data.get('date')).isoformat()
+    if 'start_date' in required:
+        end_date = ReportMixin.parse_date(data.get('end_date'))
+        start_date = ReportMixin.parse_date(data.get('start_date'), default=end_date.replace(day=1))
+        is_valid, message = ValidationHelper.validate_date_range(start_date, end_date)
+        if not is_valid:
+            raise ValueError(message)
+        params['start_date'] = start_date.isoformat()
+        params['end_date'] = end_date.isoformat()
+    if 'seller' in required:
+        params['seller'] = get_object_or_404(User, id=data.get('seller') or 0).id
+    return params
+
+
+def _serialize_report_job(job):
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'params': job.params,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'duration': job.duration,
+        'status_url': reverse('reports:report_job_status', args=[job.id]),
+    }
+    if job.status == ReportJob.STATUS_DONE:
+        data['result'] = job.result
+        if job.result_file:
+            data['download_url'] = reverse('reports:report_job_download', args=[job.id])
+    elif job.status == ReportJob.STATUS_FAILED:
+        data['error'] = "Vazifa xatolik bilan tugadi"
+    return data
+
+
+@login_required
+@require_POST
+@query_budget(8)
+@check_report_access
+def report_job_create(request):
+    """
+    Og'ir hisobot / eksportni navbatga qo'yish - darhol 202 qaytadi
+
+    Natijani status_url orqali so'rab turish kerak (run_report_worker bajaradi).
+    """
+    kind = request.POST.get('kind')
+    if kind not in JOB_TYPES:
+        return JsonResponse({'error': "Noma'lum vazifa turi"}, status=400)
+
+    shops = ReportMixin.get_user_shops(request.user)
+    if not shops.exists():
+        return JsonResponse({'error': "Do'kon topilmadi"}, status=404)
+    selected_shop = ReportMixin.get_selected_shop(shops, request.POST.get('shop'))
+
+    try:
+        params = _report_job_params(request, kind, selected_shop)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    job = ReportJob.enqueue(kind, params, request.user)
+    return JsonResponse(_serialize_report_job(job), status=202)
+
+
+@login_required
+@query_budget(4)
+@check_report_access
+def report_job_status(request, job_id):
+    """Vazifa holati (polling) - tayyor bo'lsa natija yoki yuklab olish havolasi"""
+    job = get_object_or_404(ReportJob, id=job_id, created_by=request.user)
+    return JsonResponse(_serialize_report_job(job))
+
+
+@login_required
+@check_report_access
+def report_job_download(request, job_id):
+    """Tayyor vazifa fayli"""
+    job = get_object_or_404(ReportJob, id=job_id, created_by=request.user, status=ReportJob.STATUS_DONE)
+    if not job.result_file:
+        raise Http404("Vazifa natijasi fayl emas")
+    return FileResponse(
+        job.result_file.open('rb'), as_attachment=True,
+        filename=(job.result or {}).get('filename') or os.path.basename(job.result_file.name)
+    )
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:28
+
+from django.db import migrations, models
+
+
+def fill_old_phone_imei_reversed(apps, schema_editor):
+    """Mavjud almashtirishlar uchun eski telefonning teskari IMEI si"""
+    PhoneExchange = apps.get_model('sales', 'PhoneExchange')
+    exchanges = []
+    for exchange in PhoneExchange.objects.exclude(old_phone_imei__isnull=True).exclude(
+            old_phone_imei='').only('id', 'old_phone_imei').iterator(chunk_size=2000):
+        exchange.old_phone_imei_reversed = exchange.old_phone_imei[::-1]
+        exchanges.append(exchange)
+    PhoneExchange.objects.bulk_update(exchanges, ['old_phone_imei_reversed'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0019_alter_phoneexchange_debt_amount_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phoneexchange',
+            name='old_phone_imei_reversed',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='phoneexchange',
+            index=models.Index(fields=['old_phone_imei_reversed'], name='exchange_old_imei_rev_idx'),
+        ),
+        migrations.RunPython(fill_old_phone_imei_reversed, migrations.RunPython.noop),
+    ]
@@ -4,10 +4,119 @@ from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.utils import timezone
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.db.models import Sum, Count, F, ExpressionWrapper, DecimalField
 from decimal import Decimal
 from shops.models import Shop, Customer
-from inventory.models import Phone, Accessory, PhoneModel, MemorySize
+from inventory.models import Phone, Accessory, PhoneModel, MemorySize, reverse_imei
+
+
+# ============ QUERYSETS - FOYDA SQL TOMONIDA ============
+MONEY_FIELD = DecimalField(max_digits=15, decimal_places=2)
+
+
+def _totals_annotations(count_field, amount_fields, profit, filter=None):
+    """count/summa/foyda aggregate ifodalari - aggregate() va values().annotate() uchun"""
+    annotations = {'count': Count(count_field, filter=filter)}
+    for key, field in amount_fields.items():
+        annotations[key] = Sum(field, filter=filter)
+    annotations['profit'] = Sum(profit, filter=filter, output_field=MONEY_FIELD)
+    return annotations
+
+
+def _normalize_totals(totals):
+    """aggregate() natijasidagi None -> 0"""
+    return {
+        key: (value or 0) if key == 'count' else (value if value is not None else Decimal('0'))
+        for key, value in totals.items()
+    }
+
+
+class PhoneSaleQuerySet(models.QuerySet):
+    """Telefon sotuvlari - foyda: sale_price - phone__cost_price"""
+
+    AMOUNT_FIELDS = {
+        'total': 'sale_price', 'cash': 'cash_amount', 'card': 'card_amount',
+        'debt': 'debt_amount', 'credit': 'credit_amount',
+    }
+
+    @staticmethod
+    def profit_expression(prefix=''):
+        """Bitta sotuv foydasi (prefix - bog'langan modeldan, masalan 'phone_sale__')"""
+        return ExpressionWrapper(
+            F(f'{prefix}sale_price') - F(f'{prefix}phone__cost_price'), output_field=MONEY_FIELD
+        )
+
+    def with_profit(self):
+        """Har bir sotuvga calculated_profit (SQL da hisoblanadi)"""
+        return self.annotate(calculated_profit=self.profit_expression())
+
+    def totals_annotations(self, filter=None):
+        return _totals_annotations('id', self.AMOUNT_FIELDS, self.profit_expression(), filter)
+
+    def sales_totals(self):
+        """Soni, summalar va foyda - BITTA aggregate so'rov"""
+        return _normalize_totals(self.aggregate(**self.totals_annotations()))
+
+
+class AccessorySaleQuerySet(models.QuerySet):
+    """Aksessuar sotuvlari - foyda: total_price - accessory__purchase_price * quantity"""
+
+    AMOUNT_FIELDS = {
+        'total': 'total_price', 'cash': 'cash_amount', 'card': 'card_amount',
+        'debt': 'debt_amount', 'credit': 'credit_amount',
+    }
+
+    @staticmethod
+    def profit_expression(prefix=''):
+        return ExpressionWrapper(
+            F(f'{prefix}total_price') - F(f'{prefix}accessory__purchase_price') * F(f'{prefix}quantity'),
+            output_field=MONEY_FIELD
+        )
+
+    def with_profit(self):
+        return self.annotate(calculated_profit=self.profit_expression())
+
+    def totals_annotations(self, filter=None):
+        return _totals_annotations('id', self.AMOUNT_FIELDS, self.profit_expression(), filter)
+
+    def sales_totals(self):
+        return _normalize_totals(self.aggregate(**self.totals_annotations()))
+
+
+class PhoneExchangeQuerySet(models.QuerySet):
+    """Almashtirishlar - foyda: new_phone_price - new_phone__cost_price"""
+
+    AMOUNT_FIELDS = {
+        'total': 'new_phone_price', 'old_phone_value': 'old_phone_accepted_price',
+        'cash': 'cash_amount', 'card': 'card_amount', 'debt': 'debt_amount', 'credit': 'credit_amount',
+    }
+
+    @staticmethod
+    def profit_expression(prefix=''):
+        return ExpressionWrapper(
+            F(f'{prefix}new_phone_price') - F(f'{prefix}new_phone__cost_price'), output_field=MONEY_FIELD
+        )
+
+    def with_profit(self):
+        return self.annotate(calculated_profit=self.profit_expression())
+
+    def totals_annotations(self, filter=None):
+        return _totals_annotations('id', self.AMOUNT_FIELDS, self.profit_expression(), filter)
+
+    def sales_totals(self):
+        return _normalize_totals(self.aggregate(**self.totals_annotations()))
+
+
+class PhoneReturnQuerySet(models.QuerySet):
+    """Qaytarishlar - yo'qotilgan foyda: sotuv foydasi"""
+
+    @staticmethod
+    def lost_profit_expression():
+        return PhoneSaleQuerySet.profit_expression('phone_sale__')
+
+    def with_lost_profit(self):
+        """Har bir qaytarishga lost_profit (SQL da hisoblanadi)"""
+        return self.annotate(lost_profit=self.lost_profit_expression())
 
 
 # ============ BASE MODELS ============
@@ -225,6 +334,8 @@ class AccessorySale(models.Model):
     sale_date = models.DateField(default=timezone.now, verbose_name="Sotish sanasi")
     notes = models.TextField(null=True, blank=True, verbose_name="Izoh")
 
+    objects = AccessorySaleQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Aksessuar sotish"
         verbose_name_plural = "Aksessuar sotuvlari"
@@ -278,6 +389,8 @@ class PhoneSale(models.Model):
     # ✅ Qaytarilgan yoki yo'qligini belgilash
     is_returned = models.BooleanField(default=False, verbose_name="Qaytarilganmi?")
 
+    objects = PhoneSaleQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Telefon sotish"
         verbose_name_plural = "Telefon sotuvlari"
@@ -371,6 +484,8 @@ class PhoneReturn(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name="Yaratgan foydalanuvchi")
     notes = models.TextField(null=True, blank=True, verbose_name="Izoh")
 
+    objects = PhoneReturnQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Telefon qaytarish"
         verbose_name_plural = "Telefon qaytarishlar"
@@ -447,6 +562,8 @@ class PhoneExchange(models.Model):
         verbose_name="Eski telefon IMEI",
         validators=[RegexValidator(r'^\d{15}$', "IMEI 15 ta raqamdan iborat bo'lishi kerak")]
     )
+    # ✅ Teskari IMEI - imei_q(query, 'old_phone_imei') uchun, save() yuritadi
+    old_phone_imei_reversed = models.CharField(max_length=20, blank=True, null=True, editable=False)
     old_phone_condition_percentage = models.IntegerField(
         default=80,
         validators=[MinValueValidator(1), MaxValueValidator(100)],
@@ -502,6 +619,8 @@ class PhoneExchange(models.Model):
                                    related_name="created_phone_exchanges",
                                    verbose_name="Yaratgan foydalanuvchi")
 
+    objects = PhoneExchangeQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Telefon almashtirish"
         verbose_name_plural = "Telefon almashtirishlar"
@@ -509,6 +628,7 @@ class PhoneExchange(models.Model):
         indexes = [
             models.Index(fields=['exchange_date', 'salesman']),
             models.Index(fields=['customer', 'exchange_type']),
+            models.Index(fields=['old_phone_imei_reversed'], name='exchange_old_imei_rev_idx'),
         ]
 
     def __str__(self):
@@ -587,6 +707,11 @@ class PhoneExchange(models.Model):
         # ✅ SIGNAL CHAQIRILMASLIGI UCHUN FLAG
         skip_signal = kwargs.pop('skip_signal', False)
 
+        self.old_phone_imei_reversed = reverse_imei(self.old_phone_imei)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'old_phone_imei' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'old_phone_imei_reversed'}
+
         # Yangi telefonni "sotilgan" qilish
         if self.new_phone_id:
             should_update_status = (
@@ -1,7 +1,4 @@
 import logging
-from django.http import HttpResponse
-import csv
-from datetime import datetime
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import transaction
@@ -13,9 +10,10 @@ from django.db.models import Sum, Count, Q, F, DecimalField
 from django.utils import timezone
 from decimal import Decimal
 from functools import wraps
-from inventory.models import Phone, Accessory
+from inventory.models import Phone, Accessory, imei_q
 from shops.models import Shop, Customer
 from .models import PhoneSale, PhoneReturn, AccessorySale, PhoneExchange, Debt, DebtPayment, Expense
+from reports.exports import XlsxExport, export_filename, queryset_rows
 from .forms import (PhoneSaleForm, PhoneReturnForm, AccessorySaleForm, PhoneExchangeForm,
                     DebtForm, DebtPaymentForm, ExpenseForm, manage_sale_debts)
 
@@ -173,7 +171,7 @@ def phone_sale_list(request):
     if date_to:
         phone_sales = phone_sales.filter(sale_date__lte=date_to)
     if search_imei:
-        phone_sales = phone_sales.filter(phone__imei__icontains=search_imei)
+        phone_sales = phone_sales.filter(imei_q(search_imei, 'phone__imei'))
 
     stats = phone_sales.aggregate(
         total_count=Count('id'),
@@ -573,8 +571,8 @@ def phone_exchange_list(request):
         phone_exchanges = phone_exchanges.filter(
             Q(customer_name__icontains=search_query) |
             Q(customer_phone_number__icontains=search_query) |
-            Q(new_phone__imei__icontains=search_query) |
-            Q(old_phone_imei__icontains=search_query) |
+            imei_q(search_query, 'new_phone__imei') |
+            imei_q(search_query, 'old_phone_imei') |
             Q(notes__icontains=search_query)
         )
 
@@ -667,10 +665,7 @@ def phone_exchange_list(request):
 
 @login_required
 def phone_exchange_export(request):
-    """Telefon almashtirishlarni Excel formatida eksport qilish"""
-    import csv
-    from datetime import datetime
-
+    """Telefon almashtirishlarni Excel (XLSX) formatida eksport qilish"""
     phone_exchanges = PhoneExchange.objects.select_related(
         'new_phone__phone_model', 'new_phone__memory_size',
         'old_phone_model', 'old_phone_memory', 'salesman', 'customer'
@@ -687,8 +682,8 @@ def phone_exchange_export(request):
         phone_exchanges = phone_exchanges.filter(
             Q(customer_name__icontains=search_query) |
             Q(customer_phone_number__icontains=search_query) |
-            Q(new_phone__imei__icontains=search_query) |
-            Q(old_phone_imei__icontains=search_query)
+            imei_q(search_query, 'new_phone__imei') |
+            imei_q(search_query, 'old_phone_imei')
         )
 
     if selected_salesman:
@@ -703,91 +698,58 @@ def phone_exchange_export(request):
     if date_to:
         phone_exchanges = phone_exchanges.filter(exchange_date__lte=date_to)
 
-    # CSV yaratish
-    response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-    filename = f'telefon_almashtirishlar_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    # UTF-8 BOM qo'shish
-    response.write('\ufeff')
-
-    writer = csv.writer(response)
-
-    # Sarlavhalar
-    writer.writerow([
-        '№',
-        'Mijoz',
-        'Telefon',
-        'Eski Model',
-        'Eski Xotira',
-        'Eski IMEI',
-        'Yangi Model',
-        'Yangi Xotira',
-        'Yangi IMEI',
-        'Tur',
-        'Narx Farqi ($)',
-        'Naqd ($)',
-        'Karta ($)',
-        'Nasiya ($)',
-        'Qarz ($)',
-        'Sana',
-        'Sotuvchi',
-        'Izoh'
-    ])
-
-    # Ma'lumotlar
-    for idx, exchange in enumerate(phone_exchanges.order_by('-exchange_date'), 1):
-        exchange_type_display = {
-            'customer_pays': 'Mijoz to\'laydi',
-            'shop_pays': 'Do\'kon to\'laydi',
-            'equal': 'Teng'
-        }.get(exchange.exchange_type, exchange.exchange_type)
-
-        writer.writerow([
-            idx,
-            exchange.customer_name,
-            exchange.customer_phone_number,
-            exchange.old_phone_model.name,
-            exchange.old_phone_memory.size,
-            exchange.old_phone_imei or '-',
-            exchange.new_phone.phone_model.name,
-            exchange.new_phone.memory_size.size,
-            exchange.new_phone.imei,
-            exchange_type_display,
-            f"{exchange.price_difference:.2f}",
-            f"{exchange.cash_amount:.2f}",
-            f"{exchange.card_amount:.2f}",
-            f"{exchange.credit_amount:.2f}",
-            f"{exchange.debt_amount:.2f}",
-            exchange.exchange_date.strftime('%d.%m.%Y'),
-            exchange.salesman.get_full_name() or exchange.salesman.username,
-            exchange.notes or '-'
-        ])
-
-    # Statistika
-    writer.writerow([])
-    writer.writerow(['UMUMIY STATISTIKA'])
-    writer.writerow([])
-
-    total_stats = phone_exchanges.aggregate(
-        total_count=Count('id'),
-        customer_pays_count=Count('id', filter=Q(exchange_type='customer_pays')),
-        total_price_diff=Sum('price_difference'),
-        total_debt=Sum('debt_amount'),
-        total_cash=Sum('cash_amount'),
-        total_card=Sum('card_amount'),
-        total_credit=Sum('credit_amount'),
-    )
-
-    writer.writerow(['Jami almashtirishlar:', total_stats['total_count'] or 0])
-    writer.writerow(['Mijoz to\'ladi:', total_stats['customer_pays_count'] or 0])
-    writer.writerow(['Jami narx farqi:', f"${total_stats['total_price_diff'] or 0:.2f}"])
-    writer.writerow(['Jami qarz:', f"${total_stats['total_debt'] or 0:.2f}"])
-    writer.writerow(['Jami naqd:', f"${total_stats['total_cash'] or 0:.2f}"])
-    writer.writerow(['Jami karta:', f"${total_stats['total_card'] or 0:.2f}"])
-    writer.writerow(['Jami nasiya:', f"${total_stats['total_credit'] or 0:.2f}"])
+    exchange_type_display = dict(PhoneExchange.EXCHANGE_TYPE_CHOICES)
+    exchange_type_display.update({
+        'customer_pays': 'Mijoz to\'laydi',
+        'shop_pays': 'Do\'kon to\'laydi',
+        'equal': 'Teng'
+    })
 
-    return response
+    def stats_rows():
+        total_stats = phone_exchanges.aggregate(
+            total_count=Count('id'),
+            customer_pays_count=Count('id', filter=Q(exchange_type='customer_pays')),
+            total_price_diff=Sum('price_difference'),
+            total_debt=Sum('debt_amount'),
+            total_cash=Sum('cash_amount'),
+            total_card=Sum('card_amount'),
+            total_credit=Sum('credit_amount'),
+        )
+        yield ['Jami almashtirishlar:', total_stats['total_count'] or 0]
+        yield ['Mijoz to\'ladi:', total_stats['customer_pays_count'] or 0]
+        yield ['Jami narx farqi ($):', total_stats['total_price_diff'] or 0]
+        yield ['Jami qarz ($):', total_stats['total_debt'] or 0]
+        yield ['Jami naqd ($):', total_stats['total_cash'] or 0]
+        yield ['Jami karta ($):', total_stats['total_card'] or 0]
+        yield ['Jami nasiya ($):', total_stats['total_credit'] or 0]
+
+    # XLSX - qatorlar iterator() bilan o'qilib oqim sifatida yuboriladi
+    export = XlsxExport(export_filename('telefon_almashtirishlar'))
+    export.add_sheet('Almashtirishlar', [
+        '№', 'Mijoz', 'Telefon', 'Eski Model', 'Eski Xotira', 'Eski IMEI', 'Yangi Model', 'Yangi Xotira',
+        'Yangi IMEI', 'Tur', 'Narx Farqi ($)', 'Naqd ($)', 'Karta ($)', 'Nasiya ($)', 'Qarz ($)', 'Sana',
+        'Sotuvchi', 'Izoh'
+    ], queryset_rows(phone_exchanges.order_by('-exchange_date'), lambda exchange: [
+        exchange.customer_name,
+        exchange.customer_phone_number,
+        exchange.old_phone_model.model_name,
+        exchange.old_phone_memory.size,
+        exchange.old_phone_imei or '-',
+        exchange.new_phone.phone_model.model_name,
+        exchange.new_phone.memory_size.size,
+        exchange.new_phone.imei,
+        exchange_type_display.get(exchange.exchange_type, exchange.exchange_type),
+        exchange.price_difference,
+        exchange.cash_amount,
+        exchange.card_amount,
+        exchange.credit_amount,
+        exchange.debt_amount,
+        exchange.exchange_date,
+        exchange.salesman.get_full_name() or exchange.salesman.username,
+        exchange.notes or '-'
+    ]))
+    export.add_sheet('Statistika', None, stats_rows())
+    return export.response()
 
 @login_required
 def phone_exchange_create(request):
@@ -1213,13 +1175,13 @@ def debt_list(request):
         })
 
 
-# ========== QARZ EKSPORT (CSV/Excel) ==========
+# ========== QARZ EKSPORT (Excel) ==========
 
 
 
 @login_required
 def debt_export_excel(request):
-    """Qarzlarni Excel (CSV) formatida eksport qilish"""
+    """Qarzlarni Excel (XLSX) formatida eksport qilish"""
     user_role = get_user_role(request.user)
     debts = get_debts_for_user(request.user).select_related(
         'creditor', 'debtor', 'customer', 'master'
@@ -1251,91 +1213,62 @@ def debt_export_excel(request):
     if date_to:
         debts = debts.filter(created_at__lte=date_to)
 
-    # CSV yaratish
-    response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-    filename = f'qarzlar_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    # UTF-8 BOM qo'shish (Excel uchun)
-    response.write('\ufeff')
-
-    writer = csv.writer(response)
-
-    # Sarlavhalar
-    writer.writerow([
-        '№',
-        'Qarz turi',
-        'Qarz bergan',
-        'Qarz olgan',
-        'Valyuta',
-        'Qarz summasi',
-        "To'langan",
-        'Qoldiq',
-        'Holat',
-        'Yaratilgan',
-        'Muddat',
-        'Izoh'
-    ])
-
-    # Ma'lumotlar
-    for idx, debt in enumerate(debts.order_by('-created_at'), 1):
-        writer.writerow([
-            idx,
-            debt.get_debt_type_display(),
-            debt.creditor.get_full_name() or debt.creditor.username,
-            debt.debtor_display_name,
-            debt.currency,
-            f"{debt.debt_amount:.2f}",
-            f"{debt.paid_amount:.2f}",
-            f"{debt.remaining_amount:.2f}",
-            debt.get_status_display(),
-            debt.created_at.strftime('%d.%m.%Y'),
-            debt.due_date.strftime('%d.%m.%Y') if debt.due_date else '-',
-            debt.notes or '-'
-        ])
-
-    # Statistika
-    writer.writerow([])
-    writer.writerow(['UMUMIY STATISTIKA'])
-    writer.writerow([])
-
-    total_stats = debts.aggregate(
-        total_count=Count('id'),
-        active_count=Count('id', filter=Q(status='active')),
-        paid_count=Count('id', filter=Q(status='paid')),
-
-        total_debt_usd=Sum('debt_amount', filter=Q(currency='USD')),
-        paid_usd=Sum('paid_amount', filter=Q(currency='USD')),
-        remaining_usd=Sum(
-            F('debt_amount') - F('paid_amount'),
-            filter=Q(currency='USD', status='active'),
-            output_field=DecimalField()
-        ),
-
-        total_debt_uzs=Sum('debt_amount', filter=Q(currency='UZS')),
-        paid_uzs=Sum('paid_amount', filter=Q(currency='UZS')),
-        remaining_uzs=Sum(
-            F('debt_amount') - F('paid_amount'),
-            filter=Q(currency='UZS', status='active'),
-            output_field=DecimalField()
-        ),
-    )
+    def stats_rows():
+        total_stats = debts.aggregate(
+            total_count=Count('id'),
+            active_count=Count('id', filter=Q(status='active')),
+            paid_count=Count('id', filter=Q(status='paid')),
 
-    writer.writerow(['Jami qarzlar:', total_stats['total_count'] or 0])
-    writer.writerow(['Faol qarzlar:', total_stats['active_count'] or 0])
-    writer.writerow(["To'langan qarzlar:", total_stats['paid_count'] or 0])
-    writer.writerow([])
-    writer.writerow(['USD qarzlar:'])
-    writer.writerow(['  - Jami:', f"${total_stats['total_debt_usd'] or 0:.2f}"])
-    writer.writerow(['  - To\'langan:', f"${total_stats['paid_usd'] or 0:.2f}"])
-    writer.writerow(['  - Qoldiq:', f"${total_stats['remaining_usd'] or 0:.2f}"])
-    writer.writerow([])
-    writer.writerow(['UZS qarzlar:'])
-    writer.writerow(['  - Jami:', f"{total_stats['total_debt_uzs'] or 0:.2f}"])
-    writer.writerow(['  - To\'langan:', f"{total_stats['paid_uzs'] or 0:.2f}"])
-    writer.writerow(['  - Qoldiq:', f"{total_stats['remaining_uzs'] or 0:.2f}"])
+            total_debt_usd=Sum('debt_amount', filter=Q(currency='USD')),
+            paid_usd=Sum('paid_amount', filter=Q(currency='USD')),
+            remaining_usd=Sum(
+                F('debt_amount') - F('paid_amount'),
+                filter=Q(currency='USD', status='active'),
+                output_field=DecimalField()
+            ),
 
-    return response
+            total_debt_uzs=Sum('debt_amount', filter=Q(currency='UZS')),
+            paid_uzs=Sum('paid_amount', filter=Q(currency='UZS')),
+            remaining_uzs=Sum(
+                F('debt_amount') - F('paid_amount'),
+                filter=Q(currency='UZS', status='active'),
+                output_field=DecimalField()
+            ),
+        )
+        yield ['Jami qarzlar:', total_stats['total_count'] or 0]
+        yield ['Faol qarzlar:', total_stats['active_count'] or 0]
+        yield ["To'langan qarzlar:", total_stats['paid_count'] or 0]
+        yield []
+        yield ['USD qarzlar:']
+        yield ['  - Jami:', total_stats['total_debt_usd'] or 0]
+        yield ['  - To\'langan:', total_stats['paid_usd'] or 0]
+        yield ['  - Qoldiq:', total_stats['remaining_usd'] or 0]
+        yield []
+        yield ['UZS qarzlar:']
+        yield ['  - Jami:', total_stats['total_debt_uzs'] or 0]
+        yield ['  - To\'langan:', total_stats['paid_uzs'] or 0]
+        yield ['  - Qoldiq:', total_stats['remaining_uzs'] or 0]
+
+    # XLSX - qatorlar iterator() bilan o'qilib oqim sifatida yuboriladi
+    export = XlsxExport(export_filename('qarzlar'))
+    export.add_sheet('Qarzlar', [
+        '№', 'Qarz turi', 'Qarz bergan', 'Qarz olgan', 'Valyuta', 'Qarz summasi', "To'langan", 'Qoldiq',
+        'Holat', 'Yaratilgan', 'Muddat', 'Izoh'
+    ], queryset_rows(debts.order_by('-created_at'), lambda debt: [
+        debt.get_debt_type_display(),
+        debt.creditor.get_full_name() or debt.creditor.username,
+        debt.debtor_display_name,
+        debt.currency,
+        debt.debt_amount,
+        debt.paid_amount,
+        debt.remaining_amount,
+        debt.get_status_display(),
+        debt.created_at.strftime('%d.%m.%Y'),
+        debt.due_date.strftime('%d.%m.%Y') if debt.due_date else '-',
+        debt.notes or '-'
+    ]))
+    export.add_sheet('Statistika', None, stats_rows())
+    return export.response()
 
 
 @login_required
@@ -1733,7 +1666,7 @@ def search_phone_by_imei_api(request):
 
     # ✅ Master va sold dan tashqari BARCHA statuslar
     phones = Phone.objects.filter(
-        imei__icontains=query
+        imei_q(query)
     ).exclude(
         status__in=['master', 'sold']  # Faqat bularni exclude qilish
     ).select_related('phone_model', 'memory_size', 'shop')[:10]
@@ -1769,7 +1702,7 @@ def search_phone_sale_by_imei_api(request):
 
     try:
         phone_sales = PhoneSale.objects.filter(
-            phone__imei__icontains=query,
+            imei_q(query, 'phone__imei'),
             phone__status__in=["sold", "returned"]
         ).select_related('phone__phone_model', 'phone__memory_size', 'customer', 'salesman')[:10]
 
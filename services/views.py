@@ -13,7 +13,7 @@ from decimal import Decimal
 import logging
 from .models import Master, MasterService, MasterPayment
 from .forms import MasterForm, MasterServiceForm, MasterPaymentForm
-from inventory.models import Phone
+from inventory.models import Phone, imei_q
 
 logger = logging.getLogger(__name__)
 
@@ -840,8 +840,8 @@ def search_phone_api(request):
 
     try:
         phones = Phone.objects.filter(
-            status='shop',
-            imei__icontains=query
+            imei_q(query),
+            status='shop'
         ).select_related('phone_model', 'memory_size', 'shop')[:10]
 
         results = []
@@ -873,7 +873,7 @@ def get_available_phones(request):
         )
 
         if imei_query:
-            phones = phones.filter(imei__icontains=imei_query)
+            phones = phones.filter(imei_q(imei_query))
 
         phones = phones[:10]
 
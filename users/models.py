@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from decimal import Decimal
+from bisect import bisect_right
 
 
 class CommissionHistory(models.Model):
@@ -71,6 +72,74 @@ class CommissionHistory(models.Model):
         return f"{self.user.username} - {self.effective_date} dan"
 
 
+class CommissionTimeline:
+    """
+    Foydalanuvchi komissiya tarixi xotirada - istalgan sana uchun foizlar bisect bilan
+
+    Tarix bir marta yuklanadi (for_users - ko'p foydalanuvchi uchun BITTA so'rov),
+    keyin har bir kun uchun so'rov bajarilmaydi.
+    """
+
+    ZERO_RATES = {
+        'phone_rate': Decimal('0'),
+        'accessory_rate': Decimal('0'),
+        'exchange_rate': Decimal('0'),
+        'base_salary_usd': Decimal('0'),
+        'base_salary_uzs': Decimal('0'),
+    }
+
+    def __init__(self, profile, history=()):
+        self.profile = profile
+        self.history = sorted(history, key=lambda entry: (entry.effective_date, entry.pk or 0))
+        self.dates = [entry.effective_date for entry in self.history]
+
+    @classmethod
+    def for_user(cls, user, until=None):
+        return cls.for_users([user], until)[user.id]
+
+    @classmethod
+    def for_users(cls, users, until=None):
+        """{user_id: CommissionTimeline} - barcha tarix BITTA so'rovda"""
+        users = list(users)
+        history = CommissionHistory.objects.filter(user__in=users)
+        if until:
+            history = history.filter(effective_date__lte=until)
+
+        by_user = {}
+        for entry in history:
+            by_user.setdefault(entry.user_id, []).append(entry)
+
+        return {
+            user.id: cls(getattr(user, 'userprofile', None), by_user.get(user.id, []))
+            for user in users
+        }
+
+    def rates_for_date(self, target_date):
+        """Sana uchun foizlar va maoshlar (profil bo'lmasa - nollar)"""
+        if self.profile is None:
+            return dict(self.ZERO_RATES)
+
+        index = bisect_right(self.dates, target_date)
+        if index:
+            history = self.history[index - 1]
+            return {
+                'phone_rate': history.phone_commission_percent,
+                'accessory_rate': history.accessory_commission_percent,
+                'exchange_rate': history.exchange_commission_percent,
+                'base_salary_usd': history.base_salary_usd,
+                'base_salary_uzs': history.base_salary_uzs,
+            }
+
+        # Agar tarix bo'lmasa, hozirgi qiymatlarni qaytarish
+        return {
+            'phone_rate': self.profile.phone_commission_percent,
+            'accessory_rate': self.profile.accessory_commission_percent,
+            'exchange_rate': self.profile.exchange_commission_percent,
+            'base_salary_usd': self.profile.base_salary_usd,
+            'base_salary_uzs': self.profile.base_salary_uzs,
+        }
+
+
 class UserProfile(models.Model):
     ROLE_CHOICES = [
         ('boss', 'Rahbar'),
@@ -132,29 +201,15 @@ class UserProfile(models.Model):
 
         Returns:
             dict: Foizlar va maoshlar
+
+        Ko'p sanalar uchun CommissionTimeline dan foydalaning - bu usul har safar so'rov bajaradi.
         """
         history = CommissionHistory.objects.filter(
             user=self.user,
             effective_date__lte=target_date
-        ).order_by('-effective_date').first()
+        ).order_by('-effective_date')[:1]
 
-        if history:
-            return {
-                'phone_rate': history.phone_commission_percent,
-                'accessory_rate': history.accessory_commission_percent,
-                'exchange_rate': history.exchange_commission_percent,
-                'base_salary_usd': history.base_salary_usd,
-                'base_salary_uzs': history.base_salary_uzs,
-            }
-
-        # Agar tarix bo'lmasa, hozirgi qiymatlarni qaytarish
-        return {
-            'phone_rate': self.phone_commission_percent,
-            'accessory_rate': self.accessory_commission_percent,
-            'exchange_rate': self.exchange_commission_percent,
-            'base_salary_usd': self.base_salary_usd,
-            'base_salary_uzs': self.base_salary_uzs,
-        }
+        return CommissionTimeline(self, history).rates_for_date(target_date)
 
     def calculate_commission(self, phone_profit_usd=0, accessory_profit_uzs=0, exchange_profit_usd=0):
         """
@@ -1,3 +1,64 @@
 from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from .models import CommissionHistory, CommissionTimeline
+
+
+class CommissionTimelineTestCase(TestCase):
+    """CommissionTimeline - get_commission_rates_for_date bilan bir xil, so'rovsiz"""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', password='test123')
+        self.other = User.objects.create_user(username='other', password='test123')
+
+        for user, effective_date, phone_rate in (
+                (self.seller, date(2024, 3, 10), '7.50'),
+                (self.seller, date(2024, 1, 1), '6'),
+                (self.seller, date(2024, 3, 20), '9'),
+                (self.other, date(2024, 2, 15), '4'),
+        ):
+            CommissionHistory.objects.create(
+                user=user,
+                phone_commission_percent=Decimal(phone_rate),
+                accessory_commission_percent=Decimal('12'),
+                exchange_commission_percent=Decimal('3'),
+                base_salary_usd=Decimal(phone_rate) * 10,
+                effective_date=effective_date
+            )
+
+    def test_matches_profile_lookup_for_every_day(self):
+        """Har bir kun uchun UserProfile.get_commission_rates_for_date natijasi"""
+        users = User.objects.select_related('userprofile')
+        timelines = CommissionTimeline.for_users(users)
+
+        day = date(2023, 12, 25)
+        while day <= date(2024, 4, 5):
+            for user in users:
+                self.assertEqual(
+                    timelines[user.id].rates_for_date(day),
+                    user.userprofile.get_commission_rates_for_date(day),
+                    f"{user.username} - {day}"
+                )
+            day += timedelta(days=1)
+
+    def test_bulk_load_single_query_and_no_per_day_io(self):
+        """Ko'p foydalanuvchi tarixi BITTA so'rovda, sanalar uchun so'rov yo'q"""
+        users = list(User.objects.select_related('userprofile'))
+
+        with self.assertNumQueries(1):
+            timelines = CommissionTimeline.for_users(users, until=date(2024, 3, 31))
+        with self.assertNumQueries(0):
+            rates = [timelines[self.seller.id].rates_for_date(date(2024, 3, d)) for d in range(1, 32)]
+
+        self.assertEqual(rates[0]['phone_rate'], Decimal('6'))
+        self.assertEqual(rates[9]['phone_rate'], Decimal('7.50'))
+        self.assertEqual(rates[30]['phone_rate'], Decimal('9'))
+
+    def test_user_without_profile_gets_zero_rates(self):
+        self.other.userprofile.delete()
+        other = User.objects.get(pk=self.other.pk)
+
+        rates = CommissionTimeline.for_user(other).rates_for_date(date(2024, 3, 1))
+        self.assertEqual(rates, CommissionTimeline.ZERO_RATES)
@@ -11,5 +11,6 @@ urlpatterns = [
     path('<int:pk>/delete/', views.user_delete, name='user_delete'),
     path('<int:pk>/detail/', views.user_detail, name='user_detail'),
     path('<int:pk>/statistics/', views.seller_statistics, name='seller_statistics'),  # YANGI
+    path('api/seller-series/', views.seller_series_api, name='seller_series_api'),
     path('logout/', views.logout_view, name='logout'),
 ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 from django.contrib.auth import logout
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -8,15 +9,15 @@ from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from decimal import Decimal
-import json
 from datetime import date
 from calendar import monthrange
 
-from .models import UserProfile
+from .models import UserProfile, CommissionTimeline
 from .forms import UserRegistrationForm, UserProfileForm, UserEditForm
 from reports.models import ReportCalculator
 from shops.models import Shop
 from reports.views import is_boss_or_finance
+from config.middleware import query_budget
 
 
 @login_required
@@ -37,6 +38,87 @@ def is_boss(user):
         return False
 
 
+def _seller_month_data(seller, shop, year, month):
+    """
+    Sotuvchi oylik kartochkalari va kunlik jadvallar - ✅ bitta get_seller_monthly_salary
+
+    Kunlar get_seller_monthly_salary daily_data sidan olinadi (31 ta kunlik hisobot emas).
+    Yillik natijalar va grafiklar sahifadan seller_series_api orqali yuklanadi.
+    """
+    monthly_data = ReportCalculator(shop).get_seller_monthly_salary(seller, year, month)
+    day_reports = {report['date']: report for report in monthly_data['daily_data']}
+
+    _, last_day = monthrange(year, month)
+    commission_timeline = CommissionTimeline.for_user(seller, until=date(year, month, last_day))
+    daily_sales_data = []
+    for day in range(1, last_day + 1):
+        day_date = date(year, month, day)
+        day_report = day_reports.get(day_date)
+        if day_report is None:
+            daily_sales_data.append({
+                'day': day,
+                'phone_count': 0,
+                'accessory_count': 0,
+                'exchange_count': 0,
+                'return_count': 0,
+                'total_count': 0,
+                'phone_profit': 0,
+                'accessory_profit': 0,
+                'total_profit': 0,
+                'phone_sales': 0,
+                'accessory_sales': 0,
+                'daily_salary': 0,
+            })
+            continue
+
+        total_phones = day_report['counts']['phone'] + day_report['counts']['exchange']
+        accessories = day_report['counts']['accessory']
+        phone_profit = day_report['profits']['phone_profit'] + day_report['profits']['exchange_profit']
+        accessory_profit = day_report['profits']['accessory_profit']
+
+        rates = commission_timeline.rates_for_date(day_date)
+        daily_salary = float(phone_profit * rates['phone_rate'] / 100 + rates['base_salary_usd'] / last_day)
+
+        daily_sales_data.append({
+            'day': day,
+            'phone_count': total_phones,
+            'accessory_count': accessories,
+            'exchange_count': day_report['counts']['exchange'],
+            'return_count': day_report['counts']['returns'],
+            'total_count': total_phones + accessories,
+            'phone_profit': phone_profit,
+            'accessory_profit': accessory_profit,
+            'total_profit': phone_profit + accessory_profit,
+            'phone_sales': day_report['sales']['phone_total_usd'],
+            'accessory_sales': day_report['sales']['accessory_total_uzs'],
+            'daily_salary': daily_salary,
+        })
+
+    total_monthly_phone_profit = monthly_data['profits']['phone_profit'] + monthly_data['profits']['exchange_profit']
+    total_monthly_profit = total_monthly_phone_profit + monthly_data['profits']['accessory_profit']
+
+    seller_data = {
+        'monthly': {
+            'phone_count': monthly_data['sales']['phone_count'] + monthly_data['sales']['exchange_count'],
+            'accessory_count': monthly_data['sales']['accessory_count'],
+            'returns_count': monthly_data['sales']['returns_count'],
+            'phone_profit': total_monthly_phone_profit,
+            'accessory_profit': monthly_data['profits']['accessory_profit'],
+            'total_profit': total_monthly_profit,
+            'phone_sales': monthly_data['sales']['phone_total'],
+            'accessory_sales': monthly_data['sales']['accessory_total'],
+            'total_salary_usd': monthly_data['commission']['total_salary_usd'],
+            'total_salary_uzs': monthly_data['commission']['total_salary_uzs'],
+            'base_salary_usd': monthly_data['commission']['base_salary_usd'],
+            'base_salary_uzs': monthly_data['commission']['base_salary_uzs'],
+            'phone_commission': monthly_data['commission']['phone_commission'] + monthly_data['commission'][
+                'exchange_commission'],
+            'accessory_commission': monthly_data['commission']['accessory_commission'],
+        },
+    }
+    return seller_data, daily_sales_data
+
+
 @login_required
 def dashboard(request):
     """Dashboard - foydalanuvchi turiga qarab ko'rsatish"""
@@ -115,184 +197,7 @@ def dashboard(request):
         current_year = int(request.GET.get('year', timezone.now().year))
         current_month = int(request.GET.get('month', timezone.now().month))
 
-        calculator = ReportCalculator(selected_shop)
-
-        # OYLIK MA'LUMOT
-        monthly_data = calculator.get_seller_monthly_salary(request.user, current_year, current_month)
-
-        # YILLIK MA'LUMOT
-        yearly_phone_count = 0
-        yearly_accessory_count = 0
-        yearly_exchange_count = 0
-        yearly_returns_count = 0
-        yearly_salary_usd = Decimal('0')
-        yearly_salary_uzs = Decimal('0')
-
-        monthly_phone_data = []
-        monthly_accessory_data = []
-        monthly_phone_profit_data = []
-        monthly_accessory_profit_data = []
-        monthly_phone_sales_amount = []
-        monthly_accessory_sales_amount = []
-
-        for month in range(1, 13):
-            try:
-                month_salary = calculator.get_seller_monthly_salary(request.user, current_year, month)
-                yearly_phone_count += month_salary['sales']['phone_count']
-                yearly_accessory_count += month_salary['sales']['accessory_count']
-                yearly_exchange_count += month_salary['sales']['exchange_count']
-                yearly_returns_count += month_salary['sales']['returns_count']
-                yearly_salary_usd += month_salary['commission']['total_salary_usd']
-                yearly_salary_uzs += month_salary['commission']['total_salary_uzs']
-
-                net_phones = month_salary['sales']['phone_count'] + month_salary['sales']['exchange_count']
-                monthly_phone_data.append(net_phones)
-                monthly_accessory_data.append(month_salary['sales']['accessory_count'])
-
-                phone_profit = month_salary['profits']['phone_profit'] + month_salary['profits']['exchange_profit']
-                accessory_profit = month_salary['profits']['accessory_profit']
-                monthly_phone_profit_data.append(float(phone_profit))
-                monthly_accessory_profit_data.append(float(accessory_profit))
-
-                phone_sales_total = month_salary['sales']['phone_total']
-                accessory_sales_total = month_salary['sales']['accessory_total']
-                monthly_phone_sales_amount.append(float(phone_sales_total))
-                monthly_accessory_sales_amount.append(float(accessory_sales_total))
-
-            except Exception:
-                monthly_phone_data.append(0)
-                monthly_accessory_data.append(0)
-                monthly_phone_profit_data.append(0.0)
-                monthly_accessory_profit_data.append(0.0)
-                monthly_phone_sales_amount.append(0.0)
-                monthly_accessory_sales_amount.append(0.0)
-
-        # KUNLIK MA'LUMOT
-        _, last_day = monthrange(current_year, current_month)
-        daily_phone_data = []
-        daily_accessory_data = []
-        daily_phone_profit_data = []
-        daily_accessory_profit_data = []
-        daily_phone_sales_amount = []
-        daily_accessory_sales_amount = []
-        daily_salary_data = []
-        daily_sales_data = []
-
-        for day in range(1, last_day + 1):
-            try:
-                day_date = date(current_year, current_month, day)
-                day_report = calculator.get_seller_daily_report(request.user, day_date)
-
-                total_phones = day_report['counts']['phone'] + day_report['counts']['exchange']
-                accessories = day_report['counts']['accessory']
-
-                daily_phone_data.append(total_phones)
-                daily_accessory_data.append(accessories)
-
-                phone_profit = day_report['profits']['phone_profit'] + day_report['profits']['exchange_profit']
-                accessory_profit = day_report['profits']['accessory_profit']
-
-                daily_phone_profit_data.append(float(phone_profit))
-                daily_accessory_profit_data.append(float(accessory_profit))
-
-                phone_sales = day_report['sales']['phone_total_usd']
-                accessory_sales = day_report['sales']['accessory_total_uzs']
-                daily_phone_sales_amount.append(float(phone_sales))
-                daily_accessory_sales_amount.append(float(accessory_sales))
-
-                if hasattr(request.user, 'userprofile'):
-                    rates = request.user.userprofile.get_commission_rates_for_date(day_date)
-                    phone_comm = (phone_profit * rates['phone_rate'] / 100)
-                    accessory_comm = (accessory_profit * rates['accessory_rate'] / 100)
-                    daily_salary = float(phone_comm + (rates['base_salary_usd'] / last_day))
-                    daily_salary_data.append(daily_salary)
-                else:
-                    daily_salary_data.append(0.0)
-
-                total_profit = phone_profit + accessory_profit
-
-                daily_sales_data.append({
-                    'day': day,
-                    'phone_count': total_phones,
-                    'accessory_count': accessories,
-                    'exchange_count': day_report['counts']['exchange'],
-                    'return_count': day_report['counts'].get('returns', 0),
-                    'total_count': total_phones + accessories,
-                    'phone_profit': phone_profit,
-                    'accessory_profit': accessory_profit,
-                    'total_profit': total_profit,
-                    'phone_sales': phone_sales,
-                    'accessory_sales': accessory_sales,
-                    'daily_salary': daily_salary_data[-1] if daily_salary_data else 0,
-                })
-            except Exception:
-                daily_phone_data.append(0)
-                daily_accessory_data.append(0)
-                daily_phone_profit_data.append(0.0)
-                daily_accessory_profit_data.append(0.0)
-                daily_phone_sales_amount.append(0.0)
-                daily_accessory_sales_amount.append(0.0)
-                daily_salary_data.append(0.0)
-                daily_sales_data.append({
-                    'day': day,
-                    'phone_count': 0,
-                    'accessory_count': 0,
-                    'exchange_count': 0,
-                    'return_count': 0,
-                    'total_count': 0,
-                    'phone_profit': 0,
-                    'accessory_profit': 0,
-                    'total_profit': 0,
-                    'phone_sales': 0,
-                    'accessory_sales': 0,
-                    'daily_salary': 0,
-                })
-
-        total_monthly_phone_profit = monthly_data['profits']['phone_profit'] + monthly_data['profits'][
-            'exchange_profit']
-        total_monthly_profit = total_monthly_phone_profit + monthly_data['profits']['accessory_profit']
-
-        seller_data = {
-            'monthly': {
-                'phone_count': monthly_data['sales']['phone_count'] + monthly_data['sales']['exchange_count'],
-                'accessory_count': monthly_data['sales']['accessory_count'],
-                'returns_count': monthly_data['sales']['returns_count'],
-                'phone_profit': total_monthly_phone_profit,
-                'accessory_profit': monthly_data['profits']['accessory_profit'],
-                'total_profit': total_monthly_profit,
-                'phone_sales': monthly_data['sales']['phone_total'],
-                'accessory_sales': monthly_data['sales']['accessory_total'],
-                'total_salary_usd': monthly_data['commission']['total_salary_usd'],
-                'total_salary_uzs': monthly_data['commission']['total_salary_uzs'],
-                'base_salary_usd': monthly_data['commission']['base_salary_usd'],
-                'base_salary_uzs': monthly_data['commission']['base_salary_uzs'],
-                'phone_commission': monthly_data['commission']['phone_commission'] + monthly_data['commission'][
-                    'exchange_commission'],
-                'accessory_commission': monthly_data['commission']['accessory_commission'],
-            },
-            'yearly': {
-                'phone_count': yearly_phone_count + yearly_exchange_count,
-                'accessory_count': yearly_accessory_count,
-                'returns_count': yearly_returns_count,
-                'total_salary_usd': yearly_salary_usd,
-                'total_salary_uzs': yearly_salary_uzs,
-            },
-            'charts': {
-                'daily_phone': json.dumps(daily_phone_data),
-                'daily_accessory': json.dumps(daily_accessory_data),
-                'daily_phone_profit': json.dumps(daily_phone_profit_data),
-                'daily_accessory_profit': json.dumps(daily_accessory_profit_data),
-                'daily_phone_sales': json.dumps(daily_phone_sales_amount),
-                'daily_accessory_sales': json.dumps(daily_accessory_sales_amount),
-                'daily_salary': json.dumps(daily_salary_data),
-                'monthly_phone': json.dumps(monthly_phone_data),
-                'monthly_accessory': json.dumps(monthly_accessory_data),
-                'monthly_phone_profit': json.dumps(monthly_phone_profit_data),
-                'monthly_accessory_profit': json.dumps(monthly_accessory_profit_data),
-                'monthly_phone_sales': json.dumps(monthly_phone_sales_amount),
-                'monthly_accessory_sales': json.dumps(monthly_accessory_sales_amount),
-            }
-        }
+        seller_data, daily_sales_data = _seller_month_data(request.user, selected_shop, current_year, current_month)
 
         month_names = {
             1: 'Yanvar', 2: 'Fevral', 3: 'Mart', 4: 'Aprel',
@@ -366,183 +271,9 @@ def seller_statistics(request, pk):
     current_year = int(request.GET.get('year', timezone.now().year))
     current_month = int(request.GET.get('month', timezone.now().month))
 
-    calculator = ReportCalculator(selected_shop)
-
-    # OYLIK MA'LUMOT
-    monthly_data = calculator.get_seller_monthly_salary(seller_profile.user, current_year, current_month)
-
-    # YILLIK MA'LUMOT
-    yearly_phone_count = 0
-    yearly_accessory_count = 0
-    yearly_exchange_count = 0
-    yearly_returns_count = 0
-    yearly_salary_usd = Decimal('0')
-    yearly_salary_uzs = Decimal('0')
-
-    monthly_phone_data = []
-    monthly_accessory_data = []
-    monthly_phone_profit_data = []
-    monthly_accessory_profit_data = []
-    monthly_phone_sales_amount = []
-    monthly_accessory_sales_amount = []
-
-    for month in range(1, 13):
-        try:
-            month_salary = calculator.get_seller_monthly_salary(seller_profile.user, current_year, month)
-            yearly_phone_count += month_salary['sales']['phone_count']
-            yearly_accessory_count += month_salary['sales']['accessory_count']
-            yearly_exchange_count += month_salary['sales']['exchange_count']
-            yearly_returns_count += month_salary['sales']['returns_count']
-            yearly_salary_usd += month_salary['commission']['total_salary_usd']
-            yearly_salary_uzs += month_salary['commission']['total_salary_uzs']
-
-            net_phones = month_salary['sales']['phone_count'] + month_salary['sales']['exchange_count']
-            monthly_phone_data.append(net_phones)
-            monthly_accessory_data.append(month_salary['sales']['accessory_count'])
-
-            phone_profit = month_salary['profits']['phone_profit'] + month_salary['profits']['exchange_profit']
-            accessory_profit = month_salary['profits']['accessory_profit']
-            monthly_phone_profit_data.append(float(phone_profit))
-            monthly_accessory_profit_data.append(float(accessory_profit))
-
-            phone_sales_total = month_salary['sales']['phone_total']
-            accessory_sales_total = month_salary['sales']['accessory_total']
-            monthly_phone_sales_amount.append(float(phone_sales_total))
-            monthly_accessory_sales_amount.append(float(accessory_sales_total))
-
-        except Exception:
-            monthly_phone_data.append(0)
-            monthly_accessory_data.append(0)
-            monthly_phone_profit_data.append(0.0)
-            monthly_accessory_profit_data.append(0.0)
-            monthly_phone_sales_amount.append(0.0)
-            monthly_accessory_sales_amount.append(0.0)
-
-    # KUNLIK MA'LUMOT
-    _, last_day = monthrange(current_year, current_month)
-    daily_phone_data = []
-    daily_accessory_data = []
-    daily_phone_profit_data = []
-    daily_accessory_profit_data = []
-    daily_phone_sales_amount = []
-    daily_accessory_sales_amount = []
-    daily_salary_data = []
-    daily_sales_data = []
-
-    for day in range(1, last_day + 1):
-        try:
-            day_date = date(current_year, current_month, day)
-            day_report = calculator.get_seller_daily_report(seller_profile.user, day_date)
-
-            total_phones = day_report['counts']['phone'] + day_report['counts']['exchange']
-            accessories = day_report['counts']['accessory']
-
-            daily_phone_data.append(total_phones)
-            daily_accessory_data.append(accessories)
-
-            phone_profit = day_report['profits']['phone_profit'] + day_report['profits']['exchange_profit']
-            accessory_profit = day_report['profits']['accessory_profit']
-
-            daily_phone_profit_data.append(float(phone_profit))
-            daily_accessory_profit_data.append(float(accessory_profit))
-
-            phone_sales = day_report['sales']['phone_total_usd']
-            accessory_sales = day_report['sales']['accessory_total_uzs']
-            daily_phone_sales_amount.append(float(phone_sales))
-            daily_accessory_sales_amount.append(float(accessory_sales))
-
-            if hasattr(seller_profile.user, 'userprofile'):
-                rates = seller_profile.user.userprofile.get_commission_rates_for_date(day_date)
-                phone_comm = (phone_profit * rates['phone_rate'] / 100)
-                accessory_comm = (accessory_profit * rates['accessory_rate'] / 100)
-                daily_salary = float(phone_comm + (rates['base_salary_usd'] / last_day))
-                daily_salary_data.append(daily_salary)
-            else:
-                daily_salary_data.append(0.0)
-
-            total_profit = phone_profit + accessory_profit
-
-            daily_sales_data.append({
-                'day': day,
-                'phone_count': total_phones,
-                'accessory_count': accessories,
-                'exchange_count': day_report['counts']['exchange'],
-                'return_count': day_report['counts'].get('returns', 0),
-                'total_count': total_phones + accessories,
-                'phone_profit': phone_profit,
-                'accessory_profit': accessory_profit,
-                'total_profit': total_profit,
-                'phone_sales': phone_sales,
-                'accessory_sales': accessory_sales,
-                'daily_salary': daily_salary_data[-1] if daily_salary_data else 0,
-            })
-        except Exception:
-            daily_phone_data.append(0)
-            daily_accessory_data.append(0)
-            daily_phone_profit_data.append(0.0)
-            daily_accessory_profit_data.append(0.0)
-            daily_phone_sales_amount.append(0.0)
-            daily_accessory_sales_amount.append(0.0)
-            daily_salary_data.append(0.0)
-            daily_sales_data.append({
-                'day': day,
-                'phone_count': 0,
-                'accessory_count': 0,
-                'exchange_count': 0,
-                'return_count': 0,
-                'total_count': 0,
-                'phone_profit': 0,
-                'accessory_profit': 0,
-                'total_profit': 0,
-                'phone_sales': 0,
-                'accessory_sales': 0,
-                'daily_salary': 0,
-            })
-
-    total_monthly_phone_profit = monthly_data['profits']['phone_profit'] + monthly_data['profits']['exchange_profit']
-    total_monthly_profit = total_monthly_phone_profit + monthly_data['profits']['accessory_profit']
-
-    seller_data = {
-        'monthly': {
-            'phone_count': monthly_data['sales']['phone_count'] + monthly_data['sales']['exchange_count'],
-            'accessory_count': monthly_data['sales']['accessory_count'],
-            'returns_count': monthly_data['sales']['returns_count'],
-            'phone_profit': total_monthly_phone_profit,
-            'accessory_profit': monthly_data['profits']['accessory_profit'],
-            'total_profit': total_monthly_profit,
-            'phone_sales': monthly_data['sales']['phone_total'],
-            'accessory_sales': monthly_data['sales']['accessory_total'],
-            'total_salary_usd': monthly_data['commission']['total_salary_usd'],
-            'total_salary_uzs': monthly_data['commission']['total_salary_uzs'],
-            'base_salary_usd': monthly_data['commission']['base_salary_usd'],
-            'base_salary_uzs': monthly_data['commission']['base_salary_uzs'],
-            'phone_commission': monthly_data['commission']['phone_commission'] + monthly_data['commission'][
-                'exchange_commission'],
-            'accessory_commission': monthly_data['commission']['accessory_commission'],
-        },
-        'yearly': {
-            'phone_count': yearly_phone_count + yearly_exchange_count,
-            'accessory_count': yearly_accessory_count,
-            'returns_count': yearly_returns_count,
-            'total_salary_usd': yearly_salary_usd,
-            'total_salary_uzs': yearly_salary_uzs,
-        },
-        'charts': {
-            'daily_phone': json.dumps(daily_phone_data),
-            'daily_accessory': json.dumps(daily_accessory_data),
-            'daily_phone_profit': json.dumps(daily_phone_profit_data),
-            'daily_accessory_profit': json.dumps(daily_accessory_profit_data),
-            'daily_phone_sales': json.dumps(daily_phone_sales_amount),
-            'daily_accessory_sales': json.dumps(daily_accessory_sales_amount),
-            'daily_salary': json.dumps(daily_salary_data),
-            'monthly_phone': json.dumps(monthly_phone_data),
-            'monthly_accessory': json.dumps(monthly_accessory_data),
-            'monthly_phone_profit': json.dumps(monthly_phone_profit_data),
-            'monthly_accessory_profit': json.dumps(monthly_accessory_profit_data),
-            'monthly_phone_sales': json.dumps(monthly_phone_sales_amount),
-            'monthly_accessory_sales': json.dumps(monthly_accessory_sales_amount),
-        }
-    }
+    seller_data, daily_sales_data = _seller_month_data(
+        seller_profile.user, selected_shop, current_year, current_month
+    )
 
     month_names = {
         1: 'Yanvar', 2: 'Fevral', 3: 'Mart', 4: 'Aprel',
@@ -568,6 +299,63 @@ def seller_statistics(request, pk):
     })
 
 
+def _series_point(point):
+    return {key: float(value) if isinstance(value, Decimal) else value for key, value in point.items()}
+
+
+@login_required
+@query_budget(10)
+def seller_series_api(request):
+    """
+    Sotuvchi(lar) kunlik va oylik qatorlari - grafiklar uchun BITTA so'rov
+
+    ?shop=1&year=2024&month=3[&seller=5] - seller berilmasa rahbar/moliyachi uchun
+    yilda ishlagan barcha sotuvchilar; sotuvchi faqat o'zini ko'radi.
+    """
+    profile = getattr(request.user, 'userprofile', None)
+    if profile is None or profile.role == 'operator':
+        return JsonResponse({'error': "Ruxsat yo'q"}, status=403)
+
+    today = timezone.localdate()
+    try:
+        shop = Shop.objects.get(id=request.GET.get('shop'))
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+        date(year, month, 1)
+        seller_id = int(request.GET['seller']) if request.GET.get('seller') else None
+    except (TypeError, ValueError, Shop.DoesNotExist):
+        return JsonResponse({'error': "Noto'g'ri parametrlar"}, status=400)
+
+    if is_boss_or_finance(request.user):
+        sellers = None
+        if seller_id:
+            sellers = list(User.objects.filter(id=seller_id).select_related('userprofile'))
+            if not sellers:
+                return JsonResponse({'error': "Sotuvchi topilmadi"}, status=404)
+    elif seller_id and seller_id != request.user.id:
+        return JsonResponse({'error': "Ruxsat yo'q"}, status=403)
+    else:
+        sellers = [request.user]
+
+    series = ReportCalculator(shop).get_sellers_series(year, month, sellers)
+
+    return JsonResponse({
+        'shop': shop.id,
+        'year': year,
+        'month': month,
+        'sellers': [
+            {
+                'id': data['seller'].id,
+                'name': data['seller'].get_full_name() or data['seller'].username,
+                'daily': [_series_point(point) for point in data['daily']],
+                'monthly': [_series_point(point) for point in data['monthly']],
+                'yearly': _series_point(data['yearly']),
+            }
+            for data in series.values()
+        ],
+    })
+
+
 @login_required
 def my_profile(request):
     """O'z profilini tahrirlash"""